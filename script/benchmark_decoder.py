@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modbus Decoder Benchmark
+=========================
+Замер скорости декодирования образов регистров по карте из БД.
+
+Использование:
+    python3 benchmark_decoder.py                   # 10 000 кадров input_registers
+    python3 benchmark_decoder.py --frames 100000   # Другой объём
+    python3 benchmark_decoder.py --type holding_registers
+
+Требования:
+    pip install numpy
+
+Дата: 2026-10-17
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import numpy as np
+
+from register_decoder import DecodePlan, DB_PATH, IMAGE_WORDS
+
+
+def main():
+    """Главная функция"""
+    arg_parser = argparse.ArgumentParser(description='Бенчмарк декодера образов регистров')
+    arg_parser.add_argument('--frames', type=int, default=10_000, help='Количество кадров')
+    arg_parser.add_argument('--type', default='input_registers', help='Тип регистров')
+    args = arg_parser.parse_args()
+
+    print("=" * 60)
+    print("Modbus Decoder Benchmark")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    plan = DecodePlan.from_database(DB_PATH, args.type)
+    print(f"\n📄 План: {len(plan)} переменных ({args.type}), "
+          f"{(time.perf_counter() - start) * 1000:.1f} мс")
+
+    frames = np.random.default_rng(0).integers(0, 65536, size=(args.frames, IMAGE_WORDS), dtype=np.uint16)
+
+    print(f"\n⏱️  Пакет из {args.frames} кадров...")
+    start = time.perf_counter()
+    plan.decode_batch(frames)
+    elapsed = time.perf_counter() - start
+    print(f"   Время: {elapsed * 1000:.1f} мс ({args.frames / elapsed:,.0f} кадров/с)")
+
+    count = min(args.frames, 10_000)
+    print(f"\n⏱️  По одному кадру ({count})...")
+    start = time.perf_counter()
+    for frame in frames[:count]:
+        plan.decode_batch(frame)
+    elapsed = time.perf_counter() - start
+    print(f"   Время: {elapsed * 1000:.1f} мс ({count / elapsed:,.0f} кадров/с)")
+
+    print("=" * 60)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modbus Frame Log Benchmark
+===========================
+Синтетическая смена кадров input-регистров по карте из БД (REAL - случайное
+блуждание с обновлением в 10% кадров, BOOL - редкие переключения): запись
+журнала, его размер и воспроизведение через декодер и детектор изменений
+на максимальной скорости.
+
+Использование:
+    python3 benchmark_frame_log.py                  # Смена 8 ч, кадр каждые 100 мс
+    python3 benchmark_frame_log.py --hours 1 --period 0.5
+    python3 benchmark_frame_log.py --keep shift.mbfl
+
+Требования:
+    pip install numpy
+
+Дата: 2026-10-17
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import numpy as np
+
+from change_detector import ChangeDetector
+from frame_log import FrameLogReader, FrameLogWriter
+from register_decoder import DB_PATH, IMAGE_WORDS, DecodePlan, load_register_tags
+
+
+def synthesize(plan: DecodePlan, count: int, rng) -> 'np.ndarray':
+    """Кадры (count, IMAGE_WORDS): REAL обновляются в 10% кадров, BOOL переключаются в 0.1% кадров"""
+    frames = np.zeros((count, IMAGE_WORDS), dtype='<u2')
+    for name, data_type, (address, bit) in zip(plan.names, plan.data_types, plan.addresses):
+        if data_type == 'REAL':
+            steps = rng.normal(0, 0.05, count) * (rng.random(count) < 0.1)
+            walk = (50 + np.cumsum(steps)).astype('<f4').view('<u2').reshape(-1, 2)
+            frames[:, address] = walk[:, 1]      # Регистр N - старшее слово (FC_ModbusWriteReal)
+            frames[:, address + 1] = walk[:, 0]
+        elif data_type == 'BOOL':
+            state = (np.cumsum(rng.random(count) < 0.001) % 2).astype('<u2')
+            frames[:, address] |= state << bit
+    return frames
+
+
+def main():
+    """Главная функция"""
+    arg_parser = argparse.ArgumentParser(description='Бенчмарк журнала кадров')
+    arg_parser.add_argument('--hours', type=float, default=8, help='Длительность смены, ч')
+    arg_parser.add_argument('--period', type=float, default=0.1, help='Период кадров, с')
+    arg_parser.add_argument('--keep', type=Path, help='Сохранить журнал в файл')
+    args = arg_parser.parse_args()
+
+    print("=" * 60)
+    print("Modbus Frame Log Benchmark")
+    print("=" * 60)
+
+    plan = DecodePlan(load_register_tags(DB_PATH, 'input_registers'))
+    count = int(args.hours * 3600 / args.period)
+    rng = np.random.default_rng(0)
+    start_time = 1_790_000_000.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.keep or Path(tmp) / 'shift.mbfl'
+
+        print(f"\n⏱️  Запись {count} кадров ({args.hours:g} ч по {args.period:g} с, {len(plan)} переменных)...")
+        elapsed = 0.0
+        with FrameLogWriter(path) as log:
+            for first in range(0, count, 36_000):
+                frames = synthesize(plan, min(36_000, count - first), rng)
+                start = time.perf_counter()
+                for i, frame in enumerate(frames):
+                    log.write(start_time + (first + i) * args.period, 'input_registers', frame)
+                elapsed += time.perf_counter() - start
+        size = path.stat().st_size
+        print(f"   Время: {elapsed:.1f} с ({count / elapsed:,.0f} кадров/с)")
+        print(f"   Размер: {size / 2 ** 20:.1f} МБ ({size / count:.0f} байт/кадр, "
+              f"сжатие {count * IMAGE_WORDS * 2 / size:.0f}x)")
+
+        print("\n⏱️  Воспроизведение: журнал -> decode_batch -> детектор изменений...")
+        detector = ChangeDetector.from_plan(plan)
+        start = time.perf_counter()
+        reader = FrameLogReader(path)
+        frames_read = changes = 0
+        for _, frames in reader.batches('input_registers', 4096):
+            for row in plan.decode_batch(frames):
+                changes += len(detector.update(row))
+            frames_read += len(frames)
+        elapsed = time.perf_counter() - start
+        print(f"   Время: {elapsed:.1f} с ({frames_read / elapsed:,.0f} кадров/с, "
+              f"{frames_read * args.period / elapsed:,.0f}x реального времени)")
+        print(f"   Изменений: {changes} ({changes / max(frames_read * len(plan), 1):.1%} значений)")
+
+    print("=" * 60)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modbus Migration Benchmark
+===========================
+Замер производительности пакетной вставки DatabaseMigrator.migrate_registers
+на синтетической карте регистров.
+
+Использование:
+    python3 benchmark_migration.py                     # 100 000 регистров
+    python3 benchmark_migration.py --registers 500000  # Другой объём
+
+Дата: 2026-10-17
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from migrate_from_fc import DatabaseMigrator, ModbusRegister, SCHEMA_PATH
+
+REGISTERS_PER_SECTION = 500
+DATA_TYPES = [('BOOL', 0), ('REAL', 2), ('INT', 1), ('UINT', 1), ('TIME', 2), ('DINT', 2)]
+
+
+def generate_synthetic_map(count: int):
+    """Сгенерировать синтетическую карту: (секции, регистры) без пересечений адресов"""
+    sections = {}
+    registers = []
+    next_word = {'holding_registers': 0, 'input_registers': 0}
+
+    for i in range(count):
+        register_type = 'holding_registers' if i % 2 == 0 else 'input_registers'
+        n = i // 2
+        section_name = f"Синтетическая секция {n // REGISTERS_PER_SECTION}"
+        data_type, register_count = DATA_TYPES[n % len(DATA_TYPES)]
+
+        word = next_word[register_type]
+        if data_type == 'BOOL':
+            # 16 BOOL подряд занимают одно слово
+            bit_index = n % 16
+            next_word[register_type] += 1 if bit_index == 15 else 0
+        else:
+            bit_index = None
+            if n % 16:
+                word += 1
+            next_word[register_type] = word + register_count
+
+        key = (register_type, section_name)
+        start, _ = sections.get(key, (word, word))
+        sections[key] = (start, max(word + max(register_count, 1) - 1, start))
+        registers.append(ModbusRegister(register_type, word, bit_index, data_type,
+                                        f"stSynthetic[{n % 8 + 1}].Motor[{n % 3 + 1}].VFD.qrOutFrequency",
+                                        section_name))
+    return sections, registers
+
+
+def main():
+    """Главная функция"""
+    arg_parser = argparse.ArgumentParser(description='Бенчмарк пакетной миграции регистров')
+    arg_parser.add_argument('--registers', type=int, default=100_000, help='Количество регистров')
+    args = arg_parser.parse_args()
+
+    print("=" * 60)
+    print("Modbus Migration Benchmark")
+    print("=" * 60)
+
+    print(f"\n📄 Генерация карты: {args.registers} регистров")
+    sections, registers = generate_synthetic_map(args.registers)
+    print(f"   Секций: {len(sections)}")
+
+    with tempfile.TemporaryDirectory(prefix='modbus_bench_') as tmp:
+        db_path = Path(tmp) / 'modbus_registers.db'
+        migrator = DatabaseMigrator(db_path, SCHEMA_PATH)
+        migrator.initialize_database()
+        migrator.migrate_sections(sections)
+
+        print(f"\n⏱️  Вставка регистров...")
+        start = time.perf_counter()
+        report = migrator.migrate_registers(registers)
+        elapsed = time.perf_counter() - start
+        migrator.close()
+
+    print(f"\n   Время: {elapsed:.3f} с")
+    print(f"   Скорость: {report.inserted / elapsed:,.0f} регистров/с")
+    print("=" * 60)
+    return 0 if report.inserted == args.registers else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modbus Server Benchmark
+========================
+Замер пропускной способности и задержек Modbus TCP: N одновременных
+клиентов, каждый отправляет запросы чтения блоками по --count регистров.
+
+Использование:
+    python3 benchmark_modbus_server.py                        # Встроенный сервер, 100 клиентов
+    python3 benchmark_modbus_server.py --clients 2000 --requests 20
+    python3 benchmark_modbus_server.py --pipeline 8           # 8 запросов в полёте на клиента
+    python3 benchmark_modbus_server.py --connect 10.0.0.5:502 # Внешний сервер или ПЛК
+
+Требования:
+    pip install numpy
+
+Дата: 2026-10-17
+"""
+
+import argparse
+import asyncio
+import resource
+import struct
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import numpy as np
+
+from modbus_server import FC_READ_HOLDING_REGISTERS, FC_READ_INPUT_REGISTERS, ModbusServer
+from register_decoder import DB_PATH
+
+
+async def run_client(host: str, port: int, requests: int, pipeline: int, function_code: int,
+                     address: int, count: int, latencies: list):
+    """Один клиент: requests запросов, не более pipeline одновременно в полёте"""
+    reader, writer = await asyncio.open_connection(host, port)
+    request_pdu = struct.pack('>BHH', function_code, address, count)
+    response_size = 7 + 2 + count * 2  # MBAP + код функции, байт данных + слова
+    sent_at = {}
+
+    try:
+        sent = received = 0
+        while received < requests:
+            while sent < requests and sent - received < pipeline:
+                sent_at[sent] = time.perf_counter()
+                writer.write(struct.pack('>HHHB', sent & 0xFFFF, 0, len(request_pdu) + 1, 1) + request_pdu)
+                sent += 1
+            response = await reader.readexactly(8)
+            transaction_id, _, length, _, response_code = struct.unpack('>HHHBB', response)
+            await reader.readexactly(length - 2)
+            if response_code & 0x80 or length + 6 != response_size:
+                raise RuntimeError(f"Исключение Modbus на запрос {transaction_id}")
+            latencies.append(time.perf_counter() - sent_at.pop(transaction_id))
+            received += 1
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def run_benchmark(args) -> int:
+    server = None
+    if args.connect:
+        host, port = args.connect.rsplit(':', 1)
+        port = int(port)
+    else:
+        server = ModbusServer.from_database(DB_PATH, validate=False)
+        await server.start('127.0.0.1', 0)
+        host, port = '127.0.0.1', server.port
+        print(f"\n🏭 Встроенный сервер на {host}:{port}")
+
+    function_code = FC_READ_HOLDING_REGISTERS if args.holding else FC_READ_INPUT_REGISTERS
+    print(f"⏱️  {args.clients} клиентов x {args.requests} запросов FC{function_code} "
+          f"по {args.count} регистров, в полёте: {args.pipeline}")
+
+    latencies = []
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        run_client(host, port, args.requests, args.pipeline, function_code, args.address, args.count, latencies)
+        for _ in range(args.clients)
+    ), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+
+    if server is not None:
+        await server.close()
+
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors:
+        print(f"⚠️  Ошибок клиентов: {len(errors)} (первая: {errors[0]!r})")
+    if not latencies:
+        print("❌ Нет ответов")
+        return 1
+
+    latency_ms = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(latency_ms, [50, 95, 99])
+    print(f"\n   Ответов: {len(latencies)} за {elapsed:.2f} с ({len(latencies) / elapsed:,.0f} запросов/с, "
+          f"{len(latencies) * args.count / elapsed:,.0f} регистров/с)")
+    print(f"   Задержка, мс: p50 {p50:.2f}  p95 {p95:.2f}  p99 {p99:.2f}  max {latency_ms.max():.2f}")
+    return 1 if errors else 0
+
+
+def main():
+    """Главная функция"""
+    arg_parser = argparse.ArgumentParser(description='Бенчмарк сервера Modbus TCP')
+    arg_parser.add_argument('--clients', type=int, default=100, help='Одновременных соединений')
+    arg_parser.add_argument('--requests', type=int, default=100, help='Запросов на клиента')
+    arg_parser.add_argument('--pipeline', type=int, default=1, help='Запросов в полёте на клиента')
+    arg_parser.add_argument('--address', type=int, default=0, help='Начальный адрес чтения')
+    arg_parser.add_argument('--count', type=int, default=125, help='Регистров в запросе')
+    arg_parser.add_argument('--holding', action='store_true', help='Читать holding (FC 3) вместо input (FC 4)')
+    arg_parser.add_argument('--connect', metavar='HOST:PORT', help='Внешний сервер вместо встроенного')
+    args = arg_parser.parse_args()
+
+    # Клиент и встроенный сервер держат по дескриптору на соединение
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < 2 * args.clients + 64:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, 2 * args.clients + 64), hard))
+
+    print("=" * 60)
+    print("Modbus Server Benchmark")
+    print("=" * 60)
+
+    code = asyncio.run(run_benchmark(args))
+    print("=" * 60)
+    return code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
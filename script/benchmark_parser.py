@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modbus Parser Benchmark
+========================
+Замер производительности потокового парсера FC_ModbusParser
+на синтетическом файле с большим количеством вызовов FC_Modbus*.
+
+Использование:
+    python3 benchmark_parser.py                  # 100 000 вызовов
+    python3 benchmark_parser.py --calls 500000   # Другой объём
+    python3 benchmark_parser.py --keep           # Не удалять сгенерированный файл
+
+Синтетический файл содержит все функции из Functions/Modbus,
+каждый пятый вызов разбит на несколько строк.
+
+Дата: 2026-10-17
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from migrate_from_fc import FC_ModbusParser, MODBUS_FUNCTIONS
+
+CALLS_PER_SECTION = 50
+
+
+def generate_synthetic_file(path: Path, calls: int):
+    """Сгенерировать синтетический FB_ModbusToSCADA.st с заданным числом вызовов"""
+    functions = sorted(MODBUS_FUNCTIONS.items())
+    half = calls // 2
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("FUNCTION_BLOCK FB_ModbusToSCADA\n\n")
+        for block, array, offset in (('HOLDING', 'awModbusHoldingRegisters', 0),
+                                     ('INPUT', 'awModbusInputRegisters', half)):
+            f.write(f"// === {block} РЕГИСТРЫ ===\n\n")
+            count = half if offset == 0 else calls - half
+            for i in range(count):
+                if i % CALLS_PER_SECTION == 0:
+                    start = i * 2
+                    f.write(f"\n// Синтетическая секция {i // CALLS_PER_SECTION} ({start}-{start + CALLS_PER_SECTION * 2 - 1})\n")
+                func, (data_type, value_param) = functions[i % len(functions)]
+                op = '=>' if 'Read' in func else ':='
+                args = [f"pRegisters := ADR({array})", f"iRegisterIndex := {i * 2}"]
+                if data_type == 'BOOL':
+                    args.append(f"iBitIndex := {i % 16}")
+                args.append(f"{value_param} {op} stSynthetic[{i % 8 + 1}].Motor[{i % 3 + 1}].VFD.qrOutFrequency")
+                if i % 5 == 0:
+                    f.write(f"{func}(\n    " + ",\n    ".join(args) + "\n);\n")
+                else:
+                    f.write(f"{func}(" + ", ".join(args) + ");\n")
+        f.write("\nEND_FUNCTION_BLOCK\n")
+
+
+def main():
+    """Главная функция"""
+    arg_parser = argparse.ArgumentParser(description='Бенчмарк парсера FB_ModbusToSCADA.st')
+    arg_parser.add_argument('--calls', type=int, default=100_000, help='Количество вызовов FC_Modbus*')
+    arg_parser.add_argument('--keep', action='store_true', help='Не удалять сгенерированный файл')
+    args = arg_parser.parse_args()
+
+    print("=" * 60)
+    print("Modbus Parser Benchmark")
+    print("=" * 60)
+
+    tmp_dir = Path(tempfile.mkdtemp(prefix='modbus_bench_'))
+    st_path = tmp_dir / 'FB_ModbusToSCADA.st'
+
+    print(f"\n📄 Генерация файла: {args.calls} вызовов")
+    generate_synthetic_file(st_path, args.calls)
+    size_mb = st_path.stat().st_size / (1024 * 1024)
+    print(f"   Размер: {size_mb:.1f} МБ")
+
+    print(f"\n⏱️  Парсинг...")
+    parser = FC_ModbusParser(st_path)
+    start = time.perf_counter()
+    count = sum(1 for _ in parser.iter_registers())
+    elapsed = time.perf_counter() - start
+
+    print(f"   Найдено регистров: {count}/{args.calls}")
+    print(f"   Найдено секций: {len(parser.sections)}")
+    print(f"   Время: {elapsed:.3f} с")
+    print(f"   Скорость: {count / elapsed:,.0f} вызовов/с ({size_mb / elapsed:.1f} МБ/с)")
+
+    if count != args.calls:
+        print(f"\n❌ Потеряно вызовов: {args.calls - count}")
+
+    if args.keep:
+        print(f"\n   Файл сохранён: {st_path}")
+    else:
+        st_path.unlink()
+        tmp_dir.rmdir()
+
+    print("=" * 60)
+    return 0 if count == args.calls else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
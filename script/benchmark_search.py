@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modbus Register Search Benchmark
+=================================
+Замер поиска регистров ModbusCLI.find_registers: индекс FTS5 (register_texts_fts)
+против LIKE '%...%' на БД из многих ПЛК - копий текущего FB_ModbusToSCADA.
+
+Использование:
+    python3 benchmark_search.py               # 400 ПЛК (~256 000 регистров)
+    python3 benchmark_search.py --plcs 1000   # Другой объём
+
+Дата: 2026-10-17
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from migrate_from_fc import FC_MODBUS_PATH, SCHEMA_PATH, DatabaseMigrator, FC_ModbusParser
+from modbus_cli import ModbusCLI
+
+# (запрос, ПЛК): от точного пути переменной до частого слова описания
+QUERIES = [
+    ('MotorVibFeeder[2].fbStateQF', 7),
+    ('"Текущая частота" ЧРП', 7),
+    ('^stDumper', 7),
+    ('MotorVibFeeder[2].fbStateQF', None),
+    ('частот', None),
+]
+
+
+def build_database(db_path: Path, plcs: int) -> int:
+    """БД с plcs копиями карты регистров (секции и регистры копируются SQL-запросами)"""
+    migrator = DatabaseMigrator(db_path, SCHEMA_PATH)
+    migrator.initialize_database()
+    migrator.sync(FC_ModbusParser(FC_MODBUS_PATH))
+    conn = migrator.conn
+    with conn:
+        conn.executemany("INSERT INTO plcs (id, name) VALUES (?, ?)", [(n, f"plc{n}") for n in range(2, plcs + 1)])
+        conn.execute("""
+            INSERT INTO sections (plc_id, register_type_id, name, start_register, end_register)
+            SELECT p.id, s.register_type_id, s.name, s.start_register, s.end_register
+            FROM plcs p, sections s WHERE p.id > 1 AND s.plc_id = 1
+        """)
+        conn.execute("""
+            INSERT INTO registers (plc_id, register_type_id, section_id, register_address, bit_index,
+                                   data_type_id, variable_name, description)
+            SELECT c.plc_id, r.register_type_id, c.id, r.register_address, r.bit_index,
+                   r.data_type_id, r.variable_name, r.description
+            FROM registers r
+            JOIN sections s ON r.section_id = s.id
+            JOIN sections c ON c.register_type_id = s.register_type_id AND c.name = s.name AND c.plc_id > 1
+        """)
+    count = conn.execute("SELECT COUNT(*) FROM registers").fetchone()[0]
+    migrator.close()
+    return count
+
+
+def measure(cli: ModbusCLI, term: str, repeat: int = 50):
+    """Медиана времени запроса (мс) и число найденных"""
+    rows = cli.find_registers(term, limit=100)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cli.find_registers(term, limit=100)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), len(rows)
+
+
+def main():
+    """Главная функция"""
+    arg_parser = argparse.ArgumentParser(description='Бенчмарк поиска регистров')
+    arg_parser.add_argument('--plcs', type=int, default=400, help='Количество ПЛК (копий карты)')
+    args = arg_parser.parse_args()
+
+    print("=" * 60)
+    print("Modbus Register Search Benchmark")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory(prefix='modbus_bench_') as tmp:
+        db_path = Path(tmp) / 'modbus_registers.db'
+        print(f"\n📄 Построение БД: {args.plcs} ПЛК...")
+        start = time.perf_counter()
+        count = build_database(db_path, args.plcs)
+        print(f"   Регистров: {count}, {time.perf_counter() - start:.1f} с (с индексом FTS5)")
+
+        cli = ModbusCLI(db_path)
+        print(f"\n{'Запрос':<32} {'ПЛК':>4} {'FTS5, мс':>10} {'LIKE, мс':>10} {'Найдено':>8}")
+        print("-" * 68)
+        for term, plc_id in QUERIES:
+            cli.plc_id = plc_id
+            cli.has_fts = True
+            fts_ms, found = measure(cli, term)
+            cli.has_fts = False
+            like_ms, _ = measure(cli, term.replace('"', '').lstrip('^'), repeat=5)
+            print(f"{term:<32} {plc_id or 'все':>4} {fts_ms:>10.3f} {like_ms:>10.2f} {found:>8}")
+        cli.close_db()
+
+    print("=" * 60)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ST Runtime Benchmark
+=====================
+Скорость исполнения функциональных блоков Library/ в st_runtime: для каждого
+блока - сценарий с включёнными функциями (фильтр дребезга, обратная связь,
+гистерезис, ПИД), заранее сгенерированные входы и виртуальные часы с шагом
+цикла ПЛК; результат - циклов в секунду на блок.
+
+Использование:
+    python3 benchmark_st_runtime.py                 # 200 000 циклов на блок
+    python3 benchmark_st_runtime.py --scans 50000 --cycle 10
+    python3 benchmark_st_runtime.py --blocks FB_RangeDiagnostic FB_UniversalSignal
+
+Дата: 2026-10-17
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from st_runtime import Project
+
+
+def _square(period: int):
+    return lambda i: (i // period) % 2 == 1
+
+
+def _sine(amplitude: float, period: int, offset: float):
+    return lambda i: offset + amplitude * math.sin(2 * math.pi * i / period)
+
+
+# Блок -> (постоянные входы, {вход: функция номера цикла})
+SCENARIOS = {
+    'FB_AnalogInput': ({}, {'iADC_Code': lambda i: int(16000 + 17000 * math.sin(i / 500))}),
+    'FB_AnalogOutput': ({}, {'rEngValue': _sine(60, 2000, 50)}),
+    'FB_FrequencyControl': ({'irStep': 0.5}, {'xPulse': _square(5), 'rTargetFrequency': _sine(40, 5000, 50)}),
+    'FB_NumericChangeDetector': ({}, {'irValue': _sine(5, 300, 50)}),
+    'FB_PreStartAlarm': ({'itFirstSignal': 500, 'itPauseAfterFirst': 200, 'itSecondSignal': 500,
+                          'itPauseAfterSecond': 200}, {'ixStart': _square(300), 'ixStop': lambda i: i % 1000 == 999}),
+    'FB_ProportionPID': ({'xEnable': True, 'rDeltaTime': 0.1, 'rProportionTarget_1': 0.5,
+                          'rProportionTarget_2': 0.3, 'rProportionTarget_3': 0.2, 'rFrequencyBase_1': 30.0,
+                          'rFrequencyBase_2': 30.0, 'rFrequencyBase_3': 30.0},
+                         {'rProportionActual_1': _sine(0.1, 700, 0.5), 'rProportionActual_2': _sine(0.05, 900, 0.3),
+                          'rProportionActual_3': _sine(0.05, 1100, 0.2)}),
+    'FB_RangeDiagnostic': ({}, {'irValue': _sine(50, 1000, 50)}),
+    'FB_ScadaCommunication': ({}, {'ixHeartbeatSignal': lambda i: (i // 100) % 2 == 1 if i < 5000 else False}),
+    'FB_UniversalAnalogSignal': ({'xMode4_20mA': True}, {'irRawValue': _sine(10, 1500, 12)}),
+    'FB_UniversalMechanism': ({'xEnableFeedback': True}, {'xStartCommand': lambda i: i % 400 == 0,
+                                                          'xStopCommand': lambda i: i % 400 == 200,
+                                                          'ixFeedback': _square(200)}),
+    'FB_UniversalSignal': ({'xEnableFeedback': True, 'xEnableFeedbackTimer': True, 'xEnableRattlingFilter': True},
+                           {'ixSignal': lambda i: (i // 50) % 2 == 1 or random.random() < 0.02,
+                            'ixFeedback': _square(60)}),
+}
+
+
+def run_block(project: Project, name: str, scans: int, cycle: int):
+    """Циклов в секунду для одного блока: (скорость, время компиляции)"""
+    start = time.perf_counter()
+    runtime = project.runtime([name])
+    compile_time = time.perf_counter() - start
+    fb = runtime.bind(runtime.new(name))
+    constants, stimuli = SCENARIOS.get(name, ({}, {}))
+    for key, value in constants.items():
+        setattr(fb, key, value)
+    random.seed(0)
+    inputs = [(key, [function(i) for i in range(scans)]) for key, function in stimuli.items()]
+    columns = [values for _, values in inputs]
+    keys = [key for key, _ in inputs]
+
+    start = time.perf_counter()
+    for i in range(scans):
+        for key, values in zip(keys, columns):
+            setattr(fb, key, values[i])
+        fb()
+        runtime.now += cycle
+    elapsed = time.perf_counter() - start
+    return scans / elapsed, compile_time
+
+
+def main():
+    """Главная функция"""
+    arg_parser = argparse.ArgumentParser(description='Бенчмарк исполнения ST блоков')
+    arg_parser.add_argument('--scans', type=int, default=200_000, help='Циклов на блок')
+    arg_parser.add_argument('--cycle', type=int, default=10, help='Период цикла ПЛК, мс')
+    arg_parser.add_argument('--blocks', nargs='+', default=sorted(SCENARIOS), help='Имена блоков')
+    args = arg_parser.parse_args()
+
+    print("=" * 60)
+    print("ST Runtime Benchmark")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    project = Project.load()
+    print(f"\n📄 Разбор проекта: {(time.perf_counter() - start) * 1000:.0f} мс")
+    print(f"⏱️  {args.scans} циклов на блок, цикл {args.cycle} мс\n")
+
+    print(f"{'Блок':<28}{'циклов/с':>14}{'мкс/цикл':>11}{'компиляция':>13}")
+    for name in args.blocks:
+        rate, compile_time = run_block(project, name, args.scans, args.cycle)
+        print(f"{name:<28}{rate:>14,.0f}{1e6 / rate:>11.2f}{compile_time * 1000:>10.1f} мс")
+
+    print("=" * 60)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bunker Simulation
+==================
+Порт модели бункеров FB_Simulation.st (расход пропорционально частоте
+вибропитателей, заполнение по светофору, шум LCG и линейный дрейф материала)
+вместе с контуром управления MAIN (FB_ProportionPID каждые 0.5 с, светофоры
+FC_Bunker_GetLightColor, остановка при опустошении) для тысяч независимых
+сценариев: проверка стратегии шихтования за ночь вместо линии.
+
+Использование:
+    python3 bunker_sim.py                                   # 1000 сценариев по 1 ч
+    python3 bunker_sim.py --scenarios 20000 --duration 28800 --workers 8
+    python3 bunker_sim.py --targets 60 25 15 --drift 0:3 --fill-period 4:16
+    python3 bunker_sim.py --plc-fill                        # Заполнение как в FB_Simulation
+
+Возможности:
+    - Сценарии различаются начальными значениями LCG, скоростью и начальным
+      смещением дрейфа материала, периодом заполнения; сценарий 0 - значения
+      FB_Simulation без изменений
+    - Состояние - массивы (сценарии × 3 бункера) в REAL (float32), цикл ПЛК
+      50 мс, как в FB_Simulation; LCG - в целых 64 бит, как DINT на x64
+    - Таймеры заполнения - векторный TON: ожидание периода, затем заполнение
+      заданной длительности; --plc-fill повторяет поведение блока, где общий
+      таймер не сбрасывается и после первого периода заполнение идёт каждый
+      цикл
+    - Сценарии делятся между процессами (--workers, по умолчанию - число ядер)
+    - Итог: доля опустошений и время до них, ошибка пропорций (среднее,
+      процентили), время в критическом режиме и у предела частоты
+
+Требования:
+    pip install numpy
+
+Дата: 2026-10-17
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from pid_sweep import MAIN_PARAMETERS, REAL, ProportionPID
+
+# FB_Simulation.st
+CYCLE = 0.05                                     # Цикл ПЛК в модели, с
+SEEDS = (12345, 67890, 24680)                    # _nRandomSeed
+DRIFT_SPEED = (0.0003, -0.00025, 0.00035)        # _rDriftSpeed, за цикл
+DRIFT_LIMIT = 0.08
+NOISE = 0.03
+DISCHARGE_COEFF = 0.01                           # _rDischargeCoeff: кг/с на 1 Гц
+FILL_RATE_GREEN = 0.8                            # _rFillRateGreen, кг/с
+FILL_RATE_YELLOW = 0.3                           # _rFillRateYellow, кг/с
+FILL_PERIOD = 8.0                                # _tFillPeriod, с
+FILL_DURATION = 3.0                              # _tFillDuration, с
+LCG_A, LCG_C, LCG_M = 1103515245, 12345, 2147483647
+
+# GLOBAL.st
+WEIGHT_LIGHT_RED = 90.0
+WEIGHT_LIGHT_YELLOW = 80.0
+WEIGHT_LIGHT_GREEN = 50.0
+WEIGHT_LIGHT_RED_SPECIAL = 10.0
+MINIMAL_WEIGHT = 0.0
+FREQUENCY_TARGET_SUM = 50.0
+FREQUENCY_MIN = 5.0
+FREQUENCY_MAX = 50.0
+FREQUENCY_LIMIT_TIMEOUT = 30.0                   # BUNKER_VIBFEEDER_MIN/MAX_FREQUENCY_TIMEOUT
+
+# MAIN.st
+PID_PERIOD = 0.5
+
+# E_LightColor
+OFF, GREEN, YELLOW, RED = 0, 1, 2, 3
+
+# Гистограмма ошибки пропорций для процентилей по всем сценариям
+ERROR_BINS = 1000
+
+
+class BunkerModel:
+    """
+    Модель веса бункеров и веса под бункерами (FB_Simulation.st) для count сценариев
+
+    Шаг - один цикл ПЛК (CYCLE): сначала вес под бункерами с шумом и дрейфом,
+    затем расход и заполнение бункеров, как в теле блока.
+    """
+
+    def __init__(self, count: int, seeds=None, drift_speed=None, drift_offset=None,
+                 fill_period=FILL_PERIOD, fill_duration=FILL_DURATION, plc_fill: bool = False):
+        shape = (count, 3)
+        self.count = count
+        self.seeds = np.array(np.broadcast_to(SEEDS if seeds is None else seeds, shape), dtype=np.int64)
+        self.drift_speed = np.array(np.broadcast_to(DRIFT_SPEED if drift_speed is None else drift_speed, shape),
+                                    dtype=REAL)
+        self.drift_offset = np.array(np.broadcast_to(0.0 if drift_offset is None else drift_offset, shape),
+                                     dtype=REAL)
+        self.fill_period_ms = np.broadcast_to(np.round(np.asarray(fill_period) * 1000), (count,)).astype(np.int64)
+        self.fill_duration_ms = np.broadcast_to(np.round(np.asarray(fill_duration) * 1000),
+                                                (count,)).astype(np.int64)
+        self.plc_fill = plc_fill
+
+        self.weight = np.full(shape, 100, dtype=REAL)            # Bunker[b].rWeight
+        self.under_bunker = np.zeros(shape, dtype=REAL)          # Bunker[b].rWeightUnderBunker
+        self.fill_active = np.zeros(shape, dtype=bool)           # _xFillTimerActive
+        self._timer_start = np.full(shape, -1, dtype=np.int64)   # _tonFillTimer: -1 - не запущен
+        self.now_ms = 0
+
+    def _ton(self, b: int, called, signal, preset) -> 'np.ndarray':
+        """Вызов _tonFillTimer[b] там, где called: (IN := signal, PT := preset) -> Q"""
+        start = self._timer_start[:, b]
+        start[called & ~signal] = -1
+        start[called & signal & (start < 0)] = self.now_ms
+        return called & signal & (self.now_ms - start >= preset)
+
+    def step(self, frequency, light, enabled=None) -> 'np.ndarray':
+        """
+        Один цикл ПЛК
+
+        Args:
+            frequency: rActualFrequency вибропитателей (count, 3), Гц
+            light: eLightColor (count, 3)
+            enabled: (count,) - сценарии, которые ещё моделируются
+
+        Returns:
+            rWeightUnderBunker (count, 3) - кумулятивно по ходу конвейера 3 → 2 → 1
+        """
+        frequency = np.asarray(frequency, dtype=REAL)
+        enabled = np.ones(self.count, dtype=bool) if enabled is None else enabled
+
+        # Шум: seed = (a * seed + c) MOD m, смещение в [-1, 1)
+        self.seeds = (LCG_A * self.seeds + LCG_C) % LCG_M
+        noise = (self.seeds.astype(REAL) / REAL(LCG_M) * REAL(2) - REAL(1)) * REAL(NOISE)
+
+        # Линейный дрейф с отражением от ±DRIFT_LIMIT
+        self.drift_offset += self.drift_speed
+        high = self.drift_offset > DRIFT_LIMIT
+        low = self.drift_offset < -DRIFT_LIMIT
+        self.drift_offset[high] = REAL(DRIFT_LIMIT)
+        self.drift_offset[low] = REAL(-DRIFT_LIMIT)
+        self.drift_speed = np.where(high, -np.abs(self.drift_speed),
+                                    np.where(low, np.abs(self.drift_speed), self.drift_speed))
+
+        local = np.maximum(frequency / REAL(50) * REAL(100) * (REAL(1) + noise + self.drift_offset), REAL(0))
+        self.under_bunker = np.cumsum(local[:, ::-1], axis=1, dtype=REAL)[:, ::-1]
+
+        weight = self.weight
+        for b in range(3):
+            # Расход
+            discharged = weight[:, b] - frequency[:, b] * REAL(DISCHARGE_COEFF) * REAL(CYCLE)
+            weight[:, b] = np.where(enabled, np.maximum(discharged, REAL(0)), weight[:, b])
+
+            # Заполнение по светофору: ожидание _tFillPeriod, затем _tFillDuration
+            rate = np.where(light[:, b] == GREEN, REAL(FILL_RATE_GREEN),
+                            np.where(light[:, b] == YELLOW, REAL(FILL_RATE_YELLOW), REAL(0)))
+            active = self.fill_active[:, b]
+            # В FB_Simulation ожидание и длительность - один _tonFillTimer[b], а "_tonFillTimer[b].IN := FALSE"
+            # без вызова его не сбрасывает: истёкшее ожидание сразу завершает заполнение, и на следующем
+            # цикле всё повторяется. По умолчанию таймер сбрасывается, как задумано
+            waited = self._ton(b, enabled if self.plc_fill else enabled & ~active,
+                               ~active & (rate > 0), self.fill_period_ms)
+            active |= waited
+            if not self.plc_fill:
+                self._timer_start[waited, b] = -1  # Сброс таймера ожидания
+            filling = active & enabled
+            weight[:, b] = np.where(filling, np.minimum(weight[:, b] + rate * REAL(CYCLE), REAL(100)), weight[:, b])
+            done = self._ton(b, filling, filling, self.fill_duration_ms)
+            active &= ~done
+            if not self.plc_fill:
+                self._timer_start[done, b] = -1
+
+            # Приоритет критического бункера с зелёным светофором
+            critical = ((light == GREEN) & (weight <= WEIGHT_LIGHT_RED_SPECIAL)).any(axis=1)
+            cancel = critical & ((light[:, b] != GREEN) | (weight[:, b] > WEIGHT_LIGHT_RED_SPECIAL)) & enabled
+            active &= ~cancel
+
+        self.now_ms += int(round(CYCLE * 1000))
+        return self.under_bunker
+
+
+def actual_proportions(under_bunker, active) -> 'np.ndarray':
+    """rProportionActual по кумулятивным весам (MAIN.st, BUNKER_ENABLE_PROPORTION_MONITORING)"""
+    weight = np.maximum(under_bunker - np.concatenate(
+        [under_bunker[:, 1:], np.zeros((len(under_bunker), 1), dtype=REAL)], axis=1), REAL(0))
+    weight = weight * active
+    total = weight.sum(axis=1, keepdims=True)
+    return np.where(total > REAL(0.5), weight / np.maximum(total, REAL(0.5)), REAL(0))
+
+
+def light_colors(weight, working) -> 'np.ndarray':
+    """FC_Bunker_GetLightColor для всех бункеров (eStateRemoteLighter = Auto)"""
+    this_critical = weight <= WEIGHT_LIGHT_RED_SPECIAL
+    critical = this_critical.any(axis=1, keepdims=True)
+    normal = np.where(weight >= WEIGHT_LIGHT_RED, RED,
+                      np.where(weight >= WEIGHT_LIGHT_YELLOW, YELLOW,
+                               np.where((weight >= WEIGHT_LIGHT_GREEN) | working[:, None], GREEN, OFF)))
+    return np.where(critical, np.where(this_critical, GREEN, RED), normal)
+
+
+def make_scenarios(count: int, seed: int = 0, drift: Tuple[float, float] = (0.0, 2.0),
+                   fill_period: Tuple[float, float] = (4.0, 12.0)) -> Dict[str, 'np.ndarray']:
+    """
+    Параметры сценариев; сценарий 0 - FB_Simulation без изменений
+
+    drift - диапазон множителя скорости дрейфа, fill_period - диапазон
+    периода заполнения, с. Знак дрейфа и начальные значения LCG случайные.
+    """
+    rng = np.random.default_rng(seed)
+    scenarios = {
+        'seeds': rng.integers(1, LCG_M, (count, 3)),
+        'drift_speed': (np.asarray(DRIFT_SPEED) * rng.uniform(*drift, (count, 1))
+                        * rng.choice([-1, 1], (count, 3))).astype(REAL),
+        'drift_offset': rng.uniform(-DRIFT_LIMIT, DRIFT_LIMIT, (count, 3)).astype(REAL),
+        'fill_period': rng.uniform(*fill_period, count),
+    }
+    if count:
+        scenarios['seeds'][0] = SEEDS
+        scenarios['drift_speed'][0] = DRIFT_SPEED
+        scenarios['drift_offset'][0] = 0.0
+        scenarios['fill_period'][0] = FILL_PERIOD
+    return scenarios
+
+
+def simulate(scenarios: Dict[str, 'np.ndarray'], targets: Sequence[float] = (50, 30, 20),
+             duration: float = 3600.0, warmup: float = 30.0, ramp: float = 4.0,
+             fill_duration: float = FILL_DURATION, plc_fill: bool = False,
+             parameters: Optional[Dict[str, float]] = None) -> Dict[str, 'np.ndarray']:
+    """
+    Смоделировать сценарии: бункеры полные, вибропитатели на базовых частотах (шаг INIT)
+
+    Returns:
+        По сценариям: 'empty_time' (с, inf - не опустел), 'empty_bunker' (1..3, 0),
+        'error_mean'/'error_max' (max |ошибки пропорции| по бункерам после warmup),
+        'critical_time' (с с критическим весом), 'limit_time' (наибольшее время
+        подряд у предела частоты, с), 'min_weight'; 'error_histogram' - по всем
+        сценариям (ERROR_BINS корзин на [0, 1]).
+    """
+    count = len(scenarios['fill_period'])
+    targets = np.asarray(targets, dtype=REAL)
+    targets = targets / targets.sum() if targets.sum() > 1.001 else targets
+    active = targets > 0
+    base = REAL(FREQUENCY_TARGET_SUM) * targets
+
+    model = BunkerModel(count, scenarios['seeds'], scenarios['drift_speed'], scenarios['drift_offset'],
+                        scenarios['fill_period'], fill_duration, plc_fill)
+    pid = ProportionPID(count, frequency_min=FREQUENCY_MIN, frequency_max=FREQUENCY_MAX,
+                        frequency_target_sum=FREQUENCY_TARGET_SUM, delta_time=PID_PERIOD,
+                        **(parameters or MAIN_PARAMETERS))
+    frequency = np.broadcast_to(base, (count, 3)).astype(REAL)
+    setpoint = frequency.copy()
+    running = np.ones(count, dtype=bool)
+    light = light_colors(model.weight, running)
+
+    steps = int(round(duration / CYCLE))
+    pid_every = int(round(PID_PERIOD / CYCLE))
+    warmup_steps = int(round(warmup / CYCLE))
+    limit = REAL(ramp * CYCLE)
+
+    empty_time = np.full(count, np.inf)
+    empty_bunker = np.zeros(count, dtype=np.int8)
+    error_sum = np.zeros(count)
+    error_count = np.zeros(count, dtype=np.int64)
+    error_max = np.zeros(count, dtype=REAL)
+    critical_steps = np.zeros(count, dtype=np.int64)
+    at_limit = np.zeros((count, 3), dtype=np.int64)
+    limit_steps = np.zeros(count, dtype=np.int64)
+    min_weight = np.full(count, 100, dtype=REAL)
+    histogram = np.zeros(ERROR_BINS, dtype=np.int64)
+
+    for step in range(steps):
+        under_bunker = model.step(frequency, light, running)
+        actual = actual_proportions(under_bunker, active)
+        if step % pid_every == 0:
+            setpoint = np.where(running[:, None], pid(targets, actual, base), REAL(0))
+
+        # Рампа ЧРП (FB_FrequencyControl)
+        frequency = frequency + np.clip(setpoint - frequency, -limit, limit)
+        light = light_colors(model.weight, running)
+
+        weight = model.weight
+        min_weight = np.minimum(min_weight, np.where(running, weight.min(axis=1), REAL(100)))
+        critical_steps += running & (weight <= WEIGHT_LIGHT_RED_SPECIAL).any(axis=1)
+        limit_now = ((setpoint <= FREQUENCY_MIN) | (setpoint >= FREQUENCY_MAX)) & active & running[:, None]
+        at_limit = np.where(limit_now, at_limit + 1, 0)
+        limit_steps = np.maximum(limit_steps, at_limit.max(axis=1))
+
+        if step >= warmup_steps:
+            error = np.where(running, np.abs(targets - actual)[:, active].max(axis=1), REAL(0))
+            error_sum += error
+            error_count += running
+            error_max = np.maximum(error_max, error)
+            histogram += np.bincount(np.minimum((error[running] * ERROR_BINS).astype(np.int64), ERROR_BINS - 1),
+                                     minlength=ERROR_BINS)
+
+        # FC_Bunker_CheckEmptyBunker: остановка всех бункеров
+        empty = running & (weight <= MINIMAL_WEIGHT).any(axis=1)
+        if empty.any():
+            empty_time[empty] = (step + 1) * CYCLE
+            empty_bunker[empty] = np.argmax(weight[empty] <= MINIMAL_WEIGHT, axis=1) + 1
+            running &= ~empty
+            frequency[empty] = 0
+            setpoint[empty] = 0
+            if not running.any():
+                break
+
+    return {
+        'empty_time': empty_time,
+        'empty_bunker': empty_bunker,
+        'error_mean': error_sum / np.maximum(error_count, 1),
+        'error_max': error_max,
+        'critical_time': critical_steps * CYCLE,
+        'limit_time': limit_steps * CYCLE,
+        'min_weight': min_weight,
+        'error_histogram': histogram,
+    }
+
+
+def _simulate_chunk(args):
+    scenarios, kwargs = args
+    return simulate(scenarios, **kwargs)
+
+
+def run(scenarios: Dict[str, 'np.ndarray'], workers: Optional[int] = None, chunk_size: int = 2048,
+        **kwargs) -> Dict[str, 'np.ndarray']:
+    """Смоделировать сценарии частями, параллельно в workers процессах"""
+    count = len(scenarios['fill_period'])
+    workers = workers or os.cpu_count() or 1
+    chunk_size = max(min(chunk_size, -(-count // workers)), 1)
+    chunks = [({name: column[i:i + chunk_size] for name, column in scenarios.items()}, kwargs)
+              for i in range(0, count, chunk_size)]
+    if workers == 1 or len(chunks) == 1:
+        results = [_simulate_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_simulate_chunk, chunks))
+    merged = {key: np.concatenate([result[key] for result in results])
+              for key in results[0] if key != 'error_histogram'}
+    merged['error_histogram'] = sum(result['error_histogram'] for result in results)
+    return merged
+
+
+def histogram_percentile(histogram: 'np.ndarray', percent: float) -> float:
+    """Процентиль ошибки по гистограмме (верхняя граница корзины)"""
+    total = histogram.sum()
+    if not total:
+        return 0.0
+    index = int(np.searchsorted(np.cumsum(histogram), math.ceil(total * percent / 100)))
+    return (index + 1) / len(histogram)
+
+
+def _parse_range(spec: str) -> Tuple[float, float]:
+    parts = [float(part) for part in spec.split(':')]
+    if len(parts) not in (1, 2):
+        raise argparse.ArgumentTypeError(f"Ожидается ОТ:ДО или одно значение: {spec}")
+    return parts[0], parts[-1]
+
+
+def main():
+    """Главная функция"""
+    arg_parser = argparse.ArgumentParser(description='Моделирование бункеров по FB_Simulation')
+    arg_parser.add_argument('--scenarios', type=int, default=1000, help='Число сценариев')
+    arg_parser.add_argument('--duration', type=float, default=3600.0, help='Длительность сценария, с')
+    arg_parser.add_argument('--targets', type=float, nargs=3, default=[50, 30, 20], help='Пропорции бункеров, %%')
+    arg_parser.add_argument('--drift', type=_parse_range, default=(0.0, 2.0), metavar='ОТ:ДО',
+                            help='Множитель скорости дрейфа материала (FB_Simulation - 1)')
+    arg_parser.add_argument('--fill-period', type=_parse_range, default=(4.0, 12.0), metavar='ОТ:ДО',
+                            help='Период заполнения, с (FB_Simulation - 8)')
+    arg_parser.add_argument('--fill-duration', type=float, default=FILL_DURATION, help='Длительность заполнения, с')
+    arg_parser.add_argument('--plc-fill', action='store_true',
+                            help='Заполнение как в FB_Simulation (после первого периода - непрерывно)')
+    arg_parser.add_argument('--ramp', type=float, default=4.0, help='Скорость рампы ЧРП, Гц/с')
+    arg_parser.add_argument('--warmup', type=float, default=30.0, help='Без учёта ошибки пропорций в начале, с')
+    arg_parser.add_argument('--seed', type=int, default=0, help='Начальное значение генератора сценариев')
+    arg_parser.add_argument('--workers', type=int, help='Число процессов (по умолчанию - число ядер)')
+    args = arg_parser.parse_args()
+
+    print("=" * 60)
+    print("Bunker Simulation")
+    print("=" * 60)
+
+    scenarios = make_scenarios(args.scenarios, args.seed, args.drift, args.fill_period)
+    print(f"\n⏱️  {args.scenarios} сценариев × {args.duration:g} с ({int(args.duration / CYCLE)} циклов)...")
+    start = time.perf_counter()
+    result = run(scenarios, args.workers, targets=args.targets, duration=args.duration, warmup=args.warmup,
+                 ramp=args.ramp, fill_duration=args.fill_duration, plc_fill=args.plc_fill)
+    elapsed = time.perf_counter() - start
+    print(f"   Время: {elapsed:.1f} с ({args.scenarios * args.duration / elapsed:,.0f}x реального времени)")
+
+    empty = np.isfinite(result['empty_time'])
+    print(f"\n📊 Опустошение: {empty.sum()} из {args.scenarios} ({empty.mean():.1%})")
+    if empty.any():
+        times = result['empty_time'][empty]
+        print(f"   Время до опустошения: p5 {np.percentile(times, 5):.0f} с, "
+              f"p50 {np.percentile(times, 50):.0f} с, мин {times.min():.0f} с")
+        counts = np.bincount(result['empty_bunker'][empty], minlength=4)[1:]
+        print("   По бункерам: " + ", ".join(f"{b + 1}: {n}" for b, n in enumerate(counts)))
+
+    histogram = result['error_histogram']
+    print(f"\n📊 Ошибка пропорций (max по бункерам, после {args.warmup:g} с):")
+    print(f"   Среднее {result['error_mean'].mean():.4f}; p50 {histogram_percentile(histogram, 50):.3f}, "
+          f"p95 {histogram_percentile(histogram, 95):.3f}, p99 {histogram_percentile(histogram, 99):.3f}")
+    print(f"   Критический вес: {(result['critical_time'] > 0).mean():.1%} сценариев, "
+          f"у предела частоты ≥ {FREQUENCY_LIMIT_TIMEOUT:g} с: "
+          f"{(result['limit_time'] >= FREQUENCY_LIMIT_TIMEOUT).mean():.1%}")
+
+    print("\n📊 По периоду заполнения:")
+    edges = np.quantile(scenarios['fill_period'], [0, 0.25, 0.5, 0.75, 1])
+    for low, high in zip(edges[:-1], edges[1:]):
+        group = (scenarios['fill_period'] >= low) & (scenarios['fill_period'] <= high)
+        if group.any():
+            print(f"   {low:5.1f}-{high:5.1f} с: опустошение {empty[group].mean():6.1%}, "
+                  f"ошибка {result['error_mean'][group].mean():.4f}")
+
+    print("\n🏭 Сценарий FB_Simulation (сценарий 0): "
+          f"опустошение {'через %.0f с' % result['empty_time'][0] if empty[0] else 'нет'}, "
+          f"ошибка {result['error_mean'][0]:.4f}, мин. вес {result['min_weight'][0]:.1f} кг")
+
+    print("=" * 60)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
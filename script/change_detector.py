@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modbus Change Detector
+=======================
+Обнаружение изменений между последовательными декодированными кадрами
+с мёртвыми зонами по переменным - аналог FB_NumericChangeDetector на стороне
+хоста. Потребителям (архив, HMI, аварии) передаются только изменения.
+
+Использование:
+    from change_detector import ChangeDetector
+    detector = ChangeDetector.from_database(DB_PATH, 'input_registers')
+    changes = detector.update_frame(frame)     # Кадр 512 слов
+    for change in changes.to_dicts():
+        push(change['name'], change['value'])
+
+    # С исполнителем опроса poll_planner.py
+    executor.on_update(lambda register_type, image, reads: publish(detector.update_frame(image)))
+
+Возможности:
+    - Все переменные кадра сравниваются одной операцией NumPy
+    - Мёртвая зона по переменной из колонок registers.deadband (абсолютная)
+      и registers.deadband_percent (% от последнего переданного значения);
+      действует большая из двух, BOOL - любое изменение
+    - Как в FB_NumericChangeDetector: первый кадр - только инициализация,
+      опорное значение обновляется лишь при обнаруженном изменении
+      (медленный дрейф накапливается до выхода из мёртвой зоны)
+    - Для каждой изменённой переменной: предыдущее значение, разность,
+      направление (qrValueDifference / qxValueIncreased / qxValueDecreased)
+
+Требования:
+    pip install numpy
+
+Дата: 2026-10-17
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from register_decoder import DB_PATH, IMAGE_WORDS, DecodePlan, load_register_tags
+
+
+def load_deadbands(db_path: Path = DB_PATH, register_type: str = 'input_registers',
+                   plc_id: Optional[int] = None) -> Dict[str, Tuple[float, float]]:
+    """
+    Прочитать мёртвые зоны переменных из таблицы registers
+
+    Returns:
+        {переменная: (абсолютная, процентная)}; переменные без мёртвой зоны
+        и БД старой схемы (без колонок deadband) - пустой словарь
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(registers)")}
+        if 'deadband' not in columns:
+            return {}
+        query = """
+            SELECT r.variable_name, COALESCE(r.deadband, 0), COALESCE(r.deadband_percent, 0)
+            FROM registers r
+            JOIN register_types rt ON r.register_type_id = rt.id
+            WHERE rt.name = ? AND (r.deadband > 0 OR r.deadband_percent > 0)
+        """
+        params: list = [register_type]
+        if 'plc_id' in columns:
+            query += " AND r.plc_id = ?"
+            params.append(1 if plc_id is None else plc_id)
+        return {name: (absolute, percent) for name, absolute, percent in conn.execute(query, params)}
+    finally:
+        conn.close()
+
+
+class Changes:
+    """Изменения одного кадра (массивы по изменённым переменным)"""
+
+    def __init__(self, names: List[str], indices: 'np.ndarray', previous: 'np.ndarray', values: 'np.ndarray'):
+        self.indices = indices
+        self.names = [names[i] for i in indices.tolist()]
+        self.previous = previous
+        self.values = values
+        self.difference = values - previous
+        self.increased = values > previous
+        self.decreased = values < previous
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def to_dicts(self) -> List[Dict[str, object]]:
+        """Изменения в виде словарей для публикации"""
+        return [
+            {'name': name, 'value': value, 'previous': previous, 'difference': difference,
+             'increased': increased, 'decreased': decreased}
+            for name, value, previous, difference, increased, decreased in zip(
+                self.names, self.values.tolist(), self.previous.tolist(), self.difference.tolist(),
+                self.increased.tolist(), self.decreased.tolist())
+        ]
+
+
+class ChangeDetector:
+    """
+    Детектор изменений строк значений, декодированных DecodePlan.decode_batch
+
+    Хранит опорные (последние переданные) значения всех переменных.
+    """
+
+    def __init__(self, names: List[str], data_types: List[str],
+                 deadbands: Optional[Dict[str, Tuple[float, float]]] = None, plan: Optional[DecodePlan] = None):
+        """
+        Args:
+            names, data_types: Столбцы строк значений (DecodePlan.names/data_types)
+            deadbands: {переменная: (абсолютная, процентная)} мёртвые зоны
+            plan: План декодирования для update_frame()
+        """
+        deadbands = deadbands or {}
+        self.names = list(names)
+        self.plan = plan
+        self.absolute = np.zeros(len(self.names))
+        self.fraction = np.zeros(len(self.names))
+        for column, (name, data_type) in enumerate(zip(self.names, data_types)):
+            if data_type != 'BOOL' and name in deadbands:
+                absolute, percent = deadbands[name]
+                self.absolute[column] = absolute
+                self.fraction[column] = percent / 100
+        self._reference: Optional['np.ndarray'] = None
+
+    @classmethod
+    def from_plan(cls, plan: DecodePlan,
+                  deadbands: Optional[Dict[str, Tuple[float, float]]] = None) -> 'ChangeDetector':
+        return cls(plan.names, plan.data_types, deadbands, plan)
+
+    @classmethod
+    def from_database(cls, db_path: Path = DB_PATH, register_type: str = 'input_registers',
+                      plc_id: Optional[int] = None, image_size: int = IMAGE_WORDS) -> 'ChangeDetector':
+        """Детектор по карте регистров и мёртвым зонам из БД"""
+        plan = DecodePlan(load_register_tags(db_path, register_type, plc_id), image_size)
+        return cls.from_plan(plan, load_deadbands(db_path, register_type, plc_id))
+
+    def reset(self):
+        """Сброс: следующий кадр станет опорным (как xReset)"""
+        self._reference = None
+
+    def update(self, values) -> Changes:
+        """
+        Сравнить строку значений с опорной
+
+        Args:
+            values: float64 массив (len(names),)
+        Returns:
+            Изменения, вышедшие за мёртвую зону (пусто на первом кадре)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if self._reference is None:
+            self._reference = values.copy()
+            empty = np.empty(0, dtype=np.intp)
+            return Changes(self.names, empty, values[empty], values[empty])
+
+        reference = self._reference
+        with np.errstate(invalid='ignore'):
+            threshold = np.maximum(self.absolute, self.fraction * np.abs(reference))
+            changed = np.abs(values - reference) > threshold
+            # NaN: переход в NaN и из NaN - изменение, NaN -> NaN - нет
+            changed |= np.isnan(values) != np.isnan(reference)
+
+        indices = np.flatnonzero(changed)
+        previous = reference[indices]
+        current = values[indices]
+        reference[indices] = current
+        return Changes(self.names, indices, previous, current)
+
+    def update_frame(self, frame) -> Changes:
+        """Декодировать кадр регистров и сравнить с опорным"""
+        return self.update(self.plan.decode_batch(frame)[0])
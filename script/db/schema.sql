@@ -1,8 +1,12 @@
 -- =====================================================
 -- SQLite Schema for Modbus Register Database
 -- =====================================================
--- Версия: 1.0
+-- Версия: 1.2
 -- Создано: 2025-12-12
+-- Обновлено: 2026-10-17 (ПЛК/площадки: несколько проектов в одной БД;
+--            мёртвые зоны регистров для обнаружения изменений;
+--            полнотекстовый индекс register_texts_fts для поиска;
+--            счётчики register_stats для статистики без обхода registers)
 -- Описание: База данных для управления картой Modbus регистров
 --           промышленной системы управления
 
@@ -34,21 +38,35 @@ CREATE TABLE data_types (
 -- ОСНОВНЫЕ ТАБЛИЦЫ
 -- =====================================================
 
+-- ПЛК (линии) и площадки: у каждого своя копия проекта и свой FB_ModbusToSCADA.st
+CREATE TABLE plcs (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    site TEXT,
+    project_root TEXT,
+    description TEXT
+);
+
 -- Секции оборудования
 CREATE TABLE sections (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
+    plc_id INTEGER NOT NULL DEFAULT 1,
     register_type_id INTEGER NOT NULL,
     name TEXT NOT NULL,
     start_register INTEGER NOT NULL CHECK (start_register >= 0),
     end_register INTEGER NOT NULL CHECK (end_register >= start_register),
     description TEXT,
+    content_hash TEXT,  -- SHA-256 блока секции в FB_ModbusToSCADA.st (NULL - ещё не синхронизирована)
+    is_manual INTEGER NOT NULL DEFAULT 0 CHECK (is_manual IN (0, 1)),  -- 1 - добавлена вручную, sync не удаляет
+    FOREIGN KEY (plc_id) REFERENCES plcs(id) ON DELETE CASCADE,
     FOREIGN KEY (register_type_id) REFERENCES register_types(id) ON DELETE CASCADE,
-    CONSTRAINT unique_section_name UNIQUE (register_type_id, name)
+    CONSTRAINT unique_section_name UNIQUE (plc_id, register_type_id, name)
 );
 
 -- Основная таблица регистров
 CREATE TABLE registers (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
+    plc_id INTEGER NOT NULL DEFAULT 1,
     register_type_id INTEGER NOT NULL,
     section_id INTEGER NOT NULL,
     register_address INTEGER NOT NULL CHECK (register_address >= 0),
@@ -57,12 +75,15 @@ CREATE TABLE registers (
     variable_name TEXT NOT NULL,
     description TEXT,
     is_reserved BOOLEAN DEFAULT 0 CHECK (is_reserved IN (0, 1)),
+    deadband REAL CHECK (deadband IS NULL OR deadband >= 0),  -- Мёртвая зона, единицы значения
+    deadband_percent REAL CHECK (deadband_percent IS NULL OR deadband_percent >= 0),  -- Мёртвая зона, % от значения
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (plc_id) REFERENCES plcs(id) ON DELETE CASCADE,
     FOREIGN KEY (register_type_id) REFERENCES register_types(id) ON DELETE CASCADE,
     FOREIGN KEY (section_id) REFERENCES sections(id) ON DELETE CASCADE,
     FOREIGN KEY (data_type_id) REFERENCES data_types(id) ON DELETE RESTRICT,
-    CONSTRAINT unique_register_address UNIQUE(register_type_id, register_address, bit_index),
+    CONSTRAINT unique_register_address UNIQUE(plc_id, register_type_id, register_address, bit_index),
     CONSTRAINT check_bool_bit_index CHECK (
         (data_type_id = 1 AND bit_index IS NOT NULL) OR
         (data_type_id != 1 AND bit_index IS NULL)
@@ -72,10 +93,12 @@ CREATE TABLE registers (
 -- Зарезервированные диапазоны для будущего расширения
 CREATE TABLE register_gaps (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
+    plc_id INTEGER NOT NULL DEFAULT 1,
     register_type_id INTEGER NOT NULL,
     start_register INTEGER NOT NULL CHECK (start_register >= 0),
     end_register INTEGER NOT NULL CHECK (end_register >= start_register),
     purpose TEXT,
+    FOREIGN KEY (plc_id) REFERENCES plcs(id) ON DELETE CASCADE,
     FOREIGN KEY (register_type_id) REFERENCES register_types(id) ON DELETE CASCADE
 );
 
@@ -83,12 +106,55 @@ CREATE TABLE register_gaps (
 -- ИНДЕКСЫ ДЛЯ БЫСТРОГО ПОИСКА
 -- =====================================================
 
-CREATE INDEX idx_registers_variable ON registers(variable_name);
+CREATE INDEX idx_registers_variable_plc ON registers(variable_name, plc_id);  -- Поиск: регистры по тексту на ПЛК
 CREATE INDEX idx_registers_section ON registers(section_id);
-CREATE INDEX idx_registers_address ON registers(register_type_id, register_address);
+CREATE INDEX idx_registers_address ON registers(register_type_id, register_address, bit_index);  -- Листание карты по порядку адресов
 CREATE INDEX idx_registers_data_type ON registers(data_type_id);
 CREATE INDEX idx_sections_range ON sections(register_type_id, start_register, end_register);
 CREATE INDEX idx_sections_type ON sections(register_type_id);
+CREATE INDEX idx_sections_plc ON sections(plc_id);
+
+-- =====================================================
+-- ПОЛНОТЕКСТОВЫЙ ПОИСК
+-- =====================================================
+
+-- Различные тексты регистров (имя переменной + описание) со счётчиком ссылок.
+-- У ПЛК одного проекта тексты совпадают: индекс растёт с числом уникальных текстов, а не регистров
+CREATE TABLE register_texts (
+    id INTEGER PRIMARY KEY,
+    variable_name TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',  -- NULL в registers хранится как ''
+    refs INTEGER NOT NULL DEFAULT 0,
+    CONSTRAINT unique_register_text UNIQUE (variable_name, description)
+);
+
+-- Индекс FTS5 по текстам (external content: сам текст хранится только в register_texts).
+-- Триграммы: поиск подстроки в путях вида stBunker[1].MotorVibFeeder[2] и в формах русских слов,
+-- без учёта регистра; запрос - не короче 3 символов
+CREATE VIRTUAL TABLE register_texts_fts USING fts5(
+    variable_name,
+    description,
+    content='register_texts',
+    content_rowid='id',
+    tokenize='trigram'
+);
+
+-- =====================================================
+-- СЧЁТЧИКИ ДЛЯ СТАТИСТИКИ
+-- =====================================================
+
+-- Регистры секции по типам данных (ведутся триггерами на registers).
+-- Статистика и v_sections_stats читают O(секций) строк вместо агрегации всей registers;
+-- тип регистра и ПЛК - у секции
+CREATE TABLE register_stats (
+    section_id INTEGER NOT NULL,
+    data_type_id INTEGER NOT NULL,
+    registers INTEGER NOT NULL DEFAULT 0,
+    described INTEGER NOT NULL DEFAULT 0,  -- С непустым описанием
+    reserved INTEGER NOT NULL DEFAULT 0,
+    addresses INTEGER NOT NULL DEFAULT 0,  -- Различные адреса (BOOL одного слова - один адрес)
+    PRIMARY KEY (section_id, data_type_id)
+) WITHOUT ROWID;
 
 -- =====================================================
 -- ТРИГГЕРЫ ДЛЯ АВТОМАТИЧЕСКОГО ОБНОВЛЕНИЯ
@@ -102,6 +168,142 @@ BEGIN
     UPDATE registers SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
 END;
 
+-- Счётчики ссылок register_texts по изменениям registers
+CREATE TRIGGER register_texts_insert
+AFTER INSERT ON registers
+FOR EACH ROW
+BEGIN
+    INSERT INTO register_texts (variable_name, description, refs)
+    VALUES (NEW.variable_name, IFNULL(NEW.description, ''), 1)
+    ON CONFLICT (variable_name, description) DO UPDATE SET refs = refs + 1;
+END;
+
+CREATE TRIGGER register_texts_delete
+AFTER DELETE ON registers
+FOR EACH ROW
+BEGIN
+    UPDATE register_texts SET refs = refs - 1
+    WHERE variable_name = OLD.variable_name AND description = IFNULL(OLD.description, '');
+    DELETE FROM register_texts
+    WHERE variable_name = OLD.variable_name AND description = IFNULL(OLD.description, '') AND refs <= 0;
+END;
+
+CREATE TRIGGER register_texts_update
+AFTER UPDATE OF variable_name, description ON registers
+FOR EACH ROW
+WHEN OLD.variable_name IS NOT NEW.variable_name OR OLD.description IS NOT NEW.description
+BEGIN
+    UPDATE register_texts SET refs = refs - 1
+    WHERE variable_name = OLD.variable_name AND description = IFNULL(OLD.description, '');
+    DELETE FROM register_texts
+    WHERE variable_name = OLD.variable_name AND description = IFNULL(OLD.description, '') AND refs <= 0;
+    INSERT INTO register_texts (variable_name, description, refs)
+    VALUES (NEW.variable_name, IFNULL(NEW.description, ''), 1)
+    ON CONFLICT (variable_name, description) DO UPDATE SET refs = refs + 1;
+END;
+
+-- Счётчики register_stats по изменениям registers.
+-- Адрес новый, если на нём нет других регистров того же типа данных в секции
+-- (поиск по уникальному ключу plc_id, register_type_id, register_address);
+-- изменение регистра - удаление старой строки и вставка новой (сам регистр в проверках не учитывается)
+CREATE TRIGGER register_stats_insert
+AFTER INSERT ON registers
+FOR EACH ROW
+BEGIN
+    INSERT INTO register_stats (section_id, data_type_id, registers, described, reserved, addresses)
+    VALUES (
+        NEW.section_id, NEW.data_type_id, 1,
+        IFNULL(NEW.description, '') != '', IFNULL(NEW.is_reserved, 0) = 1,
+        NOT EXISTS (
+            SELECT 1 FROM registers
+            WHERE plc_id = NEW.plc_id AND register_type_id = NEW.register_type_id
+              AND register_address = NEW.register_address AND section_id = NEW.section_id
+              AND data_type_id = NEW.data_type_id AND id != NEW.id
+        )
+    )
+    ON CONFLICT (section_id, data_type_id) DO UPDATE SET
+        registers = registers + 1,
+        described = described + excluded.described,
+        reserved = reserved + excluded.reserved,
+        addresses = addresses + excluded.addresses;
+END;
+
+CREATE TRIGGER register_stats_delete
+AFTER DELETE ON registers
+FOR EACH ROW
+BEGIN
+    UPDATE register_stats SET
+        registers = registers - 1,
+        described = described - (IFNULL(OLD.description, '') != ''),
+        reserved = reserved - (IFNULL(OLD.is_reserved, 0) = 1),
+        addresses = addresses - (NOT EXISTS (
+            SELECT 1 FROM registers
+            WHERE plc_id = OLD.plc_id AND register_type_id = OLD.register_type_id
+              AND register_address = OLD.register_address AND section_id = OLD.section_id
+              AND data_type_id = OLD.data_type_id
+        ))
+    WHERE section_id = OLD.section_id AND data_type_id = OLD.data_type_id;
+    DELETE FROM register_stats
+    WHERE section_id = OLD.section_id AND data_type_id = OLD.data_type_id AND registers <= 0;
+END;
+
+CREATE TRIGGER register_stats_update
+AFTER UPDATE OF plc_id, register_type_id, section_id, register_address, data_type_id, description, is_reserved
+ON registers
+FOR EACH ROW
+WHEN OLD.plc_id IS NOT NEW.plc_id OR OLD.register_type_id IS NOT NEW.register_type_id
+  OR OLD.section_id IS NOT NEW.section_id OR OLD.register_address IS NOT NEW.register_address
+  OR OLD.data_type_id IS NOT NEW.data_type_id OR OLD.description IS NOT NEW.description
+  OR OLD.is_reserved IS NOT NEW.is_reserved
+BEGIN
+    UPDATE register_stats SET
+        registers = registers - 1,
+        described = described - (IFNULL(OLD.description, '') != ''),
+        reserved = reserved - (IFNULL(OLD.is_reserved, 0) = 1),
+        addresses = addresses - (NOT EXISTS (
+            SELECT 1 FROM registers
+            WHERE plc_id = OLD.plc_id AND register_type_id = OLD.register_type_id
+              AND register_address = OLD.register_address AND section_id = OLD.section_id
+              AND data_type_id = OLD.data_type_id AND id != OLD.id
+        ))
+    WHERE section_id = OLD.section_id AND data_type_id = OLD.data_type_id;
+    DELETE FROM register_stats
+    WHERE section_id = OLD.section_id AND data_type_id = OLD.data_type_id AND registers <= 0;
+    INSERT INTO register_stats (section_id, data_type_id, registers, described, reserved, addresses)
+    VALUES (
+        NEW.section_id, NEW.data_type_id, 1,
+        IFNULL(NEW.description, '') != '', IFNULL(NEW.is_reserved, 0) = 1,
+        NOT EXISTS (
+            SELECT 1 FROM registers
+            WHERE plc_id = NEW.plc_id AND register_type_id = NEW.register_type_id
+              AND register_address = NEW.register_address AND section_id = NEW.section_id
+              AND data_type_id = NEW.data_type_id AND id != NEW.id
+        )
+    )
+    ON CONFLICT (section_id, data_type_id) DO UPDATE SET
+        registers = registers + 1,
+        described = described + excluded.described,
+        reserved = reserved + excluded.reserved,
+        addresses = addresses + excluded.addresses;
+END;
+
+-- Синхронизация register_texts_fts с register_texts (refs в индекс не входит)
+CREATE TRIGGER register_texts_fts_insert
+AFTER INSERT ON register_texts
+FOR EACH ROW
+BEGIN
+    INSERT INTO register_texts_fts (rowid, variable_name, description)
+    VALUES (NEW.id, NEW.variable_name, NEW.description);
+END;
+
+CREATE TRIGGER register_texts_fts_delete
+AFTER DELETE ON register_texts
+FOR EACH ROW
+BEGIN
+    INSERT INTO register_texts_fts (register_texts_fts, rowid, variable_name, description)
+    VALUES ('delete', OLD.id, OLD.variable_name, OLD.description);
+END;
+
 -- =====================================================
 -- ЗАПОЛНЕНИЕ СПРАВОЧНИКОВ
 -- =====================================================
@@ -121,6 +323,10 @@ INSERT INTO data_types (id, name, register_count, supports_bit_packing) VALUES
     (6, 'WORD', 1, 0),      -- 16-bit bit string: 1 регистр
     (7, 'DINT', 2, 0);      -- 32-bit signed integer: 2 регистра
 
+-- ПЛК по умолчанию: проект, в котором лежит этот скрипт
+INSERT INTO plcs (id, name, description) VALUES
+    (1, 'default', 'Текущий проект');
+
 -- =====================================================
 -- ПРЕДСТАВЛЕНИЯ (VIEWS) ДЛЯ УДОБНОГО ДОСТУПА
 -- =====================================================
@@ -144,13 +350,16 @@ SELECT
     r.description,
     r.is_reserved,
     r.created_at,
-    r.updated_at
+    r.updated_at,
+    p.name AS plc,
+    p.site
 FROM registers r
 JOIN register_types rt ON r.register_type_id = rt.id
 JOIN data_types dt ON r.data_type_id = dt.id
-JOIN sections s ON r.section_id = s.id;
+JOIN sections s ON r.section_id = s.id
+JOIN plcs p ON r.plc_id = p.id;
 
--- Статистика по секциям
+-- Статистика по секциям (из счётчиков register_stats, без обхода registers)
 CREATE VIEW v_sections_stats AS
 SELECT
     s.id,
@@ -159,15 +368,18 @@ SELECT
     s.start_register,
     s.end_register,
     (s.end_register - s.start_register + 1) AS total_registers,
-    COUNT(DISTINCT r.register_address) AS used_registers,
-    COUNT(r.id) AS total_entries,
-    SUM(CASE WHEN dt.name = 'BOOL' THEN 1 ELSE 0 END) AS bool_count,
-    SUM(CASE WHEN dt.name = 'REAL' THEN 1 ELSE 0 END) AS real_count,
-    SUM(CASE WHEN dt.name IN ('INT', 'UINT', 'WORD') THEN 1 ELSE 0 END) AS int_count
+    IFNULL(SUM(st.addresses), 0) AS used_registers,
+    IFNULL(SUM(st.registers), 0) AS total_entries,
+    SUM(CASE WHEN dt.name = 'BOOL' THEN st.registers ELSE 0 END) AS bool_count,
+    SUM(CASE WHEN dt.name = 'REAL' THEN st.registers ELSE 0 END) AS real_count,
+    SUM(CASE WHEN dt.name IN ('INT', 'UINT', 'WORD') THEN st.registers ELSE 0 END) AS int_count,
+    p.name AS plc,
+    p.site
 FROM sections s
 JOIN register_types rt ON s.register_type_id = rt.id
-LEFT JOIN registers r ON s.id = r.section_id
-LEFT JOIN data_types dt ON r.data_type_id = dt.id
+JOIN plcs p ON s.plc_id = p.id
+LEFT JOIN register_stats st ON s.id = st.section_id
+LEFT JOIN data_types dt ON st.data_type_id = dt.id
 GROUP BY s.id;
 
 -- =====================================================
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modbus Variable Descriptions
+=============================
+Общий словарь описаний переменных и быстрый поиск описания по пути переменной.
+Используется migrate_from_fc.py и update_descriptions.py.
+
+Использование:
+    from descriptions import find_description
+    find_description('stBunker[2].MotorVibFeeder[1].VFD.qrOutFrequency')
+
+Возможности:
+    - Индексы массивов исключаются из пути: stBunker[2].rWeight -> stBunker.rWeight
+    - Поиск самого длинного совпадающего суффикса пути по суффиксному дереву
+    - Контекстные правила для структур (VFD, *_POINTS, *_SETTINGS, stCommands, stBunker, ...)
+    - Результат кэшируется по нормализованному пути: повторяющиеся пути бункеров
+      и моторов с другими индексами разрешаются одним обращением к словарю
+
+Дата: 2026-10-17
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Индекс массива (без вложенных скобок), удаляется из пути
+_INDEX_RE = re.compile(r'\[[^\[\]]*\]')
+
+# Правила по подстроке пути: маркер -> ключи в порядке приоритета
+_KEYED_RULES: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    # *_POINTS.LL_Value, etc.
+    ('_POINTS', ('LL_Value', 'L_Value', 'H_Value', 'HH_Value')),
+    # *_SETTINGS.TIME_xxx (VIBRATOR_SETTINGS, PNEUMO_SETTINGS, ...)
+    ('_SETTINGS', ('OPTION_ENABLE', 'TIME_ACTIVE', 'TIME_PAUSE_VIBRATOR', 'TIME_PAUSE_FB',
+                   'TIME_FIRST_SIGNAL', 'TIME_FIRST_SIGNAL_PAUSE',
+                   'TIME_SECOND_SIGNAL', 'TIME_SECOND_SIGNAL_PAUSE')),
+)
+
+# Правила по компонентам пути: компоненты-маркеры -> префиксы искомого компонента
+# (None - подходит любой компонент из словаря). Берётся первый компонент слева.
+_PREFIX_RULES: Tuple[Tuple[Tuple[str, ...], Optional[Tuple[str, ...]]], ...] = (
+    # stCommands.cmdXxx.ixSignal
+    (('stCommands',), ('cmd',)),
+    # stCommonSignals.fbXxx.qxSignal
+    (('stCommonSignals',), ('fb', 'qx')),
+    # stBunker[N].fbXxx.qxSignal
+    (('stBunker', 'Bunker'), ('fb', 'cmd', 'qx', 'r', 'x')),
+    # stDumper/stConveyor fields
+    (('stDumper', 'stConveyor', 'Dumper', 'Conveyor'), None),
+)
+
+
+class _SuffixNode:
+    """Узел суффиксного дерева (компоненты пути хранятся с конца)"""
+
+    __slots__ = ('children', 'description')
+
+    def __init__(self):
+        self.children: Dict[str, '_SuffixNode'] = {}
+        self.description: Optional[str] = None
+
+
+class DescriptionResolver:
+    """Поиск описания переменной по её пути"""
+
+    def __init__(self, descriptions: Dict[str, str]):
+        self.descriptions = descriptions
+        self._root = _SuffixNode()
+        self._cache: Dict[str, str] = {}
+
+        for key, description in descriptions.items():
+            node = self._root
+            for part in reversed(self.normalize(key).split('.')):
+                node = node.children.setdefault(part, _SuffixNode())
+            node.description = description
+
+    @staticmethod
+    def normalize(variable_path: str) -> str:
+        """Убрать индексы массивов: 'stBunker[2].Motor[1].VFD' -> 'stBunker.Motor.VFD'"""
+        if '[' not in variable_path:
+            return variable_path
+        previous = None
+        while previous != variable_path:
+            previous = variable_path
+            variable_path = _INDEX_RE.sub('', variable_path)
+        return variable_path
+
+    def resolve(self, variable_path: str) -> str:
+        """
+        Найти описание для переменной по её пути
+
+        Args:
+            variable_path: Путь к переменной (например, 'stBunker[1].MotorVibFeeder[1].VFD.qrOutFrequency')
+
+        Returns:
+            Описание переменной или пустую строку, если не найдено
+        """
+        pattern = self.normalize(variable_path)
+        description = self._cache.get(pattern)
+        if description is None:
+            parts = pattern.split('.')
+            description = self._match_suffix(parts)
+            if description is None:
+                description = self._match_context(pattern, parts)
+            self._cache[pattern] = description
+        return description
+
+    def _match_suffix(self, parts: List[str]) -> Optional[str]:
+        """Самый длинный суффикс пути, имеющийся в словаре (включая полный путь)"""
+        node = self._root
+        found = None
+        for part in reversed(parts):
+            node = node.children.get(part)
+            if node is None:
+                break
+            if node.description is not None:
+                found = node.description
+        return found
+
+    def _match_context(self, pattern: str, parts: List[str]) -> str:
+        """Контекстные правила для путей, суффикс которых не описан"""
+        descriptions = self.descriptions
+        present = set(parts)
+
+        # MotorVibrator[N].VFD.xxx или MotorVibFeeder[N].VFD.xxx
+        if 'VFD' in present:
+            vfd_idx = parts.index('VFD')
+            if vfd_idx + 1 < len(parts) and parts[vfd_idx + 1] in descriptions:
+                return descriptions[parts[vfd_idx + 1]]
+
+        # MotorVibFeeder[N].rTempBearing[N]
+        if 'MotorVibFeeder' in present and 'rTempBearing' in present and 'rTempBearing' in descriptions:
+            return descriptions['rTempBearing']
+
+        for marker, keys in _KEYED_RULES:
+            if marker in pattern:
+                for key in keys:
+                    if key in present and key in descriptions:
+                        return descriptions[key]
+
+        for markers, prefixes in _PREFIX_RULES:
+            if present.isdisjoint(markers):
+                continue
+            for part in parts:
+                if part in descriptions and (prefixes is None or part.startswith(prefixes)):
+                    return descriptions[part]
+
+        return ''
+
+
+# Словарь описаний переменных
+DESCRIPTIONS = {
+    # === GLOBAL.st ===
+    "ICUR_PRECENT": "Коэффициент использования установленной мощности (в процентах)",
+    "rElectricityMeter": "Раход электроэнергии",
+    "EFFICIENCY_LIMIT_RATE": "Коэффицент ограничения производительности (0-1)",
+    "ANNUNCIATOR_LIGHT_HZ": "Световая индикация Гц",
+
+    "VFD_SMOOTH_SET_FREQUENCY": "Опция плавного задания частоты",
+    "VFD_FREQUENCY_SYNC_TOLERANCE": "Допустимая разница частот для синхронизации моторов",
+    "MOTOR_FREQUENCY_CONVEYOR": "Частота мотора конвейера",
+    "MOTOR_FREQUENCY_DUMPER_CONVEYOR": "Частота мотора конвейера отвалообразователя",
+    "MOTOR_FREQUENCY_DUMPER_ROTATION": "Частота мотора поворота отвалообразователя",
+    "CONVEYOR_DEAFULT_SPEED": "Скорость конвейера",
+
+    "BUNKER_WORK_PRECENT_1": "Уставка пропорции шихтования для бункера 1",
+    "BUNKER_WORK_PRECENT_2": "Уставка пропорции шихтования для бункера 2",
+    "BUNKER_WORK_PRECENT_3": "Уставка пропорции шихтования для бункера 3",
+    "BUNKER_MINIMAL_WEIGHT": "Уставка минимального веса бункера. Результат <= считывается алгоритмом как пустой бункер.",
+
+    # ST_AlarmSetpoints - используется для всех *_POINTS
+    "LL_Value": "Уставка Low-Low",
+    "L_Value": "Уставка Low",
+    "H_Value": "Уставка High",
+    "HH_Value": "Уставка High-High",
+
+    # ST_BunkerVibratorSettings
+    "TIME_ACTIVE": "Время активной работы вибратора",
+    "TIME_PAUSE_VIBRATOR": "Время паузы вибратора между циклами",
+    "TIME_PAUSE_FB": "Время паузы ФБ между подходами",
+
+    "TIME_WAITING_FEEDBACK": "Таймер ожидания пропавшего сигнала обратной связи работы механизма",
+    "PNEUMATIC_COLLAPSE_TIME": "Уставка времени таймера пневмообрушения",
+
+    # ST_PreStartAlarmSettings
+    "OPTION_ENABLE": "Опция на включение ППЗ в алгоритм",
+    "TIME_FIRST_SIGNAL": "Время звучания первого сигнала",
+    "TIME_FIRST_SIGNAL_PAUSE": "Пауза после первого сигнала",
+    "TIME_SECOND_SIGNAL": "Время звучания второго сигнала",
+    "TIME_SECOND_SIGNAL_PAUSE": "Пауза после втотрого сигнала",
+
+    # === ST_Commands ===
+    "cmdResetAll": "Сброс всех ошибок",
+    "cmdStartCommon": "Команда общего пуска",
+    "cmdStopCommon": "Команда общего останова",
+    "cmdEmergencyStopCommon": "Команда общей аварийной остановки",
+    "cmdSetToRepair": "Команда переключения в режим \"Ремонт\"",
+    "cmdSetToManual": "Команда переключения в режим \"Ручной\"",
+    "cmdSetToAuto": "Команда переключения в режим \"Автоматический\"",
+    "cmdBuildCircuitOn": "Команда \"Собрать цепь\"",
+    "cmdBuildCircuitOff": "Команда \"Разобрать цепь\"",
+    "cmdStartVibrator": "Команда \"Пуск вибраторов\"",
+    "cmdStopVibrator": "Команда \"Стоп вибраторов\"",
+    "cmdEmergencyStopVibrator": "Команда \"Аварийная остановка вибраторов\"",
+    "cmdAddVib1": "Команда \"Добавить вибратор 1\"",
+    "cmdAddVib2": "Команда \"Добавить вибратор 2\"",
+    "cmdAddVib3": "Команда \"Добавить вибратор 3\"",
+    "cmdAddVib4": "Команда \"Добавить вибратор 4\"",
+
+    # === ST_CommonSignals ===
+    "fbEmergencyStopBtn": "Кнопка \"Аварийная остановка\"",
+    "fbRemoteModeBtn": "Режим работы ( 1 - дистанционный, 0 - местный)",
+    "fbRealyCurrentControl": "Реле контроля фаз",
+    "fbQF1": "Состояние автомат. выключателя (1 - включен, 0 - выключен)",
+    "fb9QF1": "Состояние автомат. выключателя (1 - включен, 0 - выключен)",
+    "fb10QF1": "Состояние автомат. выключателя (1 - включен, 0 - выключен)",
+    "fb11QF1": "Состояние автомат. выключателя (1 - включен, 0 - выключен)",
+    "qx6KM1": "Контактор 6KM1",
+
+    # === MAIN.st local vars ===
+    "xStateAutoWorking": "Система полностью запущена и работает в автоматическом режиме",
+    "xStateEmergencyStop": "Система была аварийно остановлена",
+    "xStateErrorCheckReady": "Проверки стадии готовности к пуску провалились",
+    "xStateErrorAcceptIdle": "Невозможно принять коэффицент шихтования по заданию оператора - сумма коэффицентов не равна 100",
+    "xStateRemoteAuto": "Режим управления \"Автоматический\"",
+    "xStateRemoteManual": "Режим управления \"Ручной\"",
+    "xStateRemoteRepair": "Режим управления \"Ремонт\"",
+
+    # === ST_Bunker ===
+    "rWeight": "Весы бункера",
+    "rProportionActual": "Пропорция от веса",
+    "rMotorVibFeederCommonFrequency": "Частота двух моторов вибропитателя",
+    "cmdDumpingPrecent": "Задание процентного соотношения сбрасывания",
+    "xStateWarning": "Программное предупреждение",
+    "xStateFailure": "Программная ошибка",
+    "fbStateHatch": "Положение люка (1 - закрыт , 0 - открыт )",
+    "qxLightRed": "Красный сигнал светофора",
+    "qxLightYellow": "Желтый сигнал светофора",
+    "qxLightGreen": "Зеленый сигнал светофора",
+    "fbBtnStart": "Кнопка \"Пуск питателя\" NO",
+    "fbBtnStop": "Кнопка \"Стоп питателя\" NO",
+    "fbBtnEmergencyStop": "Кнопка \"Аварийная остановка\" NC",
+    "cmdStartFeeder": "Команда \"Пуск питателя\"",
+    "cmdStopFeeder": "Команда \"Стоп питателя\"",
+    "cmdEmergencyStopFeeder": "Команда \"Аварийная остановка\"",
+    "cmdReset": "Сброс ошибок",
+
+    # === ST_VFD ===
+    "qrOutFrequency": "Выходная частота",
+    "rActualFrequency": "Текущая частота ЧРП",
+    "wMotorCurrent": "Ток эл. двигателя",
+    "cmdSetFrequency": "Ручное задание частоты",
+
+    # === ST_MotorVibFeeder ===
+    "rTempBearing": "Температура подшипникового узла (в °C)",
+
+    # === ST_Dumper / ST_ConveyorBasic / ST_ConveyorPrefabricated ===
+    "xStateEnable": "Механизм полностью запущен",
+    "xStateStarting": "Процесс запуска (вместе с ППЗ)",
+    "xHLA": "Световая сигнализация",
+    "xSoundAlarm": "Звуковая сигнализация",
+    "fbYE1": "Обнаружение металла (металлодетектор)",
+    "cmdStartConveyor": "Команда пуска конвейера",
+    "cmdStopConveyor": "Команда останова конвейера",
+    "cmdEmergencyStop": "Команда аварийной остановки",
+    "cmdTurnLeft": "Команда поворота влево",
+    "cmdTurnRight": "Команда поворота вправо",
+    "fbBtnTurnLeft": "Кнопка поворота влево",
+    "fbBtnTurnRight": "Кнопка поворота вправо",
+    "fbEndSwitchRight": "Концевой выключатель правого положения",
+    "fbEndSwitchLeft": "Концевой выключатель левого положения",
+    "fbBtnRemoteMode": "Кнопка режима",
+
+    # SIMULATION
+    "SIMULATION": "Режим симуляции",
+}
+
+_resolver = DescriptionResolver(DESCRIPTIONS)
+
+
+def find_description(variable_path: str) -> str:
+    """
+    Найти описание для переменной по её пути (например, 'stBunker[1].rWeight')
+
+    Args:
+        variable_path: Путь к переменной (например, 'stBunker[1].MotorVibFeeder[1].VFD.qrOutFrequency')
+
+    Returns:
+        Описание переменной или пустую строку, если не найдено
+    """
+    return _resolver.resolve(variable_path)
@@ -7,6 +7,13 @@ Modbus Register Excel Exporter
 
 Использование:
     python3 export_to_excel.py
+    python3 export_to_excel.py --db other.db --output other.xlsx
+    python3 export_to_excel.py --plc 2            # Карта одного ПЛК
+    python3 export_to_excel.py --site "Карьер"    # ПЛК одной площадки
+
+    # Как библиотека (modbus_cli выполняет экспорт в фоновом потоке)
+    from export_to_excel import export_workbook
+    export_workbook(db_path, output_path, progress=lambda step, done, total: ..., plc_id=2)
 
 Требования:
     pip install openpyxl
@@ -15,19 +22,24 @@ Modbus Register Excel Exporter
 Дата: 2025-12-12
 """
 
+import argparse
 import sqlite3
 from pathlib import Path
-from typing import List, Tuple
+from typing import Callable, List, Optional, Tuple
 
 try:
     from openpyxl import Workbook
-    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
     from openpyxl.utils import get_column_letter
 except ImportError:
+    if __name__ != '__main__':
+        raise  # Импорт как библиотеки: сообщение - забота вызывающего
     print("❌ Библиотека openpyxl не установлена")
     print("   Установите: pip install openpyxl")
     exit(1)
 
+from register_db import plc_filter, register_stats_source
+
 
 # Пути к файлам
 SCRIPT_DIR = Path(__file__).parent
@@ -41,28 +53,42 @@ COLOR_REAL = 'D9EAD3'    # Зелёный для REAL
 COLOR_INT = 'FFF2CC'     # Жёлтый для INT/UINT/WORD
 COLOR_SECTION = 'F2F2F2' # Светло-серый для разделителей секций
 
+# Ход экспорта: (этап - лист или сохранение, выполнено этапов, всего этапов)
+ProgressCallback = Callable[[str, int, int], None]
+
 
 class ExcelExporter:
     """Экспорт данных из БД в Excel с форматированием"""
 
-    def __init__(self, db_path: Path):
+    def __init__(self, db_path: Path, plc_id: Optional[int] = None, site: Optional[str] = None):
         self.db_path = db_path
         self.conn = sqlite3.connect(db_path)
         self.conn.row_factory = sqlite3.Row
+        self.plc_id = plc_id
+        self.site = site
         self.wb = Workbook()
         self.wb.remove(self.wb.active)  # Удалить дефолтный лист
-
-    def export(self):
-        """Экспортировать все данные"""
-        # Создать листы для каждого типа регистров
-        self._export_register_type('holding_registers', 'Holding Registers')
-        self._export_register_type('input_registers', 'Input Registers')
-
-        # Создать лист с резервами
-        self._export_gaps()
-
-        # Создать сводную статистику
-        self._export_statistics()
+        self._add_row_styles()
+
+    def sheets(self) -> List[Tuple[str, Callable[[], None]]]:
+        """Листы книги в порядке построения: (имя, функция)"""
+        return [
+            # Листы для каждого типа регистров
+            ('Holding Registers', lambda: self._export_register_type('holding_registers', 'Holding Registers')),
+            ('Input Registers', lambda: self._export_register_type('input_registers', 'Input Registers')),
+            # Лист с резервами
+            ('Резервы', self._export_gaps),
+            # Сводная статистика
+            ('Статистика', self._export_statistics),
+        ]
+
+    def export(self, progress: Optional[ProgressCallback] = None, total: Optional[int] = None):
+        """Экспортировать все данные; progress(лист, готово, всего) - после каждого листа"""
+        sheets = self.sheets()
+        for done, (sheet_name, build) in enumerate(sheets, 1):
+            build()
+            if progress:
+                progress(sheet_name, done, total or len(sheets))
 
     def _export_register_type(self, type_name: str, sheet_name: str):
         """Экспортировать регистры определённого типа"""
@@ -86,7 +112,8 @@ class ExcelExporter:
 
         # Получить данные из БД
         cursor = self.conn.cursor()
-        cursor.execute("""
+        where, params = self._plc_filter('r')
+        cursor.execute(f"""
             SELECT
                 r.register_address,
                 r.bit_index,
@@ -99,9 +126,9 @@ class ExcelExporter:
             JOIN data_types dt ON r.data_type_id = dt.id
             JOIN sections s ON r.section_id = s.id
             JOIN register_types rt ON r.register_type_id = rt.id
-            WHERE rt.name = ?
+            WHERE rt.name = ?{where}
             ORDER BY s.start_register, r.register_address, r.bit_index
-        """, (type_name,))
+        """, [type_name] + params)
 
         current_section = None
         row_num = 2
@@ -162,7 +189,8 @@ class ExcelExporter:
 
         # Получить данные
         cursor = self.conn.cursor()
-        cursor.execute("""
+        where, params = self._plc_filter('g')
+        cursor.execute(f"""
             SELECT
                 rt.name AS register_type,
                 g.start_register,
@@ -170,8 +198,9 @@ class ExcelExporter:
                 g.purpose
             FROM register_gaps g
             JOIN register_types rt ON g.register_type_id = rt.id
+            WHERE 1=1{where}
             ORDER BY rt.id, g.start_register
-        """)
+        """, params)
 
         row_num = 2
         for row in cursor.fetchall():
@@ -198,13 +227,16 @@ class ExcelExporter:
         ws['A1'] = 'Статистика Modbus регистров'
         ws['A1'].font = Font(bold=True, size=14)
 
-        # Общая статистика
+        # Общая статистика - из счётчиков по секциям, без обхода registers
         cursor = self.conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM registers")
-        total_registers = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(DISTINCT section_id) FROM registers")
-        total_sections = cursor.fetchone()[0]
+        stats_from = f"FROM {register_stats_source(self.conn)} st JOIN sections s ON st.section_id = s.id"
+        where, params = self._plc_filter('s')
+        cursor.execute(f"""
+            SELECT IFNULL(SUM(st.registers), 0), COUNT(DISTINCT st.section_id)
+            {stats_from}
+            WHERE 1=1{where}
+        """, params)
+        total_registers, total_sections = cursor.fetchone()
 
         ws['A3'] = 'Общая статистика:'
         ws['A3'].font = Font(bold=True)
@@ -217,13 +249,14 @@ class ExcelExporter:
         ws['A7'] = 'Регистры по типам данных:'
         ws['A7'].font = Font(bold=True)
 
-        cursor.execute("""
-            SELECT dt.name, COUNT(*) as count
-            FROM registers r
-            JOIN data_types dt ON r.data_type_id = dt.id
+        cursor.execute(f"""
+            SELECT dt.name, SUM(st.registers) as count
+            {stats_from}
+            JOIN data_types dt ON st.data_type_id = dt.id
+            WHERE 1=1{where}
             GROUP BY dt.name
             ORDER BY count DESC
-        """)
+        """, params)
 
         row_num = 8
         for row in cursor.fetchall():
@@ -235,14 +268,14 @@ class ExcelExporter:
         ws['A' + str(row_num + 1)] = 'Топ-10 секций по количеству регистров:'
         ws['A' + str(row_num + 1)].font = Font(bold=True)
 
-        cursor.execute("""
-            SELECT s.name, COUNT(*) as count
-            FROM registers r
-            JOIN sections s ON r.section_id = s.id
-            GROUP BY s.name
+        cursor.execute(f"""
+            SELECT s.name, SUM(st.registers) as count
+            {stats_from}
+            WHERE 1=1{where}
+            GROUP BY s.id
             ORDER BY count DESC
             LIMIT 10
-        """)
+        """, params)
 
         row_num += 2
         for row in cursor.fetchall():
@@ -253,6 +286,10 @@ class ExcelExporter:
         # Автоширина
         self._auto_size_columns(ws)
 
+    def _plc_filter(self, alias: str) -> Tuple[str, List]:
+        """Условие по ПЛК/площадке экспорта для таблицы с псевдонимом alias"""
+        return plc_filter(self.conn, alias, self.plc_id, self.site)
+
     def _add_section_separator(self, ws, row_num: int, section_name: str):
         """Добавить разделитель секции"""
         ws.insert_rows(row_num)
@@ -264,6 +301,20 @@ class ExcelExporter:
         # Объединить ячейки
         ws.merge_cells(start_row=row_num, start_column=1, end_row=row_num, end_column=5)
 
+    def _add_row_styles(self):
+        """Именованные стили строк данных по цвету заливки.
+
+        Стиль назначается ячейке по имени; отдельные fill/border/alignment на каждую
+        ячейку openpyxl сравнивает со всеми уже известными - это основное время экспорта.
+        """
+        for color in (COLOR_BOOL, COLOR_REAL, COLOR_INT, 'FFFFFF'):
+            self.wb.add_named_style(NamedStyle(
+                name=f'Modbus {color}',
+                fill=PatternFill(start_color=color, end_color=color, fill_type='solid'),
+                border=self._get_border(),
+                alignment=Alignment(vertical='center', wrap_text=True)
+            ))
+
     def _format_data_row(self, ws, row_num: int, data_type: str):
         """Форматировать строку данных"""
         # Определить цвет заливки
@@ -276,14 +327,8 @@ class ExcelExporter:
         else:
             color = 'FFFFFF'
 
-        fill = PatternFill(start_color=color, end_color=color, fill_type='solid')
-        border = self._get_border()
-
         for col_num in range(1, 6):
-            cell = ws.cell(row=row_num, column=col_num)
-            cell.fill = fill
-            cell.border = border
-            cell.alignment = Alignment(vertical='center', wrap_text=True)
+            ws.cell(row=row_num, column=col_num).style = f'Modbus {color}'
 
     def _get_border(self) -> Border:
         """Получить стиль границ"""
@@ -317,32 +362,60 @@ class ExcelExporter:
         self.conn.close()
 
 
+def export_workbook(db_path: Path, output_path: Path, progress: Optional[ProgressCallback] = None,
+                    plc_id: Optional[int] = None, site: Optional[str] = None) -> Path:
+    """
+    Экспорт БД в файл Excel: листы, затем сохранение - последний этап progress
+
+    plc_id/site ограничивают книгу одним ПЛК или площадкой (по умолчанию - вся БД).
+
+    Соединение с БД открывается в вызывающем потоке - функцию можно выполнять в рабочем потоке.
+    """
+    if not db_path.exists():
+        raise FileNotFoundError(f"База данных не найдена: {db_path}")
+    exporter = ExcelExporter(db_path, plc_id, site)
+    try:
+        total = len(exporter.sheets()) + 1
+        exporter.export(progress, total)
+        exporter.save(output_path)
+        if progress:
+            progress(output_path.name, total, total)
+    finally:
+        exporter.close()
+    return output_path
+
+
 def main():
     """Главная функция"""
+    arg_parser = argparse.ArgumentParser(description='Экспорт БД Modbus регистров в Excel')
+    arg_parser.add_argument('--db', type=Path, default=DB_PATH, help='Путь к БД регистров')
+    arg_parser.add_argument('--output', type=Path, default=EXCEL_OUTPUT_PATH, help='Файл Excel')
+    arg_parser.add_argument('--plc', type=int, default=None, help='ID ПЛК в БД (по умолчанию - все)')
+    arg_parser.add_argument('--site', default=None, help='Площадка (по умолчанию - все)')
+    args = arg_parser.parse_args()
+
     print("=" * 60)
     print("Modbus Register Excel Exporter")
     print("=" * 60)
 
     # Проверка наличия БД
-    if not DB_PATH.exists():
-        print(f"❌ База данных не найдена: {DB_PATH}")
+    if not args.db.exists():
+        print(f"❌ База данных не найдена: {args.db}")
         print("   Сначала выполните: python3 migrate_from_fc.py")
-        return
+        return 1
 
-    # Экспорт данных
-    print(f"\n📤 Экспорт из базы данных: {DB_PATH.name}")
-    exporter = ExcelExporter(DB_PATH)
-    exporter.export()
+    def report(step: str, done: int, total: int):
+        icon = '💾' if done == total else '📄'
+        print(f"   {icon} [{done}/{total}] {step}")
 
-    # Сохранить файл
-    print(f"\n💾 Сохранение в файл: {EXCEL_OUTPUT_PATH.name}")
-    exporter.save(EXCEL_OUTPUT_PATH)
-    exporter.close()
+    # Экспорт данных и сохранение файла
+    print(f"\n📤 Экспорт из базы данных: {args.db.name}")
+    export_workbook(args.db, args.output, report, plc_id=args.plc, site=args.site)
 
     print(f"\n✅ Экспорт завершён успешно!")
-    print(f"   Файл: {EXCEL_OUTPUT_PATH}")
+    print(f"   Файл: {args.output}")
     print("=" * 60)
 
 
 if __name__ == '__main__':
-    main()
+    exit(main())
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modbus Frame Log
+=================
+Запись сырых образов awModbusInputRegisters / awModbusHoldingRegisters
+с метками времени в компактный двоичный журнал (дельта к предыдущему кадру)
+и воспроизведение в декодер, архив или эмулятор ПЛК.
+
+Использование:
+    python3 frame_log.py --record 127.0.0.1:5020 --out shift.mbfl   # Запись опроса
+    python3 frame_log.py --info shift.mbfl                          # Сводка журнала
+    python3 frame_log.py --replay shift.mbfl --port 5020 --speed 10 # Эмулятор ПЛК, 10x
+
+    from frame_log import FrameLogWriter, FrameLogReader
+    with FrameLogWriter('shift.mbfl') as log:
+        log.write(time.time(), 'input_registers', frame)
+    for times, frames in FrameLogReader('shift.mbfl').batches('input_registers', 4096):
+        plan.decode_batch(frames)                                   # Максимальная скорость
+
+Возможности:
+    - Кадр хранится как изменённые диапазоны слов относительно предыдущего
+      кадра того же образа; диапазоны, разделённые 1-2 неизменными словами,
+      сливаются (заголовок диапазона - 2 слова)
+    - Каждые keyframe_interval кадров - полный кадр: расхождение образа
+      не распространяется дальше ближайшего полного кадра
+    - Журнал читается через отображение в память (np.memmap): многочасовая
+      запись не загружается целиком, страницы подгружаются по мере чтения
+    - Воспроизведение: итератор кадров, пакеты (N, 512) для decode_batch,
+      асинхронное воспроизведение в реальном времени или с ускорением
+      (sink_server / sink_historian подключают эмулятор и архив)
+
+Формат файла (little-endian):
+    Заголовок: b'MBFL', версия u8, размер образа u16
+    Кадр: образ u8 (0 - input, 1 - holding; бит 7 - полный кадр),
+          время f8 (Unix, с), число диапазонов u16,
+          диапазоны: начало u16, длина u16, слова u16 * длина
+
+Требования:
+    pip install numpy
+
+Дата: 2026-10-17
+"""
+
+import argparse
+import asyncio
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from register_decoder import DB_PATH, IMAGE_WORDS
+
+MAGIC = b'MBFL'
+VERSION = 1
+
+# Образы регистров в журнале
+IMAGES = ('input_registers', 'holding_registers')
+
+# Бит полного кадра в байте образа
+KEYFRAME_FLAG = 0x80
+
+# Неизменных слов между диапазонами, при которых диапазоны сливаются
+MERGE_GAP = 2
+
+_HEADER = struct.Struct('<4sBH')
+_FRAME = struct.Struct('<BdH')
+_RUN = struct.Struct('<HH')
+
+
+def encode_runs(previous: 'np.ndarray', current: 'np.ndarray') -> List[Tuple[int, int]]:
+    """
+    Диапазоны изменённых слов [(начало, длина)]
+
+    Диапазоны, разделённые не более чем MERGE_GAP неизменными словами, сливаются.
+    """
+    changed = np.flatnonzero(previous != current)
+    if not len(changed):
+        return []
+    breaks = np.flatnonzero(np.diff(changed) > MERGE_GAP + 1)
+    starts = changed[np.concatenate(([0], breaks + 1))]
+    ends = changed[np.concatenate((breaks, [len(changed) - 1]))] + 1
+    return list(zip(starts.tolist(), (ends - starts).tolist()))
+
+
+class FrameLogWriter:
+    """Запись журнала кадров"""
+
+    def __init__(self, path: Path, image_size: int = IMAGE_WORDS, keyframe_interval: int = 600):
+        """
+        Args:
+            path: Файл журнала (перезаписывается)
+            keyframe_interval: Полный кадр каждые N кадров образа
+        """
+        self.path = Path(path)
+        self.image_size = image_size
+        self.keyframe_interval = keyframe_interval
+        self.frames = 0
+        self._file = open(self.path, 'wb')
+        self._file.write(_HEADER.pack(MAGIC, VERSION, image_size))
+        self._previous = {}
+        self._since_keyframe = {}
+
+    def write(self, timestamp: float, image: str, words):
+        """Записать кадр образа ('input_registers' / 'holding_registers')"""
+        image_id = IMAGES.index(image)
+        words = np.asarray(words, dtype='<u2')
+        if words.shape != (self.image_size,):
+            raise ValueError(f"Ожидается {self.image_size} слов в кадре, получено {words.shape}")
+
+        previous = self._previous.get(image_id)
+        since = self._since_keyframe.get(image_id, 0)
+        if previous is None or since >= self.keyframe_interval:
+            image_id |= KEYFRAME_FLAG
+            runs = [(0, self.image_size)]
+            self._since_keyframe[image_id & ~KEYFRAME_FLAG] = 1
+        else:
+            runs = encode_runs(previous, words)
+            self._since_keyframe[image_id] = since + 1
+
+        chunks = [_FRAME.pack(image_id, timestamp, len(runs))]
+        for start, length in runs:
+            chunks.append(_RUN.pack(start, length))
+            chunks.append(words[start:start + length].tobytes())
+        self._file.write(b''.join(chunks))
+        self._previous[image_id & ~KEYFRAME_FLAG] = words.copy()
+        self.frames += 1
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self) -> 'FrameLogWriter':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FrameLogReader:
+    """Чтение журнала кадров"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        if self.path.stat().st_size < _HEADER.size:
+            raise ValueError(f"Неизвестный формат журнала: {self.path}")
+        self.data = np.memmap(self.path, dtype=np.uint8, mode='r')
+        magic, version, self.image_size = _HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Неизвестный формат журнала: {self.path}")
+
+    def __iter__(self) -> Iterator[Tuple[float, str, 'np.ndarray']]:
+        """
+        Кадры по порядку: (время, образ, слова)
+
+        Массив слов образа переиспользуется - копируйте его, если нужно сохранить.
+        Обрезанный последний кадр (запись прервана) пропускается.
+        """
+        data = self.data
+        images = [np.zeros(self.image_size, dtype='<u2') for _ in IMAGES]
+        seen = [False] * len(IMAGES)
+        offset = _HEADER.size
+        while offset + _FRAME.size <= len(data):
+            image_id, timestamp, run_count = _FRAME.unpack_from(data, offset)
+            position = offset + _FRAME.size
+            runs = []
+            for _ in range(run_count):
+                if position + _RUN.size > len(data):
+                    return
+                start, length = _RUN.unpack_from(data, position)
+                position += _RUN.size
+                runs.append((start, length, position))
+                position += length * 2
+            if position > len(data):
+                return
+            offset = position
+
+            index = image_id & ~KEYFRAME_FLAG
+            seen[index] = seen[index] or bool(image_id & KEYFRAME_FLAG)
+            if not seen[index]:
+                continue  # Дельта без полного кадра - нечего к ней применить
+            words = images[index]
+            for start, length, run_offset in runs:
+                words[start:start + length] = np.frombuffer(data, dtype='<u2', count=length, offset=run_offset)
+            yield timestamp, IMAGES[index], words
+
+    def batches(self, image: str = 'input_registers',
+                size: int = 4096) -> Iterator[Tuple['np.ndarray', 'np.ndarray']]:
+        """Кадры одного образа пакетами: (время (n,), кадры (n, image_size))"""
+        times = np.empty(size)
+        frames = np.empty((size, self.image_size), dtype='<u2')
+        count = 0
+        for timestamp, name, words in self:
+            if name != image:
+                continue
+            times[count] = timestamp
+            frames[count] = words
+            count += 1
+            if count == size:
+                yield times.copy(), frames.copy()
+                count = 0
+        if count:
+            yield times[:count].copy(), frames[:count].copy()
+
+    def summary(self) -> dict:
+        """Число кадров по образам, интервал времени, размер относительно несжатых кадров"""
+        counts = dict.fromkeys(IMAGES, 0)
+        first = last = None
+        for timestamp, image, _ in self:
+            counts[image] += 1
+            first = timestamp if first is None else first
+            last = timestamp
+        raw = sum(counts.values()) * (_FRAME.size - 2 + self.image_size * 2)
+        return {'frames': counts, 'start': first, 'end': last, 'bytes': len(self.data),
+                'ratio': raw / len(self.data) if len(self.data) else 0.0}
+
+    async def replay(self, sink: Callable[[float, str, 'np.ndarray'], None], speed: Optional[float] = 1.0,
+                     yield_every: int = 256):
+        """
+        Воспроизвести журнал в sink(время, образ, слова)
+
+        Args:
+            speed: Ускорение относительно записи (1.0 - реальное время),
+                None - максимальная скорость
+            yield_every: Отдавать управление event loop каждые N кадров
+                при максимальной скорости
+        """
+        loop = asyncio.get_running_loop()
+        started = None
+        for index, (timestamp, image, words) in enumerate(self):
+            if speed is None:
+                if index % yield_every == 0:
+                    await asyncio.sleep(0)
+            else:
+                if started is None:
+                    started = (loop.time(), timestamp)
+                delay = started[0] + (timestamp - started[1]) / speed - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            sink(timestamp, image, words)
+
+
+def sink_server(server) -> Callable[[float, str, 'np.ndarray'], None]:
+    """Приёмник воспроизведения: образы эмулятора ПЛК (modbus_server.ModbusServer)"""
+    def sink(timestamp: float, image: str, words: 'np.ndarray'):
+        target = server.input if image == 'input_registers' else server.holding
+        target.words[:] = words
+    return sink
+
+
+def sink_historian(historian) -> Callable[[float, str, 'np.ndarray'], None]:
+    """Приёмник воспроизведения: архив значений (historian.Historian), только input-регистры"""
+    def sink(timestamp: float, image: str, words: 'np.ndarray'):
+        if image == 'input_registers':
+            historian.append_frame(timestamp, words)
+    return sink
+
+
+def record(path: Path, server_address: str, cycles: Optional[int], period: float, db_path: Path):
+    """Опрашивать образы сервера по карте из БД и записывать кадры в журнал"""
+    from poll_planner import PollExecutor, PollPlanner
+
+    planner = PollPlanner.from_database(db_path, default_intervals={image: period for image in IMAGES})
+    host, port = server_address.rsplit(':', 1)
+    executor = PollExecutor(planner.plan(), host, int(port))
+    with FrameLogWriter(path) as log:
+        executor.on_update(lambda image, words, reads: log.write(time.time(), image, words))
+        try:
+            asyncio.run(executor.run(cycles))
+        except KeyboardInterrupt:
+            print("\n⚠️  Остановлено")
+    print(f"✅ Записано кадров: {log.frames}, ошибок чтения: {executor.errors}")
+
+
+async def replay_to_server(path: Path, port: int, speed: Optional[float], loop_forever: bool, db_path: Path):
+    from modbus_server import ModbusServer
+
+    server = ModbusServer.from_database(db_path, validate=False)
+    await server.start('0.0.0.0', port)
+    print(f"🏭 Modbus TCP сервер слушает порт {server.port}")
+    reader = FrameLogReader(path)
+    try:
+        while True:
+            await reader.replay(sink_server(server), speed)
+            if not loop_forever:
+                break
+    finally:
+        await server.close()
+
+
+def main():
+    """Главная функция"""
+    arg_parser = argparse.ArgumentParser(description='Журнал сырых кадров регистров')
+    arg_parser.add_argument('--db', type=Path, default=DB_PATH, help='Путь к БД регистров')
+    arg_parser.add_argument('--record', metavar='HOST:PORT', help='Записывать опрос сервера')
+    arg_parser.add_argument('--out', type=Path, default=Path('frames.mbfl'), help='Файл журнала для записи')
+    arg_parser.add_argument('--period', type=float, default=0.1, help='Период опроса при записи, с')
+    arg_parser.add_argument('--cycles', type=int, default=None, help='Циклов записи (по умолчанию - бесконечно)')
+    arg_parser.add_argument('--info', type=Path, metavar='ФАЙЛ', help='Сводка журнала')
+    arg_parser.add_argument('--replay', type=Path, metavar='ФАЙЛ', help='Воспроизвести в эмулятор ПЛК')
+    arg_parser.add_argument('--port', type=int, default=5020, help='Порт эмулятора при воспроизведении')
+    arg_parser.add_argument('--speed', type=float, default=1.0, help='Ускорение воспроизведения (0 - максимум)')
+    arg_parser.add_argument('--loop', action='store_true', help='Повторять журнал бесконечно')
+    args = arg_parser.parse_args()
+
+    print("=" * 60)
+    print("Modbus Frame Log")
+    print("=" * 60)
+
+    if args.record:
+        print(f"\n🏭 Запись {args.record} -> {args.out} каждые {args.period:g} с...")
+        record(args.out, args.record, args.cycles, args.period, args.db)
+
+    if args.info:
+        summary = FrameLogReader(args.info).summary()
+        duration = (summary['end'] - summary['start']) if summary['start'] is not None else 0
+        print(f"\n📄 {args.info}: {summary['bytes'] / 2 ** 20:.1f} МБ, {duration / 3600:.2f} ч")
+        for image, count in summary['frames'].items():
+            print(f"   {image}: {count} кадров")
+        print(f"   Сжатие относительно полных кадров: {summary['ratio']:.1f}x")
+
+    if args.replay:
+        speed = args.speed or None
+        print(f"\n⏱️  Воспроизведение {args.replay} ({'максимальная скорость' if speed is None else f'{speed:g}x'})")
+        try:
+            asyncio.run(replay_to_server(args.replay, args.port, speed, args.loop, args.db))
+        except KeyboardInterrupt:
+            print("\n⚠️  Остановлено")
+
+    print("=" * 60)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,14 +2,23 @@
 """
 Генерация HTML документации Modbus регистров для GitHub Pages
 GitHub Dark Theme с адаптивной мобильной версией
+
+Использование:
+    python3 generate_html_docs.py
+    python3 generate_html_docs.py --plc 2            # Карта одного ПЛК
+    python3 generate_html_docs.py --site "Карьер"    # ПЛК одной площадки
 """
 
+import argparse
 import sqlite3
 import json
 from pathlib import Path
 
-def generate_html_documentation():
-    """Генерирует HTML файл с интерактивной таблицей Modbus регистров"""
+from register_db import plc_filter, register_stats_source
+
+
+def generate_html_documentation(plc_id=None, site=None):
+    """Генерирует HTML файл с интерактивной таблицей Modbus регистров (всей БД или одного ПЛК/площадки)"""
 
     # Путь к БД
     db_path = Path(__file__).parent / 'db' / 'modbus_registers.db'
@@ -17,9 +26,10 @@ def generate_html_documentation():
 
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
+    where, params = plc_filter(conn, 's', plc_id, site)
 
     # Получаем все регистры с полной информацией
-    cursor.execute("""
+    cursor.execute(f"""
         SELECT
             rt.name as register_type,
             s.name as section,
@@ -38,8 +48,9 @@ def generate_html_documentation():
         JOIN register_types rt ON r.register_type_id = rt.id
         JOIN data_types dt ON r.data_type_id = dt.id
         JOIN sections s ON r.section_id = s.id
+        WHERE 1=1{where}
         ORDER BY rt.id, r.register_address, r.bit_index
-    """)
+    """, params)
 
     registers = cursor.fetchall()
 
@@ -58,17 +69,19 @@ def generate_html_documentation():
             'is_reserved': bool(row[8])
         })
 
-    # Статистика
-    cursor.execute("""
+    # Статистика - из счётчиков register_stats (ведутся триггерами); БД старой схемы - по registers
+    cursor.execute(f"""
         SELECT
             rt.name,
-            COUNT(*) as total,
-            SUM(CASE WHEN r.is_reserved = 1 THEN 1 ELSE 0 END) as reserved,
-            SUM(CASE WHEN r.description IS NOT NULL AND r.description != '' THEN 1 ELSE 0 END) as with_desc
-        FROM registers r
-        JOIN register_types rt ON r.register_type_id = rt.id
+            SUM(st.registers) as total,
+            SUM(st.reserved) as reserved,
+            SUM(st.described) as with_desc
+        FROM {register_stats_source(conn)} st
+        JOIN sections s ON st.section_id = s.id
+        JOIN register_types rt ON s.register_type_id = rt.id
+        WHERE 1=1{where}
         GROUP BY rt.name
-    """)
+    """, params)
 
     stats_raw = {row[0]: {'total': row[1], 'reserved': row[2], 'with_desc': row[3]}
                  for row in cursor.fetchall()}
@@ -741,7 +754,7 @@ def generate_html_documentation():
             <div class="stat-card">
                 <h3>Всего регистров</h3>
                 <div class="number">{stats['holding']['total'] + stats['input']['total']}</div>
-                <div class="label">Покрытие описаниями: {round((stats['holding']['with_desc'] + stats['input']['with_desc']) / (stats['holding']['total'] + stats['input']['total']) * 100)}%</div>
+                <div class="label">Покрытие описаниями: {round((stats['holding']['with_desc'] + stats['input']['with_desc']) / max(1, stats['holding']['total'] + stats['input']['total']) * 100)}%</div>
             </div>
         </div>
 
@@ -928,4 +941,8 @@ def generate_html_documentation():
     print(f"   - Всего: {stats['holding']['total'] + stats['input']['total']}")
 
 if __name__ == '__main__':
-    generate_html_documentation()
+    arg_parser = argparse.ArgumentParser(description='HTML документация Modbus регистров')
+    arg_parser.add_argument('--plc', type=int, default=None, help='ID ПЛК в БД (по умолчанию - все)')
+    arg_parser.add_argument('--site', default=None, help='Площадка (по умолчанию - все)')
+    args = arg_parser.parse_args()
+    generate_html_documentation(args.plc, args.site)
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FB_ModbusToSCADA Generator
+===========================
+Генерирует POUs/FB_ModbusToSCADA.st из базы регистров (modbus_registers.db).
+Вместо вызова FC_Modbus* на каждый бит и каждое значение (арифметика указателя
+и чтение-изменение-запись слова) сгенерированный код обращается к элементам
+awModbus*Registers напрямую: каждое слово Input-регистров собирается один раз
+из своих битов, REAL копируются парами слов через UNION.
+
+Использование:
+    python3 generate_modbus_fb.py                        # Проверить и записать POUs/FB_ModbusToSCADA.st
+    python3 generate_modbus_fb.py --check                # Только проверка round-trip, файл не меняется
+    python3 generate_modbus_fb.py --output /tmp/FB.st    # Записать в другой файл
+    python3 generate_modbus_fb.py --plc 2 --force        # Другой ПЛК; записать даже при расхождениях
+    python3 generate_modbus_fb.py --cost                 # Оценка времени цикла до/после (scan_cost.py)
+
+Возможности:
+    - BOOL Input: слово собирается в локальном wBits (wBits := 0; wBits.N := ...)
+      и записывается в регистр одним присваиванием
+    - BOOL Holding: прямой доступ к биту слова (X := awModbusHoldingRegisters[N].B)
+    - REAL/TIME: два слова через U_RealToWord/U_TimeToWord (регистр N - старшее слово,
+      как в FC_ModbusReadReal/FC_ModbusWriteReal); INT/UINT/DINT - *_TO_WORD/WORD_TO_*
+    - Уставки времени (регистр REAL в секундах, переменная TIME по symbol_table.py):
+      X := REAL_TO_TIME(uReal.rTag * 1000)
+    - Объявления VAR_INPUT берутся из текущего файла, заголовки секций и маркеры
+      блоков - в формате migrate_from_fc.py: сгенерированный файл снова мигрируется
+    - Проверка round-trip: FC_ModbusParser разбирает сгенерированный текст, карта
+      (тип регистра, адрес, бит) -> (тип данных, переменная, секция) должна совпасть
+      с картой текущего файла
+
+Дата: 2026-10-17
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from migrate_from_fc import (DB_PATH, DEFAULT_PLC_ID, FC_MODBUS_PATH, PACKED_WORD, UNDEFINED_SECTION,
+                             WORD_UNIONS, FC_ModbusParser, ModbusRegister)
+from symbol_table import SymbolTable
+
+# Массивы регистров и маркеры блоков (формат migrate_from_fc.py)
+REGISTER_ARRAYS = {'holding_registers': 'awModbusHoldingRegisters', 'input_registers': 'awModbusInputRegisters'}
+BLOCK_MARKERS = {
+    'holding_registers': '// === HOLDING РЕГИСТРЫ (SCADA → PLC) - Чтение уставок ===',
+    'input_registers': '// === INPUT РЕГИСТРЫ (PLC → SCADA) - Запись данных мониторинга ===',
+}
+
+# Тип данных -> число слов регистра
+REGISTER_WORDS = {'BOOL': 1, 'INT': 1, 'UINT': 1, 'DINT': 1, 'REAL': 2, 'TIME': 2}
+
+# (тип регистра, адрес, бит) -> (тип данных, переменная, секция)
+RegisterMap = Dict[Tuple[str, int, Optional[int]], Tuple[str, str, str]]
+
+
+class Section:
+    """Секция карты регистров из таблицы sections"""
+    def __init__(self, register_type: str, name: str, start_register: int, end_register: int):
+        self.register_type = register_type
+        self.name = name
+        self.start_register = start_register
+        self.end_register = end_register
+        self.registers: List[ModbusRegister] = []
+
+    @property
+    def header(self) -> Optional[str]:
+        """Комментарий-заголовок, который FC_ModbusParser разберёт в ту же секцию"""
+        if self.name == UNDEFINED_SECTION:
+            return None
+        span = f"({self.start_register}-{self.end_register})"
+        if self.name.startswith('Модуль ') and ': ' in self.name:
+            module, description = self.name.split(': ', 1)
+            return f"// {module} {span}: {description}"
+        return f"// {self.name} {span}"
+
+
+class ModbusFBGenerator:
+    """
+    Генератор FB_ModbusToSCADA.st по секциям и регистрам БД
+
+    Регистры каждой секции выводятся по возрастанию адреса. Слово, биты
+    которого попали в разные секции или которое занято и битами, и
+    значением, собрать одним присваиванием нельзя - это ошибка карты.
+    """
+
+    def __init__(self, sections: List[Section], table: Optional[SymbolTable] = None):
+        self.sections = sections
+        self.table = table
+        self._check_words()
+
+    @classmethod
+    def from_database(cls, db_path: Path = DB_PATH, plc_id: int = DEFAULT_PLC_ID,
+                      table: Optional[SymbolTable] = None) -> 'ModbusFBGenerator':
+        """Прочитать секции и регистры ПЛК из БД"""
+        conn = sqlite3.connect(db_path)
+        try:
+            # БД до появления колонки plc_id - карта одного ПЛК
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(registers)")}
+            params = (plc_id,) if 'plc_id' in columns else ()
+            sections = {}
+            for section_id, register_type, name, start_reg, end_reg in conn.execute(f"""
+                SELECT s.id, rt.name, s.name, s.start_register, s.end_register
+                FROM sections s
+                JOIN register_types rt ON s.register_type_id = rt.id
+                {'WHERE s.plc_id = ?' if params else ''}
+                ORDER BY s.register_type_id, s.start_register, s.id
+            """, params):
+                sections[section_id] = Section(register_type, name, start_reg, end_reg)
+
+            for section_id, register_type, address, bit_index, data_type, variable, section_name in conn.execute(f"""
+                SELECT r.section_id, rt.name, r.register_address, r.bit_index, dt.name, r.variable_name, s.name
+                FROM registers r
+                JOIN register_types rt ON r.register_type_id = rt.id
+                JOIN data_types dt ON r.data_type_id = dt.id
+                JOIN sections s ON r.section_id = s.id
+                {'WHERE r.plc_id = ?' if params else ''}
+                ORDER BY r.register_address, r.bit_index
+            """, params):
+                # Регистры без заголовка секции FC_ModbusParser относит к секции ''
+                section = '' if section_name == UNDEFINED_SECTION else section_name
+                sections[section_id].registers.append(
+                    ModbusRegister(register_type, address, bit_index, data_type, variable, section))
+        finally:
+            conn.close()
+        return cls(list(sections.values()), table)
+
+    def _check_words(self):
+        """Каждое слово принадлежит одной секции и либо битам BOOL, либо одному значению"""
+        owners: Dict[Tuple[str, int], Tuple[str, str]] = {}
+        for section in self.sections:
+            for reg in section.registers:
+                if reg.data_type not in REGISTER_WORDS:
+                    raise ValueError(f"{reg.variable_name}: тип {reg.data_type} не поддерживается генератором")
+                owner = (section.name, 'BOOL' if reg.data_type == 'BOOL' else reg.variable_name)
+                for address in range(reg.register_address, reg.register_address + REGISTER_WORDS[reg.data_type]):
+                    first = owners.setdefault((reg.register_type, address), owner)
+                    # Биты одной секции делят слово; значение занимает свои слова целиком
+                    if first != owner or (reg.data_type != 'BOOL' and first is not owner):
+                        raise ValueError(f"{reg.register_type} {address}: слово занято '{first[1]}' "
+                                         f"(секция '{first[0]}') и '{reg.variable_name}' (секция '{section.name}')")
+
+    def _is_time(self, variable: str) -> bool:
+        """Переменная TIME, принимающая REAL-уставку в секундах"""
+        if self.table is None:
+            return False
+        declared = self.table.resolve(variable)
+        return declared is not None and self.table.elementary_type(declared) == 'TIME'
+
+    def generate(self, interface: str) -> str:
+        """Текст FB: interface - объявление FUNCTION_BLOCK и VAR_INPUT/VAR_OUTPUT (см. read_interface)"""
+        body: List[str] = []
+        used = set()
+        for register_type in REGISTER_ARRAYS:
+            body += ['', BLOCK_MARKERS[register_type]]
+            for section in self.sections:
+                if section.register_type != register_type:
+                    continue
+                body.append('')
+                if section.header:
+                    body.append(section.header)
+                if register_type == 'holding_registers':
+                    body += self._read_section(section, used)
+                else:
+                    body += self._write_section(section, used)
+
+        local = ["VAR"]
+        if PACKED_WORD in used:
+            local.append(f"\t{PACKED_WORD} : WORD; // Слово Input-регистра, собираемое из битов")
+        for data_type, (union, name, _) in WORD_UNIONS.items():
+            if name in used:
+                local.append(f"\t{name} : {union}; // Преобразование {data_type} <-> 2 слова регистра")
+        local.append("END_VAR")
+
+        header = [
+            '',
+            '// ========================================',
+            '// MODBUS РЕГИСТРЫ',
+            '// Сгенерировано generate_modbus_fb.py из modbus_registers.db - не редактировать вручную',
+            '// ========================================',
+        ]
+        return '\n'.join([interface.rstrip('\n')] + (local if len(local) > 2 else []) + header + body
+                         + ['', 'END_FUNCTION_BLOCK', ''])
+
+    def _read_section(self, section: Section, used: set) -> List[str]:
+        """Holding: регистры -> переменные ПЛК"""
+        array = REGISTER_ARRAYS['holding_registers']
+        lines = []
+        for reg in section.registers:
+            address = reg.register_address
+            if reg.data_type == 'BOOL':
+                lines.append(f"{reg.variable_name} := {array}[{address}].{reg.bit_index};")
+            elif reg.data_type in WORD_UNIONS:
+                _, name, field = WORD_UNIONS[reg.data_type]
+                used.add(name)
+                value = f"{name}.{field}"
+                if reg.data_type == 'REAL' and self._is_time(reg.variable_name):
+                    value = f"REAL_TO_TIME({value} * 1000)"  # Уставка в секундах
+                lines += [f"{name}.wTag[1] := {array}[{address}];",
+                          f"{name}.wTag[0] := {array}[{address + 1}];",
+                          f"{reg.variable_name} := {value};"]
+            else:
+                lines.append(f"{reg.variable_name} := WORD_TO_{reg.data_type}({array}[{address}]);")
+        return lines
+
+    def _write_section(self, section: Section, used: set) -> List[str]:
+        """Input: переменные ПЛК -> регистры, слово BOOL - одним присваиванием"""
+        array = REGISTER_ARRAYS['input_registers']
+        words: Dict[int, List[ModbusRegister]] = defaultdict(list)
+        values = []
+        for reg in section.registers:
+            if reg.data_type == 'BOOL':
+                words[reg.register_address].append(reg)
+            else:
+                values.append(reg)
+
+        items = sorted([(address, bits) for address, bits in words.items()] +
+                       [(reg.register_address, reg) for reg in values], key=lambda item: item[0])
+        lines = []
+        for address, item in items:
+            if isinstance(item, list):
+                used.add(PACKED_WORD)
+                lines.append(f"{PACKED_WORD} := 0;")
+                lines += [f"{PACKED_WORD}.{reg.bit_index} := {reg.variable_name};" for reg in item]
+                lines.append(f"{array}[{address}] := {PACKED_WORD};")
+            elif item.data_type in WORD_UNIONS:
+                _, name, field = WORD_UNIONS[item.data_type]
+                used.add(name)
+                lines += [f"{name}.{field} := {item.variable_name};",
+                          f"{array}[{address}] := {name}.wTag[1];",
+                          f"{array}[{address + 1}] := {name}.wTag[0];"]
+            else:
+                lines.append(f"{array}[{address}] := {item.data_type}_TO_WORD({item.variable_name});")
+        return lines
+
+
+def read_interface(path: Path = FC_MODBUS_PATH) -> str:
+    """
+    Объявление FB из текущего файла: FUNCTION_BLOCK и блоки VAR_INPUT/VAR_OUTPUT/VAR_IN_OUT
+
+    Блоки VAR (локальные переменные ручного кода, например rTempTime)
+    отбрасываются - генератор объявляет свои.
+    """
+    lines = []
+    skipping = False
+    for line in path.read_text(encoding='utf-8').splitlines():
+        word = line.split('//')[0].strip().upper()
+        if skipping:
+            skipping = word != 'END_VAR'
+            continue
+        if not lines:
+            if word.startswith('FUNCTION_BLOCK'):
+                lines.append(line)
+            continue
+        if word == 'VAR' or word.startswith('VAR ') or word.startswith('VAR_TEMP'):
+            skipping = True
+        elif word.startswith('VAR_') or word == 'END_VAR' or lines[-1].split('//')[0].strip().upper() != 'END_VAR':
+            lines.append(line)
+        elif word:
+            break
+    if not lines:
+        raise ValueError(f"{path}: объявление FUNCTION_BLOCK не найдено")
+    return '\n'.join(lines) + '\n'
+
+
+def register_map(path: Path) -> RegisterMap:
+    """Карта регистров файла по FC_ModbusParser"""
+    return {(reg.register_type, reg.register_address, reg.bit_index):
+            (reg.data_type, reg.variable_name, reg.section_name)
+            for reg in FC_ModbusParser(path).iter_registers()}
+
+
+def text_register_map(text: str) -> RegisterMap:
+    """Карта регистров текста FB (через временный файл)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / FC_MODBUS_PATH.name
+        path.write_text(text, encoding='utf-8')
+        return register_map(path)
+
+
+def compare_maps(expected: RegisterMap, actual: RegisterMap) -> List[str]:
+    """Расхождения карт: пустой список - адреса размечены одинаково"""
+    differences = []
+    for key in sorted(expected.keys() | actual.keys(), key=lambda k: (k[0], k[1], -1 if k[2] is None else k[2])):
+        if expected.get(key) != actual.get(key):
+            address = f"{key[0]} {key[1]}" + (f".{key[2]}" if key[2] is not None else '')
+            differences.append(f"{address}: {expected.get(key)} -> {actual.get(key)}")
+    return differences
+
+
+def _scan_cost(text: str) -> Tuple[float, float]:
+    """Худший случай FB_ModbusToSCADA по scan_cost.py: (текущий файл, сгенерированный текст), нс"""
+    from scan_cost import ScanCostAnalyzer, load_costs
+    from st_parser import parse_text, project_files
+
+    costs = load_costs()
+    files = project_files()
+    current = ScanCostAnalyzer(files, costs).pou('FB_ModbusToSCADA').total
+    generated_files = [(path, parse_text(text) if Path(path).resolve() == FC_MODBUS_PATH.resolve() else declarations)
+                       for path, declarations in files]
+    return current, ScanCostAnalyzer(generated_files, costs).pou('FB_ModbusToSCADA').total
+
+
+def main():
+    """Главная функция"""
+    arg_parser = argparse.ArgumentParser(description='Генерация FB_ModbusToSCADA.st из базы регистров')
+    arg_parser.add_argument('--db', type=Path, default=DB_PATH, help='Путь к БД регистров')
+    arg_parser.add_argument('--plc', type=int, default=DEFAULT_PLC_ID, help='ID ПЛК в БД')
+    arg_parser.add_argument('--source', type=Path, default=FC_MODBUS_PATH,
+                            help='Текущий FB: объявления и эталон для проверки')
+    arg_parser.add_argument('--output', type=Path, default=None, help='Файл результата (по умолчанию --source)')
+    arg_parser.add_argument('--check', action='store_true', help='Только проверка, без записи')
+    arg_parser.add_argument('--force', action='store_true', help='Записать несмотря на расхождения')
+    arg_parser.add_argument('--cost', action='store_true', help='Оценка времени цикла до/после')
+    args = arg_parser.parse_args()
+
+    print("=" * 60)
+    print("FB_ModbusToSCADA Generator")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    try:
+        generator = ModbusFBGenerator.from_database(args.db, args.plc, SymbolTable.load())
+        text = generator.generate(read_interface(args.source))
+    except (ValueError, sqlite3.Error) as e:
+        print(f"❌ {e}")
+        return 1
+    registers = sum(len(section.registers) for section in generator.sections)
+    print(f"\n📄 Сгенерировано: {len(generator.sections)} секций, {registers} регистров, "
+          f"{text.count(chr(10))} строк за {(time.perf_counter() - start) * 1000:.0f} мс")
+
+    print(f"\n🔎 Проверка round-trip: {args.source.name}")
+    differences = compare_maps(register_map(args.source), text_register_map(text))
+    if differences:
+        print(f"⚠️  Расхождений с текущим файлом: {len(differences)} (было -> станет)")
+        for line in differences[:20]:
+            print(f"      - {line}")
+        if len(differences) > 20:
+            print(f"      ... и еще {len(differences) - 20}")
+    else:
+        print("✅ Все адреса размечены так же, как в текущем файле")
+
+    if args.cost:
+        from st_parser import ParseError
+        from st_runtime import CompileError
+
+        try:
+            current, generated = _scan_cost(text)
+            print(f"\n⏱️  Худший случай FB_ModbusToSCADA: {current / 1000:.1f} мкс -> {generated / 1000:.1f} мкс "
+                  f"(x{current / generated:.1f})")
+        except (ParseError, CompileError) as e:
+            print(f"\n⚠️  Оценка времени цикла недоступна: {e}")
+
+    if not args.check:
+        output = args.output or args.source
+        if differences and not args.force:
+            print(f"\n❌ {output} не записан: есть расхождения (--force - записать)")
+            print("=" * 60)
+            return 1
+        output.write_text(text, encoding='utf-8')
+        print(f"\n💾 Записано: {os.path.relpath(output)}")
+
+    print("=" * 60)
+    return 1 if differences else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SCADA Heartbeat Monitor
+========================
+Хост-монитор связи с ПЛК на бите SCADA_HEARTBEAT (holding 0.4): переключает
+heartbeat и измеряет задержку до отклика FB_ScadaCommunication во входном
+образе (qxSignalChanged, input 0.6). Гистограммы задержек (в стиле HDR)
+по каждому соединению публикуются на локальном HTTP-эндпоинте метрик.
+
+Использование:
+    python3 heartbeat_monitor.py --targets line1=10.0.0.5:502
+    python3 heartbeat_monitor.py --targets 127.0.0.1:5020 --interval 0.5 --metrics-port 9105
+    curl http://127.0.0.1:9105/metrics
+
+    python3 heartbeat_monitor.py --emulate              # Встроенный эмулятор с моделью FB_ScadaCommunication
+
+Возможности:
+    - Переключение heartbeat через Mask Write (FC 22): остальные команды
+      в holding-регистре 0 не затрагиваются
+    - Две задержки на каждый такт: write - ответ на запись,
+      echo - от отправки до появления импульса qxSignalChanged во входном
+      образе (опрос FC 4 с паузой --poll-interval, по умолчанию 2 мс);
+      пропущенные импульсы считаются отдельно
+    - Состояние qxCommunicationOk / qxCommunicationLost и время с последнего
+      успешного такта - деградация видна задолго до таймаута 5 с
+    - Гистограмма: логарифмические корзины с точностью ~1% (как HdrHistogram),
+      p50/p99/p999, min/max/mean; метрики в формате Prometheus
+    - Адреса битов берутся из БД (SCADA_HEARTBEAT, fbScadaCommunication.*)
+
+Требования:
+    pip install numpy
+
+Дата: 2026-10-17
+"""
+
+import argparse
+import asyncio
+import math
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from poll_planner import ModbusClientConnection
+from register_decoder import DB_PATH, load_register_tags
+from setpoint_encoder import FC_MASK_WRITE_REGISTER
+
+# Биты связи по умолчанию (FB_ModbusToSCADA.st), если их нет в БД
+HEARTBEAT_VARIABLE = 'SCADA_HEARTBEAT'
+ECHO_VARIABLES = {
+    'changed': 'fbScadaCommunication.qxSignalChanged',
+    'ok': 'fbScadaCommunication.qxCommunicationOk',
+    'lost': 'fbScadaCommunication.qxCommunicationLost',
+}
+DEFAULT_BITS = {'heartbeat': (0, 4), 'changed': (0, 6), 'ok': (0, 4), 'lost': (0, 5)}
+
+# Пауза между опросами отклика (FC 4), с: точность измерения против нагрузки на ПЛК
+ECHO_POLL_INTERVAL = 0.002
+
+# Точность гистограммы: 2^SUB_BUCKET_BITS корзин на октаву (~1%)
+SUB_BUCKET_BITS = 7
+
+
+class LatencyHistogram:
+    """
+    Гистограмма задержек с логарифмическими корзинами (в стиле HdrHistogram)
+
+    Значения в микросекундах; до 2^SUB_BUCKET_BITS - точно, выше -
+    с относительной погрешностью не более 2^-(SUB_BUCKET_BITS - 1).
+    """
+
+    def __init__(self, max_seconds: float = 60.0):
+        self.half = 1 << (SUB_BUCKET_BITS - 1)
+        max_value = int(max_seconds * 1e6)
+        self.counts = np.zeros(self._index(max_value) + 1, dtype=np.int64)
+        self.max_value = max_value
+        self.total = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def _index(self, value: int) -> int:
+        shift = max(value.bit_length() - SUB_BUCKET_BITS, 0)
+        if not shift:
+            return value
+        return 2 * self.half + (shift - 1) * self.half + (value >> shift) - self.half
+
+    def _lower_bound(self, index: int) -> int:
+        if index < 2 * self.half:
+            return index
+        shift, offset = divmod(index - 2 * self.half, self.half)
+        return (offset + self.half) << (shift + 1)
+
+    def record(self, seconds: float):
+        """Добавить задержку (секунды)"""
+        value = min(int(seconds * 1e6), self.max_value)
+        self.counts[self._index(value)] += 1
+        self.total += 1
+        self.sum += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def percentile(self, percent: float) -> float:
+        """Задержка (секунды), не превышаемая percent % измерений"""
+        if not self.total:
+            return 0.0
+        rank = max(math.ceil(self.total * percent / 100), 1)
+        if rank >= self.total:
+            return self.max
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        # Середина корзины, но не за пределами наблюдавшихся значений
+        lower = self._lower_bound(index)
+        upper = self._lower_bound(index + 1)
+        return min(max((lower + upper - 1) / 2 / 1e6, self.min), self.max)
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.total if self.total else 0.0
+
+
+def load_bits(db_path: Path = DB_PATH, plc_id: Optional[int] = None) -> Dict[str, Tuple[int, int]]:
+    """Адреса битов heartbeat и отклика FB_ScadaCommunication из БД (или по умолчанию)"""
+    bits = dict(DEFAULT_BITS)
+    if not Path(db_path).exists():
+        return bits
+    for name, _, address, bit in load_register_tags(db_path, 'holding_registers', plc_id):
+        if name == HEARTBEAT_VARIABLE:
+            bits['heartbeat'] = (address, bit)
+    for name, _, address, bit in load_register_tags(db_path, 'input_registers', plc_id):
+        for key, variable in ECHO_VARIABLES.items():
+            if name == variable:
+                bits[key] = (address, bit)
+    return bits
+
+
+class HeartbeatTarget:
+    """Один ПЛК (соединение): такты heartbeat и гистограммы задержек"""
+
+    def __init__(self, name: str, host: str, port: int, bits: Dict[str, Tuple[int, int]],
+                 unit_id: int = 1, timeout: float = 2.0, poll_interval: float = ECHO_POLL_INTERVAL):
+        self.name = name
+        self.bits = bits
+        self.poll_interval = poll_interval
+        self.connection = ModbusClientConnection(host, port, unit_id, max_inflight=1, timeout=timeout)
+        self.write = LatencyHistogram()
+        self.echo = LatencyHistogram()
+        self.beats = 0
+        self.echo_missed = 0
+        self.errors = 0
+        self.heartbeat: Optional[bool] = None
+        self.communication_ok: Optional[bool] = None
+        self.communication_lost: Optional[bool] = None
+        self.last_success = time.monotonic()
+
+    async def beat(self, echo_timeout: float):
+        """Переключить heartbeat, измерить задержку записи и отклика"""
+        address, bit = self.bits['heartbeat']
+        try:
+            if self.heartbeat is None:
+                # Продолжить с текущего значения: повторная запись того же бита не даёт отклика
+                response = await self.connection.request(struct.pack('>BHH', 3, address, 1))
+                self.heartbeat = bool(struct.unpack_from('>H', response, 2)[0] >> bit & 1)
+            pdu = struct.pack('>BHHH', FC_MASK_WRITE_REGISTER, address,
+                              ~(1 << bit) & 0xFFFF, int(not self.heartbeat) << bit)
+            # Импульс предыдущего такта ещё не погас - иначе он будет принят за отклик
+            await self._wait_changed(False, time.perf_counter() + echo_timeout)
+
+            sent = time.perf_counter()
+            await self.connection.request(pdu)
+            self.heartbeat = not self.heartbeat
+            self.write.record(time.perf_counter() - sent)
+
+            echoed = await self._wait_changed(True, sent + echo_timeout)
+        except (ConnectionError, OSError, asyncio.TimeoutError, ValueError):
+            self.errors += 1
+            return
+        self.beats += 1
+        if echoed:
+            self.echo.record(time.perf_counter() - sent)
+            self.last_success = time.monotonic()
+        else:
+            self.echo_missed += 1
+
+    async def _wait_changed(self, state: bool, deadline: float) -> bool:
+        """Опрашивать входной регистр отклика, пока qxSignalChanged не станет равным state"""
+        address, bit = self.bits['changed']
+        while True:
+            response = await self.connection.request(struct.pack('>BHH', 4, address, 1))
+            word = struct.unpack_from('>H', response, 2)[0]
+            for key in ('ok', 'lost'):
+                key_address, key_bit = self.bits[key]
+                if key_address == address:
+                    setattr(self, f'communication_{key}', bool(word >> key_bit & 1))
+            if bool(word >> bit & 1) == state:
+                return True
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(self.poll_interval, remaining))
+
+    async def run(self, interval: float, echo_timeout: float, beats: Optional[int] = None):
+        loop = asyncio.get_running_loop()
+        next_time = loop.time()
+        done = 0
+        try:
+            while beats is None or done < beats:
+                await self.beat(echo_timeout)
+                done += 1
+                next_time += interval
+                await asyncio.sleep(max(next_time - loop.time(), 0))
+        finally:
+            await self.connection.close()
+
+
+def render_metrics(targets: List[HeartbeatTarget]) -> str:
+    """Метрики в текстовом формате Prometheus"""
+    lines = [
+        '# HELP scada_heartbeat_latency_seconds Задержка такта heartbeat (write - запись, echo - отклик ПЛК)',
+        '# TYPE scada_heartbeat_latency_seconds summary',
+    ]
+    for target in targets:
+        for kind, histogram in (('write', target.write), ('echo', target.echo)):
+            labels = f'connection="{target.name}",kind="{kind}"'
+            for quantile in (0.5, 0.9, 0.99, 0.999):
+                lines.append(f'scada_heartbeat_latency_seconds{{{labels},quantile="{quantile}"}} '
+                             f'{histogram.percentile(quantile * 100):.6f}')
+            lines.append(f'scada_heartbeat_latency_seconds_sum{{{labels}}} {histogram.sum:.6f}')
+            lines.append(f'scada_heartbeat_latency_seconds_count{{{labels}}} {histogram.total}')
+
+    now = time.monotonic()
+    gauges = (
+        ('scada_heartbeat_beats_total', 'counter', 'Тактов heartbeat', lambda t: t.beats),
+        ('scada_heartbeat_echo_missed_total', 'counter', 'Тактов без импульса qxSignalChanged',
+         lambda t: t.echo_missed),
+        ('scada_heartbeat_errors_total', 'counter', 'Ошибок связи и исключений Modbus', lambda t: t.errors),
+        ('scada_heartbeat_seconds_since_echo', 'gauge', 'Время с последнего отклика ПЛК',
+         lambda t: round(now - t.last_success, 3)),
+        ('scada_communication_ok', 'gauge', 'qxCommunicationOk (-1 - неизвестно)',
+         lambda t: -1 if t.communication_ok is None else int(t.communication_ok)),
+        ('scada_communication_lost', 'gauge', 'qxCommunicationLost (-1 - неизвестно)',
+         lambda t: -1 if t.communication_lost is None else int(t.communication_lost)),
+    )
+    for name, metric_type, help_text, value in gauges:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for target in targets:
+            lines.append(f'{name}{{connection="{target.name}"}} {value(target)}')
+    return '\n'.join(lines) + '\n'
+
+
+async def serve_metrics(targets: List[HeartbeatTarget], host: str = '127.0.0.1', port: int = 9105):
+    """Минимальный HTTP-сервер: GET /metrics"""
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()).strip():
+                pass  # Заголовки запроса не нужны
+            parts = request_line.decode('latin-1').split()
+            if len(parts) >= 2 and parts[1] == '/metrics':
+                status, body = '200 OK', render_metrics(targets).encode('utf-8')
+            else:
+                status, body = '404 Not Found', b'GET /metrics\n'
+            writer.write(f'HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n'
+                         f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n'.encode('latin-1') + body)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+class ScadaCommunicationModel:
+    """
+    Модель FB_ScadaCommunication для эмулятора ПЛК (modbus_server.py)
+
+    Шаг симуляции = цикл ПЛК: импульс qxSignalChanged на один цикл при
+    изменении heartbeat, qxCommunicationOk/Lost по таймауту.
+    qxCommunicationLost, как и в ФБ, защёлкивается до reset().
+    """
+
+    def __init__(self, bits: Dict[str, Tuple[int, int]] = None, timeout: float = 5.0):
+        self.bits = bits or dict(DEFAULT_BITS)
+        self.timeout = timeout
+        self._previous = False
+        self._first_cycle = True  # Первый цикл: текущий сигнал считается предыдущим
+        self._since_change = None  # ET таймера таймаута; None - таймер остановлен
+        self._ok = False
+        self._lost = True
+
+    def reset(self):
+        """xReset: сброс защёлки потери связи"""
+        self._since_change = None
+        self._first_cycle = True
+        self._ok = False
+        self._lost = False
+
+    def _set_bit(self, image, key: str, value: bool):
+        address, bit = self.bits[key]
+        image.words[address] = (int(image.words[address]) & ~(1 << bit)) | (int(value) << bit)
+
+    def step(self, server, dt: float):
+        address, bit = self.bits['heartbeat']
+        signal = bool(int(server.holding.words[address]) >> bit & 1)
+        if self._first_cycle:
+            self._previous = signal
+            self._first_cycle = False
+        changed = signal != self._previous
+        self._previous = signal
+
+        # TON с IN := NOT qxSignalChanged стартует в цикле после изменения
+        if changed:
+            self._since_change = None
+        else:
+            self._since_change = 0.0 if self._since_change is None else self._since_change + dt
+        if changed:
+            self._ok = True
+        if self._since_change is not None and self._since_change >= self.timeout - 1e-9:
+            self._ok = False
+            self._lost = True
+        self._set_bit(server.input, 'changed', changed)
+        self._set_bit(server.input, 'ok', self._ok)
+        self._set_bit(server.input, 'lost', self._lost)
+
+
+def print_summary(targets: List[HeartbeatTarget]):
+    for target in targets:
+        print(f"   {target.name}: тактов {target.beats}, echo p50 {target.echo.percentile(50) * 1000:.2f} "
+              f"p99 {target.echo.percentile(99) * 1000:.2f} p999 {target.echo.percentile(99.9) * 1000:.2f} мс, "
+              f"write p99 {target.write.percentile(99) * 1000:.2f} мс, "
+              f"пропущено {target.echo_missed}, ошибок {target.errors}")
+
+
+def parse_target(spec: str) -> Tuple[str, str, int]:
+    """Разобрать "ИМЯ=HOST:PORT" или "HOST:PORT" """
+    name, _, address = spec.rpartition('=')
+    host, _, port = address.rpartition(':')
+    if not host:
+        raise argparse.ArgumentTypeError(f"Ожидается [ИМЯ=]HOST:PORT: {spec}")
+    return name or address, host, int(port)
+
+
+async def run_monitor(args) -> int:
+    bits = load_bits(args.db, args.plc)
+    specs = list(args.targets)
+    server = None
+    if args.emulate:
+        from modbus_server import ModbusServer
+
+        server = ModbusServer.from_database(args.db, args.plc)
+        server.add_simulation(ScadaCommunicationModel(bits).step, interval=args.plc_cycle)
+        await server.start('127.0.0.1', 0)
+        specs.append(('emulator', '127.0.0.1', server.port))
+    if not specs:
+        print("❌ Не заданы ПЛК (--targets) и не выбран --emulate")
+        return 1
+
+    targets = [HeartbeatTarget(name, host, port, bits, poll_interval=args.poll_interval)
+               for name, host, port in specs]
+    metrics = await serve_metrics(targets, args.metrics_host, args.metrics_port)
+    print(f"📄 Heartbeat: holding {bits['heartbeat'][0]}.{bits['heartbeat'][1]}, "
+          f"отклик: input {bits['changed'][0]}.{bits['changed'][1]}")
+    print(f"🏭 Метрики: http://{args.metrics_host}:{metrics.sockets[0].getsockname()[1]}/metrics")
+
+    async def report():
+        while True:
+            await asyncio.sleep(args.report)
+            print_summary(targets)
+
+    reporter = asyncio.get_running_loop().create_task(report())
+    try:
+        await asyncio.gather(*(target.run(args.interval, args.echo_timeout, args.beats) for target in targets))
+    finally:
+        reporter.cancel()
+        print_summary(targets)
+        metrics.close()
+        if server is not None:
+            await server.close()
+    return 0
+
+
+def main():
+    """Главная функция"""
+    arg_parser = argparse.ArgumentParser(description='Монитор задержек heartbeat SCADA')
+    arg_parser.add_argument('--targets', type=parse_target, nargs='*', default=[], metavar='[ИМЯ=]HOST:PORT',
+                            help='ПЛК для контроля')
+    arg_parser.add_argument('--db', type=Path, default=DB_PATH, help='Путь к БД регистров')
+    arg_parser.add_argument('--plc', type=int, default=None, help='ID ПЛК в БД (адреса битов)')
+    arg_parser.add_argument('--interval', type=float, default=0.5, help='Период такта heartbeat, с')
+    arg_parser.add_argument('--echo-timeout', type=float, default=0.4, help='Ожидание импульса отклика, с')
+    arg_parser.add_argument('--poll-interval', type=float, default=ECHO_POLL_INTERVAL,
+                            help='Пауза между опросами отклика, с')
+    arg_parser.add_argument('--beats', type=int, default=None, help='Тактов (по умолчанию - бесконечно)')
+    arg_parser.add_argument('--report', type=float, default=10.0, help='Период вывода сводки, с')
+    arg_parser.add_argument('--metrics-host', default='127.0.0.1', help='Адрес эндпоинта метрик')
+    arg_parser.add_argument('--metrics-port', type=int, default=9105, help='Порт эндпоинта метрик')
+    arg_parser.add_argument('--emulate', action='store_true', help='Контролировать встроенный эмулятор ПЛК')
+    arg_parser.add_argument('--plc-cycle', type=float, default=0.01, help='Цикл ПЛК эмулятора, с')
+    args = arg_parser.parse_args()
+
+    print("=" * 60)
+    print("SCADA Heartbeat Monitor")
+    print("=" * 60)
+
+    try:
+        return asyncio.run(run_monitor(args))
+    except KeyboardInterrupt:
+        print("\n⚠️  Остановлено")
+        return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modbus Historian
+=================
+Колоночный архив декодированных input-регистров на memory-mapped файлах:
+сырые значения в часовых сегментах и пирамида min/max/mean для быстрого
+чтения длинных интервалов.
+
+Использование:
+    python3 historian.py --info                          # Каталог тэгов и бюджет диска
+    python3 historian.py --record 127.0.0.1:5020         # Запись опроса каждые 100 мс
+    python3 historian.py --read "stBunker[1].rWeight" --hours 168
+
+    from historian import Historian
+    historian = Historian.from_database(HISTORY_DIR, DB_PATH)
+    historian.append_frame(time.time(), frame)            # Кадр 512 слов
+    times, low, high, mean = historian.read('stBunker[1].rWeight', start, end, max_points=1000)
+
+Возможности:
+    - Каталог тэгов и типов - из БД (карта input_registers)
+    - Сырые значения: сегмент на час, в сегменте по файлу на тип хранения,
+      столбец каждого тэга непрерывен (чтение одного тэга не трогает остальные)
+    - Пирамида min/max/mean (1 с, 10 с, 1 мин, 10 мин, 1 ч): кольцевые буферы
+      фиксированного размера, обновляются при каждой записи; слот корзины
+      (все тэги) непрерывен - запись трогает одну область на уровень
+    - Чтение выбирает самый грубый достаточный уровень: неделя одного тэга
+      при 1000 точках - около 1000 записей по 12 байт
+    - Фиксированный бюджет: хранится raw_hours последних часов сырых данных,
+      уровни пирамиды - кольца с заданной глубиной; размер на диске
+      известен заранее (--info), память - отображения текущего сегмента
+
+Требования:
+    pip install numpy
+
+Дата: 2026-10-17
+"""
+
+import argparse
+import asyncio
+import calendar
+import json
+import math
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from register_decoder import DB_PATH, DecodePlan, load_register_tags
+
+# Пути к файлам
+SCRIPT_DIR = Path(__file__).parent
+HISTORY_DIR = SCRIPT_DIR / 'db' / 'history'
+
+# Длительность сегмента сырых данных, с
+SEGMENT_SECONDS = 3600
+
+# Тип хранения сырого значения по типу данных ПЛК
+STORAGE_DTYPES = {
+    'BOOL': 'u1', 'INT': 'i2', 'UINT': 'u2', 'WORD': 'u2', 'DINT': 'u2',
+    'REAL': 'f4', 'TIME': 'u4',
+}
+
+# Уровни пирамиды: (ширина корзины, с; глубина хранения, с)
+DEFAULT_LEVELS: List[Tuple[int, int]] = [
+    (1, 2 * 86400),
+    (10, 30 * 86400),
+    (60, 366 * 86400),
+    (600, 5 * 366 * 86400),
+    (3600, 10 * 366 * 86400),
+]
+
+# Порядок осей файлов пирамиды L<ширина>.f4 (в каталоге: другой порядок - другой архив)
+PYRAMID_LAYOUT = 'slot,tag,stat'
+
+
+class _Segment:
+    """Часовой сегмент сырых значений: time.f8 и по файлу на тип хранения"""
+
+    def __init__(self, path: Path, groups: Dict[str, int], capacity: int, mode: str):
+        self.path = path
+        self.times = np.memmap(path / 'time.f8', dtype='<f8', mode=mode, shape=(capacity,))
+        self.columns = {
+            code: np.memmap(path / f'{code}.bin', dtype=f'<{code}', mode=mode, shape=(count, capacity))
+            for code, count in groups.items() if count
+        }
+        # Время записи строго растёт, незаписанные строки - нули
+        self.count = int(np.count_nonzero(self.times))
+
+    @property
+    def capacity(self) -> int:
+        return len(self.times)
+
+    def flush(self):
+        self.times.flush()
+        for column in self.columns.values():
+            column.flush()
+
+
+class Historian:
+    """Архив значений тэгов одного образа регистров"""
+
+    def __init__(self, root: Path, tags: List[Tuple[str, str]], period: float = 0.1, raw_hours: int = 7 * 24,
+                 levels: Optional[List[Tuple[int, int]]] = None):
+        """
+        Args:
+            root: Каталог архива
+            tags: (тэг, тип данных) в порядке столбцов строки значений
+            period: Ожидаемый период записи, с (размер сегмента)
+            raw_hours: Сколько часов сырых данных хранить
+            levels: Уровни пирамиды (ширина корзины, глубина хранения), с
+        """
+        self.root = Path(root)
+        self.tags = [name for name, _ in tags]
+        self.data_types = [data_type for _, data_type in tags]
+        self.period = period
+        self.raw_hours = raw_hours
+        self.levels = levels or DEFAULT_LEVELS
+        self.segment_rows = math.ceil(SEGMENT_SECONDS / period * 1.25)
+
+        # Размещение тэгов: тип хранения -> столбцы строки значений
+        self.groups: Dict[str, List[int]] = {}
+        self.location: Dict[str, Tuple[str, int]] = {}
+        for column, (name, data_type) in enumerate(tags):
+            code = STORAGE_DTYPES[data_type]
+            self.location[name] = (code, len(self.groups.setdefault(code, [])))
+            self.groups[code].append(column)
+        self._group_columns = {code: np.array(columns, dtype=np.intp) for code, columns in self.groups.items()}
+
+        self._check_catalog()
+        self._levels = [self._open_level(width, depth) for width, depth in self.levels]
+        self._segment: Optional[_Segment] = None
+        self._segment_end = 0.0
+        self._last_time = 0.0
+        self.plan: Optional[DecodePlan] = None
+        self._plan_columns = None
+
+        segments = self.segment_paths()
+        if segments:
+            self._segment = _Segment(segments[-1], self._group_sizes(), self.segment_rows, 'r+')
+            start = self._segment_start(segments[-1])
+            self._segment_end = start - start % SEGMENT_SECONDS + SEGMENT_SECONDS
+            if self._segment.count:
+                self._last_time = float(self._segment.times[self._segment.count - 1])
+
+    @classmethod
+    def from_database(cls, root: Path = HISTORY_DIR, db_path: Path = DB_PATH, plc_id: Optional[int] = None,
+                      **kwargs) -> 'Historian':
+        """Архив тэгов карты input_registers из БД"""
+        return cls.from_plan(root, DecodePlan(load_register_tags(db_path, 'input_registers', plc_id)), **kwargs)
+
+    @classmethod
+    def from_plan(cls, root: Path, plan: DecodePlan, **kwargs) -> 'Historian':
+        """Архив тэгов плана декодирования; append_frame() декодирует кадры по нему"""
+        columns = sorted(plan.index.values())
+        historian = cls(root, [(plan.names[c], plan.data_types[c]) for c in columns], **kwargs)
+        historian.plan = plan
+        historian._plan_columns = np.array(columns, dtype=np.intp)
+        return historian
+
+    # ------------------------------------------------------------------
+    # Каталог и файлы
+    # ------------------------------------------------------------------
+
+    def _check_catalog(self):
+        """Создать каталог архива или проверить, что он совпадает с текущим"""
+        catalog = {
+            'tags': [[name, data_type] for name, data_type in zip(self.tags, self.data_types)],
+            'period': self.period,
+            'levels': [list(level) for level in self.levels],
+            'pyramid_layout': PYRAMID_LAYOUT,
+        }
+        path = self.root / 'catalog.json'
+        if path.exists():
+            stored = json.loads(path.read_text(encoding='utf-8'))
+            if stored != catalog:
+                raise ValueError(f"Каталог архива {self.root} не совпадает с картой регистров "
+                                 f"(тэги, период, уровни или формат пирамиды изменились) - укажите новый каталог")
+            return
+        (self.root / 'raw').mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(catalog, ensure_ascii=False, indent=1), encoding='utf-8')
+
+    def _group_sizes(self) -> Dict[str, int]:
+        return {code: len(columns) for code, columns in self.groups.items()}
+
+    def _open_level(self, width: int, depth: int):
+        """Кольцо уровня: номер корзины + 1 (0 - пусто), число значений, (слот, тэг, min/max/mean)"""
+        capacity = depth // width
+        mode = 'r+' if (self.root / f'L{width}.bucket').exists() else 'w+'
+        buckets = np.memmap(self.root / f'L{width}.bucket', dtype='<i8', mode=mode, shape=(capacity,))
+        counts = np.memmap(self.root / f'L{width}.count', dtype='<u4', mode=mode, shape=(capacity,))
+        stats = np.memmap(self.root / f'L{width}.f4', dtype='<f4', mode=mode, shape=(capacity, len(self.tags), 3))
+        return width, buckets, counts, stats
+
+    def segment_paths(self) -> List[Path]:
+        return sorted(path for path in (self.root / 'raw').iterdir() if path.is_dir())
+
+    @staticmethod
+    def _segment_start(path: Path) -> float:
+        """Время первой строки сегмента по имени каталога (ГГГГММДД_ЧЧММСС_мс, UTC)"""
+        return calendar.timegm(time.strptime(path.name[:15], '%Y%m%d_%H%M%S')) + int(path.name[16:19]) / 1000
+
+    def disk_budget(self) -> Dict[str, int]:
+        """Размер архива на диске при заполнении, байт"""
+        row = 8 + sum(np.dtype(code).itemsize * len(columns) for code, columns in self.groups.items())
+        raw = row * self.segment_rows * (self.raw_hours + 1)
+        pyramid = sum((depth // width) * (12 + 12 * len(self.tags)) for width, depth in self.levels)
+        return {'raw': raw, 'pyramid': pyramid, 'total': raw + pyramid}
+
+    # ------------------------------------------------------------------
+    # Запись
+    # ------------------------------------------------------------------
+
+    def _roll(self, timestamp: float):
+        """Начать новый сегмент и удалить сегменты старше raw_hours"""
+        if self._segment is not None:
+            self._segment.flush()
+        name = time.strftime('%Y%m%d_%H%M%S', time.gmtime(timestamp)) + f'_{int(timestamp * 1000) % 1000:03d}'
+        path = self.root / 'raw' / name
+        path.mkdir(parents=True)
+        self._segment = _Segment(path, self._group_sizes(), self.segment_rows, 'w+')
+        self._segment_end = timestamp - timestamp % SEGMENT_SECONDS + SEGMENT_SECONDS
+
+        for old in self.segment_paths()[:-(self.raw_hours + 1)]:
+            shutil.rmtree(old)
+
+    def append(self, timestamp: float, values):
+        """
+        Добавить строку значений
+
+        Args:
+            timestamp: Время, с (Unix), строго больше предыдущего
+            values: Значения тэгов в порядке self.tags
+        """
+        if timestamp <= self._last_time:
+            raise ValueError(f"Время должно расти: {timestamp} <= {self._last_time}")
+        values = np.asarray(values, dtype=np.float64)
+
+        segment = self._segment
+        if segment is None or timestamp >= self._segment_end or segment.count >= segment.capacity:
+            self._roll(timestamp)
+            segment = self._segment
+        row = segment.count
+        for code, columns in self._group_columns.items():
+            segment.columns[code][:, row] = values[columns]
+        segment.times[row] = timestamp
+        segment.count += 1
+        self._last_time = timestamp
+
+        # Произвольные слова REAL могут быть inf/NaN - это не ошибка записи
+        with np.errstate(over='ignore', invalid='ignore'):
+            self._update_levels(timestamp, values.astype(np.float32))
+
+    def _update_levels(self, timestamp: float, values32: 'np.ndarray'):
+        """Обновить корзины всех уровней пирамиды, в которые попадает timestamp"""
+        for width, buckets, counts, stats in self._levels:
+            bucket = int(timestamp // width)
+            slot = bucket % len(buckets)
+            cell = stats[slot]  # Непрерывная строка слота: тэги x (min, max, mean)
+            if buckets[slot] != bucket + 1:
+                buckets[slot] = bucket + 1
+                counts[slot] = 1
+                cell[:, 0] = cell[:, 1] = cell[:, 2] = values32
+            else:
+                count = int(counts[slot]) + 1
+                counts[slot] = count
+                np.fmin(cell[:, 0], values32, out=cell[:, 0])
+                np.fmax(cell[:, 1], values32, out=cell[:, 1])
+                cell[:, 2] += (values32 - cell[:, 2]) / count
+
+    def append_frame(self, timestamp: float, frame):
+        """Декодировать кадр регистров и добавить значения"""
+        self.append(timestamp, self.plan.decode_batch(frame)[0][self._plan_columns])
+
+    def flush(self):
+        if self._segment is not None:
+            self._segment.flush()
+        for _, buckets, counts, stats in self._levels:
+            buckets.flush()
+            counts.flush()
+            stats.flush()
+
+    # ------------------------------------------------------------------
+    # Чтение
+    # ------------------------------------------------------------------
+
+    def read_raw(self, name: str, start: float, end: float) -> Tuple['np.ndarray', 'np.ndarray']:
+        """Сырые значения тэга за [start, end): (время, значения)"""
+        code, index = self.location[name]
+        times, values = [], []
+        paths = self.segment_paths()
+        for i, path in enumerate(paths):
+            if i + 1 < len(paths) and self._segment_start(paths[i + 1]) <= start:
+                continue
+            if self._segment_start(path) >= end:
+                break
+            segment = _Segment(path, self._group_sizes(), self.segment_rows, 'r')
+            segment_times = segment.times[:segment.count]
+            first, last = np.searchsorted(segment_times, [start, end])
+            times.append(np.array(segment_times[first:last]))
+            values.append(np.array(segment.columns[code][index, first:last]))
+        if not times:
+            return np.empty(0), np.empty(0)
+        return np.concatenate(times), np.concatenate(values)
+
+    def read(self, name: str, start: float, end: float,
+             max_points: int = 1000) -> Tuple['np.ndarray', 'np.ndarray', 'np.ndarray', 'np.ndarray']:
+        """
+        Значения тэга за [start, end) для графика не более чем из max_points точек
+
+        Returns:
+            (время начала корзины, min, max, mean); для коротких интервалов -
+            сырые значения (min = max = mean)
+        """
+        if (end - start) / self.period <= max_points:
+            times, values = self.read_raw(name, start, end)
+            values = values.astype(np.float64)
+            return times, values, values, values
+
+        column = self.tags.index(name)
+        width, buckets, _, stats = self._levels[-1]
+        for level in self._levels:
+            if (end - start) / level[0] <= max_points:
+                width, buckets, _, stats = level
+                break
+
+        first, last = int(start // width), int(math.ceil(end / width))
+        numbers = np.arange(first, last, dtype=np.int64)
+        slots = numbers % len(buckets)
+        valid = buckets[slots] == numbers + 1
+        cells = stats[slots[valid], column, :]
+        return numbers[valid].astype(np.float64) * width, cells[:, 0], cells[:, 1], cells[:, 2]
+
+
+def record(historian: Historian, server: str, cycles: Optional[int]):
+    """Опрашивать input-регистры сервера и записывать кадры в архив"""
+    from poll_planner import PollExecutor, PollPlanner
+
+    planner = PollPlanner([('input_registers', '', data_type, address)
+                           for _, data_type, (address, _) in zip(historian.plan.names, historian.plan.data_types,
+                                                                  historian.plan.addresses)],
+                          default_intervals={'input_registers': historian.period})
+    host, port = server.rsplit(':', 1)
+    executor = PollExecutor(planner.plan(), host, int(port))
+    executor.on_update(lambda register_type, image, reads: historian.append_frame(time.time(), image))
+    try:
+        asyncio.run(executor.run(cycles))
+    finally:
+        historian.flush()
+    print(f"✅ Записано кадров: {executor.cycles}, ошибок чтения: {executor.errors}")
+
+
+def main():
+    """Главная функция"""
+    arg_parser = argparse.ArgumentParser(description='Архив значений input-регистров')
+    arg_parser.add_argument('--root', type=Path, default=HISTORY_DIR, help='Каталог архива')
+    arg_parser.add_argument('--db', type=Path, default=DB_PATH, help='Путь к БД регистров')
+    arg_parser.add_argument('--period', type=float, default=0.1, help='Период записи, с')
+    arg_parser.add_argument('--raw-hours', type=int, default=7 * 24, help='Часов сырых данных')
+    arg_parser.add_argument('--info', action='store_true', help='Каталог и бюджет диска')
+    arg_parser.add_argument('--record', metavar='HOST:PORT', help='Записывать опрос сервера')
+    arg_parser.add_argument('--cycles', type=int, default=None, help='Кадров записи (по умолчанию - бесконечно)')
+    arg_parser.add_argument('--read', metavar='ТЭГ', help='Прочитать тэг')
+    arg_parser.add_argument('--hours', type=float, default=1, help='Интервал чтения, ч (до текущего момента)')
+    args = arg_parser.parse_args()
+
+    print("=" * 60)
+    print("Modbus Historian")
+    print("=" * 60)
+
+    if not args.db.exists():
+        print(f"❌ База данных не найдена: {args.db}")
+        return 1
+
+    try:
+        historian = Historian.from_database(args.root, args.db, period=args.period, raw_hours=args.raw_hours)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    budget = historian.disk_budget()
+    print(f"\n📄 Тэгов: {len(historian.tags)} ({', '.join(f'{code}: {len(c)}' for code, c in historian.groups.items())})")
+    print(f"💾 Бюджет диска: сырые {budget['raw'] / 2 ** 30:.1f} ГБ ({args.raw_hours} ч), "
+          f"пирамида {budget['pyramid'] / 2 ** 30:.1f} ГБ, всего {budget['total'] / 2 ** 30:.1f} ГБ")
+
+    if args.record:
+        print(f"\n🏭 Запись {args.record} каждые {args.period:g} с...")
+        try:
+            record(historian, args.record, args.cycles)
+        except KeyboardInterrupt:
+            print("\n⚠️  Остановлено")
+
+    if args.read:
+        if args.read not in historian.location:
+            print(f"❌ Тэг не найден: {args.read}")
+            return 1
+        end = time.time()
+        times, low, high, mean = historian.read(args.read, end - args.hours * 3600, end)
+        print(f"\n🔎 {args.read}: {len(times)} точек за {args.hours:g} ч")
+        if len(times):
+            print(f"   min {np.nanmin(low):.3f}  max {np.nanmax(high):.3f}  mean {np.nanmean(mean):.3f}")
+
+    print("=" * 60)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,17 +4,29 @@
 Modbus Register Migration Tool
 ================================
 Парсит файл FC_ModbusToSCADA.st и заполняет SQLite базу данных.
-Автоматически добавляет описания переменных из встроенного словаря DESCRIPTIONS.
+Автоматически добавляет описания переменных из словаря DESCRIPTIONS (descriptions.py).
 
 Использование:
-    python migrate_from_fc.py              # Обычный режим
+    python migrate_from_fc.py              # Обычный режим (инкрементальная синхронизация существующей БД)
+    python migrate_from_fc.py --rebuild    # Удалить и пересоздать БД (с подтверждением)
+    python migrate_from_fc.py --rebuild --yes   # То же без вопроса (для автоматического запуска)
     python migrate_from_fc.py --verbose    # С выводом переменных без описаний
     python migrate_from_fc.py -v           # То же самое (короткая форма)
+    python migrate_from_fc.py --projects line1=/srv/plc/line1 line2=/srv/plc/line2 --site "Карьер"
+                                           # Несколько ПЛК в одной БД (параллельный разбор)
 
 Возможности:
-    - Парсинг FC_ModbusToSCADA.st
+    - Потоковый парсинг FC_ModbusToSCADA.st за один проход (все функции FC_Modbus*,
+      многострочные вызовы, пропуск закомментированного кода)
+    - Разбор FB, сгенерированного generate_modbus_fb.py (присваивания слов регистров)
+    - Уставки времени через временную переменную: REAL_TO_TIME(rTempTime * 1000)
+      размечаются на переменную TIME (регистр REAL в секундах)
     - Автоматическое определение описаний переменных
     - Паттерн-матчинг для сложных путей (stBunker[1].VFD.qrOutFrequency)
+    - Проверка типа и ширины переменных по DataTypes/ и POUs/ (symbol_table.py)
+    - Инкрементальная синхронизация: перезаписываются только изменённые секции,
+      ручные описания сохраняются
+    - Несколько проектов (ПЛК/площадок) в одной БД: разбор в пуле процессов
     - Статистика покрытия описаниями
     - Verbose режим для отладки
 
@@ -25,10 +37,17 @@ Modbus Register Migration Tool
 
 import re
 import sqlite3
+import hashlib
+import time
 import os
-import sys
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Tuple, Optional, Dict
+from typing import List, Tuple, Optional, Dict, Iterable, Iterator
+
+from descriptions import DESCRIPTIONS, find_description
+from register_db import REGISTER_STATS_SELECT
+from symbol_table import SymbolTable, TypeCheckReport
 
 # Пути к файлам
 SCRIPT_DIR = Path(__file__).parent
@@ -36,220 +55,98 @@ DB_PATH = SCRIPT_DIR / 'db' / 'modbus_registers.db'
 SCHEMA_PATH = SCRIPT_DIR / 'db' / 'schema.sql'
 FC_MODBUS_PATH = SCRIPT_DIR.parent / 'POUs' / 'FB_ModbusToSCADA.st'
 
-# Словарь описаний переменных (из update_descriptions.py)
-DESCRIPTIONS = {
-    # === GLOBAL.st ===
-    "ICUR_PRECENT": "Коэффициент использования установленной мощности (в процентах)",
-    "rElectricityMeter": "Раход электроэнергии",
-    "EFFICIENCY_LIMIT_RATE": "Коэффицент ограничения производительности (0-1)",
-    "ANNUNCIATOR_LIGHT_HZ": "Световая индикация Гц",
-
-    "VFD_SMOOTH_SET_FREQUENCY": "Опция плавного задания частоты",
-    "VFD_FREQUENCY_SYNC_TOLERANCE": "Допустимая разница частот для синхронизации моторов",
-    "MOTOR_FREQUENCY_CONVEYOR": "Частота мотора конвейера",
-    "MOTOR_FREQUENCY_DUMPER_CONVEYOR": "Частота мотора конвейера отвалообразователя",
-    "MOTOR_FREQUENCY_DUMPER_ROTATION": "Частота мотора поворота отвалообразователя",
-    "CONVEYOR_DEAFULT_SPEED": "Скорость конвейера",
-
-    "BUNKER_WORK_PRECENT_1": "Уставка пропорции шихтования для бункера 1",
-    "BUNKER_WORK_PRECENT_2": "Уставка пропорции шихтования для бункера 2",
-    "BUNKER_WORK_PRECENT_3": "Уставка пропорции шихтования для бункера 3",
-    "BUNKER_MINIMAL_WEIGHT": "Уставка минимального веса бункера. Результат <= считывается алгоритмом как пустой бункер.",
-
-    # ST_AlarmSetpoints - используется для всех *_POINTS
-    "LL_Value": "Уставка Low-Low",
-    "L_Value": "Уставка Low",
-    "H_Value": "Уставка High",
-    "HH_Value": "Уставка High-High",
-
-    # ST_BunkerVibratorSettings
-    "TIME_ACTIVE": "Время активной работы вибратора",
-    "TIME_PAUSE_VIBRATOR": "Время паузы вибратора между циклами",
-    "TIME_PAUSE_FB": "Время паузы ФБ между подходами",
-
-    "TIME_WAITING_FEEDBACK": "Таймер ожидания пропавшего сигнала обратной связи работы механизма",
-    "PNEUMATIC_COLLAPSE_TIME": "Уставка времени таймера пневмообрушения",
-
-    # ST_PreStartAlarmSettings
-    "OPTION_ENABLE": "Опция на включение ППЗ в алгоритм",
-    "TIME_FIRST_SIGNAL": "Время звучания первого сигнала",
-    "TIME_FIRST_SIGNAL_PAUSE": "Пауза после первого сигнала",
-    "TIME_SECOND_SIGNAL": "Время звучания второго сигнала",
-    "TIME_SECOND_SIGNAL_PAUSE": "Пауза после втотрого сигнала",
-
-    # === ST_Commands ===
-    "cmdResetAll": "Сброс всех ошибок",
-    "cmdStartCommon": "Команда общего пуска",
-    "cmdStopCommon": "Команда общего останова",
-    "cmdEmergencyStopCommon": "Команда общей аварийной остановки",
-    "cmdSetToRepair": "Команда переключения в режим \"Ремонт\"",
-    "cmdSetToManual": "Команда переключения в режим \"Ручной\"",
-    "cmdSetToAuto": "Команда переключения в режим \"Автоматический\"",
-    "cmdBuildCircuitOn": "Команда \"Собрать цепь\"",
-    "cmdBuildCircuitOff": "Команда \"Разобрать цепь\"",
-    "cmdStartVibrator": "Команда \"Пуск вибраторов\"",
-    "cmdStopVibrator": "Команда \"Стоп вибраторов\"",
-    "cmdEmergencyStopVibrator": "Команда \"Аварийная остановка вибраторов\"",
-    "cmdAddVib1": "Команда \"Добавить вибратор 1\"",
-    "cmdAddVib2": "Команда \"Добавить вибратор 2\"",
-    "cmdAddVib3": "Команда \"Добавить вибратор 3\"",
-    "cmdAddVib4": "Команда \"Добавить вибратор 4\"",
-
-    # === ST_CommonSignals ===
-    "fbEmergencyStopBtn": "Кнопка \"Аварийная остановка\"",
-    "fbRemoteModeBtn": "Режим работы ( 1 - дистанционный, 0 - местный)",
-    "fbRealyCurrentControl": "Реле контроля фаз",
-    "fbQF1": "Состояние автомат. выключателя (1 - включен, 0 - выключен)",
-    "fb9QF1": "Состояние автомат. выключателя (1 - включен, 0 - выключен)",
-    "fb10QF1": "Состояние автомат. выключателя (1 - включен, 0 - выключен)",
-    "fb11QF1": "Состояние автомат. выключателя (1 - включен, 0 - выключен)",
-    "qx6KM1": "Контактор 6KM1",
-
-    # === MAIN.st local vars ===
-    "xStateAutoWorking": "Система полностью запущена и работает в автоматическом режиме",
-    "xStateEmergencyStop": "Система была аварийно остановлена",
-    "xStateErrorCheckReady": "Проверки стадии готовности к пуску провалились",
-    "xStateErrorAcceptIdle": "Невозможно принять коэффицент шихтования по заданию оператора - сумма коэффицентов не равна 100",
-    "xStateRemoteAuto": "Режим управления \"Автоматический\"",
-    "xStateRemoteManual": "Режим управления \"Ручной\"",
-    "xStateRemoteRepair": "Режим управления \"Ремонт\"",
-
-    # === ST_Bunker ===
-    "rWeight": "Весы бункера",
-    "rProportionActual": "Пропорция от веса",
-    "rMotorVibFeederCommonFrequency": "Частота двух моторов вибропитателя",
-    "cmdDumpingPrecent": "Задание процентного соотношения сбрасывания",
-    "xStateWarning": "Программное предупреждение",
-    "xStateFailure": "Программная ошибка",
-    "fbStateHatch": "Положение люка (1 - закрыт , 0 - открыт )",
-    "qxLightRed": "Красный сигнал светофора",
-    "qxLightYellow": "Желтый сигнал светофора",
-    "qxLightGreen": "Зеленый сигнал светофора",
-    "fbBtnStart": "Кнопка \"Пуск питателя\" NO",
-    "fbBtnStop": "Кнопка \"Стоп питателя\" NO",
-    "fbBtnEmergencyStop": "Кнопка \"Аварийная остановка\" NC",
-    "cmdStartFeeder": "Команда \"Пуск питателя\"",
-    "cmdStopFeeder": "Команда \"Стоп питателя\"",
-    "cmdEmergencyStopFeeder": "Команда \"Аварийная остановка\"",
-    "cmdReset": "Сброс ошибок",
-
-    # === ST_VFD ===
-    "qrOutFrequency": "Выходная частота",
-    "rActualFrequency": "Текущая частота ЧРП",
-    "wMotorCurrent": "Ток эл. двигателя",
-    "cmdSetFrequency": "Ручное задание частоты",
-
-    # === ST_MotorVibFeeder ===
-    "rTempBearing": "Температура подшипникового узла (в °C)",
-
-    # === ST_Dumper / ST_ConveyorBasic / ST_ConveyorPrefabricated ===
-    "xStateEnable": "Механизм полностью запущен",
-    "xStateStarting": "Процесс запуска (вместе с ППЗ)",
-    "xHLA": "Световая сигнализация",
-    "xSoundAlarm": "Звуковая сигнализация",
-    "fbYE1": "Обнаружение металла (металлодетектор)",
-    "cmdStartConveyor": "Команда пуска конвейера",
-    "cmdStopConveyor": "Команда останова конвейера",
-    "cmdEmergencyStop": "Команда аварийной остановки",
-    "cmdTurnLeft": "Команда поворота влево",
-    "cmdTurnRight": "Команда поворота вправо",
-    "fbBtnTurnLeft": "Кнопка поворота влево",
-    "fbBtnTurnRight": "Кнопка поворота вправо",
-    "fbEndSwitchRight": "Концевой выключатель правого положения",
-    "fbEndSwitchLeft": "Концевой выключатель левого положения",
-    "fbBtnRemoteMode": "Кнопка режима",
-
-    # SIMULATION
-    "SIMULATION": "Режим симуляции",
+# Секция для регистров, объявленных до первого заголовка секции
+UNDEFINED_SECTION = 'Неопределенная секция'
+
+# ПЛК по умолчанию (текущий проект), см. таблицу plcs в schema.sql
+DEFAULT_PLC_ID = 1
+
+# Начиная с этого размера пакета вторичные индексы registers пересоздаются после вставки
+BULK_INDEX_THRESHOLD = 10000
+
+# Таблицы, которые триггеры ведут по registers (schema.sql): имя -> заполнение с нуля
+DERIVED_TABLES: Dict[str, str] = {
+    'register_texts': """
+        INSERT INTO register_texts (variable_name, description, refs)
+        SELECT variable_name, IFNULL(description, ''), COUNT(*) FROM registers
+        GROUP BY variable_name, IFNULL(description, '')
+    """,
+    'register_stats': """
+        INSERT INTO register_stats (section_id, data_type_id, registers, described, reserved, addresses)
+    """ + REGISTER_STATS_SELECT,
 }
 
+# Функции из Functions/Modbus: имя -> (тип данных PLC, имя параметра со значением)
+MODBUS_FUNCTIONS: Dict[str, Tuple[str, str]] = {
+    'FC_ModbusReadBool': ('BOOL', 'xValue'),
+    'FC_ModbusWriteBool': ('BOOL', 'xValue'),
+    'FC_ModbusReadReal': ('REAL', 'rValue'),
+    'FC_ModbusWriteReal': ('REAL', 'rValue'),
+    'FC_ModbusReadInt': ('INT', 'iValue'),
+    'FC_ModbusWriteInt': ('INT', 'iValue'),
+    'FC_ModbusWriteUInt': ('UINT', 'uValue'),
+    'FC_ModbusReadDint': ('DINT', 'iValue'),
+    'FC_ModbusReadTime': ('TIME', 'tValue'),
+    'FC_ModbusWriteTime': ('TIME', 'tValue'),
+}
 
-def find_description(variable_path: str) -> str:
-    """
-    Найти описание для переменной по её пути (например, 'stBunker[1].rWeight')
-    Использует паттерн-матчинг для извлечения ключевого имени переменной
-
-    Args:
-        variable_path: Путь к переменной (например, 'stBunker[1].MotorVibFeeder[1].VFD.qrOutFrequency')
+# Локальные переменные FB, сгенерированного generate_modbus_fb.py
+PACKED_WORD = 'wBits'  # Слово, в котором собираются биты Input-регистра
+# Тип данных -> (UNION из DataTypes/Unions, переменная, поле значения)
+WORD_UNIONS: Dict[str, Tuple[str, str, str]] = {
+    'REAL': ('U_RealToWord', 'uReal', 'rTag'),
+    'TIME': ('U_TimeToWord', 'uTime', 'tTag'),
+}
 
-    Returns:
-        Описание переменной или пустую строку, если не найдено
-    """
-    # Попытка прямого совпадения
-    if variable_path in DESCRIPTIONS:
-        return DESCRIPTIONS[variable_path]
-
-    # Извлечь компоненты пути (например, 'rWeight' из 'stBunker[1].rWeight')
-    parts = variable_path.replace('[', '.').replace(']', '').split('.')
-
-    # Попытка совпадения с конца
-    for i in range(len(parts)):
-        key = '.'.join(parts[i:])
-        if key in DESCRIPTIONS:
-            return DESCRIPTIONS[key]
-
-    # Попытка совпадения только последнего компонента
-    last_part = parts[-1]
-    if last_part in DESCRIPTIONS:
-        return DESCRIPTIONS[last_part]
-
-    # Проверка специальных паттернов
-    # Паттерн: MotorVibrator[N].VFD.xxx или MotorVibFeeder[N].VFD.xxx
-    if 'VFD' in parts:
-        vfd_idx = parts.index('VFD')
-        if vfd_idx + 1 < len(parts):
-            vfd_field = parts[vfd_idx + 1]
-            if vfd_field in DESCRIPTIONS:
-                return DESCRIPTIONS[vfd_field]
-
-    # Паттерн: MotorVibFeeder[N].rTempBearing[N]
-    if 'MotorVibFeeder' in parts and 'rTempBearing' in parts:
-        return DESCRIPTIONS['rTempBearing']
-
-    # Паттерн: *_POINTS.LL_Value, etc.
-    if '_POINTS' in variable_path:
-        for key in ['LL_Value', 'L_Value', 'H_Value', 'HH_Value']:
-            if key in parts:
-                return DESCRIPTIONS[key]
-
-    # Паттерн: *_SETTINGS.TIME_xxx
-    if '_SETTINGS' in variable_path or 'VIBRATOR_SETTINGS' in variable_path or 'PNEUMO_SETTINGS' in variable_path:
-        for key in ['OPTION_ENABLE', 'TIME_ACTIVE', 'TIME_PAUSE_VIBRATOR', 'TIME_PAUSE_FB',
-                    'TIME_FIRST_SIGNAL', 'TIME_FIRST_SIGNAL_PAUSE',
-                    'TIME_SECOND_SIGNAL', 'TIME_SECOND_SIGNAL_PAUSE']:
-            if key in parts:
-                return DESCRIPTIONS[key]
-
-    # Паттерн: stCommands.cmdXxx.ixSignal
-    if 'stCommands' in parts:
-        for i, part in enumerate(parts):
-            if part.startswith('cmd') and part in DESCRIPTIONS:
-                return DESCRIPTIONS[part]
-
-    # Паттерн: stCommonSignals.fbXxx.qxSignal
-    if 'stCommonSignals' in parts:
-        for i, part in enumerate(parts):
-            if part.startswith('fb') or part.startswith('qx'):
-                if part in DESCRIPTIONS:
-                    return DESCRIPTIONS[part]
-
-    # Паттерн: stBunker[N].fbXxx.qxSignal
-    if 'stBunker' in parts or 'Bunker' in parts:
-        for i, part in enumerate(parts):
-            if (part.startswith('fb') or part.startswith('cmd') or
-                part.startswith('qx') or part.startswith('r') or
-                part.startswith('x')):
-                if part in DESCRIPTIONS:
-                    return DESCRIPTIONS[part]
-
-    # Паттерн: stDumper/stConveyor fields
-    if 'stDumper' in parts or 'stConveyor' in parts or 'Dumper' in parts or 'Conveyor' in parts:
-        for i, part in enumerate(parts):
-            if part in DESCRIPTIONS:
-                return DESCRIPTIONS[part]
-
-    # Если ничего не найдено, вернуть пустую строку
-    return ''
+# Лексемы вне вызова: комментарии, строки, начало вызова FC_Modbus*, конец POU,
+# однострочное присваивание (без строк, комментариев и вызовов FC_Modbus*)
+_OUTER_TOKEN_RE = re.compile(r"""
+    (?P<comment>//.*)
+  | (?P<block>\(\*)
+  | (?P<string>'(?:\$.|[^'$])*'|"(?:\$.|[^"$])*")
+  | (?P<call>\b(?P<func>FC_Modbus\w+)\s*\()
+  | (?P<end>\bEND_FUNCTION(?:_BLOCK)?\b)
+  | (?P<assign>(?P<target>\b[A-Za-z_][\w.\[\]]*)\s*:=\s*(?P<source>(?:(?!FC_Modbus)[^;'"/])*);)
+""", re.VERBOSE)
+
+# Лексемы внутри списка аргументов вызова: текст аргумента до разделителя + разделитель
+_CALL_TOKEN_RE = re.compile(r"""
+    (?P<text>[^(),/'"]*)
+    (?:
+        (?P<comment>//.*)
+      | (?P<block>\(\*)
+      | (?P<string>'(?:\$.|[^'$])*'|"(?:\$.|[^"$])*")
+      | (?P<lparen>\()
+      | (?P<rparen>\))
+      | (?P<comma>,)
+      | (?P<slash>/)
+    )?
+""", re.VERBOSE)
+
+# Комментарии-заголовки: маркеры блоков Holding/Input и секции (start-end)
+_SECTION_COMMENT_RE = re.compile(r"""
+    //\s*(?P<marker>===)\s*(?:(?P<block>HOLDING|INPUT)\s+РЕГИСТРЫ)?
+  | //\s+(?P<modules>DI|DO)\s+MODULES\s+MAPPING\s*\((?P<m_start>\d+)-(?P<m_end>\d+)\)
+  | //\s+Модуль\s+(?P<module>(?:DI|DO)\d+)\s*\((?P<s_start>\d+)-(?P<s_end>\d+)\):\s*(?P<module_desc>.+)
+  | //\s+(?P<name>.+?)\s*\((?P<start>\d+)-(?P<end>\d+)\)
+""", re.VERBOSE)
+
+# Быстрый путь: однострочный список аргументов без комментариев и строк
+# (допускается один уровень вложенных скобок, например ADR(...))
+_FLAT_CALL_BODY_RE = re.compile(r"([^()/'\"\n]*(?:\([^()/'\"\n]*\)[^()/'\"\n]*)*)\)")
+_FLAT_ARGUMENT_RE = re.compile(r'[^(),]+(?:\([^()]*\)[^(),]*)*|(?:\([^()]*\)[^(),]*)+')
+
+_ADR_RE = re.compile(r'ADR\(\s*(\w+)\s*\)$')
+
+# Присваивания без пробелов: элемент массива регистров (с битом), преобразование типа,
+# уставка времени в секундах
+_REGISTER_ITEM_RE = re.compile(r'(awModbus\w+)\[(\d+)\](?:\.(\d+))?$')
+_CONVERSION_RE = re.compile(r'(\w+)_TO_(\w+)\((.+)\)$')
+_SECONDS_TO_TIME_RE = re.compile(r'REAL_TO_TIME\((.+)\*1000\)$')
+# Типы одного слова, передаваемые преобразованием *_TO_WORD / WORD_TO_*
+_WORD_DATA_TYPES = {'INT', 'UINT', 'DINT'}
+
+_BLOCK_REGISTER_TYPES = {'HOLDING': 'holding_registers', 'INPUT': 'input_registers'}
 
 
 class ModbusRegister:
@@ -264,147 +161,360 @@ class ModbusRegister:
         self.section_name = section_name
         # Автоматически присвоить описание на основе имени переменной
         self.description = find_description(variable_name)
+        # Уставка в секундах для переменной TIME: X := REAL_TO_TIME(... * 1000) (чтение holding)
+        self.seconds_to_time = False
+
+
+class SourceBlock:
+    """
+    Блок исходного кода одной секции: от заголовка '// Секция (start-end)'
+    до следующего заголовка. Хранит хэш содержимого и необработанные вызовы.
+    """
+    def __init__(self, register_type: str, section_name: str):
+        self.register_type = register_type
+        self.section_name = section_name
+        self.calls: List[Tuple[str, List[str]]] = []  # (функция, аргументы)
+        self._hasher = hashlib.sha256()
+
+    @property
+    def content_hash(self) -> str:
+        if self._hasher is None:
+            return self._content_hash
+        return self._hasher.hexdigest()
+
+    def __getstate__(self):
+        # Объект hashlib не сериализуется: в другой процесс передаётся готовый хэш
+        return dict(self.__dict__, _hasher=None, _content_hash=self.content_hash)
 
 
 class FC_ModbusParser:
-    """Парсер файла FC_ModbusToSCADA.st"""
+    """
+    Потоковый парсер файла FB_ModbusToSCADA.st
+
+    Файл читается построчно за один проход: лексер выделяет комментарии
+    и вызовы FC_Modbus* (в том числе многострочные), парсер отслеживает
+    текущий блок (Holding/Input) и секцию и выдаёт регистры по одному.
+    """
 
     def __init__(self, file_path: Path):
         self.file_path = file_path
         self.registers: List[ModbusRegister] = []
         self.sections: Dict[Tuple[str, str], Tuple[int, int]] = {}  # (type, name) -> (start, end)
         self.current_section = ''
+        self._block: Optional[SourceBlock] = None
 
     def parse(self) -> List[ModbusRegister]:
         """Основной метод парсинга файла"""
-        with open(self.file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Разбить на две части: Holding и Input регистры
-        holding_section = self._extract_section(content, 'HOLDING РЕГИСТРЫ')
-        input_section = self._extract_section(content, 'INPUT РЕГИСТРЫ')
-
-        # Парсить каждую секцию
-        if holding_section:
-            self._parse_register_section(holding_section, 'holding_registers')
-        if input_section:
-            self._parse_register_section(input_section, 'input_registers')
-
+        self.registers = list(self.iter_registers())
         return self.registers
 
-    def _extract_section(self, content: str, marker: str) -> Optional[str]:
-        """Извлечь секцию кода между маркерами"""
-        # Pattern matches from marker to either next === section, END_FUNCTION, or end of file
-        pattern = rf'//\s*===\s*{marker}.*?$(.+?)(?=//\s*===|END_FUNCTION|\Z)'
-        match = re.search(pattern, content, re.MULTILINE | re.DOTALL)
-        return match.group(1) if match else None
+    def iter_registers(self) -> Iterator[ModbusRegister]:
+        """Генератор регистров: один проход по файлу без загрузки его в память"""
+        for block in self.iter_blocks():
+            yield from self.build_registers(block)
 
-    def _parse_register_section(self, content: str, register_type: str):
-        """Парсить секцию регистров"""
-        lines = content.split('\n')
+    def iter_blocks(self) -> Iterator[SourceBlock]:
+        """
+        Генератор блоков секций
 
-        for line in lines:
-            # Проверка на DI/DO MODULES MAPPING секции (основная секция)
-            di_do_match = re.match(r'//\s+(DI|DO)\s+MODULES\s+MAPPING\s*\((\d+)-(\d+)\)', line)
-            if di_do_match:
-                module_type = di_do_match.group(1)
-                start_reg = int(di_do_match.group(2))
-                end_reg = int(di_do_match.group(3))
-                section_name = f"{module_type} MODULES MAPPING"
-                self.current_section = section_name
-                self.sections[(register_type, section_name)] = (start_reg, end_reg)
-                continue
+        Вызовы внутри блока не разбираются в регистры - это делает
+        build_registers(), что позволяет пропускать неизменённые блоки.
+        """
+        register_type: Optional[str] = None
+        self._block = None
 
-            # Проверка на подсекции модулей (Модуль DI1, DO1 и т.д.) - ПЕРЕД общим паттерном!
-            module_subsection_match = re.match(r'//\s+Модуль\s+(DI|DO)(\d+)\s*\((\d+)-(\d+)\):\s*(.+)', line)
-            if module_subsection_match:
-                module_type = module_subsection_match.group(1)
-                module_num = module_subsection_match.group(2)
-                start_reg = int(module_subsection_match.group(3))
-                end_reg = int(module_subsection_match.group(4))
-                description = module_subsection_match.group(5)
-                section_name = f"Модуль {module_type}{module_num}: {description}"
-                self.current_section = section_name
-                self.sections[(register_type, section_name)] = (start_reg, end_reg)
+        with open(self.file_path, 'r', encoding='utf-8') as f:
+            for kind, value, args in self._tokenize(self._hashed_lines(f)):
+                if kind == 'call' or kind == 'assign':
+                    if self._block:
+                        self._block.calls.append((value, args))
+                    continue
+
+                finished = self._block
+                if kind == 'comment':
+                    register_type = self._parse_comment(value, register_type)
+                else:  # END_FUNCTION / END_FUNCTION_BLOCK
+                    register_type = None
+                    self._block = None
+                if finished and self._block is not finished:
+                    yield finished
+
+        if self._block:
+            yield self._block
+            self._block = None
+
+    def build_registers(self, block: SourceBlock) -> Iterator[ModbusRegister]:
+        """Разобрать вызовы и присваивания блока в регистры"""
+        pending: Optional[ModbusRegister] = None  # REAL, который может уйти в TIME следующим присваиванием
+        state: Dict[str, object] = {'bits': []}  # Состояние сгенерированного кода (слово wBits, UNION)
+        for func, args in block.calls:
+            if func == ':=':
+                target, source = (' '.join(arg.split()) for arg in args)
+                if pending:
+                    # FC_ModbusReadReal(rValue => rTempTime); X := REAL_TO_TIME(rTempTime * 1000);
+                    seconds = _SECONDS_TO_TIME_RE.match(source.replace(' ', ''))
+                    if seconds and seconds.group(1) == pending.variable_name:
+                        pending = ModbusRegister(pending.register_type, pending.register_address, None,
+                                                 'REAL', target, pending.section_name)
+                        pending.seconds_to_time = True
+                    yield pending
+                    pending = None
+                yield from self._build_assignment(target, source, block.register_type, block.section_name, state)
                 continue
 
-            # Проверка на секцию оборудования (стандартный формат - общий паттерн)
-            section_match = re.match(r'//\s+(.+?)\s*\((\d+)-(\d+)\)', line)
-            if section_match:
-                section_name = section_match.group(1)
-                start_reg = int(section_match.group(2))
-                end_reg = int(section_match.group(3))
-                self.current_section = section_name
-                self.sections[(register_type, section_name)] = (start_reg, end_reg)
-                continue
+            if pending:
+                yield pending
+            pending = self._build_register(func, args, block.register_type, block.section_name)
+            if pending and pending.data_type != 'REAL':
+                yield pending
+                pending = None
+        if pending:
+            yield pending
+
+    def _hashed_lines(self, lines: Iterable[str]) -> Iterator[str]:
+        """
+        Передать строки лексеру, добавляя каждую в хэш текущего блока
+
+        Строка хэшируется после того, как лексер и парсер её обработали,
+        поэтому строка-заголовок попадает в хэш своей (новой) секции.
+        """
+        for line in lines:
+            yield line
+            if self._block:
+                self._block._hasher.update(line.encode('utf-8'))
+
+    def _tokenize(self, lines: Iterable[str]) -> Iterator[Tuple[str, str, Optional[List[str]]]]:
+        """
+        Лексер Structured Text
+
+        Выдаёт кортежи (вид, текст, аргументы):
+            ('comment', текст, None) - строчный комментарий в начале строки
+            ('call', имя функции, [аргументы]) - вызов FC_Modbus* целиком
+            ('assign', ':=', [цель, значение]) - однострочное присваивание
+            ('end', ключевое слово, None) - END_FUNCTION / END_FUNCTION_BLOCK
+        Блочные комментарии (* *) и строковые литералы пропускаются.
+        """
+        in_block_comment = False
+        call_func: Optional[str] = None  # Имя функции незавершённого вызова
+        depth = 0
+        args: List[str] = []
+        chunk: List[str] = []
 
-            # Парсинг вызовов функций FC_ModbusRead/Write
-            self._parse_function_call(line, register_type)
-
-    def _parse_function_call(self, line: str, register_type: str):
-        """Парсить вызов функции FC_ModbusRead/WriteBool/Real/Int"""
-
-        # FC_ModbusReadBool / FC_ModbusWriteBool
-        bool_pattern = r'FC_Modbus(?:Read|Write)Bool\(\s*pRegisters\s*:=\s*ADR\((\w+)\).*?iRegisterIndex\s*:=\s*(\d+).*?iBitIndex\s*:=\s*(\d+).*?xValue\s*(?:=>|:=)\s*(.+?)\)'
-        match = re.search(bool_pattern, line, re.DOTALL)
-        if match:
-            reg_array = match.group(1)
-            reg_index = int(match.group(2))
-            bit_index = int(match.group(3))
-            variable = match.group(4).strip().rstrip(');')
-
-            # Проверка типа регистра по имени массива
-            if self._matches_register_type(reg_array, register_type):
-                reg = ModbusRegister(
-                    register_type=register_type,
-                    register_address=reg_index,
-                    bit_index=bit_index,
-                    data_type='BOOL',
-                    variable_name=variable,
-                    section_name=self.current_section
-                )
-                self.registers.append(reg)
+        for line in lines:
+            pos = 0
+            while True:
+                if in_block_comment:
+                    end = line.find('*)', pos)
+                    if end < 0:
+                        break
+                    in_block_comment = False
+                    pos = end + 2
+
+                if call_func is None:
+                    m = _OUTER_TOKEN_RE.search(line, pos)
+                    if not m:
+                        break
+                    kind = m.lastgroup
+                    pos = m.end()
+                    if kind == 'comment':
+                        if not line[:m.start()].strip():
+                            yield ('comment', m.group().rstrip(), None)
+                        break
+                    elif kind == 'block':
+                        in_block_comment = True
+                    elif kind == 'call':
+                        body = _FLAT_CALL_BODY_RE.match(line, pos)
+                        if body:
+                            yield ('call', m.group('func'), _FLAT_ARGUMENT_RE.findall(body.group(1)))
+                            pos = body.end()
+                            continue
+                        call_func = m.group('func')
+                        depth = 0
+                        args = []
+                        chunk = []
+                    elif kind == 'end':
+                        yield ('end', m.group(), None)
+                    elif kind == 'assign':
+                        yield ('assign', ':=', [m.group('target'), m.group('source')])
+                    continue
+
+                m = _CALL_TOKEN_RE.match(line, pos)
+                chunk.append(m.group('text'))
+                kind = m.lastgroup
+                if kind == 'text':
+                    # Разделителей до конца строки нет - вызов продолжается на следующей
+                    break
+                pos = m.end()
+                if kind == 'comment':
+                    break
+                elif kind == 'block':
+                    in_block_comment = True
+                elif kind == 'comma' and depth == 0:
+                    args.append(''.join(chunk))
+                    chunk = []
+                elif kind == 'rparen' and depth == 0:
+                    args.append(''.join(chunk))
+                    yield ('call', call_func, args)
+                    call_func = None
+                else:
+                    if kind == 'lparen':
+                        depth += 1
+                    elif kind == 'rparen':
+                        depth -= 1
+                    chunk.append(m.group(kind))
+
+    def _parse_comment(self, comment: str, register_type: Optional[str]) -> Optional[str]:
+        """Обработать комментарий-заголовок, вернуть тип регистров текущего блока"""
+        m = _SECTION_COMMENT_RE.match(comment)
+        if not m:
+            return register_type
+
+        # Маркер блока "// === ..." закрывает текущий блок и, возможно, открывает новый
+        if m.group('marker'):
+            self.current_section = ''
+            register_type = _BLOCK_REGISTER_TYPES.get(m.group('block'))
+            self._block = SourceBlock(register_type, '') if register_type else None
+            return register_type
+
+        if m.group('modules'):
+            # DI/DO MODULES MAPPING секции (основная секция)
+            section_name = f"{m.group('modules')} MODULES MAPPING"
+            start_reg, end_reg = int(m.group('m_start')), int(m.group('m_end'))
+        elif m.group('module'):
+            # Подсекции модулей (Модуль DI1, DO1 и т.д.)
+            section_name = f"Модуль {m.group('module')}: {m.group('module_desc')}"
+            start_reg, end_reg = int(m.group('s_start')), int(m.group('s_end'))
+        else:
+            # Секция оборудования (стандартный формат)
+            section_name = m.group('name')
+            start_reg, end_reg = int(m.group('start')), int(m.group('end'))
+
+        if register_type:
+            self.current_section = section_name
+            self.sections[(register_type, section_name)] = (start_reg, end_reg)
+            self._block = SourceBlock(register_type, section_name)
+        return register_type
+
+    def _build_register(self, func: str, args: List[str], register_type: str,
+                        section_name: str) -> Optional[ModbusRegister]:
+        """Построить регистр из аргументов вызова FC_Modbus*"""
+        spec = MODBUS_FUNCTIONS.get(func)
+        if not spec:
+            return None
+        data_type, value_param = spec
+
+        params = {}
+        for arg in args:
+            name, sep, value = arg.partition(':=')
+            if not sep:
+                name, sep, value = arg.partition('=>')
+                if not sep:
+                    continue
+            params[name.strip()] = ' '.join(value.split())
+
+        array = _ADR_RE.match(params.get('pRegisters', ''))
+        if not array or not self._matches_register_type(array.group(1), register_type):
+            return None
+
+        variable = params.get(value_param)
+        if not variable:
+            return None
+
+        try:
+            register_address = int(params['iRegisterIndex'])
+            bit_index = int(params['iBitIndex']) if data_type == 'BOOL' else None
+        except (KeyError, ValueError):
+            # Адрес задан выражением, а не литералом - не может быть размечен статически
+            return None
+
+        return ModbusRegister(
+            register_type=register_type,
+            register_address=register_address,
+            bit_index=bit_index,
+            data_type=data_type,
+            variable_name=variable,
+            section_name=section_name
+        )
+
+    def _build_assignment(self, target: str, source: str, register_type: str, section_name: str,
+                          state: Dict[str, object]) -> Iterator[ModbusRegister]:
+        """
+        Построить регистры из присваивания FB, сгенерированного generate_modbus_fb.py
+
+        Формы (awModbus...[N] - элемент массива регистров; пробелы при сравнении не учитываются):
+            X := awModbusHoldingRegisters[N].B          - BOOL (чтение бита)
+            wBits := 0; wBits.B := X; ...[N] := wBits   - BOOL (слово Input собирается целиком)
+            uReal.wTag[1] := ...[N]; X := uReal.rTag    - REAL/TIME через UNION (также REAL_TO_TIME(uReal.rTag*1000))
+            uReal.rTag := X; ...[N] := uReal.wTag[1]    - запись REAL/TIME
+            X := WORD_TO_INT(...[N]); ...[N] := INT_TO_WORD(X) - целые типы
+        Остальные присваивания пропускаются.
+        """
+        def register(item, data_type, variable, bit_index=None):
+            if not self._matches_register_type(item.group(1), register_type):
+                return None
+            return ModbusRegister(register_type, int(item.group(2)), bit_index, data_type, variable, section_name)
+
+        unions = {f'{name}.{field}': data_type for data_type, (_, name, field) in WORD_UNIONS.items()}
+        high_words = {f'{name}.wTag[1]': data_type for data_type, (_, name, _) in WORD_UNIONS.items()}
+
+        value = source  # Переменная регистра - как в исходнике
+        target, source = target.replace(' ', ''), source.replace(' ', '')
+        item = _REGISTER_ITEM_RE.match(target)
+        if item:
+            # Запись в регистр
+            conversion = _CONVERSION_RE.match(value)
+            reg = None
+            if source == PACKED_WORD and not item.group(3):
+                for bit_index, variable in state['bits']:
+                    reg = register(item, 'BOOL', variable, bit_index)
+                    if reg:
+                        yield reg
+                state['bits'] = []
+                return
+            if source in high_words and 'value' in state:
+                reg = register(item, high_words[source], state.pop('value'))
+            elif conversion and conversion.group(2) == 'WORD' and conversion.group(1) in _WORD_DATA_TYPES:
+                reg = register(item, conversion.group(1), conversion.group(3).strip())
+            if reg:
+                yield reg
             return
 
-        # FC_ModbusReadReal / FC_ModbusWriteReal
-        real_pattern = r'FC_Modbus(?:Read|Write)Real\(\s*pRegisters\s*:=\s*ADR\((\w+)\).*?iRegisterIndex\s*:=\s*(\d+).*?rValue\s*(?:=>|:=)\s*(.+?)\)'
-        match = re.search(real_pattern, line, re.DOTALL)
-        if match:
-            reg_array = match.group(1)
-            reg_index = int(match.group(2))
-            variable = match.group(3).strip().rstrip(');')
-
-            if self._matches_register_type(reg_array, register_type):
-                reg = ModbusRegister(
-                    register_type=register_type,
-                    register_address=reg_index,
-                    bit_index=None,
-                    data_type='REAL',
-                    variable_name=variable,
-                    section_name=self.current_section
-                )
-                self.registers.append(reg)
+        if target.startswith(PACKED_WORD + '.'):
+            bit_index = target[len(PACKED_WORD) + 1:]
+            if bit_index.isdigit():
+                state['bits'].append((int(bit_index), value))
+            return
+        if target == PACKED_WORD:
+            state['bits'] = []
+            return
+        if target in unions:
+            state['value'] = value
             return
 
-        # FC_ModbusReadInt / FC_ModbusWriteInt
-        int_pattern = r'FC_Modbus(?:Read|Write)Int\(\s*pRegisters\s*:=\s*ADR\((\w+)\).*?iRegisterIndex\s*:=\s*(\d+).*?nValue\s*(?:=>|:=)\s*(.+?)\)'
-        match = re.search(int_pattern, line, re.DOTALL)
-        if match:
-            reg_array = match.group(1)
-            reg_index = int(match.group(2))
-            variable = match.group(3).strip().rstrip(');')
-
-            if self._matches_register_type(reg_array, register_type):
-                reg = ModbusRegister(
-                    register_type=register_type,
-                    register_address=reg_index,
-                    bit_index=None,
-                    data_type='INT',
-                    variable_name=variable,
-                    section_name=self.current_section
-                )
-                self.registers.append(reg)
+        # Чтение из регистра
+        item = _REGISTER_ITEM_RE.match(source)
+        if item:
+            if target in high_words:
+                state['read'] = (item, high_words[target])
+            elif item.group(3):
+                reg = register(item, 'BOOL', target, int(item.group(3)))
+                if reg:
+                    yield reg
             return
+        seconds = _SECONDS_TO_TIME_RE.match(source)
+        if (seconds.group(1) if seconds else source) in unions and 'read' in state:
+            item, data_type = state.pop('read')
+            reg = register(item, data_type, target)
+            if reg:
+                reg.seconds_to_time = seconds is not None
+                yield reg
+            return
+        conversion = _CONVERSION_RE.match(source)
+        if conversion and conversion.group(1) == 'WORD' and conversion.group(2) in _WORD_DATA_TYPES:
+            item = _REGISTER_ITEM_RE.match(conversion.group(3))
+            reg = register(item, conversion.group(2), target) if item and not item.group(3) else None
+            if reg:
+                yield reg
 
     def _matches_register_type(self, array_name: str, register_type: str) -> bool:
         """Проверка соответствия массива типу регистра"""
@@ -415,6 +525,91 @@ class FC_ModbusParser:
         return False
 
 
+class MigrationReport:
+    """Отчёт о пакетной миграции регистров"""
+    def __init__(self):
+        self.inserted = 0
+        # (регистр, регистр, который уже занял этот адрес в том же прогоне)
+        self.duplicates: List[Tuple[ModbusRegister, ModbusRegister]] = []
+        # Регистры, адрес которых уже занят в БД
+        self.conflicts: List[ModbusRegister] = []
+        # (регистр, причина) - неизвестный тип регистра или тип данных
+        self.unknown: List[Tuple[ModbusRegister, str]] = []
+        self.descriptions_found = 0
+        self.missing_descriptions: List[str] = []
+
+    def print_summary(self, verbose: bool = False):
+        """Вывести отчёт"""
+        print(f"✅ Вставлено регистров: {self.inserted}")
+
+        if self.duplicates:
+            print(f"⚠️  Пропущено дубликатов: {len(self.duplicates)}")
+            for reg, first in self.duplicates[:20]:
+                print(f"      - {_format_address(reg)} {reg.variable_name} "
+                      f"(адрес уже занят: {first.variable_name})")
+            if len(self.duplicates) > 20:
+                print(f"      ... и еще {len(self.duplicates) - 20}")
+
+        if self.conflicts:
+            print(f"⚠️  Пропущено конфликтов с БД: {len(self.conflicts)}")
+            for reg in self.conflicts[:20]:
+                print(f"      - {_format_address(reg)} {reg.variable_name}")
+            if len(self.conflicts) > 20:
+                print(f"      ... и еще {len(self.conflicts) - 20}")
+
+        for reg, reason in self.unknown:
+            print(f"⚠️  {reg.variable_name}: {reason}")
+
+        # Статистика описаний
+        total_descriptions = self.descriptions_found + len(self.missing_descriptions)
+        if total_descriptions > 0:
+            coverage_percent = (self.descriptions_found / total_descriptions) * 100
+            print(f"\n📝 Статистика описаний:")
+            print(f"   Найдено описаний: {self.descriptions_found}/{total_descriptions} ({coverage_percent:.1f}%)")
+            if self.missing_descriptions:
+                print(f"   Без описаний: {len(self.missing_descriptions)}")
+                if verbose:
+                    print(f"\n⚠️  Переменные без описаний:")
+                    for var in self.missing_descriptions[:20]:  # Показать первые 20
+                        print(f"      - {var}")
+                    if len(self.missing_descriptions) > 20:
+                        print(f"      ... и еще {len(self.missing_descriptions) - 20}")
+
+
+def _format_address(reg: ModbusRegister) -> str:
+    """Адрес регистра в формате карты: 0.4 для BOOL, 32 для остальных"""
+    if reg.bit_index is not None:
+        return f"{reg.register_address}.{reg.bit_index}"
+    return str(reg.register_address)
+
+
+def _section_state(parser: FC_ModbusParser, blocks: Iterable[SourceBlock]
+                   ) -> Tuple[Dict[Tuple[str, str], List[SourceBlock]], Dict[Tuple[str, str], Tuple[int, int, str]]]:
+    """
+    Блоки и состояние секций файла
+
+    Returns:
+        ((тип, секция) -> блоки, (тип, секция) -> (начало, конец, хэш содержимого))
+    """
+    # Секция может встречаться в файле несколькими блоками - объединить их
+    grouped: Dict[Tuple[str, str], List[SourceBlock]] = {}
+    for block in blocks:
+        if not block.section_name and not block.calls:
+            continue  # Пустой промежуток между маркером блока и первой секцией
+        key = (block.register_type, block.section_name or UNDEFINED_SECTION)
+        grouped.setdefault(key, []).append(block)
+
+    current = {}
+    for key, key_blocks in grouped.items():
+        if len(key_blocks) == 1:
+            content_hash = key_blocks[0].content_hash
+        else:
+            content_hash = hashlib.sha256(''.join(b.content_hash for b in key_blocks).encode('ascii')).hexdigest()
+        start_reg, end_reg = parser.sections.get(key, (0, 65535))
+        current[key] = (start_reg, end_reg, content_hash)
+    return grouped, current
+
+
 class DatabaseMigrator:
     """Класс для миграции данных в SQLite"""
 
@@ -423,14 +618,21 @@ class DatabaseMigrator:
         self.schema_path = schema_path
         self.conn: Optional[sqlite3.Connection] = None
 
-    def initialize_database(self):
-        """Создать БД из schema.sql"""
+    def initialize_database(self, confirm: bool = True):
+        """
+        Создать БД из schema.sql
+
+        Args:
+            confirm: Спросить подтверждение перед удалением существующей БД
+                (False - удалить без вопроса, для автоматического запуска)
+        """
         if self.db_path.exists():
             print(f"⚠️  База данных {self.db_path} уже существует")
-            response = input("Удалить и пересоздать? (y/N): ")
-            if response.lower() != 'y':
-                print("Отменено.")
-                return False
+            if confirm:
+                response = input("Удалить и пересоздать? (y/N): ")
+                if response.lower() != 'y':
+                    print("Отменено.")
+                    return False
             self.db_path.unlink()
 
         # Создать БД
@@ -445,115 +647,453 @@ class DatabaseMigrator:
         print(f"✅ База данных создана: {self.db_path}")
         return True
 
-    def migrate_sections(self, sections: Dict[Tuple[str, str], Tuple[int, int]]):
+    def open_database(self) -> bool:
+        """Открыть существующую БД без пересоздания (или создать новую)"""
+        if not self.db_path.exists():
+            return self.initialize_database()
+
+        self.conn = sqlite3.connect(self.db_path)
+        self.upgrade_schema()
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        return True
+
+    def upgrade_schema(self):
+        """
+        Привести БД, созданную по старой версии schema.sql, к текущей
+
+        Недостающие таблицы, индексы, триггеры и представления создаются,
+        а изменившие определение - пересоздаются; таблицы без новых колонок (content_hash, plc_id, deadband) пересоздаются
+        с копированием данных. Производные таблицы (DERIVED_TABLES) и индекс FTS5
+        после этого заполняются заново.
+        Всё выполняется в одной транзакции.
+        """
+        reference = sqlite3.connect(':memory:')
+        with open(self.schema_path, 'r', encoding='utf-8') as f:
+            reference.executescript(f.read())
+        expected = reference.execute("""
+            SELECT type, name, tbl_name, sql FROM sqlite_master
+            WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%'
+            ORDER BY CASE type WHEN 'table' THEN 0 WHEN 'index' THEN 1 ELSE 2 END, rowid
+        """).fetchall()
+        # Теневые таблицы FTS5 (register_texts_fts_data и т.п.) создаются вместе со своей виртуальной таблицей
+        virtual = [name for kind, name, _, sql in expected if kind == 'table' and sql.startswith('CREATE VIRTUAL')]
+        expected = [row for row in expected
+                    if not (row[0] == 'table' and any(row[1].startswith(f"{name}_") for name in virtual))]
+        current = {row[0]: row[1] for row in self.conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE sql IS NOT NULL")}
+
+        def columns(conn, table):
+            return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+        rebuild = [name for kind, name, _, _ in expected
+                   if kind == 'table' and name in current
+                   and set(columns(reference, name)) - set(columns(self.conn, name))]
+        missing = [row for row in expected if row[1] not in current or row[2] in rebuild
+                   or (row[0] == 'view' and rebuild) or (row[0] != 'table' and current[row[1]] != row[3])]
+        if not missing:
+            reference.close()
+            return
+
+        self.conn.execute("PRAGMA foreign_keys = OFF")
+        self.conn.execute("PRAGMA legacy_alter_table = ON")  # Не переписывать ссылки на переименованные таблицы
+        try:
+            with self.conn:
+                cursor = self.conn.cursor()
+                cursor.execute("BEGIN")
+                for kind, name, table, _ in missing:
+                    if kind == 'view' and name in current:
+                        cursor.execute(f"DROP VIEW {name}")
+                    elif kind in ('index', 'trigger') and name in current and table not in rebuild:
+                        cursor.execute(f"DROP {kind.upper()} {name}")
+                for name in rebuild:
+                    cursor.execute(f"ALTER TABLE {name} RENAME TO _old_{name}")
+
+                for kind, name, _, sql in missing:
+                    if kind != 'table':
+                        continue
+                    cursor.execute(sql)
+                    if name in rebuild:
+                        shared = [c for c in columns(self.conn, f"_old_{name}") if c in columns(reference, name)]
+                        column_list = ', '.join(shared)
+                        cursor.execute(f"INSERT INTO {name} ({column_list}) SELECT {column_list} FROM _old_{name}")
+                        if name == 'sections' and 'is_manual' not in shared:
+                            # Раньше ручную секцию отмечал только NULL в content_hash; секции из файла
+                            # получат хэш (и is_manual = 0) при ближайшей синхронизации
+                            cursor.execute("UPDATE sections SET is_manual = 1 WHERE content_hash IS NULL")
+                    else:
+                        # Новая таблица: перенести строки справочника из schema.sql
+                        rows = reference.execute(f"SELECT * FROM {name}").fetchall()
+                        if rows:
+                            cursor.executemany(
+                                f"INSERT INTO {name} VALUES ({', '.join('?' * len(rows[0]))})", rows)
+
+                # Вместе со старыми таблицами удаляются их индексы и триггеры
+                for name in rebuild:
+                    cursor.execute(f"DROP TABLE _old_{name}")
+                for kind, _, _, sql in missing:
+                    if kind != 'table':
+                        cursor.execute(sql)
+
+                # Производные таблицы и индексы FTS5 (external content) строятся по уже перенесённым строкам
+                for name, sql in DERIVED_TABLES.items():
+                    if 'registers' in rebuild or any(row[1] == name for row in missing):
+                        cursor.execute(f"DELETE FROM {name}")
+                        cursor.execute(sql)
+                for name in virtual:
+                    if rebuild or any(row[1] == name for row in missing):
+                        cursor.execute(f"INSERT INTO {name} ({name}) VALUES ('rebuild')")
+        finally:
+            self.conn.execute("PRAGMA legacy_alter_table = OFF")
+            reference.close()
+        print(f"✅ Схема БД обновлена (пересозданы таблицы: {', '.join(rebuild) or 'нет'})")
+
+    def register_plc(self, name: str, site: Optional[str] = None,
+                     project_root: Optional[Path] = None) -> int:
+        """Добавить ПЛК в таблицу plcs (или обновить площадку/путь) и вернуть его id"""
+        with self.conn:
+            self.conn.execute("""
+                INSERT INTO plcs (name, site, project_root) VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    site = COALESCE(excluded.site, site),
+                    project_root = COALESCE(excluded.project_root, project_root)
+            """, (name, site, str(project_root) if project_root else None))
+        return self.conn.execute("SELECT id FROM plcs WHERE name = ?", (name,)).fetchone()[0]
+
+    def ingest_projects(self, projects: List[Tuple[str, Path]], site: Optional[str] = None,
+                        workers: Optional[int] = None, verbose: bool = False) -> Dict[str, Dict[str, int]]:
+        """
+        Загрузить карты нескольких проектов (ПЛК) в одну БД
+
+        FB_ModbusToSCADA.st каждого проекта разбирается и хэшируется в отдельном
+        процессе пула; результаты по мере готовности синхронизируются в БД
+        (запись в SQLite выполняется в текущем процессе, по транзакции на ПЛК).
+
+        Args:
+            projects: Пары (имя ПЛК, корень проекта)
+            site: Площадка для всех переданных ПЛК
+            workers: Размер пула процессов (по умолчанию - число ядер)
+
+        Returns:
+            Статистика sync() по каждому ПЛК
+        """
+        start_time = time.perf_counter()
+        plc_ids = {name: self.register_plc(name, site, root) for name, root in projects}
+        results = {}
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(parse_project, root / 'POUs' / 'FB_ModbusToSCADA.st'): name
+                       for name, root in projects}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    parser, blocks, type_report = future.result()
+                except (OSError, UnicodeDecodeError) as e:
+                    print(f"\n❌ {name}: {e}")
+                    continue
+
+                print(f"\n🏭 ПЛК {name}: {parser.file_path}")
+                if type_report.errors:
+                    print(f"⚠️  Ошибок типа: {len(type_report.errors)}"
+                          f" (python3 symbol_table.py --check в проекте)")
+                results[name] = self.sync(parser, verbose=verbose, plc_id=plc_ids[name], blocks=blocks)
+
+        elapsed = time.perf_counter() - start_time
+        print(f"\n⏱️  Проектов загружено: {len(results)}/{len(projects)} за {elapsed:.2f} с")
+        return results
+
+    def sync(self, parser: FC_ModbusParser, verbose: bool = False, plc_id: int = DEFAULT_PLC_ID,
+             blocks: Optional[Iterable[SourceBlock]] = None) -> Dict[str, int]:
+        """
+        Инкрементальная синхронизация БД с FB_ModbusToSCADA.st
+
+        Каждый блок секции хэшируется; регистры разбираются и записываются
+        только для секций, хэш или диапазон которых изменился. Описания,
+        отредактированные вручную, сохраняются. Все изменения выполняются
+        в одной транзакции.
+
+        Args:
+            plc_id: ПЛК, карта которого синхронизируется
+            blocks: Уже прочитанные блоки файла (иначе файл читается parser.iter_blocks())
+        """
+        start_time = time.perf_counter()
+        cursor = self.conn.cursor()
+
+        type_ids = dict(cursor.execute("SELECT name, id FROM register_types"))
+        data_type_ids = dict(cursor.execute("SELECT name, id FROM data_types"))
+        stored = {}
+        for row in cursor.execute("""
+            SELECT s.id, rt.name, s.name, s.start_register, s.end_register, s.content_hash, s.is_manual
+            FROM sections s
+            JOIN register_types rt ON s.register_type_id = rt.id
+            WHERE s.plc_id = ?
+        """, (plc_id,)):
+            stored[(row[1], row[2])] = (row[0], row[3], row[4], row[5], row[6])
+
+        grouped, current = _section_state(parser, parser.iter_blocks() if blocks is None else blocks)
+
+        changed = [key for key, value in current.items()
+                   if key not in stored or stored[key][1:4] != value]
+        # Секции, добавленные вручную, не удаляются
+        removed = [key for key, value in stored.items()
+                   if key not in current and not value[4]]
+
+        stats = {'sections_total': len(current), 'sections_changed': len(changed),
+                 'sections_removed': len(removed), 'inserted': 0, 'updated': 0,
+                 'deleted': 0, 'duplicates': 0, 'conflicts': 0}
+
+        with self.conn:
+            section_ids = {}
+            for key in changed:
+                start_reg, end_reg, content_hash = current[key]
+                if key in stored:
+                    section_ids[key] = stored[key][0]
+                    # Секция есть в файле - больше не ручная
+                    cursor.execute("""
+                        UPDATE sections SET start_register = ?, end_register = ?, content_hash = ?, is_manual = 0
+                        WHERE id = ?
+                    """, (start_reg, end_reg, content_hash, stored[key][0]))
+                else:
+                    cursor.execute("""
+                        INSERT INTO sections (plc_id, register_type_id, name, start_register, end_register, content_hash)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    """, (plc_id, type_ids[key[0]], key[1], start_reg, end_reg, content_hash))
+                    section_ids[key] = cursor.lastrowid
+
+            # Существующие регистры изменённых секций: (тип, адрес, бит) -> строка
+            existing = {}
+            ids = list(section_ids.values())
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                cursor.execute(f"""
+                    SELECT id, register_type_id, register_address, bit_index,
+                           section_id, data_type_id, variable_name, description
+                    FROM registers WHERE section_id IN ({','.join('?' * len(chunk))})
+                """, chunk)
+                for row in cursor.fetchall():
+                    existing[(row[1], row[2], row[3])] = row
+
+            seen = set()
+            for key in changed:
+                section_id = section_ids[key]
+                register_type_id = type_ids[key[0]]
+                for block in grouped[key]:
+                    for reg in parser.build_registers(block):
+                        address_key = (register_type_id, reg.register_address, reg.bit_index)
+                        if address_key in seen:
+                            stats['duplicates'] += 1
+                            continue
+                        seen.add(address_key)
+                        data_type_id = data_type_ids[reg.data_type]
+
+                        row = existing.pop(address_key, None)
+                        if row is None:
+                            try:
+                                cursor.execute("""
+                                    INSERT INTO registers (
+                                        plc_id, register_type_id, section_id, register_address, bit_index,
+                                        data_type_id, variable_name, description
+                                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                                """, (plc_id, register_type_id, section_id, reg.register_address, reg.bit_index,
+                                      data_type_id, reg.variable_name, reg.description or None))
+                                stats['inserted'] += 1
+                            except sqlite3.IntegrityError:
+                                # Адрес занят регистром неизменённой секции
+                                stats['conflicts'] += 1
+                                if verbose:
+                                    print(f"⚠️  Конфликт адреса: {reg.variable_name} @ "
+                                          f"{reg.register_address}.{reg.bit_index}")
+                        elif (row[4], row[5], row[6]) != (section_id, data_type_id, reg.variable_name) \
+                                or (not row[7] and reg.description):
+                            cursor.execute("""
+                                UPDATE registers
+                                SET section_id = ?, data_type_id = ?, variable_name = ?,
+                                    description = COALESCE(NULLIF(description, ''), ?)
+                                WHERE id = ?
+                            """, (section_id, data_type_id, reg.variable_name,
+                                  reg.description or None, row[0]))
+                            stats['updated'] += 1
+
+            # Регистры, исчезнувшие из изменённых секций
+            cursor.executemany("DELETE FROM registers WHERE id = ?",
+                               [(row[0],) for row in existing.values()])
+            stats['deleted'] = len(existing)
+
+            for key in removed:
+                section_id = stored[key][0]
+                cursor.execute("DELETE FROM registers WHERE section_id = ?", (section_id,))
+                stats['deleted'] += cursor.rowcount
+                cursor.execute("DELETE FROM sections WHERE id = ?", (section_id,))
+
+        if stats['inserted'] or stats['updated'] or stats['deleted']:
+            self.optimize_search_index()
+        stats['elapsed_ms'] = round((time.perf_counter() - start_time) * 1000, 1)
+
+        print(f"✅ Секций изменено: {stats['sections_changed']}/{stats['sections_total']}"
+              f" (удалено: {stats['sections_removed']})")
+        print(f"   Регистров добавлено: {stats['inserted']}, обновлено: {stats['updated']},"
+              f" удалено: {stats['deleted']}")
+        if stats['duplicates'] or stats['conflicts']:
+            print(f"⚠️  Пропущено дубликатов: {stats['duplicates']}, конфликтов: {stats['conflicts']}")
+        print(f"⏱️  Время синхронизации: {stats['elapsed_ms']} мс")
+        return stats
+
+    def store_section_hashes(self, parser: FC_ModbusParser, blocks: Iterable[SourceBlock],
+                             plc_id: int = DEFAULT_PLC_ID):
+        """
+        Записать хэши блоков секциям, созданным migrate_sections()/migrate_registers()
+
+        После этого первая sync() перезаписывает только действительно изменённые секции.
+        """
+        _, current = _section_state(parser, blocks)
+        type_ids = dict(self.conn.execute("SELECT name, id FROM register_types"))
+        with self.conn:
+            self.conn.executemany("""
+                UPDATE sections SET start_register = ?, end_register = ?, content_hash = ?
+                WHERE plc_id = ? AND register_type_id = ? AND name = ?
+            """, [(start_reg, end_reg, content_hash, plc_id, type_ids[register_type], name)
+                  for (register_type, name), (start_reg, end_reg, content_hash) in current.items()])
+
+    def migrate_sections(self, sections: Dict[Tuple[str, str], Tuple[int, int]], plc_id: int = DEFAULT_PLC_ID):
         """Мигрировать секции в БД"""
         cursor = self.conn.cursor()
+        type_ids = dict(cursor.execute("SELECT name, id FROM register_types"))
 
         for (reg_type, section_name), (start_reg, end_reg) in sections.items():
-            # Получить register_type_id
-            cursor.execute("SELECT id FROM register_types WHERE name = ?", (reg_type,))
-            row = cursor.fetchone()
-            if not row:
+            register_type_id = type_ids.get(reg_type)
+            if register_type_id is None:
                 print(f"⚠️  Неизвестный тип регистра: {reg_type}")
                 continue
-            register_type_id = row[0]
 
             # Вставить секцию
             try:
                 cursor.execute("""
-                    INSERT INTO sections (register_type_id, name, start_register, end_register)
-                    VALUES (?, ?, ?, ?)
-                """, (register_type_id, section_name, start_reg, end_reg))
+                    INSERT INTO sections (plc_id, register_type_id, name, start_register, end_register)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (plc_id, register_type_id, section_name, start_reg, end_reg))
             except sqlite3.IntegrityError:
                 print(f"⚠️  Секция '{section_name}' уже существует, пропуск")
 
         self.conn.commit()
         print(f"✅ Мигрировано секций: {len(sections)}")
 
-    def migrate_registers(self, registers: List[ModbusRegister], verbose: bool = False):
-        """Мигрировать регистры в БД"""
+    def migrate_registers(self, registers: Iterable[ModbusRegister], verbose: bool = False,
+                          plc_id: int = DEFAULT_PLC_ID) -> MigrationReport:
+        """
+        Мигрировать регистры в БД
+
+        Справочники (типы регистров, типы данных, секции) загружаются один раз,
+        строки вставляются пакетно через executemany в одной транзакции.
+        Дубликаты и конфликты не вставляются и попадают в отчёт.
+        """
+        report = MigrationReport()
         cursor = self.conn.cursor()
-        inserted_count = 0
-        skipped_count = 0
-        descriptions_found = 0
-        descriptions_missing = 0
-        missing_vars = []
+
+        # Кэш справочников: один SELECT на таблицу вместо трёх на каждый регистр
+        type_ids = dict(cursor.execute("SELECT name, id FROM register_types"))
+        data_type_ids = dict(cursor.execute("SELECT name, id FROM data_types"))
+        section_ids = {(row[0], row[1]): row[2] for row in cursor.execute(
+            "SELECT register_type_id, name, id FROM sections WHERE plc_id = ?", (plc_id,))}
+        # Адреса, уже занятые в БД (тип, адрес, бит)
+        occupied = set(cursor.execute(
+            "SELECT register_type_id, register_address, bit_index FROM registers WHERE plc_id = ?", (plc_id,)))
+        seen: Dict[Tuple[int, int, Optional[int]], ModbusRegister] = {}
+        rows = []
 
         for reg in registers:
-            # Получить register_type_id
-            cursor.execute("SELECT id FROM register_types WHERE name = ?", (reg.register_type,))
-            row = cursor.fetchone()
-            if not row:
-                print(f"⚠️  Неизвестный тип регистра: {reg.register_type}")
+            register_type_id = type_ids.get(reg.register_type)
+            if register_type_id is None:
+                report.unknown.append((reg, f"неизвестный тип регистра {reg.register_type}"))
+                continue
+            data_type_id = data_type_ids.get(reg.data_type)
+            if data_type_id is None:
+                report.unknown.append((reg, f"неизвестный тип данных {reg.data_type}"))
                 continue
-            register_type_id = row[0]
 
-            # Получить data_type_id
-            cursor.execute("SELECT id FROM data_types WHERE name = ?", (reg.data_type,))
-            row = cursor.fetchone()
-            if not row:
-                print(f"⚠️  Неизвестный тип данных: {reg.data_type}")
+            section_id = section_ids.get((register_type_id, reg.section_name))
+            if section_id is None:
+                # Секция не найдена, использовать (и при необходимости создать) дефолтную
+                section_id = section_ids.get((register_type_id, UNDEFINED_SECTION))
+                if section_id is None:
+                    cursor.execute("""
+                        INSERT INTO sections (plc_id, register_type_id, name, start_register, end_register)
+                        VALUES (?, ?, ?, 0, 65535)
+                    """, (plc_id, register_type_id, UNDEFINED_SECTION))
+                    section_id = cursor.lastrowid
+                    section_ids[(register_type_id, UNDEFINED_SECTION)] = section_id
+
+            address_key = (register_type_id, reg.register_address, reg.bit_index)
+            if address_key in seen:
+                report.duplicates.append((reg, seen[address_key]))
                 continue
-            data_type_id = row[0]
-
-            # Получить section_id
-            cursor.execute("""
-                SELECT id FROM sections
-                WHERE register_type_id = ? AND name = ?
-            """, (register_type_id, reg.section_name))
-            row = cursor.fetchone()
-            if not row:
-                # Секция не найдена, создать дефолтную
-                cursor.execute("""
-                    INSERT INTO sections (register_type_id, name, start_register, end_register)
-                    VALUES (?, ?, 0, 65535)
-                """, (register_type_id, 'Неопределенная секция'))
-                section_id = cursor.lastrowid
-            else:
-                section_id = row[0]
+            if address_key in occupied:
+                report.conflicts.append(reg)
+                continue
+            seen[address_key] = reg
 
             # Подсчет статистики описаний
             if reg.description:
-                descriptions_found += 1
+                report.descriptions_found += 1
             else:
-                descriptions_missing += 1
-                missing_vars.append(reg.variable_name)
+                report.missing_descriptions.append(reg.variable_name)
 
-            # Вставить регистр
-            try:
-                cursor.execute("""
-                    INSERT INTO registers (
-                        register_type_id, section_id, register_address, bit_index,
-                        data_type_id, variable_name, description
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    register_type_id, section_id, reg.register_address, reg.bit_index,
-                    data_type_id, reg.variable_name, reg.description
-                ))
-                inserted_count += 1
-            except sqlite3.IntegrityError as e:
-                skipped_count += 1
-                # print(f"⚠️  Дубликат: {reg.variable_name} @ {reg.register_address}.{reg.bit_index}")
+            rows.append((plc_id, register_type_id, section_id, reg.register_address, reg.bit_index,
+                         data_type_id, reg.variable_name, reg.description))
 
+        # Пакетная вставка: журнал в памяти и без fsync на время загрузки (прежние режимы восстанавливаются)
         self.conn.commit()
-        print(f"✅ Вставлено регистров: {inserted_count}")
-        if skipped_count > 0:
-            print(f"⚠️  Пропущено дубликатов: {skipped_count}")
-
-        # Статистика описаний
-        total_descriptions = descriptions_found + descriptions_missing
-        if total_descriptions > 0:
-            coverage_percent = (descriptions_found / total_descriptions) * 100
-            print(f"\n📝 Статистика описаний:")
-            print(f"   Найдено описаний: {descriptions_found}/{total_descriptions} ({coverage_percent:.1f}%)")
-            if descriptions_missing > 0:
-                print(f"   Без описаний: {descriptions_missing}")
-                if verbose and missing_vars:
-                    print(f"\n⚠️  Переменные без описаний:")
-                    for var in missing_vars[:20]:  # Показать первые 20
-                        print(f"      - {var}")
-                    if len(missing_vars) > 20:
-                        print(f"      ... и еще {len(missing_vars) - 20}")
+        journal_mode = self.conn.execute("PRAGMA journal_mode").fetchone()[0]
+        synchronous = self.conn.execute("PRAGMA synchronous").fetchone()[0]
+        self.conn.execute("PRAGMA journal_mode = MEMORY")
+        self.conn.execute("PRAGMA synchronous = OFF")
+        self.conn.execute("PRAGMA temp_store = MEMORY")
+        self.conn.execute("PRAGMA cache_size = -65536")
+        indexes = []
+        if len(rows) >= BULK_INDEX_THRESHOLD:
+            # Построить вторичные индексы и производные таблицы один раз после загрузки дешевле,
+            # чем обновлять на каждой строке
+            indexes = cursor.execute("""
+                SELECT name, sql, type FROM sqlite_master
+                WHERE tbl_name = 'registers' AND sql IS NOT NULL
+                  AND (type = 'index' OR (type = 'trigger' AND name IN ({})))
+            """.format(', '.join('?' * len(DERIVED_TABLES) * 2)),
+                [f"{name}_{event}" for name in DERIVED_TABLES for event in ('insert', 'update')]).fetchall()
+        try:
+            with self.conn:
+                cursor.execute("BEGIN")  # DDL ниже должен откатиться вместе со вставкой
+                for name, _, kind in indexes:
+                    cursor.execute(f"DROP {kind.upper()} {name}")
+                cursor.executemany("""
+                    INSERT INTO registers (
+                        plc_id, register_type_id, section_id, register_address, bit_index,
+                        data_type_id, variable_name, description
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, rows)
+                for _, sql, _ in indexes:
+                    cursor.execute(sql)
+                if indexes:
+                    for name, sql in DERIVED_TABLES.items():
+                        cursor.execute(f"DELETE FROM {name}")
+                        cursor.execute(sql)
+            self.optimize_search_index()
+        finally:
+            self.conn.execute(f"PRAGMA synchronous = {int(synchronous)}")
+            self.conn.execute(f"PRAGMA journal_mode = {journal_mode}")
+        report.inserted = len(rows)
+
+        report.print_summary(verbose=verbose)
+        return report
+
+    def optimize_search_index(self):
+        """
+        Слить сегменты индексов FTS5 в один
+
+        Каждая транзакция добавляет в индекс сегмент; после сотен одиночных правок
+        поиск по одному сегменту в разы быстрее.
+        """
+        with self.conn:
+            for (name,) in self.conn.execute(
+                    "SELECT name FROM sqlite_master WHERE sql LIKE 'CREATE VIRTUAL TABLE%'").fetchall():
+                self.conn.execute(f"INSERT INTO {name} ({name}) VALUES ('optimize')")
 
     def close(self):
         """Закрыть соединение с БД"""
@@ -561,7 +1101,67 @@ class DatabaseMigrator:
             self.conn.close()
 
 
-def main(verbose: bool = False):
+def check_register_types(registers: Iterable[ModbusRegister], verbose: bool = False):
+    """Проверить типы переменных по таблице символов проекта (DataTypes/, POUs/, ...)"""
+    print(f"\n🔎 Проверка типов переменных...")
+    table = SymbolTable.load()
+    table.check_registers(registers).print_summary(verbose)
+
+
+def parse_project(st_path: Path) -> Tuple[FC_ModbusParser, List[SourceBlock], TypeCheckReport]:
+    """
+    Разобрать FB_ModbusToSCADA.st одного проекта (выполняется в процессе пула)
+
+    Returns:
+        Парсер (с найденными секциями), блоки секций и результат проверки типов
+        по таблице символов этого проекта
+    """
+    parser = FC_ModbusParser(st_path)
+    blocks = list(parser.iter_blocks())
+    table = SymbolTable.load(st_path.parent.parent, cache_path=None, workers=1)  # Уже в процессе пула
+    type_report = table.check_registers(reg for block in blocks for reg in parser.build_registers(block))
+    return parser, blocks, type_report
+
+
+def parse_project_spec(spec: str) -> Tuple[str, Path]:
+    """'line2=/srv/plc/line2' -> ('line2', Path); без имени ПЛК называется по каталогу проекта"""
+    name, sep, root = spec.partition('=')
+    if not sep:
+        root = name
+        name = Path(root).resolve().name
+    return name, Path(root)
+
+
+def ingest_main(specs: List[str], site: Optional[str] = None, workers: Optional[int] = None,
+                verbose: bool = False):
+    """Загрузка нескольких проектов (ПЛК) в одну БД"""
+    print("=" * 60)
+    print("Modbus Register Migration Tool: несколько ПЛК")
+    print("=" * 60)
+
+    projects = [parse_project_spec(spec) for spec in specs]
+    names = [name for name, _ in projects]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        print(f"❌ Повторяющиеся имена ПЛК: {', '.join(duplicates)}")
+        return
+    for name, root in projects:
+        if not (root / 'POUs' / 'FB_ModbusToSCADA.st').exists():
+            print(f"❌ {name}: файл не найден: {root / 'POUs' / 'FB_ModbusToSCADA.st'}")
+            return
+
+    migrator = DatabaseMigrator(DB_PATH, SCHEMA_PATH)
+    if not migrator.open_database():
+        return
+    migrator.ingest_projects(projects, site=site, workers=workers, verbose=verbose)
+    migrator.close()
+
+    print(f"\n✅ Загрузка завершена!")
+    print(f"   База данных: {DB_PATH}")
+    print("=" * 60)
+
+
+def main(verbose: bool = False, rebuild: bool = False, confirm: bool = True):
     """Главная функция"""
     print("=" * 60)
     print("Modbus Register Migration Tool")
@@ -576,24 +1176,41 @@ def main(verbose: bool = False):
         print(f"❌ Файл схемы не найден: {SCHEMA_PATH}")
         return
 
-    # Парсинг FC_ModbusToSCADA.st
-    print(f"\n📄 Парсинг файла: {FC_MODBUS_PATH.name}")
     parser = FC_ModbusParser(FC_MODBUS_PATH)
-    registers = parser.parse()
+    migrator = DatabaseMigrator(DB_PATH, SCHEMA_PATH)
+
+    # Инкрементальная синхронизация существующей БД
+    if DB_PATH.exists() and not rebuild:
+        check_register_types(parser.iter_registers(), verbose=verbose)
+        print(f"\n🔄 Синхронизация с файлом: {FC_MODBUS_PATH.name}")
+        if not migrator.open_database():
+            return
+        migrator.sync(parser, verbose=verbose)
+        migrator.close()
+        print(f"\n✅ Синхронизация завершена успешно!")
+        print(f"   База данных: {DB_PATH}")
+        print("=" * 60)
+        return
+
+    # Парсинг FC_ModbusToSCADA.st: блоки сохраняются для хэшей секций
+    print(f"\n📄 Парсинг файла: {FC_MODBUS_PATH.name}")
+    blocks = list(parser.iter_blocks())
+    registers = [reg for block in blocks for reg in parser.build_registers(block)]
     sections = parser.sections
 
     print(f"   Найдено секций: {len(sections)}")
     print(f"   Найдено регистров: {len(registers)}")
 
+    check_register_types(registers, verbose=verbose)
+
     # Миграция в БД
     print(f"\n💾 Миграция в базу данных...")
-    migrator = DatabaseMigrator(DB_PATH, SCHEMA_PATH)
-
-    if not migrator.initialize_database():
+    if not migrator.initialize_database(confirm=confirm):
         return
 
     migrator.migrate_sections(sections)
     migrator.migrate_registers(registers, verbose=verbose)
+    migrator.store_section_hashes(parser, blocks)
     migrator.close()
 
     print(f"\n✅ Миграция завершена успешно!")
@@ -603,5 +1220,17 @@ def main(verbose: bool = False):
 
 if __name__ == '__main__':
     # Проверка аргументов командной строки
-    verbose = '--verbose' in sys.argv or '-v' in sys.argv
-    main(verbose=verbose)
+    arg_parser = argparse.ArgumentParser(description='Миграция FB_ModbusToSCADA.st в SQLite')
+    arg_parser.add_argument('-v', '--verbose', action='store_true', help='Вывод переменных без описаний')
+    arg_parser.add_argument('--rebuild', action='store_true', help='Удалить и пересоздать БД')
+    arg_parser.add_argument('-y', '--yes', action='store_true', help='Не спрашивать подтверждение (--rebuild)')
+    arg_parser.add_argument('--projects', nargs='+', metavar='[ПЛК=]КАТАЛОГ',
+                            help='Загрузить несколько проектов (ПЛК) параллельно')
+    arg_parser.add_argument('--site', help='Площадка для ПЛК из --projects')
+    arg_parser.add_argument('--workers', type=int, help='Число процессов (по умолчанию - число ядер)')
+    args = arg_parser.parse_args()
+
+    if args.projects:
+        ingest_main(args.projects, site=args.site, workers=args.workers, verbose=args.verbose)
+    else:
+        main(verbose=args.verbose, rebuild=args.rebuild, confirm=not args.yes)
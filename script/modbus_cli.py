@@ -10,14 +10,26 @@ Modbus Register CLI Manager
 - Добавление новых регистров
 - Редактирование регистров
 - Удаление регистров
-- Экспорт в Excel
+- Экспорт в Excel (в фоновом потоке, с ходом по листам)
 - Статистика по БД
+- Подкоманды и пакетный режим для скриптов (вывод JSON/NDJSON)
 
 Использование:
     ./modbus_cli.sh
     или
     python3 modbus_cli.py
 
+    # Подкоманды для скриптов (без меню), вывод text/json/ndjson
+    python3 modbus_cli.py list --type input_registers --format ndjson
+    python3 modbus_cli.py search Bunker --format json
+    python3 modbus_cli.py add --type holding_registers --section 1 --data-type BOOL --address 0 --bit 5 --variable xReset
+    python3 modbus_cli.py edit 42 --description "Новое описание"
+    python3 modbus_cli.py delete 42
+    python3 modbus_cli.py stats | sections | export
+
+    # Пакет операций NDJSON из stdin в одной транзакции
+    python3 modbus_cli.py --batch < operations.ndjson
+
 Требования:
     pip install openpyxl
 
@@ -25,18 +37,133 @@ Modbus Register CLI Manager
 Дата: 2025-12-26
 """
 
+import argparse
+import json
+import re
 import sqlite3
 import sys
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, List, Dict, Any
-import subprocess
+from typing import Optional, List, Dict, Any, Callable, Iterable, Tuple, Union
 import os
 
+from register_db import register_stats_source
+
 
 # Пути к файлам
 SCRIPT_DIR = Path(__file__).parent
 DB_PATH = SCRIPT_DIR / 'db' / 'modbus_registers.db'
-EXPORT_SCRIPT = SCRIPT_DIR / 'export_to_excel.py'
+EXCEL_OUTPUT_PATH = SCRIPT_DIR / 'modbus_map.xlsx'
+
+OUTPUT_FORMATS = ('text', 'json', 'ndjson')
+
+# Запросы - постоянные строки: sqlite3 держит подготовленные выражения в кэше соединения,
+# поэтому повторный execute() с тем же текстом не компилирует SQL заново
+REGISTER_SELECT = """
+    SELECT
+        r.id,
+        rt.name AS register_type,
+        s.name AS section,
+        r.register_address,
+        r.bit_index,
+        dt.name AS data_type,
+        r.variable_name,
+        r.description
+    FROM registers r
+    JOIN data_types dt ON r.data_type_id = dt.id
+    JOIN sections s ON r.section_id = s.id
+    JOIN register_types rt ON r.register_type_id = rt.id
+"""
+
+INSERT_REGISTER = """
+    INSERT INTO registers (
+        register_type_id, section_id, register_address, bit_index,
+        data_type_id, variable_name, description
+    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_REGISTER_PLC = """
+    INSERT INTO registers (
+        register_type_id, section_id, register_address, bit_index,
+        data_type_id, variable_name, description, plc_id
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Регистры, чьи слова могут пересекаться с [адрес - 1, последнее слово]: многословные типы - не длиннее 2 слов
+OVERLAP_SELECT = """
+    SELECT r.id, r.register_address, r.bit_index, r.variable_name, dt.register_count
+    FROM registers r
+    JOIN data_types dt ON r.data_type_id = dt.id
+    WHERE r.register_type_id = ? AND r.register_address BETWEEN ? AND ?
+"""
+
+# Листание: позиция - ключ (register_type_id, register_address, бит, id) строки на краю страницы,
+# страница ищется по индексу idx_registers_address (с ПЛК - по уникальному ключу регистра), без OFFSET.
+# Бит NULL (слово) - как -1: строковое сравнение с NULL не определено
+PAGE_KEY = "(r.register_type_id, r.register_address, IFNULL(r.bit_index, -1), r.id)"
+PAGE_ORDER = " ORDER BY r.register_type_id {0}, r.register_address {0}, r.bit_index {0}, r.id {0} LIMIT ?"
+
+RegisterKey = Tuple[int, int, int, int]
+
+# Полнотекстовый поиск: сначала различные тексты (register_texts_fts) по релевантности -
+# совпадения в имени переменной весят больше, чем в описании; затем регистры с этими текстами
+FTS_SEARCH = """
+    SELECT t.id, t.variable_name, t.description
+    FROM register_texts_fts
+    JOIN register_texts t ON t.id = register_texts_fts.rowid
+    WHERE register_texts_fts MATCH ?
+    ORDER BY bm25(register_texts_fts, 10.0, 1.0), t.variable_name
+"""
+
+# Подсветка - только для текстов, попавших в результат (snippet по триграммам недёшев)
+FTS_HIGHLIGHT = """
+    SELECT
+        rowid,
+        highlight(register_texts_fts, 0, ?, ?) AS variable_highlight,
+        snippet(register_texts_fts, 1, ?, ?, '…', 48) AS description_snippet
+    FROM register_texts_fts
+    WHERE register_texts_fts MATCH ? AND rowid IN (SELECT value FROM json_each(?))
+"""
+
+REGISTERS_BY_TEXT = REGISTER_SELECT + " WHERE r.variable_name = ? AND IFNULL(r.description, '') = ?"
+
+# Поиск без индекса: те же колонки, без подсветки
+LIKE_SEARCH = """
+    SELECT
+        r.id,
+        rt.name AS register_type,
+        s.name AS section,
+        r.register_address,
+        r.bit_index,
+        dt.name AS data_type,
+        r.variable_name,
+        r.description,
+        r.variable_name AS variable_highlight,
+        r.description AS description_snippet
+    FROM registers r
+    JOIN data_types dt ON r.data_type_id = dt.id
+    JOIN sections s ON r.section_id = s.id
+    JOIN register_types rt ON r.register_type_id = rt.id
+    WHERE (r.variable_name LIKE ? OR r.description LIKE ?)
+"""
+
+# Метки подсветки совпадений в выводе поиска (не встречаются в путях ST и описаниях)
+SEARCH_MARKS = ('«', '»')
+
+# Фраза в кавычках или слово; ^ - совпадение с начала имени/описания
+_SEARCH_TOKEN_RE = re.compile(r'(\^?)"([^"]*)"?|(\^?)(\S+)')
+
+REGISTER_BY_ADDRESS = """
+    SELECT r.id FROM registers r
+    JOIN register_types rt ON r.register_type_id = rt.id
+    WHERE rt.name = ? AND r.register_address = ? AND r.bit_index IS ?
+"""
+
+# Поля регистра в выводе подкоманд и в операциях пакетного режима
+REGISTER_FIELDS = ('register_type', 'section', 'register_address', 'bit_index', 'data_type',
+                   'variable_name', 'description')
+EDITABLE_FIELDS = ('variable_name', 'description')
 
 
 class Colors:
@@ -52,12 +179,69 @@ class Colors:
     UNDERLINE = '\033[4m'
 
 
+def format_address(row) -> str:
+    """Адрес регистра: 12 или 12.3 для BOOL"""
+    if row['bit_index'] is None:
+        return str(row['register_address'])
+    return f"{row['register_address']}.{row['bit_index']}"
+
+
+def emit(data: Union[List[Dict], Dict], output_format: str, file=None):
+    """Вывод результата подкоманды: text - таблица, json - документ, ndjson - объект в строке"""
+    file = file or sys.stdout
+    items = data if isinstance(data, list) else [data]
+    if output_format == 'json':
+        json.dump(data, file, ensure_ascii=False, indent=2)
+        file.write('\n')
+    elif output_format == 'ndjson':
+        file.writelines(json.dumps(item, ensure_ascii=False) + '\n' for item in items)
+    elif isinstance(data, dict):
+        for key, value in data.items():
+            if isinstance(value, list):
+                print(f"{key}:", file=file)
+                for item in value:
+                    print("  " + "  ".join(str(field) for field in item.values()), file=file)
+            else:
+                print(f"{key}: {value}", file=file)
+    elif items:
+        columns = list(items[0])
+        widths = [max(len(str(column)), *(len(str(item[column] if item[column] is not None else ''))
+                                           for item in items)) for column in columns]
+        print("  ".join(f"{column:<{width}}" for column, width in zip(columns, widths)).rstrip(), file=file)
+        for item in items:
+            print("  ".join(f"{str(item[column] if item[column] is not None else ''):<{width}}"
+                            for column, width in zip(columns, widths)).rstrip(), file=file)
+
+
+def fts_query(term: str) -> Optional[str]:
+    """
+    Запрос поиска → выражение MATCH для register_texts_fts
+
+    Слова объединяются по И, "фраза в кавычках" ищется целиком, ^слово - с начала
+    имени переменной или описания, слово* - то же, что слово (триграммы и так ищут подстроку).
+    Спецсимволы FTS5 в путях ST (точки, скобки) экранируются кавычками.
+    None - фрагмент короче 3 символов: триграммный индекс его не найдёт.
+    """
+    phrases = []
+    for anchor, quoted, word_anchor, word in _SEARCH_TOKEN_RE.findall(term):
+        text = quoted if quoted or not word else word.rstrip('*')
+        if len(text) < 3:
+            return None
+        phrases.append(f'{anchor or word_anchor}"{text.replace(chr(34), chr(34) * 2)}"')
+    return ' '.join(phrases) or None
+
+
 class ModbusCLI:
     """Интерактивное CLI для управления Modbus регистрами"""
 
-    def __init__(self, db_path: Path):
+    def __init__(self, db_path: Path, plc_id: Optional[int] = None):
         self.db_path = db_path
+        self.plc_id = plc_id
         self.conn = None
+        # Экспорт в Excel: один рабочий поток на сеанс, последний запуск и его ход (этап, готово, всего)
+        self._export_executor: Optional[ThreadPoolExecutor] = None
+        self.export_future: Optional[Future] = None
+        self.export_progress: Tuple[str, int, int] = ('', 0, 0)
         self.connect_db()
 
     def connect_db(self):
@@ -72,8 +256,27 @@ class ModbusCLI:
         # Включить поддержку внешних ключей
         self.conn.execute("PRAGMA foreign_keys = ON")
 
+        # Справочники читаются один раз на соединение
+        self.data_types = {row['name']: row for row in self.conn.execute("SELECT * FROM data_types")}
+        self.register_type_ids = {row['name']: row['id']
+                                  for row in self.conn.execute("SELECT id, name FROM register_types")}
+        # Старые БД (до таблицы plcs) - без plc_id
+        self.has_plc = any(row['name'] == 'plc_id' for row in self.conn.execute("PRAGMA table_info(registers)"))
+        # Ручные секции отмечаются is_manual (старые БД - только NULL в content_hash)
+        self.has_manual_sections = any(
+            row['name'] == 'is_manual' for row in self.conn.execute("PRAGMA table_info(sections)"))
+        # Старые БД без индекса (до обновления схемы migrate_from_fc.py) ищут через LIKE
+        self.has_fts = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'register_texts_fts'").fetchone() is not None
+        # Счётчики статистики: register_stats или агрегация registers в БД старой схемы
+        self.stats_source = register_stats_source(self.conn)
+        self._sections = {}
+
     def close_db(self):
-        """Закрыть подключение к БД"""
+        """Закрыть подключение к БД (начатый экспорт в Excel - дождаться)"""
+        if self._export_executor is not None:
+            self._export_executor.shutdown()
+            self._export_executor = None
         if self.conn:
             self.conn.close()
 
@@ -115,6 +318,424 @@ class ModbusCLI:
         """Пауза перед продолжением"""
         input(f"\n{Colors.OKCYAN}Нажмите Enter для продолжения...{Colors.ENDC}")
 
+    # ========================================================================
+    # ОПЕРАЦИИ С БД (общие для меню, подкоманд и пакетного режима)
+    # ========================================================================
+
+    def _plc_filter(self, alias: str) -> str:
+        """Условие по ПЛК для запроса (пусто, если ПЛК не задан или БД без plc_id)"""
+        return f" AND {alias}.plc_id = ?" if self.plc_id is not None and self.has_plc else ""
+
+    def _plc_params(self) -> List[int]:
+        return [self.plc_id] if self.plc_id is not None and self.has_plc else []
+
+    def _register_type_id(self, name: str) -> int:
+        if name not in self.register_type_ids:
+            raise ValueError(f"Неизвестный тип регистра: {name} "
+                             f"(допустимо: {', '.join(self.register_type_ids)})")
+        return self.register_type_ids[name]
+
+    def _data_type(self, name: str) -> sqlite3.Row:
+        if name not in self.data_types:
+            raise ValueError(f"Неизвестный тип данных: {name} (допустимо: {', '.join(self.data_types)})")
+        return self.data_types[name]
+
+    def _section(self, register_type_id: int, section: Union[int, str]) -> sqlite3.Row:
+        """Секция по ID или имени в пределах типа регистра (и ПЛК)"""
+        key = (register_type_id, section)
+        if key not in self._sections:
+            if isinstance(section, int) or str(section).isdigit():
+                rows = self.conn.execute("SELECT * FROM sections WHERE id = ? AND register_type_id = ?",
+                                         (int(section), register_type_id)).fetchall()
+            else:
+                rows = self.conn.execute(
+                    "SELECT * FROM sections s WHERE s.name = ? AND s.register_type_id = ?" + self._plc_filter('s'),
+                    [section, register_type_id] + self._plc_params()).fetchall()
+            if not rows:
+                raise ValueError(f"Секция не найдена для данного типа регистров: {section}")
+            if len(rows) > 1:
+                raise ValueError(f"Секция {section} есть у нескольких ПЛК, укажите --plc")
+            self._sections[key] = rows[0]
+        return self._sections[key]
+
+    def _check_register(self, section: sqlite3.Row, register_address: int, bit_index: Optional[int],
+                        data_type: sqlite3.Row, variable_name: str):
+        """Проверка регистра перед вставкой: бит-индекс, диапазон секции, занятость слов"""
+        if not variable_name:
+            raise ValueError("Имя переменной не может быть пустым")
+        is_bool = bool(data_type['supports_bit_packing'])
+        if is_bool and (bit_index is None or not 0 <= bit_index <= 15):
+            raise ValueError("Для BOOL нужен бит-индекс 0-15")
+        if not is_bool and bit_index is not None:
+            raise ValueError(f"Бит-индекс допустим только для BOOL, не для {data_type['name']}")
+
+        last = register_address + max(data_type['register_count'], 1) - 1
+        if register_address < section['start_register'] or last > section['end_register']:
+            raise ValueError(f"Адрес {register_address} вне диапазона секции {section['name']} "
+                             f"({section['start_register']}-{section['end_register']})")
+
+        query, params = OVERLAP_SELECT, [section['register_type_id'], register_address - 1, last]
+        if self.has_plc:
+            query, params = query + " AND r.plc_id = ?", params + [section['plc_id']]
+        for other in self.conn.execute(query, params):
+            if other['register_address'] + max(other['register_count'], 1) - 1 < register_address:
+                continue
+            if is_bool and other['bit_index'] is not None and other['bit_index'] != bit_index:
+                continue  # Другой бит того же слова
+            address = other['register_address']
+            if other['bit_index'] is not None:
+                address = f"{address}.{other['bit_index']}"
+            raise ValueError(f"Адрес {register_address} занят: {other['variable_name']} "
+                             f"(ID {other['id']}, адрес {address})")
+
+    def query_registers(self, register_type: Optional[str] = None,
+                        section: Optional[Union[int, str]] = None,
+                        data_type: Optional[str] = None,
+                        limit: Optional[int] = 50) -> List[sqlite3.Row]:
+        """Регистры с фильтрацией по типу регистра, секции (ID или имя) и типу данных"""
+        query = REGISTER_SELECT + " WHERE 1=1" + self._plc_filter('r')
+        params: List[Any] = self._plc_params()
+
+        if register_type:
+            query += " AND rt.name = ?"
+            params.append(register_type)
+
+        if section is not None:
+            if isinstance(section, int) or str(section).isdigit():
+                query += " AND r.section_id = ?"
+                params.append(int(section))
+            else:
+                query += " AND s.name = ?"
+                params.append(section)
+
+        if data_type:
+            query += " AND dt.name = ?"
+            params.append(data_type)
+
+        query += " ORDER BY r.register_address, r.bit_index"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        return self.conn.execute(query, params).fetchall()
+
+    def register_key(self, row) -> RegisterKey:
+        """Ключ листания строки query_registers/page_registers"""
+        bit_index = -1 if row['bit_index'] is None else row['bit_index']
+        return self.register_type_ids[row['register_type']], row['register_address'], bit_index, row['id']
+
+    def address_key(self, register_type: str, register_address: int) -> RegisterKey:
+        """Ключ перед всеми регистрами адреса: page_registers(after=...) начнёт страницу с него"""
+        return self._register_type_id(register_type), register_address, -2, 0
+
+    def page_registers(self, register_type: Optional[str] = None,
+                       section: Optional[int] = None,
+                       data_type: Optional[str] = None,
+                       after: Optional[RegisterKey] = None,
+                       before: Optional[RegisterKey] = None,
+                       limit: int = 50) -> List[sqlite3.Row]:
+        """
+        Страница регистров в порядке (тип регистра, адрес, бит) после ключа after или перед ключом before
+
+        Курсор - только ключи крайних строк страницы (register_key): любая страница карты
+        читает из индекса limit строк, а не все предыдущие, как OFFSET.
+        """
+        query = REGISTER_SELECT + " WHERE 1=1" + self._plc_filter('r')
+        params: List[Any] = self._plc_params()
+
+        # Фильтры - по колонкам registers, чтобы SQLite шёл по индексу адресов, а не сортировал выборку
+        if section is not None:
+            query += " AND r.section_id = ?"
+            params.append(section)
+        if data_type:
+            # Унарный + отключает idx_registers_data_type: иначе каждая страница сортирует все регистры типа
+            query += " AND +r.data_type_id = ?"
+            params.append(self._data_type(data_type)['id'])
+
+        lower, upper = after, before
+        if register_type:
+            # Тип регистра - границы ключа: равенство по типу SQLite не совмещает с диапазоном по строке ключа
+            type_id = self._register_type_id(register_type)
+            lower = max(lower or (type_id, -1, -2, 0), (type_id, -1, -2, 0))
+            upper = min(upper or (type_id + 1, -1, -2, 0), (type_id + 1, -1, -2, 0))
+        if lower is not None:
+            query += f" AND {PAGE_KEY} > (?, ?, ?, ?)"
+            params += lower
+        if upper is not None:
+            query += f" AND {PAGE_KEY} < (?, ?, ?, ?)"
+            params += upper
+
+        query += PAGE_ORDER.format('DESC' if before is not None else 'ASC')
+        params.append(limit)
+        rows = self.conn.execute(query, params).fetchall()
+        return rows[::-1] if before is not None else rows
+
+    def find_registers(self, term: str, limit: Optional[int] = 100,
+                       marks: Tuple[str, str] = SEARCH_MARKS) -> List[Dict[str, Any]]:
+        """
+        Поиск по имени переменной или описанию
+
+        С индексом register_texts_fts - по релевантности, с подсветкой совпадений (variable_highlight)
+        и фрагментом описания (description_snippet); синтаксис запроса - см. fts_query.
+        Индекс - по различным текстам: у копий проекта на многих ПЛК выборка регистров
+        останавливается, как только набран limit.
+        Без индекса или для фрагментов короче 3 символов - частичное совпадение LIKE, по адресу.
+        """
+        match = fts_query(term) if self.has_fts else None
+        if not match:
+            query = LIKE_SEARCH + self._plc_filter('r') + " ORDER BY r.register_address, r.bit_index"
+            params: List[Any] = [f'%{term}%', f'%{term}%'] + self._plc_params()
+            if limit:
+                query += " LIMIT ?"
+                params.append(limit)
+            return [dict(row) for row in self.conn.execute(query, params)]
+
+        query = REGISTERS_BY_TEXT + self._plc_filter('r') + " ORDER BY r.plc_id, r.register_address, r.bit_index"
+        if limit:
+            query += " LIMIT ?"
+        found = []
+        for text in self.conn.execute(FTS_SEARCH, (match,)):
+            params = [text['variable_name'], text['description']] + self._plc_params()
+            if limit:
+                params.append(limit - len(found))
+            found += [(text['id'], row) for row in self.conn.execute(query, params)]
+            if limit and len(found) >= limit:
+                break
+
+        highlights = {row['rowid']: row for row in self.conn.execute(
+            FTS_HIGHLIGHT, [*marks, *marks, match, json.dumps(sorted({text_id for text_id, _ in found}))])}
+        return [dict(row, variable_highlight=highlights[text_id]['variable_highlight'],
+                     description_snippet=highlights[text_id]['description_snippet'] or None)
+                for text_id, row in found]
+
+    def get_register(self, register_id: int) -> sqlite3.Row:
+        """Регистр по ID (ValueError, если не найден)"""
+        row = self.conn.execute(REGISTER_SELECT + " WHERE r.id = ?", (register_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"Регистр с ID {register_id} не найден")
+        return row
+
+    def find_register_id(self, register_type: str, register_address: int, bit_index: Optional[int] = None) -> int:
+        """ID регистра по адресу (для операций без ID)"""
+        query = REGISTER_BY_ADDRESS + self._plc_filter('r')
+        row = self.conn.execute(query, [register_type, register_address, bit_index] + self._plc_params()).fetchone()
+        if row is None:
+            address = register_address if bit_index is None else f"{register_address}.{bit_index}"
+            raise ValueError(f"Регистр {register_type} {address} не найден")
+        return row['id']
+
+    def insert_register(self, register_type: str, section: Union[int, str], register_address: int,
+                        bit_index: Optional[int], data_type: str, variable_name: str,
+                        description: Optional[str] = None) -> int:
+        """Проверить и вставить регистр, вернуть ID. Фиксация транзакции - за вызывающим"""
+        register_type_id = self._register_type_id(register_type)
+        section_row = self._section(register_type_id, section)
+        data_type_row = self._data_type(data_type)
+        variable_name = (variable_name or '').strip()
+        self._check_register(section_row, register_address, bit_index, data_type_row, variable_name)
+
+        params = [register_type_id, section_row['id'], register_address, bit_index,
+                  data_type_row['id'], variable_name, description or None]
+        if self.has_plc:
+            return self.conn.execute(INSERT_REGISTER_PLC, params + [section_row['plc_id']]).lastrowid
+        return self.conn.execute(INSERT_REGISTER, params).lastrowid
+
+    def update_register(self, register_id: int, **fields):
+        """Изменить имя переменной и/или описание. Фиксация транзакции - за вызывающим"""
+        unknown = set(fields) - set(EDITABLE_FIELDS)
+        if unknown:
+            raise ValueError(f"Нельзя изменить поля: {', '.join(sorted(unknown))} "
+                             f"(допустимо: {', '.join(EDITABLE_FIELDS)})")
+        if not fields:
+            raise ValueError("Не задано ни одного поля для изменения")
+        if 'variable_name' in fields:
+            fields['variable_name'] = (fields['variable_name'] or '').strip()
+            if not fields['variable_name']:
+                raise ValueError("Имя переменной не может быть пустым")
+        if 'description' in fields:
+            fields['description'] = fields['description'] or None
+
+        names = [name for name in EDITABLE_FIELDS if name in fields]
+        cursor = self.conn.execute(
+            f"UPDATE registers SET {', '.join(f'{name} = ?' for name in names)} WHERE id = ?",
+            [fields[name] for name in names] + [register_id])
+        if cursor.rowcount == 0:
+            raise ValueError(f"Регистр с ID {register_id} не найден")
+
+    def remove_register(self, register_id: int):
+        """Удалить регистр. Фиксация транзакции - за вызывающим"""
+        if self.conn.execute("DELETE FROM registers WHERE id = ?", (register_id,)).rowcount == 0:
+            raise ValueError(f"Регистр с ID {register_id} не найден")
+
+    def statistics(self) -> Dict[str, Any]:
+        """Статистика БД: итоги, по типам регистров, по типам данных, топ-10 секций
+
+        Из счётчиков register_stats - O(секций) строк при любом размере registers.
+        """
+        stats_from = f"FROM {self.stats_source} st JOIN sections s ON st.section_id = s.id"
+        where, params = " WHERE 1=1" + self._plc_filter('s'), self._plc_params()
+        totals = self.conn.execute(f"""
+            SELECT IFNULL(SUM(st.registers), 0) AS registers, COUNT(DISTINCT st.section_id) AS sections
+            {stats_from}
+            {where}
+        """, params).fetchone()
+        by_register_type = self.conn.execute(f"""
+            SELECT rt.name, rt.description_ru, SUM(st.registers) as count
+            {stats_from}
+            JOIN register_types rt ON s.register_type_id = rt.id
+            {where}
+            GROUP BY rt.name
+        """, params).fetchall()
+        by_data_type = self.conn.execute(f"""
+            SELECT dt.name, SUM(st.registers) as count
+            {stats_from}
+            JOIN data_types dt ON st.data_type_id = dt.id
+            {where}
+            GROUP BY dt.name
+            ORDER BY count DESC
+        """, params).fetchall()
+        top_sections = self.conn.execute(f"""
+            SELECT s.name, SUM(st.registers) as count
+            {stats_from}
+            {where}
+            GROUP BY s.id
+            ORDER BY count DESC
+            LIMIT 10
+        """, params).fetchall()
+        return {
+            'registers': totals['registers'],
+            'sections': totals['sections'],
+            'by_register_type': [dict(row) for row in by_register_type],
+            'by_data_type': [dict(row) for row in by_data_type],
+            'top_sections': [dict(row) for row in top_sections],
+        }
+
+    def list_sections(self) -> List[sqlite3.Row]:
+        """Секции с диапазонами и числом регистров"""
+        return self.conn.execute(f"""
+            SELECT
+                s.id,
+                s.name,
+                s.start_register,
+                s.end_register,
+                s.description,
+                rt.name AS register_type_name,
+                rt.description_ru AS register_type,
+                COUNT(r.id) as register_count
+            FROM sections s
+            JOIN register_types rt ON s.register_type_id = rt.id
+            LEFT JOIN registers r ON r.section_id = s.id
+            WHERE 1=1{self._plc_filter('s')}
+            GROUP BY s.id
+            ORDER BY s.start_register
+        """, self._plc_params()).fetchall()
+
+    def start_export(self, output_path: Path = EXCEL_OUTPUT_PATH,
+                     progress: Optional[Callable[[str, int, int], None]] = None) -> Future:
+        """
+        Экспорт текущей БД в Excel в рабочем потоке; Future - путь к файлу или исключение
+
+        progress(этап, готово, всего) вызывается из рабочего потока после каждого листа.
+        Поток и импорт openpyxl живут весь сеанс: повторный экспорт - без холодного старта.
+        """
+        if self._export_executor is None:
+            self._export_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='excel-export')
+
+        def report(step: str, done: int, total: int):
+            self.export_progress = (step, done, total)
+            if progress:
+                progress(step, done, total)
+
+        self.export_progress = ('', 0, 0)
+        self.export_future = self._export_executor.submit(self._export_workbook, output_path, report)
+        return self.export_future
+
+    def _export_workbook(self, output_path: Path, progress: Callable[[str, int, int], None]) -> Path:
+        # Импорт при первом экспорте: меню и подкоманды работают и без openpyxl
+        from export_to_excel import export_workbook
+        return export_workbook(self.db_path, output_path, progress, plc_id=self.plc_id)
+
+    def run_export(self, output_path: Path = EXCEL_OUTPUT_PATH, quiet: bool = False) -> int:
+        """Экспорт в Excel с ожиданием результата; ход по листам - в stdout (quiet - в stderr)"""
+        stream = sys.stderr if quiet else sys.stdout
+
+        def report(step: str, done: int, total: int):
+            print(f"   {'💾' if done == total else '📄'} [{done}/{total}] {step}", file=stream)
+
+        try:
+            self.start_export(output_path, report).result()
+        except (ImportError, OSError, sqlite3.Error) as e:
+            print(f"❌ Ошибка экспорта: {e}", file=sys.stderr)
+            return 1
+        return 0
+
+    def export_status(self) -> Optional[str]:
+        """Строка о ходе или результате последнего экспорта (None - экспорта не было)"""
+        if self.export_future is None:
+            return None
+        step, done, total = self.export_progress
+        if not self.export_future.done():
+            return f"📤 Экспорт в Excel: {done}/{total} {step}" if total else "📤 Экспорт в Excel: запуск..."
+        error = self.export_future.exception()
+        if error is not None:
+            return f"❌ Ошибка экспорта: {error}"
+        return f"✅ Экспорт завершён: {self.export_future.result()}"
+
+    # ========================================================================
+    # ПАКЕТНЫЙ РЕЖИМ
+    # ========================================================================
+
+    def apply_operation(self, operation: Dict[str, Any]) -> Dict[str, Any]:
+        """Одна операция пакета: {"op": "add" | "edit" | "delete", ...поля регистра}
+
+        edit/delete адресуют регистр по "id" или по register_type + register_address (+ bit_index).
+        """
+        kind = operation.get('op')
+        if kind == 'add':
+            missing = [name for name in REGISTER_FIELDS
+                       if name not in operation and name not in ('bit_index', 'description')]
+            if missing:
+                raise ValueError(f"Не заданы поля: {', '.join(missing)}")
+            register_id = self.insert_register(**{name: operation.get(name) for name in REGISTER_FIELDS})
+        elif kind in ('edit', 'delete'):
+            if 'id' in operation:
+                register_id = operation['id']
+            elif 'register_type' in operation and 'register_address' in operation:
+                register_id = self.find_register_id(operation['register_type'], operation['register_address'],
+                                                    operation.get('bit_index'))
+            else:
+                raise ValueError("Укажите id или register_type + register_address")
+            if kind == 'edit':
+                self.update_register(register_id, **{name: operation[name]
+                                                     for name in EDITABLE_FIELDS if name in operation})
+            else:
+                self.remove_register(register_id)
+        else:
+            raise ValueError(f"Неизвестная операция: {kind!r} (допустимо: add, edit, delete)")
+        return {'op': kind, 'id': register_id}
+
+    def run_batch(self, lines: Iterable[str]) -> List[Dict[str, Any]]:
+        """Операции NDJSON (по одной в строке) в одной транзакции.
+
+        При первой ошибке транзакция откатывается целиком и поднимается ValueError с номером строки.
+        """
+        results = []
+        with self.conn:
+            for number, line in enumerate(lines, 1):
+                if not line.strip():
+                    continue
+                try:
+                    operation = json.loads(line)
+                    if not isinstance(operation, dict):
+                        raise ValueError("ожидается объект JSON")
+                    results.append(dict(line=number, **self.apply_operation(operation)))
+                except (ValueError, TypeError, sqlite3.Error) as e:
+                    raise ValueError(f"Строка {number}: {e}") from e
+            # Каждая транзакция добавляет в индекс поиска сегмент: одиночные правки его дробят - слить в один
+            if self.has_fts and results:
+                self.conn.execute("INSERT INTO register_texts_fts (register_texts_fts) VALUES ('optimize')")
+        return results
+
     # ========================================================================
     # ГЛАВНОЕ МЕНЮ
     # ========================================================================
@@ -124,6 +745,9 @@ class ModbusCLI:
         while True:
             self.clear_screen()
             self.print_header("MODBUS REGISTER DATABASE MANAGER")
+            status = self.export_status()
+            if status:
+                print(f"{Colors.OKCYAN}{status}{Colors.ENDC}")
 
             options = [
                 "📋 Просмотр регистров",
@@ -193,51 +817,15 @@ class ModbusCLI:
                 self.view_registers_by_datatype()
 
     def view_registers(self, register_type: Optional[str] = None,
-                      section_id: Optional[int] = None,
-                      data_type_id: Optional[int] = None,
+                      section: Optional[int] = None,
+                      data_type: Optional[str] = None,
                       limit: int = 50):
-        """Просмотр регистров с фильтрацией"""
-        self.clear_screen()
-
-        # Построить запрос
-        query = """
-            SELECT
-                r.id,
-                r.register_address,
-                r.bit_index,
-                dt.name AS data_type,
-                r.variable_name,
-                r.description,
-                s.name AS section,
-                rt.name AS register_type
-            FROM registers r
-            JOIN data_types dt ON r.data_type_id = dt.id
-            JOIN sections s ON r.section_id = s.id
-            JOIN register_types rt ON r.register_type_id = rt.id
-            WHERE 1=1
-        """
-        params = []
-
-        if register_type:
-            query += " AND rt.name = ?"
-            params.append(register_type)
-
-        if section_id:
-            query += " AND r.section_id = ?"
-            params.append(section_id)
-
-        if data_type_id:
-            query += " AND r.data_type_id = ?"
-            params.append(data_type_id)
-
-        query += " ORDER BY r.register_address, r.bit_index LIMIT ?"
-        params.append(limit)
-
-        cursor = self.conn.cursor()
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
+        """Просмотр регистров с фильтрацией: постранично, вперёд/назад и переход к адресу"""
+        filters = {'register_type': register_type, 'section': section, 'data_type': data_type}
+        rows = self.page_registers(**filters, limit=limit)
 
         if not rows:
+            self.clear_screen()
             print(f"{Colors.WARNING}📭 Регистры не найдены{Colors.ENDC}")
             self.pause()
             return
@@ -249,35 +837,53 @@ class ModbusCLI:
         elif register_type == 'input_registers':
             title = "INPUT REGISTERS (PLC → SCADA)"
 
-        self.print_header(title)
-        print(f"{Colors.OKCYAN}Найдено регистров: {len(rows)}{Colors.ENDC}")
-
-        # Печать таблицы
-        print(f"\n{Colors.BOLD}{'ID':<5} {'Адрес':<12} {'Тип':<8} {'Переменная':<30} {'Секция':<25}{Colors.ENDC}")
-        print(f"{Colors.BOLD}{'-' * 95}{Colors.ENDC}")
-
-        for row in rows:
-            # Форматирование адреса
-            if row['data_type'] == 'BOOL':
-                address = f"{row['register_address']}.{row['bit_index']}"
-            else:
-                address = str(row['register_address'])
+        while True:
+            first, last = rows[0], rows[-1]
+            has_prev = bool(self.page_registers(**filters, before=self.register_key(first), limit=1))
+            has_next = bool(self.page_registers(**filters, after=self.register_key(last), limit=1))
 
-            # Цвет по типу данных
-            if row['data_type'] == 'BOOL':
-                color = Colors.OKCYAN
-            elif row['data_type'] == 'REAL':
-                color = Colors.OKGREEN
-            else:
-                color = Colors.ENDC
+            self.clear_screen()
+            self.print_header(title)
+            print(f"{Colors.OKCYAN}Регистры: {first['register_type']} {format_address(first)} - "
+                  f"{last['register_type']} {format_address(last)}{Colors.ENDC}")
+
+            # Печать таблицы
+            print(f"\n{Colors.BOLD}{'ID':<5} {'Адрес':<12} {'Тип':<8} {'Переменная':<30} {'Секция':<25}{Colors.ENDC}")
+            print(f"{Colors.BOLD}{'-' * 95}{Colors.ENDC}")
+
+            for row in rows:
+                address = format_address(row)
+
+                # Цвет по типу данных
+                if row['data_type'] == 'BOOL':
+                    color = Colors.OKCYAN
+                elif row['data_type'] == 'REAL':
+                    color = Colors.OKGREEN
+                else:
+                    color = Colors.ENDC
 
-            print(f"{color}{row['id']:<5} {address:<12} {row['data_type']:<8} "
-                  f"{row['variable_name']:<30} {row['section']:<25}{Colors.ENDC}")
+                print(f"{color}{row['id']:<5} {address:<12} {row['data_type']:<8} "
+                      f"{row['variable_name']:<30} {row['section']:<25}{Colors.ENDC}")
 
-        if len(rows) == limit:
-            print(f"\n{Colors.WARNING}⚠️  Показано первых {limit} записей{Colors.ENDC}")
+            commands = (["Enter/n - дальше"] if has_next else []) + (["p - назад"] if has_prev else [])
+            commands += ["g АДРЕС - к адресу", "0 - выход"]
+            try:
+                command = input(f"\n{Colors.BOLD}{', '.join(commands)}: {Colors.ENDC}").strip().lower()
+            except KeyboardInterrupt:
+                return
 
-        self.pause()
+            if command in ('', 'n') and has_next:
+                rows = self.page_registers(**filters, after=self.register_key(last), limit=limit)
+            elif command == 'p' and has_prev:
+                rows = self.page_registers(**filters, before=self.register_key(first), limit=limit)
+            elif command.startswith('g') and command[1:].strip().isdigit():
+                # Без фильтра по типу - адрес в типе регистров текущей страницы
+                key = self.address_key(register_type or first['register_type'], int(command[1:]))
+                # За последним адресом - последняя страница
+                rows = (self.page_registers(**filters, after=key, limit=limit)
+                        or self.page_registers(**filters, before=key, limit=limit) or rows)
+            elif command in ('', '0', 'q'):
+                return
 
     def view_registers_by_section(self):
         """Просмотр регистров по секции"""
@@ -302,7 +908,7 @@ class ModbusCLI:
             return
 
         selected = sections[choice - 1]
-        self.view_registers(section_id=selected['id'])
+        self.view_registers(section=selected['id'])
 
     def view_registers_by_datatype(self):
         """Просмотр регистров по типу данных"""
@@ -319,7 +925,7 @@ class ModbusCLI:
             return
 
         selected = datatypes[choice - 1]
-        self.view_registers(data_type_id=selected['id'])
+        self.view_registers(data_type=selected['name'])
 
     # ========================================================================
     # ДОБАВЛЕНИЕ РЕГИСТРА
@@ -347,10 +953,8 @@ class ModbusCLI:
                 return
 
             # Проверка, является ли это BOOL
-            cursor = self.conn.cursor()
-            cursor.execute("SELECT name FROM data_types WHERE id = ?", (data_type_id,))
-            data_type_name = cursor.fetchone()['name']
-            is_bool = (data_type_name == 'BOOL')
+            data_type = next(dt for dt in self.data_types.values() if dt['id'] == data_type_id)
+            is_bool = bool(data_type['supports_bit_packing'])
 
             # 4. Ввод адреса регистра
             register_address = self.input_int("Введите адрес регистра", min_val=0)
@@ -376,23 +980,22 @@ class ModbusCLI:
             if not description:
                 description = None
 
-            # 8. Вставка в БД
-            cursor.execute("""
-                INSERT INTO registers (
-                    register_type_id, section_id, register_address, bit_index,
-                    data_type_id, variable_name, description
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (register_type_id, section_id, register_address, bit_index,
-                  data_type_id, variable_name, description))
+            # 8. Проверка и вставка в БД
+            register_type = next(name for name, type_id in self.register_type_ids.items()
+                                 if type_id == register_type_id)
+            register_id = self.insert_register(register_type, section_id, register_address, bit_index,
+                                               data_type['name'], variable_name, description)
 
             self.conn.commit()
 
             print(f"\n{Colors.OKGREEN}✅ Регистр успешно добавлен!{Colors.ENDC}")
-            print(f"{Colors.OKCYAN}   ID: {cursor.lastrowid}{Colors.ENDC}")
+            print(f"{Colors.OKCYAN}   ID: {register_id}{Colors.ENDC}")
 
         except sqlite3.IntegrityError as e:
             print(f"\n{Colors.FAIL}❌ Ошибка: регистр с таким адресом уже существует{Colors.ENDC}")
             print(f"{Colors.FAIL}   {e}{Colors.ENDC}")
+        except ValueError as e:
+            print(f"\n{Colors.FAIL}❌ {e}{Colors.ENDC}")
         except Exception as e:
             print(f"\n{Colors.FAIL}❌ Ошибка при добавлении: {e}{Colors.ENDC}")
 
@@ -413,31 +1016,17 @@ class ModbusCLI:
             return
 
         # Получить текущие данные
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT
-                r.*,
-                dt.name AS data_type,
-                s.name AS section,
-                rt.name AS register_type
-            FROM registers r
-            JOIN data_types dt ON r.data_type_id = dt.id
-            JOIN sections s ON r.section_id = s.id
-            JOIN register_types rt ON r.register_type_id = rt.id
-            WHERE r.id = ?
-        """, (register_id,))
-
-        register = cursor.fetchone()
-        if not register:
-            print(f"{Colors.FAIL}❌ Регистр с ID {register_id} не найден{Colors.ENDC}")
+        try:
+            register = self.get_register(register_id)
+        except ValueError as e:
+            print(f"{Colors.FAIL}❌ {e}{Colors.ENDC}")
             self.pause()
             return
 
         # Показать текущие данные
         print(f"\n{Colors.BOLD}Текущие данные регистра:{Colors.ENDC}")
         print(f"{Colors.OKCYAN}ID:          {register['id']}{Colors.ENDC}")
-        print(f"{Colors.OKCYAN}Адрес:       {register['register_address']}"
-              f"{f'.{register["bit_index"]}' if register["bit_index"] is not None else ''}{Colors.ENDC}")
+        print(f"{Colors.OKCYAN}Адрес:       {format_address(register)}{Colors.ENDC}")
         print(f"{Colors.OKCYAN}Тип данных:  {register['data_type']}{Colors.ENDC}")
         print(f"{Colors.OKCYAN}Переменная:  {register['variable_name']}{Colors.ENDC}")
         print(f"{Colors.OKCYAN}Описание:    {register['description'] or '(нет)'}{Colors.ENDC}")
@@ -463,22 +1052,20 @@ class ModbusCLI:
                 # Изменить имя переменной
                 new_name = input(f"{Colors.BOLD}Новое имя переменной [{register['variable_name']}]: {Colors.ENDC}").strip()
                 if new_name:
-                    cursor.execute("UPDATE registers SET variable_name = ? WHERE id = ?",
-                                 (new_name, register_id))
+                    self.update_register(register_id, variable_name=new_name)
                     self.conn.commit()
                     print(f"{Colors.OKGREEN}✅ Имя переменной обновлено{Colors.ENDC}")
 
             elif choice == 2:
                 # Изменить описание
                 new_desc = input(f"{Colors.BOLD}Новое описание [{register['description'] or ''}]: {Colors.ENDC}").strip()
-                cursor.execute("UPDATE registers SET description = ? WHERE id = ?",
-                             (new_desc if new_desc else None, register_id))
+                self.update_register(register_id, description=new_desc)
                 self.conn.commit()
                 print(f"{Colors.OKGREEN}✅ Описание обновлено{Colors.ENDC}")
 
             elif choice == 3:
                 # Удалить описание
-                cursor.execute("UPDATE registers SET description = NULL WHERE id = ?", (register_id,))
+                self.update_register(register_id, description=None)
                 self.conn.commit()
                 print(f"{Colors.OKGREEN}✅ Описание удалено{Colors.ENDC}")
 
@@ -502,29 +1089,17 @@ class ModbusCLI:
             return
 
         # Получить данные регистра
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT
-                r.*,
-                dt.name AS data_type,
-                s.name AS section
-            FROM registers r
-            JOIN data_types dt ON r.data_type_id = dt.id
-            JOIN sections s ON r.section_id = s.id
-            WHERE r.id = ?
-        """, (register_id,))
-
-        register = cursor.fetchone()
-        if not register:
-            print(f"{Colors.FAIL}❌ Регистр с ID {register_id} не найден{Colors.ENDC}")
+        try:
+            register = self.get_register(register_id)
+        except ValueError as e:
+            print(f"{Colors.FAIL}❌ {e}{Colors.ENDC}")
             self.pause()
             return
 
         # Показать данные
         print(f"\n{Colors.WARNING}⚠️  ВНИМАНИЕ! Вы собираетесь удалить регистр:{Colors.ENDC}")
         print(f"{Colors.OKCYAN}ID:          {register['id']}{Colors.ENDC}")
-        print(f"{Colors.OKCYAN}Адрес:       {register['register_address']}"
-              f"{f'.{register["bit_index"]}' if register["bit_index"] is not None else ''}{Colors.ENDC}")
+        print(f"{Colors.OKCYAN}Адрес:       {format_address(register)}{Colors.ENDC}")
         print(f"{Colors.OKCYAN}Переменная:  {register['variable_name']}{Colors.ENDC}")
         print(f"{Colors.OKCYAN}Секция:      {register['section']}{Colors.ENDC}")
 
@@ -536,7 +1111,7 @@ class ModbusCLI:
             return
 
         try:
-            cursor.execute("DELETE FROM registers WHERE id = ?", (register_id,))
+            self.remove_register(register_id)
             self.conn.commit()
             print(f"\n{Colors.OKGREEN}✅ Регистр успешно удалён{Colors.ENDC}")
         except Exception as e:
@@ -553,29 +1128,14 @@ class ModbusCLI:
         self.clear_screen()
         self.print_header("ПОИСК РЕГИСТРОВ")
 
+        if self.has_fts:
+            print(f"{Colors.OKCYAN}Слова - по И, \"фраза\" - целиком, ^слово - с начала имени/описания{Colors.ENDC}")
         search_term = input(f"{Colors.BOLD}Введите текст для поиска (имя переменной или описание): {Colors.ENDC}").strip()
         if not search_term:
             return
 
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT
-                r.id,
-                r.register_address,
-                r.bit_index,
-                dt.name AS data_type,
-                r.variable_name,
-                r.description,
-                s.name AS section
-            FROM registers r
-            JOIN data_types dt ON r.data_type_id = dt.id
-            JOIN sections s ON r.section_id = s.id
-            WHERE r.variable_name LIKE ? OR r.description LIKE ?
-            ORDER BY r.register_address, r.bit_index
-            LIMIT 100
-        """, (f'%{search_term}%', f'%{search_term}%'))
-
-        rows = cursor.fetchall()
+        # Совпадения подсвечиваются цветом
+        rows = self.find_registers(search_term, marks=(Colors.WARNING + Colors.BOLD, Colors.ENDC))
 
         if not rows:
             print(f"\n{Colors.WARNING}📭 Регистры не найдены{Colors.ENDC}")
@@ -587,15 +1147,12 @@ class ModbusCLI:
         print(f"{Colors.BOLD}{'-' * 100}{Colors.ENDC}")
 
         for row in rows:
-            # Форматирование адреса
-            if row['data_type'] == 'BOOL':
-                address = f"{row['register_address']}.{row['bit_index']}"
-            else:
-                address = str(row['register_address'])
+            address = format_address(row)
 
-            desc = (row['description'] or '')[:30]
+            # Ширина колонки - по тексту без управляющих кодов подсветки
+            padding = ' ' * max(30 - len(row['variable_name']), 0)
             print(f"{row['id']:<5} {address:<12} {row['data_type']:<8} "
-                  f"{row['variable_name']:<30} {desc:<30}")
+                  f"{row['variable_highlight']}{padding} {row['description_snippet'] or ''}")
 
         self.pause()
 
@@ -608,53 +1165,26 @@ class ModbusCLI:
         self.clear_screen()
         self.print_header("СТАТИСТИКА БАЗЫ ДАННЫХ")
 
-        cursor = self.conn.cursor()
+        stats = self.statistics()
 
         # Общая статистика
-        cursor.execute("SELECT COUNT(*) as count FROM registers")
-        total_registers = cursor.fetchone()['count']
-
-        cursor.execute("SELECT COUNT(DISTINCT section_id) as count FROM registers")
-        total_sections = cursor.fetchone()['count']
-
         print(f"{Colors.BOLD}Общая статистика:{Colors.ENDC}")
-        print(f"{Colors.OKCYAN}  Всего регистров:  {total_registers}{Colors.ENDC}")
-        print(f"{Colors.OKCYAN}  Всего секций:     {total_sections}{Colors.ENDC}")
+        print(f"{Colors.OKCYAN}  Всего регистров:  {stats['registers']}{Colors.ENDC}")
+        print(f"{Colors.OKCYAN}  Всего секций:     {stats['sections']}{Colors.ENDC}")
 
         # Статистика по типам регистров
         print(f"\n{Colors.BOLD}По типам регистров:{Colors.ENDC}")
-        cursor.execute("""
-            SELECT rt.name, rt.description_ru, COUNT(*) as count
-            FROM registers r
-            JOIN register_types rt ON r.register_type_id = rt.id
-            GROUP BY rt.name
-        """)
-        for row in cursor.fetchall():
+        for row in stats['by_register_type']:
             print(f"{Colors.OKGREEN}  {row['description_ru']:<30} {row['count']:>5}{Colors.ENDC}")
 
         # Статистика по типам данных
         print(f"\n{Colors.BOLD}По типам данных:{Colors.ENDC}")
-        cursor.execute("""
-            SELECT dt.name, COUNT(*) as count
-            FROM registers r
-            JOIN data_types dt ON r.data_type_id = dt.id
-            GROUP BY dt.name
-            ORDER BY count DESC
-        """)
-        for row in cursor.fetchall():
+        for row in stats['by_data_type']:
             print(f"{Colors.OKCYAN}  {row['name']:<15} {row['count']:>5}{Colors.ENDC}")
 
         # Топ секций
         print(f"\n{Colors.BOLD}Топ-10 секций по количеству регистров:{Colors.ENDC}")
-        cursor.execute("""
-            SELECT s.name, COUNT(*) as count
-            FROM registers r
-            JOIN sections s ON r.section_id = s.id
-            GROUP BY s.name
-            ORDER BY count DESC
-            LIMIT 10
-        """)
-        for i, row in enumerate(cursor.fetchall(), 1):
+        for i, row in enumerate(stats['top_sections'], 1):
             print(f"{Colors.OKBLUE}  {i:>2}. {row['name']:<45} {row['count']:>5}{Colors.ENDC}")
 
         self.pause()
@@ -664,33 +1194,18 @@ class ModbusCLI:
     # ========================================================================
 
     def export_to_excel(self):
-        """Экспорт в Excel"""
+        """Экспорт в Excel в фоне: меню доступно, ход - в заголовке главного меню"""
         self.clear_screen()
         self.print_header("ЭКСПОРТ В EXCEL")
 
-        if not EXPORT_SCRIPT.exists():
-            print(f"{Colors.FAIL}❌ Скрипт экспорта не найден: {EXPORT_SCRIPT}{Colors.ENDC}")
+        if self.export_future is not None and not self.export_future.done():
+            print(f"{Colors.WARNING}⚠️  Экспорт уже выполняется: {self.export_status()}{Colors.ENDC}")
             self.pause()
             return
 
-        print(f"{Colors.OKCYAN}Запуск экспорта в Excel...{Colors.ENDC}\n")
-
-        try:
-            result = subprocess.run(
-                [sys.executable, str(EXPORT_SCRIPT)],
-                cwd=str(SCRIPT_DIR),
-                capture_output=False,
-                text=True
-            )
-
-            if result.returncode == 0:
-                print(f"\n{Colors.OKGREEN}✅ Экспорт завершён успешно{Colors.ENDC}")
-            else:
-                print(f"\n{Colors.FAIL}❌ Ошибка при экспорте (код: {result.returncode}){Colors.ENDC}")
-
-        except Exception as e:
-            print(f"{Colors.FAIL}❌ Ошибка: {e}{Colors.ENDC}")
-
+        self.start_export()
+        print(f"{Colors.OKCYAN}Экспорт в {EXCEL_OUTPUT_PATH.name} запущен в фоне{Colors.ENDC}")
+        print(f"{Colors.OKCYAN}Можно продолжать работу: ход экспорта - в главном меню{Colors.ENDC}")
         self.pause()
 
     # ========================================================================
@@ -729,24 +1244,7 @@ class ModbusCLI:
         self.clear_screen()
         self.print_header("ВСЕ СЕКЦИИ")
 
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT
-                s.id,
-                s.name,
-                s.start_register,
-                s.end_register,
-                s.description,
-                rt.description_ru AS register_type,
-                COUNT(r.id) as register_count
-            FROM sections s
-            JOIN register_types rt ON s.register_type_id = rt.id
-            LEFT JOIN registers r ON r.section_id = s.id
-            GROUP BY s.id
-            ORDER BY s.start_register
-        """)
-
-        rows = cursor.fetchall()
+        rows = self.list_sections()
 
         if not rows:
             print(f"{Colors.WARNING}📭 Секции не найдены{Colors.ENDC}")
@@ -797,12 +1295,16 @@ class ModbusCLI:
 
             # Вставка
             cursor = self.conn.cursor()
-            cursor.execute("""
-                INSERT INTO sections (register_type_id, name, start_register, end_register, description)
-                VALUES (?, ?, ?, ?, ?)
+            columns, values = "", ""
+            if self.has_manual_sections:
+                columns, values = ", is_manual", ", 1"  # Синхронизация с файлом её не удалит
+            cursor.execute(f"""
+                INSERT INTO sections (register_type_id, name, start_register, end_register, description{columns})
+                VALUES (?, ?, ?, ?, ?{values})
             """, (register_type_id, name, start_register, end_register, description))
 
             self.conn.commit()
+            self._sections.clear()
             print(f"\n{Colors.OKGREEN}✅ Секция успешно добавлена (ID: {cursor.lastrowid}){Colors.ENDC}")
 
         except sqlite3.IntegrityError:
@@ -859,6 +1361,7 @@ class ModbusCLI:
         try:
             cursor.execute("DELETE FROM sections WHERE id = ?", (section_id,))
             self.conn.commit()
+            self._sections.clear()
             print(f"\n{Colors.OKGREEN}✅ Секция успешно удалена{Colors.ENDC}")
         except Exception as e:
             print(f"\n{Colors.FAIL}❌ Ошибка: {e}{Colors.ENDC}")
@@ -974,6 +1477,8 @@ class ModbusCLI:
         print(f"\n{Colors.OKGREEN}{'=' * 70}{Colors.ENDC}")
         print(f"{Colors.OKGREEN}Спасибо за использование Modbus Register Manager!{Colors.ENDC}")
         print(f"{Colors.OKGREEN}{'=' * 70}{Colors.ENDC}\n")
+        if self.export_future is not None and not self.export_future.done():
+            print(f"{Colors.OKCYAN}Ожидание завершения экспорта в Excel...{Colors.ENDC}")
         self.close_db()
         sys.exit(0)
 
@@ -982,10 +1487,118 @@ class ModbusCLI:
 # ГЛАВНАЯ ФУНКЦИЯ
 # ============================================================================
 
+def build_arg_parser() -> argparse.ArgumentParser:
+    """Аргументы: без подкоманды - интерактивное меню"""
+    arg_parser = argparse.ArgumentParser(description='Управление БД Modbus регистров')
+    arg_parser.add_argument('--db', type=Path, default=DB_PATH, help='Путь к БД регистров')
+    arg_parser.add_argument('--plc', type=int, default=None, help='ID ПЛК в БД')
+    arg_parser.add_argument('--format', choices=OUTPUT_FORMATS, default='text', help='Формат вывода подкоманд')
+    arg_parser.add_argument('--batch', action='store_true',
+                            help='Прочитать операции NDJSON из stdin и применить в одной транзакции')
+
+    # Те же опции после подкоманды; SUPPRESS - не затирать значения, заданные до неё
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--db', type=Path, default=argparse.SUPPRESS, help='Путь к БД регистров')
+    common.add_argument('--plc', type=int, default=argparse.SUPPRESS, help='ID ПЛК в БД')
+    common.add_argument('--format', choices=OUTPUT_FORMATS, default=argparse.SUPPRESS, help='Формат вывода')
+
+    commands = arg_parser.add_subparsers(dest='command', metavar='КОМАНДА')
+
+    command = commands.add_parser('list', parents=[common], help='Список регистров')
+    command.add_argument('--type', dest='register_type', choices=('holding_registers', 'input_registers'))
+    command.add_argument('--section', help='ID или имя секции')
+    command.add_argument('--data-type')
+    command.add_argument('--limit', type=int, default=0, help='Не больше N записей (0 - все)')
+
+    command = commands.add_parser('search', parents=[common], help='Поиск по имени переменной или описанию')
+    command.add_argument('term')
+    command.add_argument('--limit', type=int, default=100)
+
+    command = commands.add_parser('add', parents=[common], help='Добавить регистр')
+    command.add_argument('--type', dest='register_type', required=True,
+                         choices=('holding_registers', 'input_registers'))
+    command.add_argument('--section', required=True, help='ID или имя секции')
+    command.add_argument('--data-type', required=True)
+    command.add_argument('--address', dest='register_address', type=int, required=True)
+    command.add_argument('--bit', dest='bit_index', type=int, help='Бит-индекс (только BOOL)')
+    command.add_argument('--variable', dest='variable_name', required=True)
+    command.add_argument('--description')
+
+    command = commands.add_parser('edit', parents=[common], help='Изменить имя переменной или описание')
+    command.add_argument('id', type=int)
+    command.add_argument('--variable', dest='variable_name')
+    command.add_argument('--description', help='Пустая строка удаляет описание')
+
+    command = commands.add_parser('delete', parents=[common], help='Удалить регистр')
+    command.add_argument('id', type=int)
+
+    commands.add_parser('stats', parents=[common], help='Статистика БД')
+    commands.add_parser('sections', parents=[common], help='Список секций')
+
+    command = commands.add_parser('export', parents=[common], help='Экспорт в Excel')
+    command.add_argument('--output', type=Path, default=EXCEL_OUTPUT_PATH)
+    return arg_parser
+
+
+def run_command(cli: ModbusCLI, args: argparse.Namespace) -> int:
+    """Выполнить подкоманду или пакет; ошибки - в stderr, код возврата 1"""
+    try:
+        if args.batch:
+            start = time.perf_counter()
+            results = cli.run_batch(sys.stdin)
+            if args.format == 'text':
+                print(f"✅ Применено операций: {len(results)} "
+                      f"за {(time.perf_counter() - start) * 1000:.1f} мс")
+            else:
+                emit(results, args.format)
+        elif args.command == 'list':
+            emit([dict(row) for row in cli.query_registers(args.register_type, args.section, args.data_type,
+                                                           args.limit)], args.format)
+        elif args.command == 'search':
+            emit([dict(row) for row in cli.find_registers(args.term, args.limit)], args.format)
+        elif args.command == 'add':
+            with cli.conn:
+                register_id = cli.insert_register(args.register_type, args.section, args.register_address,
+                                                  args.bit_index, args.data_type, args.variable_name,
+                                                  args.description)
+            emit(dict(cli.get_register(register_id)), args.format)
+        elif args.command == 'edit':
+            fields = {name: getattr(args, name) for name in EDITABLE_FIELDS if getattr(args, name) is not None}
+            with cli.conn:
+                cli.update_register(args.id, **fields)
+            emit(dict(cli.get_register(args.id)), args.format)
+        elif args.command == 'delete':
+            register = dict(cli.get_register(args.id))
+            with cli.conn:
+                cli.remove_register(args.id)
+            emit(register, args.format)
+        elif args.command == 'stats':
+            emit(cli.statistics(), args.format)
+        elif args.command == 'sections':
+            emit([dict(row) for row in cli.list_sections()], args.format)
+        elif args.command == 'export':
+            returncode = cli.run_export(args.output, quiet=args.format != 'text')
+            emit({'returncode': returncode, 'output': str(args.output)}, args.format)
+            return 1 if returncode else 0
+    except (ValueError, sqlite3.Error) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
 def main():
     """Главная функция"""
+    args = build_arg_parser().parse_args()
+
+    if args.command or args.batch:
+        cli = ModbusCLI(args.db, plc_id=args.plc)
+        try:
+            return run_command(cli, args)
+        finally:
+            cli.close_db()
+
     try:
-        cli = ModbusCLI(DB_PATH)
+        cli = ModbusCLI(args.db, plc_id=args.plc)
         cli.main_menu()
     except KeyboardInterrupt:
         print(f"\n\n{Colors.WARNING}Программа прервана пользователем{Colors.ENDC}")
@@ -996,4 +1609,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
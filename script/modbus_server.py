@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modbus TCP Server Stand-in
+===========================
+Asyncio-сервер Modbus TCP, эмулирующий образы регистров ПЛК
+awModbusHoldingRegisters / awModbusInputRegisters (по 512 слов, GLOBAL.st)
+для нагрузочного тестирования SCADA и утилит без оборудования.
+
+Использование:
+    python3 modbus_server.py                     # 0.0.0.0:5020, карта из БД
+    python3 modbus_server.py --port 502 --simulate
+    python3 modbus_server.py --no-validate       # Без проверки адресов по БД
+
+    from modbus_server import ModbusServer
+    server = ModbusServer.from_database(DB_PATH)
+    server.add_simulation(step, interval=0.1)    # step(server, dt)
+    server.on_write(callback)                    # callback(address, count)
+    await server.start('127.0.0.1', 5020)
+
+Возможности:
+    - Функции 3 (Read Holding), 4 (Read Input), 6, 16 и 22 (Mask Write)
+    - Все соединения обслуживаются одним event loop (asyncio.Protocol),
+      запросы внутри одного TCP-пакета обрабатываются пакетом
+    - Проверка адресов по карте из БД: первый и последний регистр запроса
+      должны принадлежать переменным (ILLEGAL DATA ADDRESS), при этом
+      блочное чтение через промежутки карты допускается
+    - Хуки симуляции: периодические шаги, запись по именам переменных,
+      уведомления о записи holding-регистров со стороны SCADA
+
+Требования:
+    pip install numpy
+
+Дата: 2026-10-17
+"""
+
+import argparse
+import asyncio
+import math
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from register_decoder import DB_PATH, DECODE_WORDS, IMAGE_WORDS, DecodePlan, load_register_tags
+from setpoint_encoder import (
+    FC_MASK_WRITE_REGISTER, FC_WRITE_MULTIPLE_REGISTERS, FC_WRITE_SINGLE_REGISTER, MAX_WRITE_REGISTERS,
+    SetpointEncoder,
+)
+
+# Коды функций чтения
+FC_READ_HOLDING_REGISTERS = 3
+FC_READ_INPUT_REGISTERS = 4
+
+# Максимум регистров в одном запросе чтения (FC 3/4)
+MAX_READ_REGISTERS = 125
+
+# Коды исключений Modbus
+ILLEGAL_FUNCTION = 1
+ILLEGAL_DATA_ADDRESS = 2
+ILLEGAL_DATA_VALUE = 3
+
+# Заголовок MBAP: transaction id, protocol id, длина, unit id
+_MBAP = struct.Struct('>HHHB')
+
+
+class ModbusException(Exception):
+    """Ошибка запроса, возвращаемая клиенту как исключение Modbus"""
+
+    def __init__(self, code: int):
+        super().__init__(code)
+        self.code = code
+
+
+class RegisterImage:
+    """Образ одного типа регистров и его карта переменных"""
+
+    def __init__(self, tags: Iterable[Tuple[str, str, int, Optional[int]]], image_size: int = IMAGE_WORDS):
+        """
+        Args:
+            tags: (переменная, тип данных, адрес регистра, индекс бита)
+            image_size: Размер образа в словах
+        """
+        tags = list(tags)
+        self.words = np.zeros(image_size, dtype=np.uint16)
+        self.plan = DecodePlan(tags, image_size)
+        self.encoder = SetpointEncoder(tags, image_size)
+
+        # Слова, занятые переменными карты
+        self.mapped = np.zeros(image_size, dtype=bool)
+        for _, data_type, address, _ in tags:
+            self.mapped[address:address + DECODE_WORDS[data_type]] = True
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def check_range(self, address: int, count: int, validate: bool):
+        """
+        Проверить диапазон запроса
+
+        Raises:
+            ModbusException: ILLEGAL_DATA_ADDRESS
+        """
+        if address + count > len(self.words):
+            raise ModbusException(ILLEGAL_DATA_ADDRESS)
+        if validate and not (self.mapped[address] and self.mapped[address + count - 1]):
+            raise ModbusException(ILLEGAL_DATA_ADDRESS)
+
+    def read_bytes(self, address: int, count: int) -> bytes:
+        """Слова диапазона в порядке байт Modbus (big-endian)"""
+        return self.words[address:address + count].astype('>u2').tobytes()
+
+    def set_values(self, values: Dict[str, object]):
+        """
+        Записать значения по именам переменных (как их записал бы ПЛК)
+
+        Raises:
+            KeyError: переменной нет в карте
+            ValueError: значение не помещается в тип
+        """
+        words, bits = self.encoder.encode_words(values)
+        for address, value_words in words.items():
+            self.words[address:address + len(value_words)] = value_words
+        for address, (mask, bit_values) in bits.items():
+            self.words[address] = (int(self.words[address]) & ~mask & 0xFFFF) | bit_values
+
+    def values(self) -> Dict[str, object]:
+        """Текущие значения переменных {переменная: значение}"""
+        return self.plan.decode(self.words)
+
+
+class ModbusServer:
+    """Сервер Modbus TCP поверх двух образов регистров"""
+
+    def __init__(self, holding: RegisterImage, input_registers: RegisterImage, validate: bool = True):
+        """
+        Args:
+            holding: Образ holding-регистров (SCADA -> ПЛК)
+            input_registers: Образ input-регистров (ПЛК -> SCADA)
+            validate: Проверять адреса запросов по карте переменных
+        """
+        self.holding = holding
+        self.input = input_registers
+        self.validate = validate
+
+        self.connections = 0
+        self.requests = 0
+        self.exceptions = 0
+
+        self._write_callbacks: List[Callable[[int, int], None]] = []
+        self._simulations: List[Tuple[Callable[['ModbusServer', float], None], float]] = []
+        self._tasks: List[asyncio.Task] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @classmethod
+    def from_database(cls, db_path: Path = DB_PATH, plc_id: Optional[int] = None,
+                      validate: bool = True) -> 'ModbusServer':
+        """Создать сервер по карте регистров из БД"""
+        return cls(RegisterImage(load_register_tags(db_path, 'holding_registers', plc_id)),
+                   RegisterImage(load_register_tags(db_path, 'input_registers', plc_id)),
+                   validate)
+
+    def on_write(self, callback: Callable[[int, int], None]):
+        """Вызывать callback(адрес, количество) после каждой записи holding-регистров клиентом"""
+        self._write_callbacks.append(callback)
+
+    def add_simulation(self, step: Callable[['ModbusServer', float], None], interval: float = 0.1):
+        """
+        Добавить шаг симуляции, вызываемый step(server, dt) каждые interval секунд
+
+        Шаги, добавленные после start(), запускаются сразу.
+        """
+        self._simulations.append((step, interval))
+        if self._server is not None:
+            self._tasks.append(asyncio.get_running_loop().create_task(self._run_simulation(step, interval)))
+
+    def handle_pdu(self, pdu: bytes) -> bytes:
+        """Обработать PDU запроса и вернуть PDU ответа (или исключения)"""
+        self.requests += 1
+        function_code = pdu[0] if pdu else 0
+        try:
+            return self._dispatch(function_code, pdu)
+        except ModbusException as e:
+            self.exceptions += 1
+            return bytes((function_code | 0x80, e.code))
+        except struct.error:
+            self.exceptions += 1
+            return bytes((function_code | 0x80, ILLEGAL_DATA_VALUE))
+
+    def _dispatch(self, function_code: int, pdu: bytes) -> bytes:
+        if function_code in (FC_READ_HOLDING_REGISTERS, FC_READ_INPUT_REGISTERS):
+            address, count = struct.unpack_from('>HH', pdu, 1)
+            if not 1 <= count <= MAX_READ_REGISTERS:
+                raise ModbusException(ILLEGAL_DATA_VALUE)
+            image = self.holding if function_code == FC_READ_HOLDING_REGISTERS else self.input
+            image.check_range(address, count, self.validate)
+            return bytes((function_code, count * 2)) + image.read_bytes(address, count)
+
+        if function_code == FC_WRITE_SINGLE_REGISTER:
+            address, value = struct.unpack_from('>HH', pdu, 1)
+            self.holding.check_range(address, 1, self.validate)
+            self.holding.words[address] = value
+            self._notify_write(address, 1)
+            return pdu[:5]
+
+        if function_code == FC_WRITE_MULTIPLE_REGISTERS:
+            address, count, byte_count = struct.unpack_from('>HHB', pdu, 1)
+            if not 1 <= count <= MAX_WRITE_REGISTERS or byte_count != count * 2 or len(pdu) != 6 + byte_count:
+                raise ModbusException(ILLEGAL_DATA_VALUE)
+            self.holding.check_range(address, count, self.validate)
+            self.holding.words[address:address + count] = np.frombuffer(pdu, dtype='>u2', count=count, offset=6)
+            self._notify_write(address, count)
+            return pdu[:5]
+
+        if function_code == FC_MASK_WRITE_REGISTER:
+            address, and_mask, or_mask = struct.unpack_from('>HHH', pdu, 1)
+            self.holding.check_range(address, 1, self.validate)
+            current = int(self.holding.words[address])
+            self.holding.words[address] = (current & and_mask) | (or_mask & ~and_mask & 0xFFFF)
+            self._notify_write(address, 1)
+            return pdu[:7]
+
+        raise ModbusException(ILLEGAL_FUNCTION)
+
+    def _notify_write(self, address: int, count: int):
+        for callback in self._write_callbacks:
+            callback(address, count)
+
+    async def start(self, host: str = '0.0.0.0', port: int = 5020, backlog: int = 4096):
+        """Начать приём соединений и запустить шаги симуляции"""
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_server(lambda: _ModbusProtocol(self), host, port, backlog=backlog)
+        for step, interval in self._simulations:
+            self._tasks.append(loop.create_task(self._run_simulation(step, interval)))
+
+    @property
+    def port(self) -> int:
+        """Фактический порт (для start(port=0))"""
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def close(self):
+        """Остановить симуляцию и закрыть сервер"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _run_simulation(self, step: Callable[['ModbusServer', float], None], interval: float):
+        last = time.perf_counter()
+        while True:
+            await asyncio.sleep(interval)
+            now = time.perf_counter()
+            step(self, now - last)
+            last = now
+
+
+class _ModbusProtocol(asyncio.Protocol):
+    """Одно TCP-соединение: разбор кадров MBAP и ответы"""
+
+    def __init__(self, server: ModbusServer):
+        self.server = server
+        self.transport = None
+        self._buffer = b''
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.server.connections += 1
+
+    def connection_lost(self, exc):
+        self.server.connections -= 1
+
+    def data_received(self, data: bytes):
+        buffer = self._buffer + data if self._buffer else data
+        offset = 0
+        responses = []
+        while len(buffer) - offset >= _MBAP.size:
+            transaction_id, protocol_id, length, unit_id = _MBAP.unpack_from(buffer, offset)
+            if protocol_id != 0 or not 2 <= length <= 254:
+                self.transport.close()
+                return
+            end = offset + 6 + length
+            if len(buffer) < end:
+                break
+            response = self.server.handle_pdu(buffer[offset + _MBAP.size:end])
+            responses.append(_MBAP.pack(transaction_id, 0, len(response) + 1, unit_id) + response)
+            offset = end
+        self._buffer = buffer[offset:]
+        if responses:
+            self.transport.write(b''.join(responses))
+
+
+def sine_simulation(period: float = 60.0) -> Callable[[ModbusServer, float], None]:
+    """
+    Демонстрационный шаг симуляции: REAL input-регистры меняются по синусоиде,
+    BOOL повторяют знак синусоиды (со сдвигом фазы по адресу)
+    """
+    elapsed = 0.0
+
+    def step(server: ModbusServer, dt: float):
+        nonlocal elapsed
+        elapsed += dt
+        values = {}
+        for name, data_type, (address, _) in zip(server.input.plan.names, server.input.plan.data_types,
+                                                  server.input.plan.addresses):
+            phase = 2 * math.pi * (elapsed / period + address / 64)
+            if data_type == 'REAL':
+                values[name] = 50.0 + 50.0 * math.sin(phase)
+            elif data_type == 'BOOL':
+                values[name] = math.sin(phase) > 0
+        server.input.set_values(values)
+
+    return step
+
+
+async def serve(host: str, port: int, db_path: Path, plc_id: Optional[int], validate: bool, simulate: bool):
+    server = ModbusServer.from_database(db_path, plc_id, validate)
+    if simulate:
+        server.add_simulation(sine_simulation(), interval=0.1)
+    server.on_write(lambda address, count: print(f"💾 Запись holding {address}..{address + count - 1}"))
+    await server.start(host, port)
+
+    print(f"✅ Holding: {len(server.holding.plan)} переменных, input: {len(server.input.plan)} переменных")
+    print(f"🏭 Modbus TCP сервер слушает {host}:{server.port} (Ctrl+C для остановки)")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main():
+    """Главная функция"""
+    arg_parser = argparse.ArgumentParser(description='Эмулятор ПЛК: сервер Modbus TCP')
+    arg_parser.add_argument('--host', default='0.0.0.0', help='Адрес прослушивания')
+    arg_parser.add_argument('--port', type=int, default=5020, help='Порт (502 требует прав root)')
+    arg_parser.add_argument('--db', type=Path, default=DB_PATH, help='Путь к БД регистров')
+    arg_parser.add_argument('--plc', type=int, default=None, help='ID ПЛК в БД')
+    arg_parser.add_argument('--no-validate', action='store_true', help='Не проверять адреса по карте из БД')
+    arg_parser.add_argument('--simulate', action='store_true', help='Менять input-регистры по синусоиде')
+    args = arg_parser.parse_args()
+
+    print("=" * 60)
+    print("Modbus TCP Server Stand-in")
+    print("=" * 60)
+
+    if not args.db.exists():
+        print(f"❌ База данных не найдена: {args.db}")
+        return 1
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.db, args.plc, not args.no_validate, args.simulate))
+    except KeyboardInterrupt:
+        print("\n⚠️  Остановлено")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
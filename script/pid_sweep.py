@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Proportion PID Sweep
+=====================
+Векторизованный порт FB_ProportionPID (Library/FB_ProportionPID.st) и модели
+подачи бункеров (FB_Simulation.st) для перебора параметров ПИД: тысячи
+наборов rPID_Kp/Ki/Kd/IntegralLimit/DerivativeFilter моделируются одновременно
+и ранжируются по времени установления и перерегулированию.
+
+Использование:
+    python3 pid_sweep.py                                    # Сетка по умолчанию
+    python3 pid_sweep.py --kp 0.1:2:20 --ki 0.01:0.5:20 --kd 0:0.1:5
+    python3 pid_sweep.py --targets 50 30 20 --material 1.0 0.8 1.2 --duration 600
+    python3 pid_sweep.py --workers 8 --top 20
+
+Возможности:
+    - Порт блока один-в-один в REAL (float32): условное интегрирование
+      (anti-windup) и ограничение интеграла, фильтр D-составляющей,
+      масштабирование от базовых частот, ограничение rFrequency_Min/Max,
+      нормализация к rFrequency_TargetSum, xReset, коды ошибок
+    - Состояние - массивы (наборы параметров × 3 бункера): один шаг ПИД
+      для всей сетки - несколько десятков операций NumPy
+    - Модель установки: рампа ЧРП (FB_FrequencyControl), вес под бункером
+      пропорционален частоте и коэффициенту материала, транспортная задержка
+      и шум весов; фактические пропорции - как в MAIN
+    - Сетка делится между процессами (--workers, по умолчанию - число ядер)
+    - Метрики на лету: время установления в полосе --band, перерегулирование,
+      интеграл модуля ошибки (IAE)
+
+Требования:
+    pip install numpy
+
+Дата: 2026-10-17
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+# Параметры ПИД, перебираемые в сетке, и их значения в MAIN.st
+PARAMETERS = ('kp', 'ki', 'kd', 'integral_limit', 'derivative_filter')
+MAIN_PARAMETERS = {'kp': 0.4, 'ki': 0.15, 'kd': 0.01, 'integral_limit': 10.0, 'derivative_filter': 0.8}
+DEFAULT_GRID = {
+    'kp': '0.1:2.0:12',
+    'ki': '0.01:0.6:12',
+    'kd': '0:0.1:5',
+    'integral_limit': '10',
+    'derivative_filter': '0:0.9:4',
+}
+
+# quErrorCode
+ERROR_PROPORTION_SUM = 1
+ERROR_DELTA_TIME = 2
+ERROR_FREQUENCY_LIMITS = 3
+ERROR_TARGET_SUM = 4
+
+REAL = np.float32
+
+
+class ProportionPID:
+    """
+    FB_ProportionPID для count наборов параметров одновременно
+
+    Параметры ПИД - скаляры или массивы (count,); входы и выходы -
+    массивы (count, 3) по бункерам. Вычисления в float32, как REAL в ПЛК.
+    """
+
+    def __init__(self, count: int, kp=1.0, ki=0.2, kd=0.05, integral_limit=10.0, derivative_filter=0.1,
+                 frequency_min: float = 1.0, frequency_max: float = 35.0, frequency_target_sum: float = 90.0,
+                 delta_time: float = 2.0, scale_min: float = 0.1, scale_max: float = 3.0,
+                 proportion_threshold: float = 0.001):
+        self.count = count
+        column = lambda value: np.broadcast_to(np.asarray(value, dtype=REAL), (count,)).reshape(count, 1)
+        self.kp = column(kp)
+        self.ki = column(ki)
+        self.kd = column(kd)
+        self.integral_limit = column(integral_limit)
+        self.derivative_filter = column(derivative_filter)
+        self.frequency_min = REAL(frequency_min)
+        self.frequency_max = REAL(frequency_max)
+        self.frequency_target_sum = REAL(frequency_target_sum)
+        self.delta_time = REAL(delta_time)
+        self.scale_min = REAL(scale_min)
+        self.scale_max = REAL(scale_max)
+        self.proportion_threshold = REAL(proportion_threshold)
+
+        shape = (count, 3)
+        self.frequency = np.zeros(shape, dtype=REAL)           # qrFrequency_1..3
+        self.pid_output = np.zeros(shape, dtype=REAL)          # qrPID_Output_1..3
+        self.error = np.zeros(shape, dtype=REAL)               # qrPID_Error_1..3
+        self.integral = np.zeros(shape, dtype=REAL)            # _rIntegral_1..3
+        self.previous_error = np.zeros(shape, dtype=REAL)      # _rPrevError_1..3
+        self.derivative_filtered = np.zeros(shape, dtype=REAL)  # _rDerivativeFiltered_1..3
+        self.active = np.zeros(count, dtype=bool)              # qxActive
+        self.error_code = np.zeros(count, dtype=np.uint16)     # quErrorCode
+        self.normalized = np.zeros(count, dtype=bool)          # qxProportionNormalized
+
+    def disable(self):
+        """Вызов с xEnable = FALSE: сброс выходов и состояния ПИД"""
+        self.active[:] = False
+        for array in (self.frequency, self.pid_output, self.error, self.integral,
+                      self.previous_error, self.derivative_filtered):
+            array[:] = 0
+
+    def _parameter_error(self) -> int:
+        if self.delta_time <= 0 or self.delta_time > 1:
+            return ERROR_DELTA_TIME
+        if self.frequency_min >= self.frequency_max:
+            return ERROR_FREQUENCY_LIMITS
+        if self.frequency_target_sum <= 0:
+            return ERROR_TARGET_SUM
+        return 0
+
+    def __call__(self, targets, actual, base, reset: bool = False) -> 'np.ndarray':
+        """
+        Один вызов блока с xEnable = TRUE
+
+        Args:
+            targets: rProportionTarget_1..3 - (3,) или (count, 3)
+            actual: rProportionActual_1..3 - (count, 3)
+            base: rFrequencyBase_1..3 - (3,) или (count, 3)
+            reset: xReset
+
+        Returns:
+            qrFrequency_1..3 (count, 3)
+        """
+        self.error_code[:] = self._parameter_error()
+        if self.error_code[0]:
+            return self.frequency  # RETURN до расчёта: выходы прежние
+
+        targets = np.broadcast_to(np.asarray(targets, dtype=REAL), (self.count, 3))
+        actual = np.asarray(actual, dtype=REAL)
+        base = np.broadcast_to(np.asarray(base, dtype=REAL), (self.count, 3))
+
+        # Нормализация пропорций
+        proportion_sum = targets.sum(axis=1, dtype=REAL)
+        valid = proportion_sum >= REAL(0.0001)
+        normalized = np.abs(proportion_sum - 1) > REAL(0.001)
+        safe_sum = np.where(valid, proportion_sum, REAL(1))[:, None]
+        norm = np.where(normalized[:, None], targets / safe_sum, targets)
+        bunker_active = norm > self.proportion_threshold
+
+        # xReset сбрасывает интеграл и предыдущую ошибку (но не фильтр D)
+        integral = np.zeros_like(self.integral) if reset else self.integral
+        previous_error = np.zeros_like(self.previous_error) if reset else self.previous_error
+
+        # ПИД по каждому бункеру
+        error = norm - actual
+        derivative = (error - previous_error) / self.delta_time
+        derivative_filtered = (1 - self.derivative_filter) * derivative + self.derivative_filter * self.derivative_filtered
+        output = self.kp * error + self.ki * integral + self.kd * derivative_filtered
+
+        # Условное интегрирование: только вне насыщения или если ошибка выводит из него
+        integrate = (((output >= 0) & (output <= 1)) | ((output < 0) & (error > 0)) | ((output > 1) & (error < 0)))
+        integral = np.where(integrate,
+                            np.clip(integral + error * self.delta_time, -self.integral_limit, self.integral_limit),
+                            integral)
+        output = np.clip(output, 0, 1)
+
+        zero = REAL(0)
+        error = np.where(bunker_active, error, zero)
+        output = np.where(bunker_active, output, zero)
+        integral = np.where(bunker_active, integral, zero)
+        derivative_filtered = np.where(bunker_active, derivative_filtered, zero)
+
+        # ШАГ 1: коррекция базовой частоты, выход 0.5 - без коррекции
+        safe_base = np.where(base != 0, base, REAL(1))
+        scaled = base + (output - REAL(0.5)) * 2 * base
+        scale = scaled / safe_base
+        scaled = np.where(scale < self.scale_min, base * self.scale_min,
+                          np.where(scale > self.scale_max, base * self.scale_max, scaled))
+        # ШАГ 2: пределы ЧРП до нормализации
+        scaled = np.where(bunker_active, np.clip(scaled, self.frequency_min, self.frequency_max), zero)
+        # ШАГ 3: нормализация к целевой сумме
+        scaled_sum = np.maximum(scaled.sum(axis=1, dtype=REAL), REAL(0.01))
+        frequency = scaled * (self.frequency_target_sum / scaled_sum)[:, None]
+
+        # Наборы с суммой пропорций = 0: код 1, частоты 0, состояние ПИД не меняется
+        rows = valid[:, None]
+        self.frequency = np.where(rows, frequency, zero)
+        self.error = np.where(rows, error, self.error)
+        self.pid_output = np.where(rows, output, self.pid_output)
+        self.integral = np.where(rows, integral, self.integral)
+        self.derivative_filtered = np.where(rows, derivative_filtered, self.derivative_filtered)
+        self.previous_error = np.where(rows, error, self.previous_error)
+        self.normalized = np.where(valid, normalized, self.normalized)
+        self.error_code[~valid] = ERROR_PROPORTION_SUM
+        self.active = valid
+        return self.frequency
+
+
+class FeederPlant:
+    """
+    Модель подачи трёх бункеров на сборный конвейер (FB_Simulation.st)
+
+    Частота ЧРП догоняет уставку с шагом ramp Гц/с (FB_FrequencyControl),
+    вес под бункером = частота / 50 * 100 * коэффициент материала * (1 + шум);
+    фактические пропорции доходят до весов через delay шагов.
+    """
+
+    def __init__(self, count: int, material: Sequence[float] = (1.0, 1.0, 1.0), ramp: float = 4.0,
+                 delay: int = 0, noise: float = 0.0, seed: int = 0):
+        self.count = count
+        self.material = np.broadcast_to(np.asarray(material, dtype=REAL), (count, 3))
+        self.ramp = REAL(ramp)
+        self.noise = REAL(noise)
+        self.frequency = np.zeros((count, 3), dtype=REAL)
+        self._pipeline = [None] * delay
+        self._rng = np.random.default_rng(seed)
+
+    def start(self, frequency):
+        """Установившийся режим на заданных частотах"""
+        self.frequency[:] = frequency
+        proportions = self._proportions()
+        self._pipeline = [proportions] * len(self._pipeline)
+
+    def _proportions(self) -> 'np.ndarray':
+        weight = self.frequency / 50 * 100 * self.material
+        if self.noise:
+            # Один и тот же шум для всех наборов - сравнение при равных условиях
+            weight = weight * (1 + self.noise * self._rng.uniform(-1, 1, 3).astype(REAL))
+        total = weight.sum(axis=1, keepdims=True)
+        return np.where(total > REAL(0.5), weight / np.maximum(total, REAL(0.5)), REAL(0))
+
+    def step(self, setpoint, dt: float) -> 'np.ndarray':
+        """Сдвинуть частоты к уставкам на dt и вернуть фактические пропорции"""
+        limit = self.ramp * REAL(dt)
+        self.frequency += np.clip(setpoint - self.frequency, -limit, limit)
+        proportions = self._proportions()
+        if not self._pipeline:
+            return proportions
+        self._pipeline.append(proportions)
+        return self._pipeline.pop(0)
+
+
+def simulate(parameters: Dict[str, 'np.ndarray'], targets: Sequence[float], material: Sequence[float],
+             duration: float = 300.0, band: float = 0.01, delay: int = 0, noise: float = 0.0,
+             ramp: float = 4.0, frequency_min: float = 5.0, frequency_max: float = 50.0,
+             frequency_target_sum: float = 50.0, delta_time: float = 0.5) -> Dict[str, 'np.ndarray']:
+    """
+    Смоделировать сетку наборов параметров (значения MAIN.st по умолчанию)
+
+    Старт - из установившегося режима на базовых частотах (шаг INIT в MAIN),
+    различие коэффициентов материала даёт начальную ошибку пропорций.
+
+    Returns:
+        {'settling_time': с (inf - не установилось), 'overshoot': доля
+        начальной ошибки, 'iae': ∫|e|dt, 'final_error': max|e| в конце}
+    """
+    count = len(next(iter(parameters.values())))
+    targets = np.asarray(targets, dtype=REAL)
+    targets = targets / targets.sum() if targets.sum() > 1.001 else targets
+    base = REAL(frequency_target_sum) * targets
+
+    pid = ProportionPID(count, frequency_min=frequency_min, frequency_max=frequency_max,
+                        frequency_target_sum=frequency_target_sum, delta_time=delta_time, **parameters)
+    plant = FeederPlant(count, material, ramp=ramp, delay=delay, noise=noise)
+    plant.start(base)
+    active = targets > pid.proportion_threshold
+
+    actual = plant.step(plant.frequency, delta_time)
+    initial = np.abs(targets - actual)[:, active].max(axis=1)
+    direction = np.sign(targets - actual)
+    steps = int(duration / delta_time)
+    last_outside = np.full(count, -1)
+    overshoot = np.zeros(count, dtype=REAL)
+    iae = np.zeros(count, dtype=REAL)
+
+    for step in range(steps):
+        error = (targets - actual)[:, active]
+        outside = np.abs(error).max(axis=1) > band
+        last_outside[outside] = step
+        overshoot = np.maximum(overshoot, np.max(-error * direction[:, active], axis=1))
+        iae += np.abs(error).sum(axis=1) * REAL(delta_time)
+        actual = plant.step(pid(targets, actual, base), delta_time)
+
+    settled = last_outside < steps - 1
+    return {
+        'settling_time': np.where(settled, (last_outside + 1) * delta_time, np.inf),
+        'overshoot': overshoot / np.maximum(initial, REAL(1e-6)),
+        'iae': iae,
+        'final_error': np.abs(targets - actual)[:, active].max(axis=1),
+    }
+
+
+def parse_range(spec: str) -> 'np.ndarray':
+    """Разобрать "НАЧАЛО:КОНЕЦ:ЧИСЛО" (включительно) или одно значение"""
+    parts = [float(part) for part in spec.split(':')]
+    if len(parts) == 1:
+        return np.array(parts, dtype=REAL)
+    if len(parts) != 3:
+        raise argparse.ArgumentTypeError(f"Ожидается НАЧАЛО:КОНЕЦ:ЧИСЛО: {spec}")
+    return np.linspace(parts[0], parts[1], int(parts[2]), dtype=REAL)
+
+
+def build_grid(ranges: Dict[str, 'np.ndarray']) -> Dict[str, 'np.ndarray']:
+    """Декартово произведение диапазонов -> столбцы параметров"""
+    mesh = np.meshgrid(*(ranges[name] for name in PARAMETERS), indexing='ij')
+    return {name: axis.ravel() for name, axis in zip(PARAMETERS, mesh)}
+
+
+def _simulate_chunk(args):
+    parameters, kwargs = args
+    return simulate(parameters, **kwargs)
+
+
+def sweep(grid: Dict[str, 'np.ndarray'], workers: Optional[int] = None, chunk_size: int = 4096,
+          **kwargs) -> Dict[str, 'np.ndarray']:
+    """Смоделировать сетку частями, параллельно в workers процессах"""
+    count = len(grid[PARAMETERS[0]])
+    workers = workers or os.cpu_count() or 1
+    chunk_size = max(min(chunk_size, -(-count // workers)), 1)
+    chunks = [({name: column[i:i + chunk_size] for name, column in grid.items()}, kwargs)
+              for i in range(0, count, chunk_size)]
+    if workers == 1 or len(chunks) == 1:
+        results = [_simulate_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_simulate_chunk, chunks))
+    return {key: np.concatenate([result[key] for result in results]) for key in results[0]}
+
+
+def rank(metrics: Dict[str, 'np.ndarray'], overshoot_weight: float = 60.0) -> 'np.ndarray':
+    """
+    Индексы наборов от лучшего к худшему
+
+    Неустановившиеся - в конце (по IAE); остальные - по времени установления
+    плюс overshoot_weight секунд за каждые 100% перерегулирования.
+    """
+    score = metrics['settling_time'] + overshoot_weight * metrics['overshoot']
+    return np.lexsort((metrics['iae'], score, ~np.isfinite(metrics['settling_time'])))
+
+
+def main():
+    """Главная функция"""
+    arg_parser = argparse.ArgumentParser(description='Перебор параметров FB_ProportionPID')
+    for name in PARAMETERS:
+        arg_parser.add_argument(f"--{name.replace('_', '-')}", type=parse_range, default=DEFAULT_GRID[name],
+                                metavar='НАЧАЛО:КОНЕЦ:ЧИСЛО', help=f"Диапазон {name} (по умолчанию {DEFAULT_GRID[name]})")
+    arg_parser.add_argument('--targets', type=float, nargs=3, default=[50, 30, 20], help='Пропорции бункеров, %%')
+    arg_parser.add_argument('--material', type=float, nargs=3, default=[1.0, 0.8, 1.2],
+                            help='Коэффициенты материала (подача на 1 Гц относительно расчётной)')
+    arg_parser.add_argument('--duration', type=float, default=300.0, help='Длительность моделирования, с')
+    arg_parser.add_argument('--band', type=float, default=0.01, help='Полоса установления по пропорции')
+    arg_parser.add_argument('--delay', type=int, default=0, help='Транспортная задержка до весов, вызовов ПИД')
+    arg_parser.add_argument('--noise', type=float, default=0.0, help='Шум весов (0.03 = ±3%%, как FB_Simulation)')
+    arg_parser.add_argument('--ramp', type=float, default=4.0, help='Скорость рампы ЧРП, Гц/с')
+    arg_parser.add_argument('--workers', type=int, help='Число процессов (по умолчанию - число ядер)')
+    arg_parser.add_argument('--top', type=int, default=10, help='Сколько лучших наборов вывести')
+    args = arg_parser.parse_args()
+
+    print("=" * 60)
+    print("Proportion PID Sweep")
+    print("=" * 60)
+
+    grid = build_grid({name: getattr(args, name) for name in PARAMETERS})
+    count = len(grid['kp'])
+    kwargs = dict(targets=args.targets, material=args.material, duration=args.duration, band=args.band,
+                  delay=args.delay, noise=args.noise, ramp=args.ramp)
+    print(f"\n⏱️  {count} наборов × {int(args.duration / 0.5)} вызовов ПИД...")
+    start = time.perf_counter()
+    metrics = sweep(grid, args.workers, **kwargs)
+    elapsed = time.perf_counter() - start
+    print(f"   Время: {elapsed:.1f} с ({count * args.duration / 0.5 / elapsed:,.0f} вызовов блока/с)")
+    settled = np.isfinite(metrics['settling_time'])
+    print(f"   Установились в полосе ±{args.band:g}: {settled.sum()} из {count}")
+
+    reference = simulate({name: np.array([value], dtype=REAL) for name, value in MAIN_PARAMETERS.items()}, **kwargs)
+
+    def describe(parameters: Dict[str, float], result: Dict[str, float]) -> str:
+        return (f"Kp={parameters['kp']:<6.3g} Ki={parameters['ki']:<6.3g} Kd={parameters['kd']:<6.3g} "
+                f"Lim={parameters['integral_limit']:<5.3g} Filt={parameters['derivative_filter']:<5.3g} | "
+                f"t={result['settling_time']:>6.1f} с  перерег. {result['overshoot']:>6.1%}  "
+                f"IAE {result['iae']:.3f}")
+
+    print(f"\n📊 Лучшие {args.top}:")
+    for i in rank(metrics)[:args.top]:
+        print("   " + describe({name: grid[name][i] for name in PARAMETERS},
+                                {key: values[i] for key, values in metrics.items()}))
+    print("\n🏭 Текущие параметры MAIN.st:")
+    print("   " + describe(MAIN_PARAMETERS, {key: values[0] for key, values in reference.items()}))
+
+    print("=" * 60)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modbus Poll Planner
+====================
+Планировщик опроса для SCADA-клиентов: карта регистров из БД превращается
+в минимальный список блочных чтений с периодом опроса по секциям.
+
+Использование:
+    python3 poll_planner.py                                  # План по умолчанию
+    python3 poll_planner.py --rate "Уставки*=5" --rate "Модуль DI*=0.2"
+    python3 poll_planner.py --request-cost 20 -v             # Список блоков
+    python3 poll_planner.py --connect 127.0.0.1:5020 --cycles 10
+
+    from poll_planner import PollPlanner, PollExecutor
+    plan = PollPlanner.from_database(DB_PATH, rates={'Уставки*': 5.0}).plan()
+    executor = PollExecutor(plan, '127.0.0.1', 5020, connections=2)
+    executor.on_update(callback)          # callback(register_type, image, reads)
+    await executor.run()
+
+Возможности:
+    - Период опроса задаётся по секции (шаблоны fnmatch по имени секции),
+      по умолчанию - по типу регистров
+    - Регистры одного типа и периода объединяются в блоки не длиннее
+      125 регистров; значения REAL/TIME не разрезаются между блоками
+    - Промежутки между регистрами перекрываются, когда это дешевле
+      отдельного запроса: разбиение на блоки оптимально для модели
+      стоимости "request_cost + число регистров" (динамическое программирование)
+    - Блоки начинаются и заканчиваются на регистрах карты (проходят проверку
+      адресов modbus_server.py)
+    - Асинхронный исполнитель: небольшой пул соединений, несколько запросов
+      в полёте на соединение, общие образы регистров для декодера
+
+Требования:
+    pip install numpy
+
+Дата: 2026-10-17
+"""
+
+import argparse
+import asyncio
+import sqlite3
+import struct
+import sys
+import time
+from collections import deque
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from register_decoder import DB_PATH, DECODE_WORDS, IMAGE_WORDS
+
+# Максимум регистров в одном запросе чтения (FC 3/4)
+MAX_READ_REGISTERS = 125
+
+# Циклов групп, по которым хранится время опроса (PollExecutor.latencies)
+LATENCY_WINDOW = 10000
+
+# Код функции чтения по типу регистров
+READ_FUNCTION_CODES = {'holding_registers': 3, 'input_registers': 4}
+
+# Период опроса по умолчанию (секунды): статусы часто, уставки редко
+DEFAULT_INTERVALS = {'input_registers': 1.0, 'holding_registers': 5.0}
+
+# Стоимость запроса в регистрах: заголовки MBAP/TCP и ход задачи Modbus ПЛК
+DEFAULT_REQUEST_COST = 16
+
+
+class BlockRead:
+    """Одно блочное чтение"""
+
+    def __init__(self, register_type: str, address: int, count: int, interval: float, sections: List[str]):
+        self.register_type = register_type
+        self.function_code = READ_FUNCTION_CODES[register_type]
+        self.address = address
+        self.count = count
+        self.interval = interval
+        self.sections = sections
+
+    def to_pdu(self) -> bytes:
+        """PDU запроса Read Holding/Input Registers"""
+        return struct.pack('>BHH', self.function_code, self.address, self.count)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, BlockRead) and self.__dict__ == other.__dict__
+
+    def __repr__(self) -> str:
+        return f"BlockRead(FC{self.function_code} @{self.address} x{self.count} каждые {self.interval:g} с)"
+
+
+def load_section_tags(db_path: Path = DB_PATH,
+                      plc_id: Optional[int] = None) -> List[Tuple[str, str, str, int]]:
+    """
+    Прочитать регистры с секциями из БД
+
+    Returns:
+        (тип регистров, секция, тип данных, адрес регистра) по возрастанию адреса
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        query = """
+            SELECT rt.name, s.name, dt.name, r.register_address
+            FROM registers r
+            JOIN register_types rt ON r.register_type_id = rt.id
+            JOIN sections s ON r.section_id = s.id
+            JOIN data_types dt ON r.data_type_id = dt.id
+        """
+        params: list = []
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(registers)")}
+        if 'plc_id' in columns:
+            query += " WHERE r.plc_id = ?"
+            params.append(1 if plc_id is None else plc_id)
+        query += " ORDER BY rt.name, r.register_address"
+        return conn.execute(query, params).fetchall()
+    finally:
+        conn.close()
+
+
+def partition_spans(spans: List[Tuple[int, int]], request_cost: int = DEFAULT_REQUEST_COST,
+                    max_count: int = MAX_READ_REGISTERS) -> List[Tuple[int, int]]:
+    """
+    Оптимально разбить отсортированные непересекающиеся диапазоны на блоки
+
+    Стоимость блока - request_cost + его длина; блок не длиннее max_count
+    и состоит из целых диапазонов.
+
+    Args:
+        spans: [(начало, конец)) по возрастанию
+    Returns:
+        [(адрес, количество)] блоков
+
+    Raises:
+        ValueError: диапазон длиннее max_count (не помещается в один блок)
+    """
+    for start, end in spans:
+        if end - start > max_count:
+            raise ValueError(f"Диапазон {start}..{end - 1} длиннее {max_count} регистров")
+    n = len(spans)
+    best = [0] + [float('inf')] * n  # best[j] - стоимость покрытия первых j диапазонов
+    cut = [0] * (n + 1)
+    for j in range(1, n + 1):
+        end = spans[j - 1][1]
+        i = j - 1
+        while i >= 0 and end - spans[i][0] <= max_count:
+            cost = best[i] + request_cost + end - spans[i][0]
+            if cost < best[j]:
+                best[j], cut[j] = cost, i
+            i -= 1
+
+    blocks = []
+    j = n
+    while j > 0:
+        i = cut[j]
+        blocks.append((spans[i][0], spans[j - 1][1] - spans[i][0]))
+        j = i
+    return blocks[::-1]
+
+
+class PollPlanner:
+    """Построение плана опроса по карте регистров и периодам секций"""
+
+    def __init__(self, tags: Iterable[Tuple[str, str, str, int]], rates: Optional[Dict[str, float]] = None,
+                 default_intervals: Optional[Dict[str, float]] = None,
+                 request_cost: int = DEFAULT_REQUEST_COST, image_size: int = IMAGE_WORDS):
+        """
+        Args:
+            tags: (тип регистров, секция, тип данных, адрес регистра)
+            rates: {шаблон имени секции: период, с}; первый совпавший шаблон
+            default_intervals: Период по типу регистров для остальных секций
+            request_cost: Стоимость отдельного запроса в регистрах
+        """
+        self.tags = list(tags)
+        self.rates = rates or {}
+        self.default_intervals = dict(DEFAULT_INTERVALS, **(default_intervals or {}))
+        self.request_cost = request_cost
+        self.image_size = image_size
+
+    @classmethod
+    def from_database(cls, db_path: Path = DB_PATH, plc_id: Optional[int] = None, **kwargs) -> 'PollPlanner':
+        return cls(load_section_tags(db_path, plc_id), **kwargs)
+
+    def interval_for(self, register_type: str, section: str) -> float:
+        """Период опроса секции"""
+        for pattern, interval in self.rates.items():
+            if fnmatchcase(section, pattern):
+                return interval
+        return self.default_intervals[register_type]
+
+    def plan(self) -> List[BlockRead]:
+        """
+        Построить план опроса
+
+        Returns:
+            Блочные чтения, отсортированные по периоду, типу регистров и адресу
+        """
+        # (тип регистров, период) -> адрес -> (конец, секции)
+        groups: Dict[Tuple[str, float], Dict[int, Tuple[int, set]]] = {}
+        for register_type, section, data_type, address in self.tags:
+            end = address + DECODE_WORDS.get(data_type, 1)
+            if end > self.image_size:
+                raise ValueError(f"Адрес {address} вне образа ({self.image_size} слов): {section}")
+            words = groups.setdefault((register_type, self.interval_for(register_type, section)), {})
+            previous_end, sections = words.get(address, (end, set()))
+            sections.add(section)
+            words[address] = (max(previous_end, end), sections)
+
+        reads = []
+        for (register_type, interval), words in sorted(groups.items(), key=lambda item: (item[0][1], item[0][0])):
+            # Слитые диапазоны слов: BOOL одного регистра и перекрытия - один диапазон
+            spans: List[Tuple[int, int]] = []
+            span_sections: List[set] = []
+            for address in sorted(words):
+                end, sections = words[address]
+                if spans and address < spans[-1][1]:
+                    spans[-1] = (spans[-1][0], max(spans[-1][1], end))
+                    span_sections[-1] |= sections
+                else:
+                    spans.append((address, end))
+                    span_sections.append(set(sections))
+
+            index = 0
+            for address, count in partition_spans(spans, self.request_cost):
+                sections = set()
+                while index < len(spans) and spans[index][0] < address + count:
+                    sections |= span_sections[index]
+                    index += 1
+                reads.append(BlockRead(register_type, address, count, interval, sorted(sections)))
+        return reads
+
+
+def print_plan(reads: List[BlockRead], tag_count: int, verbose: bool = False):
+    """Вывести сводку плана опроса"""
+    requests_per_second = sum(1 / read.interval for read in reads)
+    words_per_second = sum(read.count / read.interval for read in reads)
+    print(f"\n📊 {tag_count} регистров карты -> {len(reads)} блочных чтений")
+
+    intervals = sorted({read.interval for read in reads})
+    for interval in intervals:
+        group = [read for read in reads if read.interval == interval]
+        print(f"   ⏱️  {interval:g} с: {len(group)} запросов, {sum(read.count for read in group)} регистров")
+        if verbose:
+            for read in group:
+                print(f"      FC{read.function_code} {read.address:3d}..{read.address + read.count - 1:3d} "
+                      f"({read.count:3d})  {'; '.join(read.sections)}")
+    print(f"   Нагрузка: {requests_per_second:.1f} запросов/с, {words_per_second:.0f} регистров/с")
+
+
+class ModbusClientConnection:
+    """
+    Соединение Modbus TCP с несколькими запросами в полёте
+
+    Ответы сопоставляются с запросами по transaction id.
+    """
+
+    def __init__(self, host: str, port: int, unit_id: int = 1, max_inflight: int = 4, timeout: float = 2.0):
+        self.host = host
+        self.port = port
+        self.unit_id = unit_id
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(max_inflight)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._transaction_id = 0
+        self._writer = None
+        self._reader_task = None
+        self._connecting = None
+
+    async def _ensure_connected(self):
+        if self._writer is not None:
+            return
+        if self._connecting is None:
+            self._connecting = asyncio.get_running_loop().create_task(self._connect())
+        try:
+            await self._connecting
+        finally:
+            self._connecting = None
+
+    async def _connect(self):
+        reader, self._writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+        self._reader_task = asyncio.get_running_loop().create_task(self._read_responses(reader))
+
+    async def _read_responses(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                transaction_id, _, length, _ = struct.unpack('>HHHB', await reader.readexactly(7))
+                pdu = await reader.readexactly(length - 1)
+                future = self._pending.pop(transaction_id, None)
+                if future is not None and not future.done():
+                    future.set_result(pdu)
+        except (asyncio.IncompleteReadError, ConnectionError, OSError) as e:
+            self._fail_pending(ConnectionError(f"Соединение {self.host}:{self.port} разорвано: {e!r}"))
+
+    def _fail_pending(self, error: Exception):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self._pending.clear()
+
+    async def request(self, pdu: bytes) -> bytes:
+        """
+        Отправить PDU и дождаться PDU ответа
+
+        Raises:
+            ConnectionError: соединение разорвано
+            asyncio.TimeoutError: нет ответа за timeout
+            ValueError: ответ-исключение Modbus
+        """
+        async with self._slots:
+            await self._ensure_connected()
+            self._transaction_id = (self._transaction_id + 1) & 0xFFFF
+            transaction_id = self._transaction_id
+            future = asyncio.get_running_loop().create_future()
+            self._pending[transaction_id] = future
+            self._writer.write(struct.pack('>HHHB', transaction_id, 0, len(pdu) + 1, self.unit_id) + pdu)
+            try:
+                response = await asyncio.wait_for(future, self.timeout)
+            finally:
+                self._pending.pop(transaction_id, None)
+
+        if response[0] & 0x80:
+            raise ValueError(f"Исключение Modbus {response[1] if len(response) > 1 else '?'} "
+                             f"на FC{pdu[0]} @{struct.unpack_from('>H', pdu, 1)[0]}")
+        return response
+
+    async def read(self, read: BlockRead) -> 'np.ndarray':
+        """Выполнить блочное чтение и вернуть слова"""
+        response = await self.request(read.to_pdu())
+        # Байт счётчика и сами данные: усечённый кадр не должен дойти до frombuffer
+        if len(response) < 2 + read.count * 2 or response[1] != read.count * 2:
+            raise ValueError(f"Неверная длина ответа на {read!r}: {len(response)} байт PDU")
+        return np.frombuffer(response, dtype='>u2', count=read.count, offset=2)
+
+    async def close(self):
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+            self._reader_task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class PollExecutor:
+    """Исполнитель плана опроса: группа чтений одного периода запускается одновременно"""
+
+    def __init__(self, reads: List[BlockRead], host: str, port: int, connections: int = 2,
+                 max_inflight: int = 4, unit_id: int = 1, timeout: float = 2.0, image_size: int = IMAGE_WORDS):
+        """
+        Args:
+            reads: План опроса (PollPlanner.plan())
+            connections: Размер пула соединений
+            max_inflight: Запросов в полёте на соединение
+        """
+        self.reads = reads
+        self.pool = [ModbusClientConnection(host, port, unit_id, max_inflight, timeout) for _ in range(connections)]
+        self.images = {register_type: np.zeros(image_size, dtype=np.uint16) for register_type in READ_FUNCTION_CODES}
+        self.cycles = 0
+        self.errors = 0
+        self.latencies: deque = deque(maxlen=LATENCY_WINDOW)  # Последние циклы групп, с
+        self._callbacks: List[Callable[[str, 'np.ndarray', List[BlockRead]], None]] = []
+
+    def on_update(self, callback: Callable[[str, 'np.ndarray', List[BlockRead]], None]):
+        """Вызывать callback(тип регистров, образ, выполненные чтения) после каждого цикла группы"""
+        self._callbacks.append(callback)
+
+    async def poll_once(self, reads: List[BlockRead]):
+        """Выполнить чтения одновременно по пулу и обновить образы"""
+        start = time.perf_counter()
+        results = await asyncio.gather(*(
+            self.pool[i % len(self.pool)].read(read) for i, read in enumerate(reads)
+        ), return_exceptions=True)
+        self.latencies.append(time.perf_counter() - start)
+        self.cycles += 1
+
+        updated: Dict[str, List[BlockRead]] = {}
+        for read, words in zip(reads, results):
+            if isinstance(words, BaseException):
+                self.errors += 1
+                continue
+            self.images[read.register_type][read.address:read.address + read.count] = words
+            updated.setdefault(read.register_type, []).append(read)
+        for register_type, done in updated.items():
+            for callback in self._callbacks:
+                callback(register_type, self.images[register_type], done)
+
+    async def _poll_group(self, interval: float, reads: List[BlockRead], cycles: Optional[int]):
+        loop = asyncio.get_running_loop()
+        next_time = loop.time()
+        done = 0
+        while cycles is None or done < cycles:
+            await self.poll_once(reads)
+            done += 1
+            next_time += interval
+            # Пропуск циклов при перегрузке вместо накопления очереди
+            if next_time < loop.time():
+                next_time = loop.time()
+            await asyncio.sleep(next_time - loop.time())
+
+    async def run(self, cycles: Optional[int] = None):
+        """Опрашивать все группы со своими периодами (cycles - циклов на группу, None - бесконечно)"""
+        groups: Dict[float, List[BlockRead]] = {}
+        for read in self.reads:
+            groups.setdefault(read.interval, []).append(read)
+        try:
+            await asyncio.gather(*(self._poll_group(interval, reads, cycles) for interval, reads in groups.items()))
+        finally:
+            await self.close()
+
+    async def close(self):
+        await asyncio.gather(*(connection.close() for connection in self.pool))
+
+
+def parse_rate(spec: str) -> Tuple[str, float]:
+    """Разобрать "ШАБЛОН=СЕКУНДЫ" """
+    pattern, _, seconds = spec.rpartition('=')
+    if not pattern:
+        raise argparse.ArgumentTypeError(f"Ожидается ШАБЛОН=СЕКУНДЫ: {spec}")
+    return pattern, float(seconds)
+
+
+def main():
+    """Главная функция"""
+    arg_parser = argparse.ArgumentParser(description='Планировщик блочного опроса Modbus')
+    arg_parser.add_argument('--db', type=Path, default=DB_PATH, help='Путь к БД регистров')
+    arg_parser.add_argument('--plc', type=int, default=None, help='ID ПЛК в БД')
+    arg_parser.add_argument('--rate', type=parse_rate, action='append', default=[],
+                            metavar='ШАБЛОН=СЕКУНДЫ', help='Период опроса секций по шаблону имени')
+    arg_parser.add_argument('--request-cost', type=int, default=DEFAULT_REQUEST_COST,
+                            help='Стоимость запроса в регистрах (больше - крупнее блоки)')
+    arg_parser.add_argument('--connect', metavar='HOST:PORT', help='Выполнить план на сервере')
+    arg_parser.add_argument('--cycles', type=int, default=10, help='Циклов опроса на группу (с --connect)')
+    arg_parser.add_argument('--connections', type=int, default=2, help='Размер пула соединений')
+    arg_parser.add_argument('-v', '--verbose', action='store_true', help='Список блоков')
+    args = arg_parser.parse_args()
+
+    print("=" * 60)
+    print("Modbus Poll Planner")
+    print("=" * 60)
+
+    if not args.db.exists():
+        print(f"❌ База данных не найдена: {args.db}")
+        return 1
+
+    planner = PollPlanner.from_database(args.db, args.plc, rates=dict(args.rate), request_cost=args.request_cost)
+    reads = planner.plan()
+    print_plan(reads, len(planner.tags), args.verbose)
+
+    if args.connect:
+        host, port = args.connect.rsplit(':', 1)
+        executor = PollExecutor(reads, host, int(port), connections=args.connections)
+        print(f"\n🏭 Опрос {args.connect}...")
+        asyncio.run(executor.run(args.cycles))
+        print(f"   Циклов: {executor.cycles}, ошибок чтения: {executor.errors}")
+        if executor.latencies:  # Пусто при --cycles 0 или если все чтения завершились ошибкой
+            latency_ms = np.array(executor.latencies) * 1000
+            print(f"   Время цикла группы, мс: p50 {np.percentile(latency_ms, 50):.2f}  max {latency_ms.max():.2f}")
+
+    print("=" * 60)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
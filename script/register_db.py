@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Register DB Queries
+====================
+Общие запросы к БД регистров для читателей (modbus_cli.py, export_to_excel.py,
+generate_html_docs.py) и миграции (migrate_from_fc.py). Только стандартная
+библиотека: импорт не тянет за собой разбор ST и словарь описаний.
+
+Использование:
+    from register_db import plc_filter, register_stats_source
+    source = register_stats_source(conn)
+    where, params = plc_filter(conn, 's', site='Карьер')
+    conn.execute(f"SELECT SUM(registers) FROM {source} st JOIN sections s ON st.section_id = s.id"
+                 f" WHERE 1=1{where}", params)
+
+Дата: 2026-10-17
+"""
+
+import sqlite3
+from typing import List, Optional, Tuple
+
+# Счётчики register_stats по registers: заполнение таблицы и замена для БД старой схемы
+REGISTER_STATS_SELECT = """
+        SELECT section_id, data_type_id, COUNT(*) AS registers, SUM(IFNULL(description, '') != '') AS described,
+               SUM(IFNULL(is_reserved, 0) = 1) AS reserved, COUNT(DISTINCT register_address) AS addresses
+        FROM registers GROUP BY section_id, data_type_id
+"""
+
+
+def register_stats_source(conn: sqlite3.Connection) -> str:
+    """
+    Источник счётчиков статистики для FROM (колонки как у register_stats)
+
+    Returns:
+        'register_stats' или, в БД старой схемы (не обновлённой migrate_from_fc.py),
+        подзапрос с той же агрегацией по registers
+    """
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'register_stats'").fetchone():
+        return 'register_stats'
+    return f"({REGISTER_STATS_SELECT})"
+
+
+def plc_filter(conn: sqlite3.Connection, alias: str, plc_id: Optional[int] = None,
+               site: Optional[str] = None) -> Tuple[str, List]:
+    """
+    Условие по ПЛК и/или площадке для таблицы с plc_id (sections, registers, register_gaps)
+
+    Returns:
+        (" AND ..." для WHERE, параметры); пусто, если фильтр не задан или БД без plc_id
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(registers)")}
+    if 'plc_id' not in columns:
+        return "", []
+    where, params = "", []
+    if plc_id is not None:
+        where, params = where + f" AND {alias}.plc_id = ?", params + [plc_id]
+    if site is not None:
+        where, params = where + f" AND {alias}.plc_id IN (SELECT id FROM plcs WHERE site = ?)", params + [site]
+    return where, params
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modbus Register Image Decoder
+==============================
+Векторизованное декодирование образов регистров awModbusInputRegisters /
+awModbusHoldingRegisters (512 слов) в значения переменных по карте из БД.
+
+Использование:
+    from register_decoder import DecodePlan
+    plan = DecodePlan.from_database(DB_PATH, 'input_registers')
+    values = plan.decode(frame)           # {'stBunker[1].rWeight': 12.5, ...}
+    matrix = plan.decode_batch(frames)    # ndarray (N кадров, len(plan.names))
+
+Возможности:
+    - План декодирования строится один раз из таблицы registers
+    - Кадр или пакет из N кадров декодируется несколькими операциями NumPy
+      (по одной выборке на тип данных), без цикла по переменным
+    - Порядок слов как в Functions/Modbus: REAL/TIME - регистр N -> wTag[1],
+      N+1 -> wTag[0] (на little-endian ПЛК регистр N - старшее слово);
+      BOOL - бит iBitIndex регистра
+    - INT знаковый, UINT/WORD беззнаковые, DINT - WORD_TO_DINT одного регистра
+      (как FC_ModbusReadDint)
+
+Требования:
+    pip install numpy
+
+Дата: 2026-10-17
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+# Пути к файлам
+SCRIPT_DIR = Path(__file__).parent
+DB_PATH = SCRIPT_DIR / 'db' / 'modbus_registers.db'
+
+# Размер образа регистров: awModbus*Registers : ARRAY [0..511] OF WORD (GLOBAL.st)
+IMAGE_WORDS = 512
+
+# Регистров на значение при декодировании (BOOL - бит в одном регистре)
+DECODE_WORDS: Dict[str, int] = {
+    'BOOL': 1, 'INT': 1, 'UINT': 1, 'WORD': 1, 'DINT': 1,
+    'REAL': 2, 'TIME': 2,
+}
+
+# Тип NumPy 32-битного значения из пары регистров
+_PAIR_DTYPES = {'REAL': '<f4', 'TIME': '<u4'}
+
+# Тип NumPy значения из одного регистра
+_WORD_DTYPES = {'INT': '<i2', 'UINT': '<u2', 'WORD': '<u2', 'DINT': '<u2'}
+
+
+def load_register_tags(db_path: Path = DB_PATH, register_type: str = 'input_registers',
+                       plc_id: Optional[int] = None) -> List[Tuple[str, str, int, Optional[int]]]:
+    """
+    Прочитать карту одного типа регистров из таблицы registers
+
+    Args:
+        register_type: 'input_registers' или 'holding_registers'
+        plc_id: ПЛК (None - ПЛК по умолчанию, если в БД есть колонка plc_id)
+
+    Returns:
+        (переменная, тип данных, адрес регистра, индекс бита) по возрастанию адреса
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        query = """
+            SELECT r.variable_name, dt.name, r.register_address, r.bit_index
+            FROM registers r
+            JOIN register_types rt ON r.register_type_id = rt.id
+            JOIN data_types dt ON r.data_type_id = dt.id
+            WHERE rt.name = ?
+        """
+        params: list = [register_type]
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(registers)")}
+        if 'plc_id' in columns:
+            query += " AND r.plc_id = ?"
+            params.append(1 if plc_id is None else plc_id)
+        query += " ORDER BY r.register_address, r.bit_index"
+        return conn.execute(query, params).fetchall()
+    finally:
+        conn.close()
+
+
+class DecodePlan:
+    """
+    План декодирования одного образа регистров
+
+    Переменные сгруппированы по типу данных; для каждой группы заранее
+    вычислены индексы слов, биты и номера столбцов результата.
+    """
+
+    def __init__(self, tags: Iterable[Tuple[str, str, int, Optional[int]]], image_size: int = IMAGE_WORDS):
+        """
+        Args:
+            tags: (переменная, тип данных, адрес регистра, индекс бита)
+            image_size: Размер образа в словах
+        """
+        self.image_size = image_size
+        self.names: List[str] = []
+        self.data_types: List[str] = []
+        self.addresses: List[Tuple[int, Optional[int]]] = []
+
+        groups: Dict[str, List[Tuple[int, int, Optional[int]]]] = {}
+        for variable_name, data_type, address, bit_index in tags:
+            if data_type not in DECODE_WORDS:
+                raise ValueError(f"Неподдерживаемый тип данных {data_type}: {variable_name}")
+            if address < 0 or address + DECODE_WORDS[data_type] > image_size:
+                raise ValueError(f"Адрес {address} вне образа ({image_size} слов): {variable_name}")
+            if data_type == 'BOOL' and not (bit_index is not None and 0 <= bit_index <= 15):
+                raise ValueError(f"Неверный индекс бита {bit_index}: {variable_name}")
+
+            groups.setdefault(data_type, []).append((len(self.names), address, bit_index))
+            self.names.append(variable_name)
+            self.data_types.append(data_type)
+            self.addresses.append((address, bit_index))
+
+        # Первый столбец каждой переменной (имена в карте могут повторяться)
+        self.index: Dict[str, int] = {}
+        for column, name in enumerate(self.names):
+            self.index.setdefault(name, column)
+
+        self._groups = []
+        for data_type, entries in sorted(groups.items()):
+            columns = np.array([e[0] for e in entries], dtype=np.intp)
+            words = np.array([e[1] for e in entries], dtype=np.intp)
+            if data_type in _PAIR_DTYPES:
+                # В памяти little-endian младшее слово идёт первым: [N+1, N]
+                words = np.column_stack((words + 1, words)).ravel()
+            bits = None
+            if data_type == 'BOOL':
+                bits = np.array([e[2] for e in entries], dtype=np.uint16)
+            self._groups.append((data_type, columns, words, bits))
+
+    @classmethod
+    def from_database(cls, db_path: Path = DB_PATH, register_type: str = 'input_registers',
+                      plc_id: Optional[int] = None, image_size: int = IMAGE_WORDS) -> 'DecodePlan':
+        """
+        Построить план из таблицы registers
+
+        Args:
+            register_type: 'input_registers' или 'holding_registers'
+            plc_id: ПЛК (None - ПЛК по умолчанию, если в БД есть колонка plc_id)
+        """
+        return cls(load_register_tags(db_path, register_type, plc_id), image_size)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def decode_batch(self, frames) -> 'np.ndarray':
+        """
+        Декодировать пакет кадров
+
+        Args:
+            frames: Массив (N, image_size) или (image_size,) слов
+
+        Returns:
+            float64 массив (N, len(plan)): BOOL как 0/1, TIME в миллисекундах
+        """
+        frames = np.asarray(frames)
+        if frames.ndim == 1:
+            frames = frames[np.newaxis, :]
+        if frames.shape[1] != self.image_size:
+            raise ValueError(f"Ожидается {self.image_size} слов в кадре, получено {frames.shape[1]}")
+        frames = np.ascontiguousarray(frames, dtype='<u2')
+
+        result = np.empty((frames.shape[0], len(self.names)), dtype=np.float64)
+        # Произвольные слова могут давать сигнальные NaN - это не ошибка декодирования
+        with np.errstate(invalid='ignore'):
+            self._decode_into(frames, result)
+        return result
+
+    def _decode_into(self, frames: 'np.ndarray', result: 'np.ndarray'):
+        """Заполнить столбцы результата: одна выборка слов на тип данных"""
+        for data_type, columns, words, bits in self._groups:
+            values = np.take(frames, words, axis=1)
+            if data_type == 'BOOL':
+                result[:, columns] = (values >> bits) & 1
+            elif data_type in _PAIR_DTYPES:
+                result[:, columns] = values.view(_PAIR_DTYPES[data_type])
+            else:
+                result[:, columns] = values.view(_WORD_DTYPES[data_type])
+
+    def decode(self, frame) -> Dict[str, object]:
+        """Декодировать один кадр в словарь {переменная: значение} с типами Python"""
+        row = self.decode_batch(frame)[0]
+        values = {}
+        for name, data_type, value in zip(self.names, self.data_types, row.tolist()):
+            if name in values:
+                continue
+            if data_type == 'BOOL':
+                values[name] = bool(value)
+            elif data_type == 'REAL':
+                values[name] = value
+            else:
+                values[name] = int(value)
+        return values
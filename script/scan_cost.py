@@ -0,0 +1,543 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PLC Scan Cost
+==============
+Статическая оценка времени цикла ПЛК: граф вызовов всех POU проекта по
+синтаксическому дереву st_parser и худший случай времени исполнения каждого
+POU и каждого пути вызовов по таблице стоимостей операций. Позволяет оценить
+влияние изменений на время цикла до загрузки в контроллер.
+
+Использование:
+    python3 scan_cost.py                                  # Все PROGRAM (MAIN), цикл 10 мс
+    python3 scan_cost.py FB_ModbusToSCADA --top 20        # Отдельный POU как корень
+    python3 scan_cost.py --costs costs.json --cycle 5     # Своя таблица стоимостей
+    python3 scan_cost.py --all                            # Худший случай всех POU
+
+Возможности:
+    - Худший случай: IF/CASE - самая дорогая ветка (с проверками условий до неё),
+      FOR - число итераций по константным границам (VAR_GLOBAL CONSTANT),
+      вызовы - стоимость вызываемого POU целиком
+    - Экземпляры ФБ разрешаются по типам переменных, полей структур,
+      массивов и REFERENCE TO; стандартные ФБ (TON, R_TRIG, ...) и встроенные
+      функции - по таблице
+    - Таблица стоимостей (нс) - JSON с переопределениями: операции ('assign',
+      'index', 'fb_call', ...), встроенные функции и стандартные ФБ по имени,
+      а также измеренное время любого POU целиком ("FC_ModbusWriteBool": 45)
+    - Отчёт: время корня и доля цикла, самые дорогие пути вызовов, горячие
+      точки по собственному времени POU и строк исходника, неразрешённые вызовы
+      и циклы без константной границы
+
+Значения по умолчанию ориентировочные (x86 ПЛК); их стоит откалибровать по
+измеренному времени исполнения задачи.
+
+Дата: 2026-10-17
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from st_parser import PROJECT_ROOT, project_files, walk
+from st_runtime import INTEGER_TYPES, REAL_TYPES, STANDARD_FBS, CompileError, Project
+
+# Стоимость операций, нс
+DEFAULT_COSTS: Dict[str, float] = {
+    'assign': 2.0,            # Запись переменной
+    'operator': 1.0,          # Арифметика, логика, сравнение, доступ к биту
+    'divide': 8.0,            # '/', MOD
+    'power': 40.0,            # '**'
+    'index': 2.0,             # Индекс массива (с проверкой границ)
+    'deref': 1.0,             # ^ и REFERENCE TO
+    'branch': 1.0,            # Проверка условия IF/ELSIF, метки CASE
+    'loop_iteration': 2.0,    # Инкремент и проверка счётчика FOR
+    'call': 10.0,             # Вызов FUNCTION
+    'fb_call': 12.0,          # Вызов экземпляра ФБ
+    'argument': 2.0,          # Передача параметра (:= или =>)
+    'builtin': 5.0,           # Встроенная функция без отдельной стоимости
+    'loop_bound': 100,        # Итераций для цикла без константной границы
+    # Встроенные функции
+    'SQRT': 20.0, 'EXP': 40.0, 'LN': 40.0, 'LOG': 40.0, 'SIN': 40.0, 'COS': 40.0, 'TAN': 40.0,
+    'ASIN': 50.0, 'ACOS': 50.0, 'ATAN': 50.0, 'EXPT': 60.0,
+    'ADR': 1.0, 'SIZEOF': 0.0, 'MEMCPY': 50.0, 'MEMSET': 40.0, '__ISVALIDREF': 1.0,
+    # Стандартные ФБ (вызов целиком)
+    'TON': 40.0, 'TOF': 40.0, 'TP': 40.0, 'BLINK': 45.0, 'R_TRIG': 8.0, 'F_TRIG': 8.0,
+    'CTU': 12.0, 'CTD': 12.0, 'RS': 6.0, 'SR': 6.0,
+}
+
+_BUILTINS = {'ABS', 'MIN', 'MAX', 'LIMIT', 'SEL', 'MUX', 'TRUNC', 'SHL', 'SHR', 'ROL', 'ROR',
+             'SQRT', 'EXP', 'LN', 'LOG', 'SIN', 'COS', 'TAN', 'ASIN', 'ACOS', 'ATAN', 'EXPT',
+             'ADR', 'SIZEOF', 'MEMCPY', 'MEMSET', 'MOVE', '__ISVALIDREF'}
+
+
+def load_costs(path: Optional[Path] = None) -> Dict[str, float]:
+    """Таблица стоимостей: DEFAULT_COSTS с переопределениями из JSON (имена без учёта регистра)"""
+    costs = {key.lower(): value for key, value in DEFAULT_COSTS.items()}
+    if path is not None:
+        costs.update({key.lower(): float(value) for key, value in json.loads(Path(path).read_text('utf-8')).items()})
+    return costs
+
+
+class Cost:
+    """Стоимость фрагмента кода в худшем случае"""
+
+    __slots__ = ('total', 'own', 'calls', 'lines')
+
+    def __init__(self, own: float = 0.0):
+        self.total = own                           # С вызываемыми POU, нс
+        self.own = own                             # Без вызываемых POU, нс
+        self.calls: Counter = Counter()            # (POU, метка вызова) -> число вызовов
+        self.lines: Counter = Counter()            # Строка -> собственная стоимость, нс
+
+    def add(self, other: 'Cost', times: float = 1) -> 'Cost':
+        self.total += other.total * times
+        self.own += other.own * times
+        for key, count in other.calls.items():
+            self.calls[key] += count * times
+        for line, cost in other.lines.items():
+            self.lines[line] += cost * times
+        return self
+
+    def charge(self, cost: float, line: Optional[int]) -> 'Cost':
+        """Добавить собственную стоимость строки"""
+        self.total += cost
+        self.own += cost
+        if line is not None and cost:
+            self.lines[line] += cost
+        return self
+
+
+class PouCost:
+    """Худший случай одного вызова POU"""
+
+    def __init__(self, name: str, kind: str, source: str, cost: Cost, measured: bool = False):
+        self.name = name
+        self.kind = kind
+        self.source = source
+        self.cost = cost
+        self.measured = measured  # Время задано в таблице стоимостей
+
+    @property
+    def total(self) -> float:
+        return self.cost.total
+
+
+class ScanCostAnalyzer:
+    """Граф вызовов и худший случай времени исполнения POU проекта"""
+
+    def __init__(self, files: Iterable[Tuple[str, tuple]], costs: Optional[Dict[str, float]] = None):
+        files = list(files)
+        self.project = Project(files)
+        self.costs = costs or load_costs()
+        self.sources: Dict[str, str] = {}
+        for path, declarations in files:
+            for declaration in declarations:
+                if declaration[0] == 'pou':
+                    self.sources.setdefault(declaration[2].lower(), path)
+        self.results: Dict[str, PouCost] = {}
+        self.unresolved: Counter = Counter()   # (POU, строка, вызов)
+        self.unbounded: List[Tuple[str, int]] = []
+        self._stack: List[str] = []
+
+    @classmethod
+    def load(cls, root: Path = PROJECT_ROOT, costs: Optional[Dict[str, float]] = None) -> 'ScanCostAnalyzer':
+        return cls(project_files(root), costs)
+
+    def roots(self) -> List[str]:
+        """Корни графа: все PROGRAM (задачи ПЛК)"""
+        return [declaration[2] for declaration in self.project.pous.values() if declaration[1] == 'PROGRAM']
+
+    # ------------------------------------------------------------------ POU
+
+    def pou(self, name: str) -> PouCost:
+        """Худший случай одного вызова POU (результат кэшируется)"""
+        key = name.lower()
+        if key in self.results:
+            return self.results[key]
+        declaration = self.project.pous.get(key)
+        if declaration is None:
+            raise KeyError(f"POU не найден: {name}")
+        _, kind, pou_name, _, _, _, body, _ = declaration
+        if key in self.costs:
+            result = PouCost(pou_name, kind, self.sources[key], Cost(self.costs[key]), measured=True)
+        elif key in (name.lower() for name in self._stack):
+            raise CompileError(f"Рекурсивный вызов: {' → '.join(self._stack + [pou_name])}")
+        else:
+            self._stack.append(pou_name)
+            try:
+                scope = self._variables(declaration)
+                result = PouCost(pou_name, kind, self.sources[key], self._block(body, scope, key))
+            finally:
+                self._stack.pop()
+        self.results[key] = result
+        return result
+
+    def _variables(self, declaration: tuple) -> Dict[str, tuple]:
+        """Переменные POU (с унаследованными через EXTENDS): key -> typespec"""
+        scope = {}
+        while declaration is not None:
+            for _, _, fields in declaration[5]:
+                for name, typespec, _, _ in fields:
+                    scope.setdefault(name.lower(), typespec)
+            base = declaration[3]
+            declaration = self.project.pous.get(base.lower()) if base else None
+        return scope
+
+    # ------------------------------------------------------------------ типы
+
+    def _resolve(self, typespec: Optional[tuple]) -> Optional[tuple]:
+        """Тип без псевдонимов и REFERENCE TO"""
+        while typespec is not None:
+            if typespec[0] == 'ref':
+                typespec = typespec[1]
+            elif typespec[0] == 'named' and typespec[1].lower() in self.project.types \
+                    and self.project.types[typespec[1].lower()][2][0] == 'alias':
+                typespec = self.project.types[typespec[1].lower()][2][1]
+            else:
+                return typespec
+        return None
+
+    def _member(self, typespec: Optional[tuple], name: str) -> Optional[tuple]:
+        """Тип поля STRUCT/UNION/ФБ"""
+        typespec = self._resolve(typespec)
+        if typespec is None or typespec[0] != 'named':
+            return None
+        key = typespec[1].lower()
+        while key:
+            if key in self.project.pous:
+                declaration = self.project.pous[key]
+                fields = [field for _, _, section in declaration[5] for field in section]
+                base = declaration[3]
+            elif key in self.project.types:
+                spec = self.project.types[key][2]
+                if spec[0] not in ('struct', 'union'):
+                    return None
+                fields = spec[2] if spec[0] == 'struct' else spec[1]
+                base = spec[1] if spec[0] == 'struct' else None
+            else:
+                return None
+            for field_name, field_type, _, _ in fields:
+                if field_name.lower() == name.lower():
+                    return field_type
+            key = base.lower() if base else None
+        return None
+
+    def _type_of(self, expression: tuple, scope: Dict[str, tuple]) -> Optional[tuple]:
+        """Тип выражения-пути к переменной (name, member, index, deref)"""
+        kind = expression[0]
+        if kind == 'name':
+            key = expression[1].lower()
+            if key in scope:
+                return scope[key]
+            entry = self.project.globals.get(key)
+            return entry[0][1] if entry else None
+        if kind == 'member':
+            return self._member(self._type_of(expression[1], scope), expression[2])
+        typespec = self._resolve(self._type_of(expression[1], scope)) if kind in ('index', 'deref') else None
+        if typespec is not None and typespec[0] == ('array' if kind == 'index' else 'ptr'):
+            return typespec[2] if kind == 'index' else typespec[1]
+        return None
+
+    def _fb_type(self, typespec: Optional[tuple]) -> Optional[str]:
+        """Имя типа ФБ (POU или стандартного) или None"""
+        typespec = self._resolve(typespec)
+        if typespec is None or typespec[0] != 'named':
+            return None
+        key = typespec[1].lower()
+        if key in STANDARD_FBS:
+            return typespec[1].upper()
+        declaration = self.project.pous.get(key)
+        if declaration is not None and declaration[1] in ('FUNCTION_BLOCK', 'PROGRAM'):
+            return declaration[2]
+        return None
+
+    # ------------------------------------------------------------------ стоимость
+
+    def _block(self, body: tuple, scope: Dict[str, tuple], pou: str) -> Cost:
+        cost = Cost()
+        for statement in body:
+            cost.add(self._statement(statement, scope, pou))
+        return cost
+
+    def _statement(self, statement: tuple, scope: Dict[str, tuple], pou: str) -> Cost:
+        kind, line = statement[0], statement[1]
+        costs = self.costs
+        if kind == 'assign':
+            cost = self._expression(statement[3], scope, pou, line)
+            cost.add(self._expression(statement[2], scope, pou, line))
+            return cost.charge(costs['assign'], line)
+        if kind == 'call':
+            return self._expression(statement[2], scope, pou, line)
+        if kind == 'if':
+            # Худшая ветка: проверки всех условий до неё + тело
+            worst, conditions = None, Cost()
+            for condition, body in statement[2]:
+                conditions.add(self._expression(condition, scope, pou, line)).charge(costs['branch'], line)
+                branch = Cost().add(conditions).add(self._block(body, scope, pou))
+                worst = branch if worst is None or branch.total > worst.total else worst
+            otherwise = Cost().add(conditions).add(self._block(statement[3] or (), scope, pou))
+            return otherwise if otherwise.total > worst.total else worst
+        if kind == 'case':
+            selector = self._expression(statement[2], scope, pou, line)
+            labels = sum(len(labels) for labels, _ in statement[3])
+            selector.charge(labels * costs['branch'], line)
+            bodies = [self._block(body, scope, pou) for _, body in statement[3]]
+            bodies.append(self._block(statement[4] or (), scope, pou))
+            return selector.add(max(bodies, key=lambda body: body.total))
+        if kind == 'for':
+            _, _, variable, start, end, step, body = statement
+            cost = self._expression(start, scope, pou, line).add(self._expression(end, scope, pou, line))
+            cost.charge(costs['assign'], line)
+            iterations = self._iterations(start, end, step, scope)
+            if iterations is None:
+                iterations = int(costs['loop_bound'])
+                self.unbounded.append((pou, line))
+            iteration = self._block(body, scope, pou).charge(costs['loop_iteration'], line)
+            return cost.add(iteration, iterations)
+        if kind in ('while', 'repeat'):
+            condition, body = (statement[2], statement[3]) if kind == 'while' else (statement[3], statement[2])
+            self.unbounded.append((pou, line))
+            iteration = self._block(body, scope, pou).add(self._expression(condition, scope, pou, line))
+            return Cost().add(iteration.charge(costs['branch'], line), int(costs['loop_bound']))
+        return Cost()  # EXIT, CONTINUE, RETURN: в худшем случае не сокращают цикл
+
+    def _iterations(self, start: tuple, end: tuple, step: Optional[tuple], scope: Dict[str, tuple]) -> Optional[int]:
+        bounds = (start, end) + ((step,) if step is not None else ())
+        if any(node[0] == 'name' and node[1].lower() in scope for bound in bounds for node in walk(bound)):
+            return None  # Локальная переменная, даже если совпадает с константой VAR_GLOBAL
+        try:
+            first, last = self.project.constant(start), self.project.constant(end)
+            increment = self.project.constant(step) if step is not None else 1
+        except (CompileError, KeyError):
+            return None
+        if not increment:
+            return None
+        return max((last - first) // increment + 1, 0)
+
+    def _expression(self, expression: tuple, scope: Dict[str, tuple], pou: str, line: int) -> Cost:
+        kind = expression[0]
+        costs = self.costs
+        if kind in ('lit', 'name', 'array_init', 'struct_init'):
+            return Cost()
+        if kind == 'member':
+            return self._expression(expression[1], scope, pou, line)
+        if kind == 'bit':
+            return self._expression(expression[1], scope, pou, line).charge(costs['operator'], line)
+        if kind == 'deref':
+            return self._expression(expression[1], scope, pou, line).charge(costs['deref'], line)
+        if kind == 'index':
+            cost = self._expression(expression[1], scope, pou, line)
+            for index in expression[2]:
+                cost.add(self._expression(index, scope, pou, line)).charge(costs['index'], line)
+            return cost
+        if kind == 'unary':
+            return self._expression(expression[2], scope, pou, line).charge(costs['operator'], line)
+        if kind == 'binary':
+            cost = self._expression(expression[2], scope, pou, line)
+            cost.add(self._expression(expression[3], scope, pou, line))
+            operator = {'/': 'divide', 'MOD': 'divide', '**': 'power'}.get(expression[1], 'operator')
+            return cost.charge(costs[operator], line)
+        if kind == 'call':
+            return self._call(expression, scope, pou, line)
+        return Cost()
+
+    def _call(self, call: tuple, scope: Dict[str, tuple], pou: str, line: int) -> Cost:
+        _, callee, arguments = call
+        costs = self.costs
+        cost = Cost()
+        for _, value, _ in arguments:
+            if value is not None:
+                cost.add(self._expression(value, scope, pou, line))
+            cost.charge(costs['argument'], line)
+
+        if callee[0] == 'name' and callee[1].lower() not in scope:
+            name = callee[1]
+            upper, key = name.upper(), name.lower()
+            declaration = self.project.pous.get(key)
+            if declaration is not None and declaration[1] == 'FUNCTION':
+                return self._invoke(cost, declaration[2], declaration[2], 'call', line)
+            if upper in _BUILTINS or '_TO_' in upper or upper.startswith('TO_') \
+                    or upper in INTEGER_TYPES or upper in REAL_TYPES:
+                return cost.charge(costs.get(key, costs['builtin']), line)
+
+        # Экземпляр ФБ: переменная, поле структуры, элемент массива
+        cost.add(self._expression(callee, scope, pou, line))
+        fb_type = self._fb_type(self._type_of(callee, scope))
+        if fb_type is None:
+            self.unresolved[(self.project.pous[pou][2], line, _label(callee))] += 1
+            return cost.charge(costs['call'], line)
+        if fb_type.lower() in STANDARD_FBS:
+            cost.calls[(fb_type, _label(callee))] += 1
+            standard = costs.get(fb_type.lower(), costs['fb_call'])
+            cost.total += standard
+            return cost
+        return self._invoke(cost, fb_type, _label(callee), 'fb_call', line)
+
+    def _invoke(self, cost: Cost, name: str, label: str, overhead: str, line: int) -> Cost:
+        cost.charge(self.costs[overhead], line)
+        cost.calls[(name, label)] += 1
+        cost.total += self.pou(name).total
+        return cost
+
+    # ------------------------------------------------------------------ отчёт
+
+    def call_paths(self, root: str, limit: Optional[int] = None) -> List[Tuple[Tuple[str, ...], float, float]]:
+        """
+        Пути вызовов от корня: (метки пути, число вызовов за цикл, время за цикл, нс),
+        по убыванию времени
+        """
+        paths = []
+        stack = [((self.pou(root).name,), 1.0, self.pou(root))]
+        while stack:
+            path, count, result = stack.pop()
+            if result is None or result.measured:
+                continue
+            for (name, label), calls in result.cost.calls.items():
+                callee = self.results.get(name.lower())
+                total = callee.total if callee is not None else self.costs.get(name.lower(), self.costs['fb_call'])
+                label = label if label == name else f"{label}: {name}"
+                paths.append((path + (label,), count * calls, count * calls * total))
+                stack.append((path + (label,), count * calls, callee))
+        paths.sort(key=lambda item: -item[2])
+        return paths[:limit] if limit else paths
+
+    def executions(self, root: str) -> Counter:
+        """Число вызовов каждого POU за один вызов корня"""
+        counts = Counter({self.pou(root).name: 1.0})
+        order = []
+        seen = set()
+
+        def visit(name: str):
+            if name.lower() in seen:
+                return
+            seen.add(name.lower())
+            result = self.results.get(name.lower())
+            if result is not None and not result.measured:
+                for callee, _ in result.cost.calls:
+                    visit(callee)
+            order.append(name)
+
+        visit(self.pou(root).name)
+        for name in reversed(order):  # Топологический порядок: вызывающий раньше вызываемого
+            result = self.results.get(name.lower())
+            if result is None or result.measured:
+                continue
+            for (callee, _), calls in result.cost.calls.items():
+                counts[callee] += counts[name] * calls
+        return counts
+
+    def hot_spots(self, root: str) -> Tuple[List[Tuple[str, float, float]], List[Tuple[str, int, float]]]:
+        """
+        Собственное время за цикл: POU (имя, вызовов, нс) и строки (файл, строка, нс),
+        по убыванию
+        """
+        counts = self.executions(root)
+        pous, lines = [], Counter()
+        for name, count in counts.items():
+            result = self.results.get(name.lower())
+            if result is None:
+                pous.append((name, count, count * self.costs.get(name.lower(), self.costs['fb_call'])))
+                continue
+            pous.append((result.name, count, count * result.cost.own))
+            if not result.measured:
+                for line, cost in result.cost.lines.items():
+                    lines[(result.source, line)] += count * cost
+        pous.sort(key=lambda item: -item[2])
+        return pous, sorted(((path, line, cost) for (path, line), cost in lines.items()), key=lambda item: -item[2])
+
+
+def _label(expression: tuple) -> str:
+    """Текст пути вызова: индексы сворачиваются в []"""
+    kind = expression[0]
+    if kind == 'name':
+        return expression[1]
+    if kind == 'member':
+        return f"{_label(expression[1])}.{expression[2]}"
+    if kind == 'index':
+        return f"{_label(expression[1])}[]"
+    if kind == 'deref':
+        return f"{_label(expression[1])}^"
+    return '?'
+
+
+def _format_ns(value: float) -> str:
+    return f"{value / 1000:,.1f} мкс" if value >= 1000 else f"{value:,.0f} нс"
+
+
+def main():
+    """Главная функция"""
+    arg_parser = argparse.ArgumentParser(description='Статическая оценка времени цикла ПЛК')
+    arg_parser.add_argument('roots', nargs='*', help='Корневые POU (по умолчанию - все PROGRAM)')
+    arg_parser.add_argument('--costs', type=Path, help='JSON с переопределениями стоимостей, нс')
+    arg_parser.add_argument('--cycle', type=float, default=10.0, help='Время цикла задачи, мс')
+    arg_parser.add_argument('--top', type=int, default=15, help='Строк в каждом разделе отчёта')
+    arg_parser.add_argument('--all', action='store_true', help='Худший случай всех POU проекта')
+    args = arg_parser.parse_args()
+
+    print("=" * 60)
+    print("PLC Scan Cost")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    analyzer = ScanCostAnalyzer.load(costs=load_costs(args.costs))
+    print(f"\n📄 Разбор проекта: {len(analyzer.project.pous)} POU за {(time.perf_counter() - start) * 1000:.0f} мс")
+
+    failed = 0
+    for key in sorted(analyzer.project.pous):
+        try:
+            analyzer.pou(key)
+        except CompileError as e:
+            failed += 1
+            print(f"❌ {e}")
+
+    for root in args.roots or analyzer.roots():
+        try:
+            result = analyzer.pou(root)
+        except KeyError as e:
+            print(f"❌ {e.args[0]}")
+            return 1
+        share = result.total / (args.cycle * 1e6)
+        print(f"\n🏭 {result.name}: худший случай {_format_ns(result.total)} ({share:.2%} цикла {args.cycle:g} мс), "
+              f"собственное время {_format_ns(result.cost.own)}")
+
+        print("\n📊 Самые дорогие пути вызовов:")
+        for path, count, cost in analyzer.call_paths(root, args.top):
+            times = f" ×{count:g}" if count != 1 else ""
+            print(f"   {_format_ns(cost):>12} {cost / result.total:6.1%}  {' → '.join(path)}{times}")
+
+        pous, lines = analyzer.hot_spots(root)
+        print("\n🔎 Горячие точки (собственное время за цикл):")
+        print(f"   {'POU':<34}{'вызовов':>9}{'время':>14}{'доля':>8}")
+        for name, count, cost in pous[:args.top]:
+            print(f"   {name:<34}{count:>9g}{_format_ns(cost):>14}{cost / result.total:>8.1%}")
+        print()
+        for path, line, cost in lines[:args.top]:
+            location = f"{os.path.relpath(path, PROJECT_ROOT)}:{line}"
+            print(f"   {location:<43}{_format_ns(cost):>14}{cost / result.total:>8.1%}")
+
+    if args.all:
+        print(f"\n📊 Худший случай вызова POU:")
+        for result in sorted(analyzer.results.values(), key=lambda item: -item.total):
+            mark = ' (из таблицы)' if result.measured else ''
+            print(f"   {result.name:<34}{result.kind:<16}{_format_ns(result.total):>14}{mark}")
+
+    if analyzer.unbounded:
+        print(f"\n⚠️  Циклы без константной границы (по {int(analyzer.costs['loop_bound'])} итераций):")
+        for pou, line in analyzer.unbounded[:args.top]:
+            print(f"   {analyzer.project.pous[pou][2]}:{line}")
+    if analyzer.unresolved:
+        print(f"\n⚠️  Неразрешённые вызовы ({sum(analyzer.unresolved.values())}), учтены как 'call':")
+        for (pou, line, label), count in analyzer.unresolved.most_common(args.top):
+            print(f"   {pou}:{line} {label}" + (f" ×{count}" if count > 1 else ""))
+
+    print("=" * 60)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
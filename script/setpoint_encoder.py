@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modbus Setpoint Encoder
+========================
+Кодирование группы уставок {переменная: значение} в минимальный набор
+запросов записи holding-регистров.
+
+Использование:
+    from setpoint_encoder import SetpointEncoder
+    encoder = SetpointEncoder.from_database(DB_PATH)
+    requests = encoder.encode({'MOTOR_CONVEYOR_CURRENT_POINTS.LL_Value': 3.8, ...}, current=image)
+    for request in requests:
+        send(request.to_pdu())
+
+Возможности:
+    - Значение кодируется по типу данных из БД с порядком слов как в
+      FC_ModbusWriteReal/FC_ModbusWriteTime (регистр N <- wTag[1], N+1 <- wTag[0])
+    - Соседние регистры объединяются в запросы FC 16 (до 123 регистров)
+    - BOOL биты одного регистра складываются в одну запись слова: с текущим
+      образом регистров - в общий диапазон, без него - Mask Write (FC 22)
+    - Промежутки между диапазонами до max_gap регистров заполняются
+      текущими значениями, чтобы сократить число запросов
+
+Требования:
+    pip install numpy  # Для register_decoder (карта из БД); сам модуль numpy не использует,
+                       # current - любая последовательность слов (список, массив numpy)
+
+Дата: 2026-10-17
+"""
+
+import struct
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from register_decoder import DB_PATH, IMAGE_WORDS, load_register_tags
+
+# Максимум регистров в одном запросе Write Multiple Registers (FC 16)
+MAX_WRITE_REGISTERS = 123
+
+# Коды функций Modbus
+FC_WRITE_SINGLE_REGISTER = 6
+FC_WRITE_MULTIPLE_REGISTERS = 16
+FC_MASK_WRITE_REGISTER = 22
+
+# Допустимые диапазоны значений, записываемых в один регистр
+_WORD_RANGES = {
+    'INT': (-32768, 32767),
+    'UINT': (0, 65535),
+    'WORD': (0, 65535),
+    'DINT': (0, 65535),  # FC_ModbusReadDint читает один регистр (WORD_TO_DINT)
+}
+
+
+class WriteRequest:
+    """Один запрос записи holding-регистров"""
+
+    def __init__(self, function_code: int, address: int, words: Optional[List[int]] = None,
+                 and_mask: int = 0xFFFF, or_mask: int = 0):
+        self.function_code = function_code
+        self.address = address
+        self.words = words or []
+        self.and_mask = and_mask
+        self.or_mask = or_mask
+
+    def to_pdu(self) -> bytes:
+        """PDU запроса Modbus (без заголовка MBAP/адреса устройства)"""
+        if self.function_code == FC_WRITE_SINGLE_REGISTER:
+            return struct.pack('>BHH', self.function_code, self.address, self.words[0])
+        if self.function_code == FC_MASK_WRITE_REGISTER:
+            return struct.pack('>BHHH', self.function_code, self.address, self.and_mask, self.or_mask)
+        count = len(self.words)
+        return struct.pack(f'>BHHB{count}H', self.function_code, self.address, count, count * 2, *self.words)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, WriteRequest) and self.__dict__ == other.__dict__
+
+    def __repr__(self) -> str:
+        if self.function_code == FC_MASK_WRITE_REGISTER:
+            return f"WriteRequest(FC22 @{self.address} and=0x{self.and_mask:04X} or=0x{self.or_mask:04X})"
+        return f"WriteRequest(FC{self.function_code} @{self.address} x{len(self.words)})"
+
+
+def encode_value(data_type: str, value) -> List[int]:
+    """
+    Закодировать значение в слова регистров (в порядке адресов N, N+1)
+
+    Raises:
+        ValueError: значение вне диапазона типа или тип не поддерживается
+    """
+    if data_type == 'REAL':
+        low, high = struct.unpack('<HH', struct.pack('<f', float(value)))  # wTag[0], wTag[1]
+        return [high, low]
+    if data_type == 'TIME':
+        if isinstance(value, timedelta):
+            value = round(value.total_seconds() * 1000)
+        if int(value) != value or not 0 <= value <= 0xFFFFFFFF:
+            raise ValueError(f"TIME вне диапазона: {value}")
+        low, high = struct.unpack('<HH', struct.pack('<I', int(value)))
+        return [high, low]
+    if data_type in _WORD_RANGES:
+        low_limit, high_limit = _WORD_RANGES[data_type]
+        if int(value) != value or not low_limit <= value <= high_limit:
+            raise ValueError(f"{data_type} вне диапазона {low_limit}..{high_limit}: {value}")
+        return [int(value) & 0xFFFF]
+    raise ValueError(f"Неподдерживаемый тип данных: {data_type}")
+
+
+class SetpointEncoder:
+    """Кодировщик уставок в запросы записи holding-регистров"""
+
+    def __init__(self, tags: Iterable[Tuple[str, str, int, Optional[int]]], image_size: int = IMAGE_WORDS):
+        """
+        Args:
+            tags: (переменная, тип данных, адрес регистра, индекс бита) holding-регистров
+            image_size: Размер образа holding-регистров (слов); адреса за ним не пишутся
+        """
+        self.image_size = image_size
+        self.tags: Dict[str, List[Tuple[str, int, Optional[int]]]] = {}
+        for variable_name, data_type, address, bit_index in tags:
+            self.tags.setdefault(variable_name, []).append((data_type, address, bit_index))
+
+    @classmethod
+    def from_database(cls, db_path: Path = DB_PATH, plc_id: Optional[int] = None) -> 'SetpointEncoder':
+        """Построить кодировщик по карте holding-регистров из БД"""
+        return cls(load_register_tags(db_path, 'holding_registers', plc_id))
+
+    def encode_words(self, values: Dict[str, object]) -> Tuple[Dict[int, List[int]], Dict[int, Tuple[int, int]]]:
+        """
+        Закодировать значения в слова
+
+        Returns:
+            (начальный адрес -> слова значения, адрес -> (маска битов, значения битов) для BOOL)
+
+        Raises:
+            KeyError: переменной нет в карте holding-регистров
+            ValueError: значение не помещается в тип или адрес вне образа регистров
+        """
+        unknown = sorted(name for name in values if name not in self.tags)
+        if unknown:
+            raise KeyError(f"Переменные не найдены в holding-регистрах: {', '.join(unknown)}")
+
+        words: Dict[int, List[int]] = {}
+        bits: Dict[int, Tuple[int, int]] = {}
+        for name, value in values.items():
+            for data_type, address, bit_index in self.tags[name]:
+                if data_type == 'BOOL':
+                    mask, bit_values = bits.get(address, (0, 0))
+                    bit = 1 << bit_index
+                    bits[address] = (mask | bit, (bit_values | bit) if value else (bit_values & ~bit))
+                    continue
+                words[address] = encode_value(data_type, value)
+        outside = sorted(address for address, value_words in words.items()
+                         if address < 0 or address + len(value_words) > self.image_size)
+        outside += sorted(address for address in bits if not 0 <= address < self.image_size)
+        if outside:
+            raise ValueError(f"Адреса вне образа регистров ({self.image_size} слов): "
+                             f"{', '.join(map(str, outside))}")
+        return words, bits
+
+    def encode(self, values: Dict[str, object], current=None, max_gap: int = 0) -> List[WriteRequest]:
+        """
+        Закодировать группу уставок в минимальный набор запросов записи
+
+        Args:
+            values: {переменная: значение}
+            current: Текущий образ holding-регистров (последний опрос); нужен,
+                чтобы сохранить остальные биты слов с BOOL и заполнить промежутки
+            max_gap: Максимальный промежуток (в регистрах), заполняемый текущими
+                значениями для объединения диапазонов (только с current)
+
+        Returns:
+            Запросы FC 6/16 по возрастанию адреса, затем FC 22 для битов без образа
+
+        Raises:
+            ValueError: образ current короче image_size (см. также encode_words)
+        """
+        if current is not None and len(current) < self.image_size:
+            raise ValueError(f"Образ регистров короче {self.image_size} слов: {len(current)}")
+        words, bits = self.encode_words(values)
+        requests = []
+
+        # Слово, которое уже пишется значением: биты накладываются на него
+        # (как FC 22 после FC 6/16 без образа), а не пишутся отдельно
+        covered = {start + offset: (start, offset)
+                   for start, value_words in words.items() for offset in range(len(value_words))}
+        for address, (mask, bit_values) in sorted(bits.items()):
+            if current is None:
+                requests.append(WriteRequest(FC_MASK_WRITE_REGISTER, address,
+                                             and_mask=~mask & 0xFFFF, or_mask=bit_values))
+            elif address in covered:
+                start, offset = covered[address]
+                words[start][offset] = (words[start][offset] & ~mask & 0xFFFF) | bit_values
+            else:
+                words[address] = [(int(current[address]) & ~mask & 0xFFFF) | bit_values]
+
+        # Значения не разрезаются между запросами: REAL/TIME пишутся целиком
+        ranges: List[List[int]] = []  # [начальный адрес, слово, слово, ...]
+        end = None  # Адрес после последнего слова текущего диапазона
+        for address in sorted(words):
+            value_words = words[address]
+            gap = address - end if end is not None else None
+            if gap is not None and (gap == 0 or (current is not None and 0 < gap <= max_gap)) \
+                    and len(ranges[-1]) - 1 + gap + len(value_words) <= MAX_WRITE_REGISTERS:
+                ranges[-1].extend(int(current[a]) for a in range(end, address))
+                ranges[-1].extend(value_words)
+            else:
+                ranges.append([address] + value_words)
+            end = address + len(value_words)
+
+        word_requests = []
+        for start, *range_words in ranges:
+            if len(range_words) == 1:
+                word_requests.append(WriteRequest(FC_WRITE_SINGLE_REGISTER, start, range_words))
+            else:
+                word_requests.append(WriteRequest(FC_WRITE_MULTIPLE_REGISTERS, start, range_words))
+        return word_requests + requests
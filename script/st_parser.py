@@ -0,0 +1,760 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ST Parser
+==========
+Разбор Structured Text (IEC 61131-3) проекта в синтаксическое дерево:
+объявления TYPE (STRUCT, UNION, перечисления), FUNCTION_BLOCK/FUNCTION/PROGRAM
+с секциями VAR и телами, VAR_GLOBAL.
+
+Использование:
+    python3 st_parser.py                        # Все .st проекта через кэш, статистика
+    python3 st_parser.py --no-cache --workers 1 # Разобрать всё заново в одном процессе
+    python3 st_parser.py Library/FB_UniversalSignal.st --dump
+
+Возможности:
+    - Лексер на одном регулярном выражении: литералы времени (T#1h2m),
+      типизированные (INT#5, 16#FF, E_State#IDLE), строки, комментарии //, (* *)
+    - Рекурсивный спуск с приоритетами операторов IEC; IF/CASE/FOR/WHILE/REPEAT,
+      вызовы ФБ и функций с := и =>, доступ к битам (wTag.3), ^, массивы
+    - Дерево - вложенные кортежи из str/int/float/bool/None (сериализуется
+      marshal/json), номера строк у операторов и объявлений
+    - SourceTree - общий слой для всех инструментов (st_runtime, scan_cost, ...):
+      деревья всех файлов DataTypes/, Library/, Functions/, POUs/ в кэше на диске
+      (db/st_ast_cache.marshal). Файл с неизменными mtime и размером берётся из
+      кэша без чтения, с изменённым - сверяется SHA-256; изменённые файлы
+      разбираются в пуле процессов. Кэш сбрасывается при изменении st_parser.py
+      или версии Python
+
+Дерево:
+    Файл - список объявлений:
+        ('type', name, spec, line)
+            spec: ('struct', extends, fields) | ('union', fields) |
+                  ('enum', members, base) | ('alias', typespec, init)
+        ('globals', qualifiers, fields, line)
+        ('pou', kind, name, extends, return_type, sections, body, line)
+            sections: ((section, qualifiers, fields), ...)
+        fields: ((name, typespec, init, line), ...)
+    typespec: ('named', name) | ('array', ((lo, hi), ...), elem) |
+              ('ref', elem) | ('ptr', elem) | ('string', size) | ('enum', members, base)
+    Операторы (второй элемент - номер строки):
+        ('assign', line, target, expr) | ('call', line, call) |
+        ('if', line, ((cond, body), ...), else_body) |
+        ('case', line, selector, ((labels, body), ...), else_body) |
+        ('for', line, var, start, end, step, body) | ('while', line, cond, body) |
+        ('repeat', line, body, cond) | ('exit', line) | ('continue', line) | ('return', line)
+    Выражения:
+        ('lit', value, kind) | ('name', name) | ('member', obj, name) | ('bit', obj, n) |
+        ('index', obj, (expr, ...)) | ('deref', obj) | ('call', callee, ((name, expr | None, output), ...)) |
+        ('unary', op, expr) | ('binary', op, left, right) |
+        ('array_init', ((count, init), ...)) | ('struct_init', ((name, init), ...))
+
+Дата: 2026-10-17
+"""
+
+import bisect
+import gc
+import hashlib
+import marshal
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+CACHE_PATH = SCRIPT_DIR / 'db' / 'st_ast_cache.marshal'
+
+# Начиная с этого числа изменённых файлов разбор идёт в пуле процессов
+PARALLEL_THRESHOLD = 16
+
+# Каталоги с исходниками ST (относительно корня проекта)
+SOURCE_DIRS = ('DataTypes', 'Library', 'Functions', 'POUs')
+
+_TOKEN_RE = re.compile(r"""
+    (?P<skip>\s+|//[^\n]*|\(\*.*?\*\)|/\*.*?\*/|\{[^}]*\})
+  | (?P<time>(?i:LTIME|TIME|T)\#-?[0-9][\w.]*)
+  | (?P<based>(?:2|8|16)\#[0-9A-Fa-f_]+)
+  | (?P<typed>[^\W\d]\w*\#(?:(?:2|8|16)\#[0-9A-Fa-f_]+|[-+]?[\w.]+(?:[eE][-+]?\d+)?))
+  | (?P<number>\d[\d_]*(?:\.\d[\d_]*)?(?:[eE][-+]?\d+)?)
+  | (?P<string>'(?:\$.|[^'$])*'|"(?:\$.|[^"$])*")
+  | (?P<ident>[^\W\d]\w*)
+  | (?P<op>:=|=>|<=|>=|<>|\*\*|\.\.|[-+*/()\[\],;:.^=<>&])
+""", re.VERBOSE | re.DOTALL)
+
+_TIME_PART_RE = re.compile(r'(\d+(?:\.\d+)?)(ms|us|ns|d|h|m|s)', re.IGNORECASE)
+_TIME_UNITS_MS = {'d': 86_400_000, 'h': 3_600_000, 'm': 60_000, 's': 1000, 'ms': 1, 'us': 0.001, 'ns': 0.000001}
+
+_POU_KINDS = {'FUNCTION_BLOCK': 'END_FUNCTION_BLOCK', 'FUNCTION': 'END_FUNCTION', 'PROGRAM': 'END_PROGRAM'}
+_VAR_SECTIONS = ('VAR', 'VAR_INPUT', 'VAR_OUTPUT', 'VAR_IN_OUT', 'VAR_TEMP', 'VAR_STAT', 'VAR_INST',
+                 'VAR_GLOBAL', 'VAR_EXTERNAL')
+_VAR_QUALIFIERS = ('CONSTANT', 'RETAIN', 'PERSISTENT', 'NON_RETAIN')
+
+# Бинарные операторы по возрастанию приоритета
+_PRECEDENCE = (
+    ('OR',),
+    ('XOR',),
+    ('AND', '&'),
+    ('=', '<>'),
+    ('<', '>', '<=', '>='),
+    ('+', '-'),
+    ('*', '/', 'MOD'),
+    ('**',),
+)
+
+
+class ParseError(ValueError):
+    """Синтаксическая ошибка с позицией в исходнике"""
+
+
+def parse_time(text: str) -> int:
+    """Литерал времени (T#1h2m3s, TIME#100MS) в миллисекундах"""
+    value = text.split('#', 1)[1]
+    sign = -1 if value.startswith('-') else 1
+    total = sum(float(number) * _TIME_UNITS_MS[unit.lower()] for number, unit in _TIME_PART_RE.findall(value))
+    return sign * int(round(total))
+
+
+def _parse_number(text: str):
+    text = text.replace('_', '')
+    if '#' in text:
+        base, digits = text.split('#', 1)
+        return int(digits, int(base))
+    if '.' in text or 'e' in text.lower():
+        return float(text)
+    return int(text)
+
+
+class Parser:
+    """Рекурсивный спуск по токенам одного файла"""
+
+    def __init__(self, text: str, source: str = '<st>'):
+        self.text = text
+        self.source = source
+        self.tokens: List[Tuple[str, str, int]] = []
+        position = 0
+        for match in _TOKEN_RE.finditer(text):
+            if match.start() != position:
+                break
+            position = match.end()
+            kind = match.lastgroup
+            if kind != 'skip':
+                value = match.group()
+                if kind == 'ident':
+                    upper = value.upper()
+                    kind, value = ('kw', upper) if upper in _KEYWORDS else ('ident', value)
+                self.tokens.append((kind, value, match.start()))
+        if position != len(text):
+            self.pos = len(self.tokens)
+            raise self.error(f"Неизвестный символ {text[position]!r}", position)
+        self.tokens.append(('eof', '', len(text)))
+        self.pos = 0
+        self._line_starts = [0] + [m.end() for m in re.finditer('\n', text)]
+
+    # ------------------------------------------------------------------ токены
+
+    def line(self, offset: Optional[int] = None) -> int:
+        if offset is None:
+            offset = self.tokens[self.pos][2]
+        return bisect.bisect_right(self._line_starts, offset)
+
+    def error(self, message: str, offset: Optional[int] = None) -> ParseError:
+        return ParseError(f"{self.source}:{self.line(offset)}: {message}")
+
+    def peek(self, ahead: int = 0) -> Tuple[str, str, int]:
+        return self.tokens[min(self.pos + ahead, len(self.tokens) - 1)]
+
+    def at(self, *values: str) -> bool:
+        kind, value, _ = self.tokens[self.pos]
+        return kind in ('kw', 'op') and value in values
+
+    def accept(self, *values: str) -> Optional[str]:
+        if self.at(*values):
+            self.pos += 1
+            return self.tokens[self.pos - 1][1]
+        return None
+
+    def expect(self, *values: str) -> str:
+        value = self.accept(*values)
+        if value is None:
+            raise self.error(f"Ожидается {' или '.join(values)}, найдено {self.peek()[1]!r}")
+        return value
+
+    def ident(self) -> str:
+        kind, value, _ = self.peek()
+        if kind == 'ident' or (kind == 'kw' and value in _SOFT_KEYWORDS):
+            self.pos += 1
+            return value
+        raise self.error(f"Ожидается идентификатор, найдено {value!r}")
+
+    # ------------------------------------------------------------ объявления
+
+    def parse_file(self) -> tuple:
+        declarations = []
+        while self.peek()[0] != 'eof':
+            if self.accept(';'):
+                continue
+            line = self.line()
+            if self.accept('TYPE'):
+                while not self.accept('END_TYPE'):
+                    declarations.append(self.parse_type(line))
+                    line = self.line()
+            elif self.accept('VAR_GLOBAL'):
+                qualifiers, fields = self.parse_var_block_body()
+                declarations.append(('globals', qualifiers, fields, line))
+            elif self.at(*_POU_KINDS):
+                declarations.append(self.parse_pou())
+            else:
+                raise self.error(f"Неожиданный токен {self.peek()[1]!r}")
+        return tuple(declarations)
+
+    def parse_type(self, line: int) -> tuple:
+        name = self.ident()
+        extends = self.ident() if self.accept('EXTENDS') else None
+        self.expect(':')
+        if self.accept('STRUCT'):
+            spec = ('struct', extends, self.parse_fields('END_STRUCT'))
+            self.expect('END_STRUCT')
+        elif self.accept('UNION'):
+            spec = ('union', self.parse_fields('END_UNION'))
+            self.expect('END_UNION')
+        elif self.at('('):
+            members = self.parse_enum_members()
+            base = self.ident() if self.peek()[0] == 'ident' or self.peek()[1] in _ELEMENTARY else 'INT'
+            if self.accept(':='):
+                self.parse_expression()
+            spec = ('enum', members, base)
+        else:
+            typespec = self.parse_typespec()
+            spec = ('alias', typespec, self.parse_initializer() if self.accept(':=') else None)
+        self.accept(';')
+        return ('type', name, spec, line)
+
+    def parse_enum_members(self) -> tuple:
+        self.expect('(')
+        members = []
+        while True:
+            name = self.ident()
+            members.append((name, self.parse_expression() if self.accept(':=') else None))
+            if not self.accept(','):
+                break
+        self.expect(')')
+        return tuple(members)
+
+    def parse_pou(self) -> tuple:
+        line = self.line()
+        kind = self.expect(*_POU_KINDS)
+        end = _POU_KINDS[kind]
+        while self.accept('ABSTRACT', 'FINAL', 'PUBLIC', 'INTERNAL'):
+            pass
+        name = self.ident()
+        extends = self.ident() if self.accept('EXTENDS') else None
+        if self.accept('IMPLEMENTS'):
+            self.ident()
+            while self.accept(','):
+                self.ident()
+        return_type = self.parse_typespec() if self.accept(':') else None
+
+        sections = []
+        while self.at(*_VAR_SECTIONS):
+            section = self.expect(*_VAR_SECTIONS)
+            qualifiers, fields = self.parse_var_block_body()
+            sections.append((section, qualifiers, fields))
+        body = self.parse_statements(end)
+        self.expect(end)
+        return ('pou', kind, name, extends, return_type, tuple(sections), body, line)
+
+    def parse_var_block_body(self) -> Tuple[tuple, tuple]:
+        qualifiers = []
+        while self.at(*_VAR_QUALIFIERS):
+            qualifiers.append(self.expect(*_VAR_QUALIFIERS))
+        fields = self.parse_fields('END_VAR')
+        self.expect('END_VAR')
+        return tuple(qualifiers), fields
+
+    def parse_fields(self, end: str) -> tuple:
+        fields = []
+        while not self.at(end):
+            if self.accept(';'):
+                continue
+            line = self.line()
+            names = [self.ident()]
+            while self.accept(','):
+                names.append(self.ident())
+            if self.accept('AT'):
+                self.pos += 1  # Адрес %I*, %Q*
+            self.expect(':')
+            typespec = self.parse_typespec()
+            init = self.parse_initializer() if self.accept(':=') else None
+            self.expect(';')
+            fields.extend((name, typespec, init, line) for name in names)
+        return tuple(fields)
+
+    def parse_typespec(self) -> tuple:
+        if self.accept('ARRAY'):
+            self.expect('[')
+            ranges = []
+            while True:
+                low = self.parse_expression()
+                self.expect('..')
+                ranges.append((low, self.parse_expression()))
+                if not self.accept(','):
+                    break
+            self.expect(']')
+            self.expect('OF')
+            return ('array', tuple(ranges), self.parse_typespec())
+        if self.accept('REFERENCE'):
+            self.expect('TO')
+            return ('ref', self.parse_typespec())
+        if self.accept('POINTER'):
+            self.expect('TO')
+            return ('ptr', self.parse_typespec())
+        if self.at('STRING', 'WSTRING'):
+            self.pos += 1
+            size = 80
+            if self.accept('(', '['):
+                size = self.parse_expression()
+                self.expect(')', ']')
+            return ('string', size)
+        if self.at('('):
+            members = self.parse_enum_members()
+            base = self.ident() if self.peek()[0] == 'ident' else 'INT'
+            return ('enum', members, base)
+        name = self.ident()
+        if self.accept('('):  # Поддиапазон INT(0..100)
+            self.parse_expression()
+            self.expect('..')
+            self.parse_expression()
+            self.expect(')')
+        return ('named', name)
+
+    def parse_initializer(self) -> tuple:
+        if self.accept('['):
+            items = []
+            while not self.at(']'):
+                kind, value, _ = self.peek()
+                if kind == 'number' and self.peek(1)[1] == '(':
+                    self.pos += 2
+                    count = _parse_number(value)
+                    items.append((count, self.parse_initializer() if not self.at(')') else None))
+                    self.expect(')')
+                else:
+                    items.append((1, self.parse_initializer()))
+                if not self.accept(','):
+                    break
+            self.expect(']')
+            return ('array_init', tuple(items))
+        if self.at('(') and self.peek(1)[0] == 'ident' and self.peek(2)[1] == ':=':
+            self.pos += 1
+            items = []
+            while not self.at(')'):
+                name = self.ident()
+                self.expect(':=')
+                items.append((name, self.parse_initializer()))
+                if not self.accept(','):
+                    break
+            self.expect(')')
+            return ('struct_init', tuple(items))
+        return self.parse_expression()
+
+    # -------------------------------------------------------------- операторы
+
+    def parse_statements(self, *ends: str, case_labels: bool = False) -> tuple:
+        statements = []
+        while not self.at(*ends) and self.peek()[0] != 'eof':
+            if case_labels and self._at_case_label():
+                break
+            statement = self.parse_statement()
+            if statement is not None:
+                statements.append(statement)
+        return tuple(statements)
+
+    def _at_case_label(self) -> bool:
+        start = self.pos
+        try:
+            self.parse_case_labels()
+            return self.at(':')
+        except ParseError:
+            return False
+        finally:
+            self.pos = start
+
+    def parse_statement(self) -> Optional[tuple]:
+        line = self.line()
+        if self.accept(';'):
+            return None
+        if self.accept('IF'):
+            branches = []
+            condition = self.parse_expression()
+            self.expect('THEN')
+            branches.append((condition, self.parse_statements('ELSIF', 'ELSE', 'END_IF')))
+            while self.accept('ELSIF'):
+                condition = self.parse_expression()
+                self.expect('THEN')
+                branches.append((condition, self.parse_statements('ELSIF', 'ELSE', 'END_IF')))
+            otherwise = self.parse_statements('END_IF') if self.accept('ELSE') else ()
+            self.expect('END_IF')
+            return ('if', line, tuple(branches), otherwise)
+        if self.accept('CASE'):
+            selector = self.parse_expression()
+            self.expect('OF')
+            branches = []
+            while not self.at('ELSE', 'END_CASE'):
+                labels = self.parse_case_labels()
+                self.expect(':')
+                branches.append((labels, self.parse_statements('ELSE', 'END_CASE', case_labels=True)))
+            otherwise = self.parse_statements('END_CASE') if self.accept('ELSE') else ()
+            self.expect('END_CASE')
+            return ('case', line, selector, tuple(branches), otherwise)
+        if self.accept('FOR'):
+            variable = self.ident()
+            self.expect(':=')
+            start = self.parse_expression()
+            self.expect('TO')
+            end = self.parse_expression()
+            step = self.parse_expression() if self.accept('BY') else None
+            self.expect('DO')
+            body = self.parse_statements('END_FOR')
+            self.expect('END_FOR')
+            return ('for', line, variable, start, end, step, body)
+        if self.accept('WHILE'):
+            condition = self.parse_expression()
+            self.expect('DO')
+            body = self.parse_statements('END_WHILE')
+            self.expect('END_WHILE')
+            return ('while', line, condition, body)
+        if self.accept('REPEAT'):
+            body = self.parse_statements('UNTIL')
+            self.expect('UNTIL')
+            condition = self.parse_expression()
+            self.expect('END_REPEAT')
+            return ('repeat', line, body, condition)
+        for keyword in ('EXIT', 'CONTINUE', 'RETURN'):
+            if self.accept(keyword):
+                self.accept(';')
+                return (keyword.lower(), line)
+
+        target = self.parse_postfix()
+        if self.accept(':='):
+            statement = ('assign', line, target, self.parse_expression())
+        elif target[0] == 'call':
+            statement = ('call', line, target)
+        else:
+            raise self.error(f"Ожидается := или вызов, найдено {self.peek()[1]!r}")
+        if not self.at(*_BLOCK_ENDS):
+            self.expect(';')
+        return statement
+
+    def parse_case_labels(self) -> tuple:
+        labels = []
+        while True:
+            low = self.parse_expression()
+            labels.append((low, self.parse_expression()) if self.accept('..') else (low, None))
+            if not self.accept(','):
+                break
+        return tuple(labels)
+
+    # ------------------------------------------------------------- выражения
+
+    def parse_expression(self, level: int = 0) -> tuple:
+        if level == len(_PRECEDENCE):
+            return self.parse_unary()
+        left = self.parse_expression(level + 1)
+        while self.at(*_PRECEDENCE[level]):
+            op = self.expect(*_PRECEDENCE[level])
+            right = self.parse_expression(level + 1)
+            left = ('binary', 'AND' if op == '&' else op, left, right)
+        return left
+
+    def parse_unary(self) -> tuple:
+        if self.accept('NOT'):
+            return ('unary', 'NOT', self.parse_unary())
+        if self.accept('-'):
+            operand = self.parse_unary()
+            if operand[0] == 'lit' and isinstance(operand[1], (int, float)) and not isinstance(operand[1], bool):
+                return ('lit', -operand[1], operand[2])
+            return ('unary', '-', operand)
+        if self.accept('+'):
+            return self.parse_unary()
+        return self.parse_postfix()
+
+    def parse_postfix(self) -> tuple:
+        expression = self.parse_primary()
+        while True:
+            if self.accept('.'):
+                kind, value, _ = self.peek()
+                if kind == 'number':
+                    self.pos += 1
+                    expression = ('bit', expression, int(value))
+                else:
+                    expression = ('member', expression, self.ident())
+            elif self.accept('['):
+                indices = [self.parse_expression()]
+                while self.accept(','):
+                    indices.append(self.parse_expression())
+                self.expect(']')
+                expression = ('index', expression, tuple(indices))
+            elif self.accept('^'):
+                expression = ('deref', expression)
+            elif self.accept('('):
+                expression = ('call', expression, self.parse_arguments())
+            else:
+                return expression
+
+    def parse_arguments(self) -> tuple:
+        arguments = []
+        while not self.accept(')'):
+            if self.peek()[0] in ('ident', 'kw') and self.peek(1)[1] in (':=', '=>'):
+                name = self.peek()[1]
+                self.pos += 1
+                output = self.expect(':=', '=>') == '=>'
+                # Пустой аргумент "ixSignal := ," - вход не подключён
+                arguments.append((name, None if self.at(',', ')') else self.parse_expression(), output))
+            else:
+                arguments.append((None, self.parse_expression(), False))
+            if not self.accept(','):
+                self.expect(')')
+                break
+        return tuple(arguments)
+
+    def parse_primary(self) -> tuple:
+        kind, value, offset = self.peek()
+        self.pos += 1
+        if kind == 'number' or kind == 'based':
+            number = _parse_number(value)
+            return ('lit', number, 'REAL' if isinstance(number, float) else 'INT')
+        if kind == 'time':
+            return ('lit', parse_time(value), 'TIME')
+        if kind == 'string':
+            return ('lit', value[1:-1].replace("$'", "'").replace('$$', '$'), 'STRING')
+        if kind == 'typed':
+            type_name, literal = value.split('#', 1)
+            upper = type_name.upper()
+            if upper in _ELEMENTARY:
+                if upper == 'BOOL':
+                    return ('lit', literal.upper() in ('TRUE', '1'), 'BOOL')
+                number = _parse_number(literal)
+                return ('lit', float(number) if upper in ('REAL', 'LREAL') else number, upper)
+            return ('member', ('name', type_name), literal)  # Перечисление E_State#IDLE
+        if kind == 'kw' and value in ('TRUE', 'FALSE'):
+            return ('lit', value == 'TRUE', 'BOOL')
+        if kind == 'op' and value == '(':
+            expression = self.parse_expression()
+            self.expect(')')
+            return expression
+        if kind == 'ident' or (kind == 'kw' and value in _SOFT_KEYWORDS):
+            return ('name', value)
+        self.pos -= 1
+        raise self.error(f"Ожидается выражение, найдено {value!r}", offset)
+
+
+_ELEMENTARY = {
+    'BOOL', 'BYTE', 'WORD', 'DWORD', 'LWORD', 'SINT', 'USINT', 'INT', 'UINT', 'DINT', 'UDINT',
+    'LINT', 'ULINT', 'REAL', 'LREAL', 'TIME', 'LTIME', 'DATE', 'TOD', 'DT', 'TIME_OF_DAY', 'DATE_AND_TIME',
+}
+_KEYWORDS = {
+    'TYPE', 'END_TYPE', 'STRUCT', 'END_STRUCT', 'UNION', 'END_UNION', 'EXTENDS', 'IMPLEMENTS',
+    'FUNCTION_BLOCK', 'END_FUNCTION_BLOCK', 'FUNCTION', 'END_FUNCTION', 'PROGRAM', 'END_PROGRAM',
+    'ABSTRACT', 'FINAL', 'PUBLIC', 'INTERNAL', 'AT',
+    'ARRAY', 'OF', 'REFERENCE', 'POINTER', 'TO', 'STRING', 'WSTRING', 'END_VAR',
+    'IF', 'THEN', 'ELSIF', 'ELSE', 'END_IF', 'CASE', 'END_CASE', 'FOR', 'BY', 'DO', 'END_FOR',
+    'WHILE', 'END_WHILE', 'REPEAT', 'UNTIL', 'END_REPEAT', 'EXIT', 'CONTINUE', 'RETURN',
+    'NOT', 'AND', 'OR', 'XOR', 'MOD', 'TRUE', 'FALSE',
+} | set(_VAR_SECTIONS) | set(_VAR_QUALIFIERS)
+# Ключевые слова, допустимые как имена (поля, параметры)
+_SOFT_KEYWORDS = {'AT', 'FINAL', 'PUBLIC', 'INTERNAL', 'ABSTRACT'}
+_BLOCK_ENDS = ('END_IF', 'ELSIF', 'ELSE', 'END_CASE', 'END_FOR', 'END_WHILE', 'UNTIL', 'END_REPEAT',
+               'END_FUNCTION_BLOCK', 'END_FUNCTION', 'END_PROGRAM')
+
+
+def parse_text(text: str, source: str = '<st>') -> tuple:
+    """Разобрать текст ST в кортеж объявлений"""
+    return Parser(text, source).parse_file()
+
+
+def parse_file(path: Path) -> tuple:
+    """Разобрать файл .st"""
+    return parse_text(Path(path).read_bytes().decode('utf-8-sig', errors='replace'), str(path))
+
+
+def source_files(root: Path = PROJECT_ROOT) -> List[Path]:
+    """Все .st проекта в SOURCE_DIRS"""
+    return [path for source_dir in SOURCE_DIRS for path in sorted((root / source_dir).rglob('*.st'))]
+
+
+def _parse_source(item: Tuple[str, str]) -> Tuple[Optional[tuple], Optional[str]]:
+    """Разбор в процессе пула: (дерево, None) или (None, текст ошибки)"""
+    text, source = item
+    try:
+        return parse_text(text, source), None
+    except ParseError as e:
+        return None, str(e)
+
+
+def _cache_key(root: Path) -> Tuple:
+    """Ключ совместимости кэша: корень проекта, версия Python (формат marshal), содержимое разборщика"""
+    return str(root.resolve()), sys.version_info[:2], hashlib.sha256(Path(__file__).read_bytes()).hexdigest()
+
+
+class SourceTree:
+    """
+    Деревья всех .st проекта с кэшем на диске
+
+    files - список (путь, объявления) в порядке source_files(); файлы
+    с синтаксическими ошибками в него не входят, ошибки - в errors.
+    """
+
+    def __init__(self):
+        self.files: List[Tuple[str, tuple]] = []
+        self.errors: List[str] = []
+        self.files_total = 0
+        self.files_parsed = 0
+
+    @classmethod
+    def load(cls, root: Path = PROJECT_ROOT, cache_path: Optional[Path] = CACHE_PATH,
+             workers: Optional[int] = None) -> 'SourceTree':
+        """
+        Разобрать исходники проекта, используя кэш
+
+        Args:
+            cache_path: Файл кэша (None - без кэша)
+            workers: Процессов для разбора изменённых файлов (None - по числу CPU, 1 - без пула)
+        """
+        key = _cache_key(root)
+        cached: Dict[str, dict] = {}
+        if cache_path is not None and cache_path.exists():
+            # marshal.loads по байтам быстрее чтения из файла; сборщик мусора на время
+            # создания сотен тысяч кортежей отключается - циклов в дереве нет
+            gc_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                cache = marshal.loads(cache_path.read_bytes())
+                if cache.get('key') == key:
+                    cached = cache['files']
+            except (OSError, ValueError, EOFError, TypeError, KeyError, AttributeError):
+                cached = {}
+            finally:
+                if gc_enabled:
+                    gc.enable()
+
+        tree = cls()
+        entries: Dict[str, dict] = {}
+        pending: List[Tuple[str, dict, str]] = []  # (rel, запись, текст) - разобрать заново
+        changed = False
+        for path in source_files(root):
+            rel = path.relative_to(root).as_posix()
+            stat = path.stat()
+            entry = cached.get(rel)
+            if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                entries[rel] = entry
+                continue
+
+            data = path.read_bytes()
+            digest = hashlib.sha256(data).hexdigest()
+            if entry and entry['sha256'] == digest:
+                entry = dict(entry)
+            else:
+                entry = {'sha256': digest, 'tree': None, 'error': None}
+                pending.append((rel, entry, data.decode('utf-8-sig', errors='replace')))
+            entry['mtime_ns'] = stat.st_mtime_ns
+            entry['size'] = stat.st_size
+            entries[rel] = entry
+            changed = True
+
+        if pending:
+            items = [(text, str(root / rel)) for rel, _, text in pending]
+            workers = workers or os.cpu_count() or 1
+            if workers > 1 and len(pending) >= PARALLEL_THRESHOLD:
+                with ProcessPoolExecutor(min(workers, len(pending))) as pool:
+                    results = list(pool.map(_parse_source, items, chunksize=max(1, len(items) // (workers * 4))))
+            else:
+                results = [_parse_source(item) for item in items]
+            for (_, entry, _), (declarations, error) in zip(pending, results):
+                entry['tree'], entry['error'] = declarations, error
+            tree.files_parsed = len(pending)
+
+        changed = changed or set(entries) != set(cached)
+        if cache_path is not None and changed:
+            tmp_path = cache_path.with_suffix('.tmp')
+            tmp_path.write_bytes(marshal.dumps({'key': key, 'files': entries}))
+            os.replace(tmp_path, cache_path)
+
+        for rel, entry in entries.items():
+            if entry['error'] is not None:
+                tree.errors.append(entry['error'])
+            else:
+                tree.files.append((str(root / rel), entry['tree']))
+        tree.files_total = len(entries)
+        return tree
+
+
+def project_files(root: Path = PROJECT_ROOT) -> List[Tuple[str, tuple]]:
+    """(путь, объявления) всех .st проекта через кэш SourceTree; синтаксическая ошибка - ParseError"""
+    tree = SourceTree.load(root)
+    if tree.errors:
+        raise ParseError(tree.errors[0])
+    return tree.files
+
+
+def walk(node):
+    """Обойти все узлы-кортежи дерева (в глубину)"""
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, tuple):
+            if node and isinstance(node[0], str):
+                yield node
+            stack.extend(reversed(node))
+
+
+def main():
+    """Главная функция"""
+    import argparse
+    import time
+    from pprint import pprint
+
+    arg_parser = argparse.ArgumentParser(description='Разбор исходников Structured Text')
+    arg_parser.add_argument('files', nargs='*', type=Path, help='Файлы .st (по умолчанию - весь проект)')
+    arg_parser.add_argument('--dump', action='store_true', help='Вывести дерево')
+    arg_parser.add_argument('--no-cache', action='store_true', help='Не использовать кэш деревьев')
+    arg_parser.add_argument('--workers', type=int, default=None, help='Процессов для разбора')
+    args = arg_parser.parse_args()
+
+    print("=" * 60)
+    print("ST Parser")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    if args.files:
+        files, errors = [], []
+        for path in args.files:
+            try:
+                files.append((str(path), parse_file(path)))
+            except ParseError as e:
+                errors.append(str(e))
+        total, parsed = len(args.files), len(args.files)
+    else:
+        tree = SourceTree.load(cache_path=None if args.no_cache else CACHE_PATH, workers=args.workers)
+        files, errors, total, parsed = tree.files, tree.errors, tree.files_total, tree.files_parsed
+    elapsed = time.perf_counter() - start
+
+    counts = {}
+    for path, declarations in files:
+        for declaration in declarations:
+            counts[declaration[0]] = counts.get(declaration[0], 0) + 1
+        if args.dump:
+            print(f"\n📄 {path}")
+            pprint(declarations, width=120)
+    for error in errors:
+        print(f"❌ {error}")
+
+    print(f"\n✅ Файлов: {len(files)} из {total} за {elapsed * 1000:.0f} мс (разобрано заново: {parsed})")
+    print(f"   Объявлений: " + ', '.join(f"{kind} {count}" for kind, count in sorted(counts.items())))
+    print("=" * 60)
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
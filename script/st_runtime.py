@@ -0,0 +1,1346 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ST Runtime
+===========
+Исполнение Structured Text проекта в Python для офлайн-регрессии: каждый
+POU (FUNCTION_BLOCK, FUNCTION, PROGRAM), STRUCT и UNION один раз
+транслируется в исходник Python (класс или функцию) и компилируется в code
+object - цикл ПЛК исполняет готовый байткод, а не обходит дерево.
+
+Использование:
+    from st_runtime import Project
+
+    runtime = Project.load().runtime(['FB_UniversalSignal'])
+    fb = runtime.new('FB_UniversalSignal')
+    fb.ixSignal = True
+    fb()                                  # Один цикл
+    runtime.advance(10)                   # Виртуальные часы ПЛК, мс
+
+    python3 st_runtime.py FB_RangeDiagnostic --source   # Показать сгенерированный Python
+
+Возможности:
+    - Экземпляры ФБ - объекты с __slots__, вызов с := и =>; R_TRIG/F_TRIG
+      встраиваются в код вызывающего, TON/TOF/TP/BLINK/CTU/CTD/RS/SR
+      работают от виртуальных часов Runtime.now
+    - IF/CASE/FOR/WHILE/REPEAT, EXIT/CONTINUE/RETURN, массивы (в т.ч.
+      многомерные), STRUCT с EXTENDS, UNION (общая память через struct),
+      перечисления, REFERENCE TO, POINTER TO с ADR и арифметикой указателей
+    - Целочисленная семантика IEC: переполнение по ширине типа при
+      присваивании, деление и MOD с отбросом дробной части, *_TO_*
+    - Компилируются только нужные корням POU и типы; изображение
+      (ProgramImage) можно исполнять в нескольких независимых Runtime
+
+Ограничения:
+    - REAL вычисляется в double, деление на 0.0 - ZeroDivisionError
+    - AND/OR для BOOL вычисляются с коротким замыканием
+    - Индекс ниже нижней границы массива не проверяется
+
+Дата: 2026-10-17
+"""
+
+import copy
+import keyword
+import math
+import struct
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from st_parser import PROJECT_ROOT, parse_file, project_files
+
+# Целые типы: (бит, со знаком)
+INTEGER_TYPES = {
+    'SINT': (8, True), 'USINT': (8, False), 'BYTE': (8, False),
+    'INT': (16, True), 'UINT': (16, False), 'WORD': (16, False),
+    'DINT': (32, True), 'UDINT': (32, False), 'DWORD': (32, False),
+    'LINT': (64, True), 'ULINT': (64, False), 'LWORD': (64, False),
+    'TIME': (32, False), 'LTIME': (64, False), 'DATE': (32, False), 'TOD': (32, False),
+    'TIME_OF_DAY': (32, False), 'DT': (32, False), 'DATE_AND_TIME': (32, False),
+    'ANYINT': (64, True),
+}
+REAL_TYPES = ('REAL', 'LREAL', 'ANYREAL')
+TYPE_ALIASES = {'TIME_OF_DAY': 'TOD', 'DATE_AND_TIME': 'DT'}
+
+# Упаковка элементарных типов в UNION (little-endian, как у ПЛК x86/ARM)
+STRUCT_FORMATS = {
+    'BOOL': '?', 'SINT': 'b', 'USINT': 'B', 'BYTE': 'B', 'INT': 'h', 'UINT': 'H', 'WORD': 'H',
+    'DINT': 'i', 'UDINT': 'I', 'DWORD': 'I', 'TIME': 'I', 'LINT': 'q', 'ULINT': 'Q', 'LWORD': 'Q',
+    'LTIME': 'Q', 'REAL': 'f', 'LREAL': 'd',
+}
+
+# Нижняя граница массива, до которой список дополняется неиспользуемыми
+# элементами: индекс ARRAY[1..3] - без вычитания
+MAX_INDEX_PADDING = 8
+
+
+class CompileError(ValueError):
+    """Конструкция ST, которую невозможно транслировать"""
+
+
+# ============================================================================
+# Стандартные ФБ (Tc2_Standard / Util)
+# ============================================================================
+
+class _StandardFB:
+    __slots__ = ('_rt',)
+    MEMBERS: Dict[str, str] = {}
+
+    def __init__(self, rt):
+        self._rt = rt
+
+    def __deepcopy__(self, memo):
+        clone = self.__class__(self._rt)
+        for name in self.MEMBERS:
+            setattr(clone, name, getattr(self, name))
+        return clone
+
+
+class R_TRIG(_StandardFB):
+    __slots__ = ('CLK', 'Q', 'M')
+    MEMBERS = {'CLK': 'BOOL', 'Q': 'BOOL', 'M': 'BOOL'}
+
+    def __init__(self, rt):
+        self._rt = rt
+        self.CLK = self.Q = self.M = False
+
+    def __call__(self):
+        self.Q = self.CLK and not self.M
+        self.M = self.CLK
+
+
+class F_TRIG(R_TRIG):
+    __slots__ = ()
+
+    def __call__(self):
+        self.Q = not self.CLK and not self.M
+        self.M = not self.CLK
+
+
+class TON(_StandardFB):
+    __slots__ = ('IN', 'PT', 'Q', 'ET', '_start')
+    MEMBERS = {'IN': 'BOOL', 'PT': 'TIME', 'Q': 'BOOL', 'ET': 'TIME'}
+
+    def __init__(self, rt):
+        self._rt = rt
+        self.IN = self.Q = False
+        self.PT = self.ET = 0
+        self._start = None
+
+    def __call__(self):
+        if self.IN:
+            if self._start is None:
+                self._start = self._rt.now
+            elapsed = self._rt.now - self._start
+            self.Q = elapsed >= self.PT
+            self.ET = self.PT if self.Q else elapsed
+        else:
+            self._start = None
+            self.Q = False
+            self.ET = 0
+
+
+class TOF(TON):
+    __slots__ = ()
+
+    def __call__(self):
+        if self.IN:
+            self._start = None
+            self.Q = True
+            self.ET = 0
+        elif self.Q:
+            if self._start is None:
+                self._start = self._rt.now
+            self.ET = min(self._rt.now - self._start, self.PT)
+            self.Q = self.ET < self.PT
+
+
+class TP(TON):
+    __slots__ = ('_previous',)
+
+    def __init__(self, rt):
+        TON.__init__(self, rt)
+        self._previous = False
+
+    def __call__(self):
+        now = self._rt.now
+        if self.IN and not self._previous and not self.Q:
+            self._start = now
+        self._previous = self.IN
+        if self._start is not None:
+            self.ET = min(now - self._start, self.PT)
+            self.Q = self.ET < self.PT
+            if not self.Q and not self.IN:
+                self._start = None
+                self.ET = 0
+
+
+class BLINK(_StandardFB):
+    __slots__ = ('ENABLE', 'TIMELOW', 'TIMEHIGH', 'OUT', '_start')
+    MEMBERS = {'ENABLE': 'BOOL', 'TIMELOW': 'TIME', 'TIMEHIGH': 'TIME', 'OUT': 'BOOL'}
+
+    def __init__(self, rt):
+        self._rt = rt
+        self.ENABLE = self.OUT = False
+        self.TIMELOW = self.TIMEHIGH = 0
+        self._start = None
+
+    def __call__(self):
+        if not self.ENABLE:
+            self._start = None
+            self.OUT = False
+            return
+        now = self._rt.now
+        if self._start is None:
+            self._start = now
+        period = self.TIMELOW + self.TIMEHIGH
+        self.OUT = period > 0 and (now - self._start) % period < self.TIMEHIGH
+
+
+class CTU(_StandardFB):
+    __slots__ = ('CU', 'RESET', 'PV', 'Q', 'CV', '_previous')
+    MEMBERS = {'CU': 'BOOL', 'RESET': 'BOOL', 'PV': 'WORD', 'Q': 'BOOL', 'CV': 'WORD'}
+
+    def __init__(self, rt):
+        self._rt = rt
+        self.CU = self.RESET = self.Q = self._previous = False
+        self.PV = self.CV = 0
+
+    def __call__(self):
+        if self.RESET:
+            self.CV = 0
+        elif self.CU and not self._previous and self.CV < 0xFFFF:
+            self.CV += 1
+        self._previous = self.CU
+        self.Q = self.CV >= self.PV
+
+
+class CTD(_StandardFB):
+    __slots__ = ('CD', 'LOAD', 'PV', 'Q', 'CV', '_previous')
+    MEMBERS = {'CD': 'BOOL', 'LOAD': 'BOOL', 'PV': 'WORD', 'Q': 'BOOL', 'CV': 'WORD'}
+
+    def __init__(self, rt):
+        self._rt = rt
+        self.CD = self.LOAD = self.Q = self._previous = False
+        self.PV = self.CV = 0
+
+    def __call__(self):
+        if self.LOAD:
+            self.CV = self.PV
+        elif self.CD and not self._previous and self.CV > 0:
+            self.CV -= 1
+        self._previous = self.CD
+        self.Q = self.CV == 0
+
+
+class RS(_StandardFB):
+    __slots__ = ('SET', 'RESET1', 'Q1')
+    MEMBERS = {'SET': 'BOOL', 'RESET1': 'BOOL', 'Q1': 'BOOL'}
+
+    def __init__(self, rt):
+        self._rt = rt
+        self.SET = self.RESET1 = self.Q1 = False
+
+    def __call__(self):
+        self.Q1 = not self.RESET1 and (self.SET or self.Q1)
+
+
+class SR(_StandardFB):
+    __slots__ = ('SET1', 'RESET', 'Q1')
+    MEMBERS = {'SET1': 'BOOL', 'RESET': 'BOOL', 'Q1': 'BOOL'}
+
+    def __init__(self, rt):
+        self._rt = rt
+        self.SET1 = self.RESET = self.Q1 = False
+
+    def __call__(self):
+        self.Q1 = self.SET1 or (not self.RESET and self.Q1)
+
+
+STANDARD_FBS = {cls.__name__.lower(): cls for cls in (R_TRIG, F_TRIG, TON, TOF, TP, BLINK, CTU, CTD, RS, SR)}
+
+
+# ============================================================================
+# Ссылки, указатели, UNION
+# ============================================================================
+
+class AttrRef:
+    """REFERENCE/POINTER на поле объекта"""
+    __slots__ = ('obj', 'name')
+
+    def __init__(self, obj, name: str):
+        self.obj = obj
+        self.name = name
+
+    @property
+    def value(self):
+        return getattr(self.obj, self.name)
+
+    @value.setter
+    def value(self, value):
+        setattr(self.obj, self.name, value)
+
+
+class ItemRef:
+    """REFERENCE/POINTER на элемент массива; арифметика указателя - в байтах"""
+    __slots__ = ('items', 'index', 'size')
+
+    def __init__(self, items, index: int, size: int = 1):
+        self.items = items
+        self.index = index
+        self.size = size
+
+    @property
+    def value(self):
+        return self.items[self.index]
+
+    @value.setter
+    def value(self, value):
+        self.items[self.index] = value
+
+    def __add__(self, offset: int) -> 'ItemRef':
+        return ItemRef(self.items, self.index + offset // self.size, self.size)
+
+    def __sub__(self, offset: int) -> 'ItemRef':
+        return ItemRef(self.items, self.index - offset // self.size, self.size)
+
+
+class ObjectRef:
+    """POINTER на STRUCT/ФБ: p^ возвращает сам объект"""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class UnionArray:
+    """Поле-массив UNION поверх общей памяти"""
+    __slots__ = ('_buffer', '_format', '_size', '_offset')
+
+    def __init__(self, buffer: bytearray, fmt: str, low: int):
+        self._buffer = buffer
+        self._format = '<' + fmt
+        self._size = struct.calcsize(self._format)
+        self._offset = low
+
+    def __getitem__(self, index: int):
+        return struct.unpack_from(self._format, self._buffer, (index - self._offset) * self._size)[0]
+
+    def __setitem__(self, index: int, value):
+        struct.pack_into(self._format, self._buffer, (index - self._offset) * self._size, value)
+
+
+class UnionBase:
+    """Базовый класс UNION: поля - свойства поверх bytearray"""
+    __slots__ = ('_buffer',)
+    SIZE = 0
+
+    def __init__(self):
+        self._buffer = bytearray(self.SIZE)
+
+    def __deepcopy__(self, memo):
+        clone = self.__class__()
+        clone._buffer[:] = self._buffer
+        return clone
+
+
+def _union_field(fmt: str):
+    fmt = '<' + fmt
+
+    def getter(self):
+        return struct.unpack_from(fmt, self._buffer)[0]
+
+    def setter(self, value):
+        struct.pack_into(fmt, self._buffer, 0, value)
+    return property(getter, setter)
+
+
+# ============================================================================
+# Вспомогательные функции сгенерированного кода
+# ============================================================================
+
+def _idiv(a: int, b: int) -> int:
+    """Целочисленное деление с отбросом дробной части (IEC)"""
+    quotient = abs(a) // abs(b)
+    return quotient if (a >= 0) == (b >= 0) else -quotient
+
+
+def _imod(a: int, b: int) -> int:
+    """MOD со знаком делимого (IEC)"""
+    return a - _idiv(a, b) * b
+
+
+def _round(value: float) -> int:
+    """REAL_TO_INT: округление половины от нуля"""
+    return int(math.floor(value + 0.5)) if value >= 0 else -int(math.floor(-value + 0.5))
+
+
+def _init_fields(obj, **fields):
+    for name, value in fields.items():
+        setattr(obj, name, value)
+    return obj
+
+
+def _array(count: int, low: int, factory, values=()):
+    """Список для ARRAY[low..]: дополнение до low + значения инициализатора + значения по умолчанию"""
+    padding = low if 0 < low <= MAX_INDEX_PADDING else 0
+    items = [None] * padding + list(values)[:count]
+    items.extend(factory() for _ in range(count - len(items) + padding))
+    return items
+
+
+HELPERS = {
+    '_idiv': _idiv, '_imod': _imod, '_round': _round, '_init_fields': _init_fields, '_array': _array,
+    '_deepcopy': copy.deepcopy, '_math': math, 'AttrRef': AttrRef, 'ItemRef': ItemRef, 'ObjectRef': ObjectRef,
+    'UnionArray': UnionArray, 'UnionBase': UnionBase, '_union_field': _union_field,
+}
+HELPERS.update({cls.__name__: cls for cls in STANDARD_FBS.values()})
+
+
+def _enclosed(code: str) -> bool:
+    """Выражение целиком в одних внешних скобках"""
+    if not (code.startswith('(') and code.endswith(')')):
+        return False
+    depth = 0
+    for i, char in enumerate(code):
+        depth += (char == '(') - (char == ')')
+        if depth == 0 and i < len(code) - 1:
+            return False
+    return True
+
+
+def _wrap_code(code: str, type_name: str) -> str:
+    if _enclosed(code):
+        code = code[1:-1]
+    bits, signed = INTEGER_TYPES[type_name]
+    mask = (1 << bits) - 1
+    if signed:
+        half = 1 << (bits - 1)
+        return f"((({code}) + {half}) & {mask}) - {half}"
+    return f"({code}) & {mask}"
+
+
+def _python_name(name: str) -> str:
+    return name + '_' if keyword.iskeyword(name) else name
+
+
+# ============================================================================
+# Проект и компилятор
+# ============================================================================
+
+class Project:
+    """Объявления всех .st проекта (типы, POU, глобальные переменные)"""
+
+    def __init__(self, files: Iterable[Tuple[str, tuple]]):
+        self.types: Dict[str, tuple] = {}
+        self.pous: Dict[str, tuple] = {}
+        self.globals: Dict[str, Tuple[tuple, tuple]] = {}
+        self.enum_members: Dict[str, List[Tuple[str, int]]] = {}
+        self._images: Dict[Tuple[str, ...], 'ProgramImage'] = {}
+        for _, declarations in files:
+            for declaration in declarations:
+                kind = declaration[0]
+                if kind == 'type':
+                    self.types.setdefault(declaration[1].lower(), declaration)
+                elif kind == 'pou':
+                    self.pous.setdefault(declaration[2].lower(), declaration)
+                elif kind == 'globals':
+                    for field in declaration[2]:
+                        self.globals.setdefault(field[0].lower(), (field, declaration[1]))
+        for key, declaration in self.types.items():
+            if declaration[2][0] == 'enum':
+                for member, value in self.enum_values(declaration[2][1]).items():
+                    self.enum_members.setdefault(member.lower(), []).append((key, value))
+
+    @classmethod
+    def load(cls, root: Path = PROJECT_ROOT, paths: Optional[Iterable[Path]] = None) -> 'Project':
+        """Разобрать исходники проекта (по умолчанию - все .st в SOURCE_DIRS через кэш деревьев)"""
+        if paths is not None:
+            return cls((str(path), parse_file(path)) for path in paths)
+        return cls(project_files(root))
+
+    def enum_values(self, members: tuple) -> Dict[str, int]:
+        values = {}
+        next_value = 0
+        for name, expression in members:
+            if expression is not None:
+                next_value = self.constant(expression)
+            values[name] = next_value
+            next_value += 1
+        return values
+
+    def constant(self, expression: tuple):
+        """Значение константного выражения (литералы, константы VAR_GLOBAL, арифметика)"""
+        kind = expression[0]
+        if kind == 'lit':
+            return expression[1]
+        if kind == 'name':
+            entry = self.globals.get(expression[1].lower())
+            if entry and entry[0][2] is not None:
+                return self.constant(entry[0][2])
+        if kind == 'member' and expression[1][0] == 'name':
+            declaration = self.types.get(expression[1][1].lower())
+            if declaration and declaration[2][0] == 'enum':
+                values = {name.lower(): value for name, value in self.enum_values(declaration[2][1]).items()}
+                return values[expression[2].lower()]
+        if kind == 'unary' and expression[1] == '-':
+            return -self.constant(expression[2])
+        if kind == 'binary':
+            left, right = self.constant(expression[2]), self.constant(expression[3])
+            operations = {'+': lambda: left + right, '-': lambda: left - right, '*': lambda: left * right,
+                          '/': lambda: _idiv(left, right) if isinstance(left, int) and isinstance(right, int)
+                          else left / right, 'MOD': lambda: _imod(left, right)}
+            if expression[1] in operations:
+                return operations[expression[1]]()
+        raise CompileError(f"Не константное выражение: {expression!r}")
+
+    def compile(self, roots: Iterable[str]) -> 'ProgramImage':
+        """Транслировать POU-корни и их зависимости (результат кэшируется)"""
+        key = tuple(sorted(root.lower() for root in roots))
+        if key not in self._images:
+            compiler = _Compiler(self)
+            for root in key:
+                compiler.require_pou(root)
+            self._images[key] = compiler.finish()
+        return self._images[key]
+
+    def runtime(self, roots: Iterable[str]) -> 'Runtime':
+        """Новый Runtime с откомпилированными POU-корнями"""
+        return Runtime(self.compile(roots))
+
+
+class ProgramImage:
+    """Откомпилированный набор POU: исходник Python и code object"""
+
+    def __init__(self, source: str, names: Dict[str, str]):
+        self.source = source
+        self.names = names
+        self.code = compile(source, '<st_runtime>', 'exec')
+
+
+class Runtime:
+    """Исполняемая копия ProgramImage: виртуальные часы и глобальные переменные"""
+
+    def __init__(self, image: ProgramImage):
+        self.image = image
+        self.now = 0
+        self.namespace = dict(HELPERS, rt=self)
+        exec(image.code, self.namespace)
+        self.G = self.namespace['G'] = self.namespace['_Globals']()
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def advance(self, ms: int):
+        """Сдвинуть виртуальное время ПЛК"""
+        self.now += ms
+
+    def new(self, name: str):
+        """Новый экземпляр ФБ/PROGRAM/STRUCT"""
+        return self.namespace[self.image.names[name.lower()]]()
+
+    @staticmethod
+    def bind(instance):
+        """Подставить новые объекты во все непривязанные REFERENCE TO экземпляра"""
+        for name, factory in getattr(instance, '_REFS', {}).items():
+            if getattr(instance, name) is None:
+                setattr(instance, name, factory())
+        return instance
+
+    def function(self, name: str):
+        """Откомпилированная FUNCTION (аргументы - именованные, имена из объявления)"""
+        return self.namespace[self.image.names[name.lower()]]
+
+
+class _Scope:
+    """Переменные POU при трансляции тела"""
+
+    def __init__(self, kind: str, name: str):
+        self.kind = kind
+        self.name = name
+        self.variables: Dict[str, Tuple[str, tuple, str]] = {}  # key -> (имя, тип, хранение)
+        self.enum_members: Dict[str, int] = {}
+        self.result_type = None
+        self.return_code = 'return'
+        self.temp_counter = 0
+        self.pending: List[str] = []  # Присваивания выходов функций после оператора
+
+    def temp(self, prefix: str = '_t') -> str:
+        self.temp_counter += 1
+        return f"{prefix}{self.temp_counter}"
+
+
+class _Compiler:
+    """Трансляция объявлений в исходник Python"""
+
+    def __init__(self, project: Project):
+        self.project = project
+        self.chunks: List[str] = []
+        self.names: Dict[str, str] = {}
+        self.in_progress = set()
+        self.globals_used: Dict[str, Tuple[str, tuple, tuple]] = {}
+
+    # ------------------------------------------------------------------ типы
+
+    def resolve_type(self, typespec: tuple, scope: Optional[_Scope] = None) -> tuple:
+        kind = typespec[0]
+        if kind == 'array':
+            ranges = tuple((self.project.constant(low), self.project.constant(high)) for low, high in typespec[1])
+            return ('array', ranges, self.resolve_type(typespec[2], scope))
+        if kind in ('ref', 'ptr'):
+            return (kind, self.resolve_type(typespec[1], scope))
+        if kind == 'string':
+            return ('string',)
+        if kind == 'enum':
+            values = self.project.enum_values(typespec[1])
+            if scope is not None:
+                scope.enum_members.update({name.lower(): value for name, value in values.items()})
+            return ('elem', 'INT', min(values.values()) if values else 0)
+        name = typespec[1]
+        upper = name.upper()
+        if upper in INTEGER_TYPES or upper in REAL_TYPES or upper == 'BOOL':
+            return ('elem', TYPE_ALIASES.get(upper, upper))
+        key = name.lower()
+        if key in STANDARD_FBS:
+            return ('fb', key)
+        declaration = self.project.types.get(key)
+        if declaration is not None:
+            spec = declaration[2]
+            if spec[0] == 'enum':
+                values = self.project.enum_values(spec[1])
+                return ('enum', key, next(iter(values.values()), 0))
+            if spec[0] == 'alias':
+                return self.resolve_type(spec[1], scope)
+            self.require_type(key)
+            return (spec[0], key)
+        if key in self.project.pous and self.project.pous[key][1] in ('FUNCTION_BLOCK', 'PROGRAM'):
+            self.require_pou(key)
+            return ('fb', key)
+        raise CompileError(f"Неизвестный тип {name}")
+
+    @staticmethod
+    def scalar(type_: tuple) -> Optional[str]:
+        """Имя элементарного типа (перечисление - INT) или None"""
+        if type_ is None:
+            return None
+        if type_[0] == 'elem':
+            return type_[1]
+        if type_[0] == 'enum':
+            return 'INT'
+        return None
+
+    def members(self, type_: tuple) -> Dict[str, Tuple[str, tuple]]:
+        """Поля STRUCT/UNION/ФБ: key -> (имя, тип)"""
+        kind, key = type_[0], type_[1]
+        if kind == 'fb' and key in STANDARD_FBS:
+            return {name.lower(): (name, ('elem', t)) for name, t in STANDARD_FBS[key].MEMBERS.items()}
+        result = {}
+        while key:
+            if kind == 'fb':
+                declaration = self.project.pous[key]
+                fields = [field for _, _, section in declaration[5] for field in section]
+                base = declaration[3]
+            else:
+                spec = self.project.types[key][2]
+                fields = spec[2] if spec[0] == 'struct' else spec[1]
+                base = spec[1] if spec[0] == 'struct' else None
+            for name, typespec, _, _ in fields:
+                type_ = self.resolve_type(typespec)
+                if kind == 'union' and type_[0] == 'array':
+                    type_ += ('union',)  # UnionArray сам вычитает нижнюю границу
+                result.setdefault(name.lower(), (name, type_))
+            key = base.lower() if base else None
+        return result
+
+    def class_name(self, key: str) -> str:
+        if key in self.names:
+            return self.names[key]
+        declaration = self.project.types.get(key) or self.project.pous[key]
+        return 'T_' + (declaration[1] if declaration[0] == 'type' else declaration[2])
+
+    def default_code(self, type_: tuple, init: Optional[tuple], scope: _Scope) -> str:
+        """Выражение начального значения переменной"""
+        kind = type_[0]
+        if kind == 'array':
+            (low, high), *rest = type_[1]
+            element = ('array', tuple(rest), type_[2]) if rest else type_[2]
+            values = ''
+            if init is not None and init[0] == 'array_init':
+                items = []
+                for count, item in init[1]:
+                    items.extend([self.default_code(element, item, scope)] * count)
+                values = ', (' + ', '.join(items) + (',)' if len(items) == 1 else ')')
+            return f"_array({high - low + 1}, {low}, lambda: {self.default_code(element, None, scope)}{values})"
+        if kind in ('struct', 'union', 'fb'):
+            constructor = (f"{STANDARD_FBS[type_[1]].__name__}(rt)" if type_[1] in STANDARD_FBS
+                           else f"{self.class_name(type_[1])}()")
+            if init is not None and init[0] == 'struct_init':
+                members = self.members(type_)
+                fields = ', '.join(f"{members[name.lower()][0]}={self.default_code(members[name.lower()][1], value, scope)}"
+                                   for name, value in init[1])
+                return f"_init_fields({constructor}, {fields})"
+            return constructor
+        if kind in ('ref', 'ptr'):
+            return 'None'
+        if kind == 'string':
+            return repr(init[1]) if init is not None and init[0] == 'lit' else "''"
+        if init is not None:
+            return self.assign_code(type_, self.expression(init, scope))
+        if kind == 'enum' or (kind == 'elem' and len(type_) > 2):
+            return str(type_[2])
+        return 'False' if type_[1] == 'BOOL' else '0.0' if type_[1] in REAL_TYPES else '0'
+
+    def require_type(self, key: str):
+        if key in self.names or key in self.in_progress:
+            return
+        self.in_progress.add(key)
+        name, spec, _ = self.project.types[key][1:]
+        class_name = 'T_' + name
+        scope = _Scope('struct', name)
+        if spec[0] == 'struct':
+            base = 'object'
+            if spec[1]:
+                self.require_type(spec[1].lower())
+                base = self.class_name(spec[1].lower())
+            fields = [(field_name, self.resolve_type(typespec, scope), init)
+                      for field_name, typespec, init, _ in spec[2]]
+            lines = [f"class {class_name}({base}):",
+                     f"    __slots__ = {tuple(_python_name(f[0]) for f in fields)!r}",
+                     "    def __init__(self):"]
+            if spec[1]:
+                lines.append(f"        {base}.__init__(self)")
+            lines += [f"        self.{_python_name(n)} = {self.default_code(t, i, scope)}" for n, t, i in fields]
+            if len(lines) == 3:
+                lines.append("        pass")
+        else:
+            size = 0
+            lines = [f"class {class_name}(UnionBase):", "    __slots__ = ()"]
+            for field_name, typespec, _, _ in spec[1]:
+                type_ = self.resolve_type(typespec, scope)
+                if type_[0] == 'array' and self.scalar(type_[2]) in STRUCT_FORMATS and len(type_[1]) == 1:
+                    fmt = STRUCT_FORMATS[self.scalar(type_[2])]
+                    (low, high), = type_[1]
+                    size = max(size, struct.calcsize('<' + fmt) * (high - low + 1))
+                    lines.append(f"    {_python_name(field_name)} = property("
+                                 f"lambda self: UnionArray(self._buffer, {fmt!r}, {low}))")
+                elif self.scalar(type_) in STRUCT_FORMATS:
+                    fmt = STRUCT_FORMATS[self.scalar(type_)]
+                    size = max(size, struct.calcsize('<' + fmt))
+                    lines.append(f"    {_python_name(field_name)} = _union_field({fmt!r})")
+                else:
+                    raise CompileError(f"{name}: поле UNION {field_name} не элементарного типа")
+            lines.append(f"    SIZE = {size}")
+        self.chunks.append('\n'.join(lines))
+        self.names[key] = class_name
+        self.in_progress.discard(key)
+
+    # ------------------------------------------------------------------- POU
+
+    def require_pou(self, key: str):
+        if key in self.names or key in self.in_progress:
+            return
+        if key not in self.project.pous:
+            raise CompileError(f"Неизвестный POU {key}")
+        self.in_progress.add(key)
+        _, kind, name, extends, return_type, sections, body, _ = self.project.pous[key]
+        scope = _Scope(kind, name)
+        storage = 'local' if kind == 'FUNCTION' else 'self'
+        declared = []
+        for section, _, fields in sections:
+            for field_name, typespec, init, _ in fields:
+                type_ = self.resolve_type(typespec, scope)
+                scope.variables[field_name.lower()] = (field_name, type_, storage)
+                declared.append((section, field_name, type_, init))
+
+        if kind == 'FUNCTION':
+            class_name = 'F_' + name
+            scope.result_type = self.resolve_type(return_type, scope) if return_type else None
+            parameters = [f"{_python_name(n)}={self.default_code(t, i, scope)}"
+                          for section, n, t, i in declared if section in ('VAR_INPUT', 'VAR_IN_OUT')]
+            lines = [f"def {class_name}({', '.join(parameters)}):"]
+            lines += [f"    {_python_name(n)} = {self.default_code(t, i, scope)}"
+                      for section, n, t, i in declared if section not in ('VAR_INPUT', 'VAR_IN_OUT')]
+            if scope.result_type is not None:
+                lines.append(f"    _result = {self.default_code(scope.result_type, None, scope)}")
+            outputs = [_python_name(n) for section, n, _, _ in declared if section == 'VAR_OUTPUT']
+            # С VAR_OUTPUT функция возвращает кортеж (результат, выходы...)
+            scope.return_code = 'return ' + ', '.join(
+                ['_result' if scope.result_type is not None else 'None'] + outputs) if outputs else (
+                'return _result' if scope.result_type is not None else 'return')
+            self.names[key] = class_name  # Рекурсия
+            lines += self.statements(body, scope, 1) or ['    pass']
+            lines.append('    ' + scope.return_code)
+        else:
+            class_name = 'FB_' + name if not name.upper().startswith(('FB_', 'PRG_')) else name
+            base = 'object'
+            if extends:
+                self.require_pou(extends.lower())
+                base = self.names[extends.lower()]
+                for inherited_key, (inherited_name, type_) in self.members(('fb', extends.lower())).items():
+                    scope.variables.setdefault(inherited_key, (inherited_name, type_, 'self'))
+            self.names[key] = class_name
+            slots = tuple(_python_name(n) for _, n, _, _ in declared)
+            lines = [f"class {class_name}({base}):",
+                     f"    __slots__ = {slots!r}",
+                     "    def __init__(self):"]
+            if extends:
+                lines.append(f"        {base}.__init__(self)")
+            lines += [f"        self.{_python_name(n)} = {self.default_code(t, i, scope)}" for _, n, t, i in declared]
+            if len(lines) == 3:
+                lines.append("        pass")
+            references = [f"{_python_name(n)!r}: lambda: " + (
+                f"ObjectRef({self.default_code(t[1], None, scope)})" if self.scalar(t[1])
+                else self.default_code(t[1], None, scope)) for _, n, t, _ in declared if t[0] == 'ref']
+            if references:
+                lines.insert(2, f"    _REFS = {{{', '.join(references)}}}")
+            lines.append("    def __call__(self):")
+            lines += self.statements(body, scope, 2) or ['        pass']
+        self.chunks.append('\n'.join(lines))
+        self.in_progress.discard(key)
+
+    def finish(self) -> ProgramImage:
+        scope = _Scope('globals', 'G')
+        lines = ["class _Globals:",
+                 f"    __slots__ = {tuple(_python_name(n) for n, _, _ in self.globals_used.values())!r}",
+                 "    def __init__(self):"]
+        lines += [f"        self.{_python_name(n)} = {self.default_code(t, i, scope)}"
+                  for n, t, i in self.globals_used.values()] or ["        pass"]
+        self.chunks.append('\n'.join(lines))
+        names = dict(self.names)
+        return ProgramImage('\n\n\n'.join(self.chunks) + '\n', names)
+
+    # -------------------------------------------------------------- операторы
+
+    def statements(self, body: tuple, scope: _Scope, depth: int) -> List[str]:
+        lines = []
+        for statement in body:
+            try:
+                lines += self.statement(statement, scope, depth)
+            except CompileError as e:
+                if str(e).startswith(f"{scope.name}:"):
+                    raise
+                raise CompileError(f"{scope.name}:{statement[1]}: {e}") from None
+        return lines
+
+    def statement(self, statement: tuple, scope: _Scope, depth: int) -> List[str]:
+        pad = '    ' * depth
+        kind = statement[0]
+        if kind in ('assign', 'call'):
+            lines = (self.assignment(statement[2], statement[3], scope) if kind == 'assign'
+                     else self.call_statement(statement[2], scope))
+            lines += scope.pending
+            scope.pending = []
+            return [pad + line for line in lines]
+        lines = self.control(statement, scope, depth)
+        if scope.pending:
+            raise CompileError("Выходы функции (=>) допустимы только в присваивании или вызове")
+        return lines
+
+    def control(self, statement: tuple, scope: _Scope, depth: int) -> List[str]:
+        pad = '    ' * depth
+        kind = statement[0]
+        if kind == 'if':
+            lines = []
+            for i, (condition, body) in enumerate(statement[2]):
+                code, _ = self.expression(condition, scope)
+                lines.append(f"{pad}{'if' if i == 0 else 'elif'} {code}:")
+                lines += self.statements(body, scope, depth + 1) or [pad + '    pass']
+            if statement[3]:
+                lines.append(pad + 'else:')
+                lines += self.statements(statement[3], scope, depth + 1) or [pad + '    pass']
+            return lines
+        if kind == 'case':
+            selector, _ = self.expression(statement[2], scope)
+            temp = scope.temp('_c')
+            lines = [f"{pad}{temp} = {selector}"]
+            for i, (labels, body) in enumerate(statement[3]):
+                tests = []
+                for low, high in labels:
+                    low_code, _ = self.expression(low, scope)
+                    if high is None:
+                        tests.append(f"{temp} == {low_code}")
+                    else:
+                        tests.append(f"{low_code} <= {temp} <= {self.expression(high, scope)[0]}")
+                lines.append(f"{pad}{'if' if i == 0 else 'elif'} {' or '.join(tests)}:")
+                lines += self.statements(body, scope, depth + 1) or [pad + '    pass']
+            if statement[4]:
+                lines.append(pad + ('else:' if statement[3] else 'if True:'))
+                lines += self.statements(statement[4], scope, depth + 1) or [pad + '    pass']
+            return lines
+        if kind == 'for':
+            _, _, variable, start, end, step, body = statement
+            target, _ = self.variable(variable, scope)
+            start_code, _ = self.expression(start, scope)
+            end_code, _ = self.expression(end, scope)
+            step_value = 1 if step is None else None
+            if step is not None and step[0] == 'lit':
+                step_value = step[1]
+            if step_value is not None:
+                stop = f"({end_code}) + 1" if step_value > 0 else f"({end_code}) - 1"
+                loop = f"range({start_code}, {stop}, {step_value})"
+            else:
+                step_code, _ = self.expression(step, scope)
+                temp = scope.temp('_s')
+                loop = (f"(lambda {temp}: range({start_code}, ({end_code}) + (1 if {temp} > 0 else -1), {temp}))"
+                        f"({step_code})")
+            index = scope.temp('_i')
+            lines = [f"{pad}for {index} in {loop}:", f"{pad}    {target} = {index}"]
+            return lines + self.statements(body, scope, depth + 1)
+        if kind == 'while':
+            code, _ = self.expression(statement[2], scope)
+            return [f"{pad}while {code}:"] + (self.statements(statement[3], scope, depth + 1) or [pad + '    pass'])
+        if kind == 'repeat':
+            code, _ = self.expression(statement[3], scope)
+            return ([f"{pad}while True:"] + self.statements(statement[2], scope, depth + 1) +
+                    [f"{pad}    if {code}:", f"{pad}        break"])
+        if kind == 'exit':
+            return [pad + 'break']
+        if kind == 'continue':
+            return [pad + 'continue']
+        if kind == 'return':
+            return [pad + scope.return_code]
+        raise CompileError(f"Неизвестный оператор {kind}")
+
+    def assign_code(self, type_: tuple, value: Tuple[str, tuple]) -> str:
+        """Привести значение к типу переменной (переполнение целых, REAL -> целое)"""
+        code, value_type = value
+        target = self.scalar(type_)
+        if target in INTEGER_TYPES:
+            source = self.scalar(value_type)
+            if source in REAL_TYPES:
+                return _wrap_code(f"_round({code})", target)
+            if source == target and not code.startswith('('):
+                return code
+            if source in INTEGER_TYPES or source is None:
+                if code.lstrip('-').isdigit():
+                    value = int(code)
+                    bits, signed = INTEGER_TYPES[target]
+                    low = -(1 << (bits - 1)) if signed else 0
+                    if low <= value < low + (1 << bits):
+                        return code
+                if source == target and value_type[0] == 'elem' and len(value_type) > 3:
+                    return code  # Уже в диапазоне типа
+                return _wrap_code(code, target)
+            if source == 'BOOL':
+                return f"int({code})"
+        elif target in REAL_TYPES and self.scalar(value_type) in INTEGER_TYPES and code.lstrip('-').isdigit():
+            return code + '.0'
+        if type_[0] in ('struct', 'union', 'fb', 'array') and not code.endswith(')'):
+            return f"_deepcopy({code})"
+        return code
+
+    def assignment(self, target: tuple, value: tuple, scope: _Scope) -> List[str]:
+        if target[0] == 'name' and target[1].lower() == scope.name.lower() and scope.result_type is not None:
+            return [f"_result = {self.assign_code(scope.result_type, self.expression(value, scope))}"]
+        if target[0] == 'bit':
+            container, container_type = self.lvalue(target[1], scope)
+            mask = 1 << target[2]
+            value_code, _ = self.expression(value, scope)
+            return [f"{container} = ({container} & ~{mask}) | ({mask} if {value_code} else 0)"]
+        code, type_ = self.lvalue(target, scope)
+        return [f"{code} = {self.assign_code(type_, self.expression(value, scope))}"]
+
+    def lvalue(self, target: tuple, scope: _Scope) -> Tuple[str, tuple]:
+        """Код для присваивания; ссылка на элементарный тип - через .value"""
+        code, type_ = self.access(target, scope)
+        if type_[0] == 'ref':
+            return f"{code}.value" if self.scalar(type_[1]) else code, type_[1]
+        return code, type_
+
+    # ----------------------------------------------------------------- вызовы
+
+    def call_statement(self, call: tuple, scope: _Scope) -> List[str]:
+        _, callee, arguments = call
+        if callee[0] == 'name' and self._is_function(callee[1], scope):
+            code, _ = self.call_expression(call, scope)
+            return [code]
+        instance, type_ = self.access(callee, scope)
+        if type_[0] == 'ref':
+            type_ = type_[1]
+        if type_[0] != 'fb':
+            raise CompileError(f"Вызов не ФБ: {callee!r}")
+        members = self.members(type_)
+        temp = scope.temp('_f')
+        lines = [f"{temp} = {instance}"]
+        outputs = []
+        assigned = {}
+        for name, expression, output in arguments:
+            if name is None:
+                raise CompileError("Позиционные аргументы ФБ не поддерживаются")
+            if expression is None:
+                continue
+            member_name, member_type = members.get(name.lower(), (None, None))
+            if member_name is None:
+                raise CompileError(f"{type_[1]}: нет параметра {name}")
+            if output:
+                outputs.append((expression, member_name))
+            elif member_type[0] == 'ref':
+                lines.append(f"{temp}.{_python_name(member_name)} = {self.reference(expression, scope)}")
+            else:
+                value = self.assign_code(member_type, self.expression(expression, scope))
+                assigned[member_name] = value
+                lines.append(f"{temp}.{_python_name(member_name)} = {value}")
+
+        if type_[1] in ('r_trig', 'f_trig'):
+            # Встроенный R_TRIG/F_TRIG: без вызова метода
+            clock = f"{temp}.CLK"
+            if 'CLK' in assigned:
+                lines[-1] = f"{temp}.CLK = _k = {assigned['CLK']}"
+                clock = '_k'
+            if type_[1] == 'r_trig':
+                lines += [f"{temp}.Q = {clock} and not {temp}.M", f"{temp}.M = {clock}"]
+            else:
+                lines += [f"{temp}.Q = not {clock} and not {temp}.M", f"{temp}.M = not {clock}"]
+        else:
+            lines.append(f"{temp}()")
+        for expression, member_name in outputs:
+            target, target_type = self.lvalue(expression, scope)
+            lines.append(f"{target} = {self.assign_code(target_type, (f'{temp}.{member_name}', members[member_name.lower()][1]))}")
+        return lines
+
+    def _is_function(self, name: str, scope: _Scope) -> bool:
+        key = name.lower()
+        if key in scope.variables:
+            return False
+        if key in self.project.pous:
+            return self.project.pous[key][1] == 'FUNCTION'
+        return key not in self.project.globals
+
+    def reference(self, expression: tuple, scope: _Scope) -> str:
+        """Объект-ссылка на переменную (для REFERENCE TO, ADR)"""
+        kind = expression[0]
+        code, type_ = self.access(expression, scope)
+        if type_[0] == 'ref':
+            return code  # Ссылка передаётся дальше
+        if type_[0] in ('struct', 'union', 'fb', 'array'):
+            return code
+        if kind == 'name':
+            entry = scope.variables.get(expression[1].lower())
+            if entry is not None and entry[2] == 'local':
+                raise CompileError(f"Ссылка на локальную переменную функции {expression[1]}")
+            owner, _, attribute = code.rpartition('.')
+            return f"AttrRef({owner}, {attribute!r})"
+        if kind == 'member':
+            owner, _, attribute = code.rpartition('.')
+            return f"AttrRef({owner}, {attribute!r})"
+        if kind == 'index':
+            container, _, index = code.rpartition('[')
+            return f"ItemRef({container}, {index[:-1]}, {self.size_of(type_)})"
+        raise CompileError(f"Нельзя взять ссылку на {expression!r}")
+
+    def size_of(self, type_: tuple) -> int:
+        name = self.scalar(type_)
+        if name in STRUCT_FORMATS:
+            return struct.calcsize('<' + STRUCT_FORMATS[name])
+        return 1
+
+    def call_expression(self, call: tuple, scope: _Scope) -> Tuple[str, tuple]:
+        _, callee, arguments = call
+        if callee[0] != 'name':
+            raise CompileError(f"Вызов в выражении: {callee!r}")
+        name = callee[1]
+        upper = name.upper()
+        positional = [expression for key, expression, _ in arguments if key is None]
+
+        builtin = self.builtin(upper, positional, arguments, scope)
+        if builtin is not None:
+            return builtin
+
+        key = name.lower()
+        if key not in self.project.pous or self.project.pous[key][1] != 'FUNCTION':
+            raise CompileError(f"Неизвестная функция {name}")
+        self.require_pou(key)
+        declaration = self.project.pous[key]
+        parameters = [field for section, _, fields in declaration[5] if section in ('VAR_INPUT', 'VAR_IN_OUT')
+                      for field in fields]
+        by_name = {field[0].lower(): field for field in parameters}
+        outputs = [field for section, _, fields in declaration[5] if section == 'VAR_OUTPUT' for field in fields]
+        output_index = {field[0].lower(): i + 1 for i, field in enumerate(outputs)}
+        temp = scope.temp('_o') if outputs else None
+        values = []
+        for i, (argument_name, expression, output) in enumerate(arguments):
+            if expression is None:
+                continue
+            if output:
+                if argument_name.lower() not in output_index:
+                    raise CompileError(f"{name}: нет выхода {argument_name}")
+                field = outputs[output_index[argument_name.lower()] - 1]
+                target, target_type = self.lvalue(expression, scope)
+                value = self.assign_code(target_type, (f"{temp}[{output_index[argument_name.lower()]}]",
+                                                       self.resolve_type(field[1])))
+                scope.pending.append(f"{target} = {value}")
+                continue
+            field = by_name.get(argument_name.lower()) if argument_name else parameters[i]
+            if field is None:
+                raise CompileError(f"{name}: нет параметра {argument_name}")
+            type_ = self.resolve_type(field[1])
+            if type_[0] == 'ref':
+                value = self.reference(expression, scope)
+            else:
+                value = self.assign_code(type_, self.expression(expression, scope))
+            values.append(f"{_python_name(field[0])}={value}")
+        return_type = self.resolve_type(declaration[4]) if declaration[4] else None
+        if outputs:
+            return f"({temp} := {self.names[key]}({', '.join(values)}))[0]", return_type
+        return f"{self.names[key]}({', '.join(values)})", return_type
+
+    def builtin(self, upper: str, args: List[tuple], arguments: tuple, scope: _Scope) -> Optional[Tuple[str, tuple]]:
+        """Стандартные функции IEC и преобразования типов"""
+        if upper in ('ADR', 'REF'):
+            expression = args[0]
+            code, type_ = self.access(expression, scope)
+            if type_[0] == 'array':
+                low = type_[1][0][0]
+                padded = low if 0 < low <= MAX_INDEX_PADDING else 0
+                return f"ItemRef({code}, {padded}, {self.size_of(type_[2])})", ('ptr', type_[2])
+            if type_[0] in ('struct', 'union', 'fb'):
+                return f"ObjectRef({code})", ('ptr', type_)
+            return self.reference(expression, scope), ('ptr', type_)
+        if upper == '__ISVALIDREF':
+            code, _ = self.access(args[0], scope)
+            return f"({code} is not None)", ('elem', 'BOOL')
+        if upper == 'SIZEOF':
+            _, type_ = self.access(args[0], scope)
+            return str(self.size_of(type_)), ('elem', 'ANYINT')
+        compiled = [self.expression(arg, scope) for arg in args]
+        codes = [code for code, _ in compiled]
+        first_type = compiled[0][1] if compiled else None
+        if upper == 'ABS':
+            return f"abs({codes[0]})", first_type
+        if upper in ('MIN', 'MAX'):
+            return f"{upper.lower()}({', '.join(codes)})", self.common_type(*[t for _, t in compiled])
+        if upper == 'LIMIT':
+            return f"min(max({codes[1]}, {codes[0]}), {codes[2]})", compiled[1][1]
+        if upper == 'SEL':
+            return f"({codes[2]} if {codes[0]} else {codes[1]})", self.common_type(compiled[1][1], compiled[2][1])
+        if upper == 'MUX':
+            return f"({', '.join(codes[1:])},)[{codes[0]}]", compiled[1][1]
+        if upper == 'MOVE':
+            return codes[0], first_type
+        if upper in ('SQRT', 'EXP', 'SIN', 'COS', 'TAN', 'ASIN', 'ACOS', 'ATAN'):
+            return f"_math.{upper.lower()}({codes[0]})", ('elem', 'LREAL')
+        if upper == 'LN':
+            return f"_math.log({codes[0]})", ('elem', 'LREAL')
+        if upper == 'LOG':
+            return f"_math.log10({codes[0]})", ('elem', 'LREAL')
+        if upper == 'EXPT':
+            return f"({codes[0]} ** {codes[1]})", ('elem', 'LREAL')
+        if upper == 'TRUNC':
+            return f"int({codes[0]})", ('elem', 'DINT')
+        if upper in ('SHL', 'SHR', 'ROL', 'ROR'):
+            type_name = self.scalar(first_type) or 'ANYINT'
+            bits = INTEGER_TYPES.get(type_name, (32, False))[0]
+            if upper == 'SHL':
+                return f"({codes[0]} << {codes[1]})", first_type
+            if upper == 'SHR':
+                return f"({codes[0]} >> {codes[1]})", first_type
+            left, right = (codes[1], f"{bits} - {codes[1]}") if upper == 'ROL' else (f"{bits} - {codes[1]}", codes[1])
+            return f"((({codes[0]} << {left}) | ({codes[0]} >> {right})) & {(1 << bits) - 1})", first_type
+        if '_TO_' in upper or upper.startswith('TO_'):
+            target = upper.rsplit('_TO_', 1)[-1] if '_TO_' in upper else upper[3:]
+            target = TYPE_ALIASES.get(target, target)
+            if target in REAL_TYPES:
+                return f"float({codes[0]})", ('elem', target)
+            if target == 'BOOL':
+                return f"({codes[0]} != 0)", ('elem', 'BOOL')
+            if target in INTEGER_TYPES:
+                source = self.scalar(first_type)
+                code = f"_round({codes[0]})" if source in REAL_TYPES else f"int({codes[0]})"
+                return '(' + _wrap_code(code, target) + ')', ('elem', target)
+            if target in ('STRING', 'WSTRING'):
+                return f"str({codes[0]})", ('string',)
+        return None
+
+    # ------------------------------------------------------------- выражения
+
+    @staticmethod
+    def common_type(*types: tuple) -> tuple:
+        names = [_Compiler.scalar(t) for t in types]
+        for name in names:
+            if name in REAL_TYPES:
+                return ('elem', 'LREAL' if 'LREAL' in names else 'REAL')
+        concrete = [n for n in names if n in INTEGER_TYPES and n != 'ANYINT']
+        if concrete:
+            return ('elem', max(concrete, key=lambda n: INTEGER_TYPES[n][0]))
+        return types[0] if types else None
+
+    def expression(self, expression: tuple, scope: _Scope) -> Tuple[str, tuple]:
+        """Код выражения Python и его тип"""
+        kind = expression[0]
+        if kind == 'lit':
+            value, literal_type = expression[1], expression[2]
+            if literal_type == 'INT':
+                return str(value), ('elem', 'ANYINT')
+            if literal_type == 'REAL':
+                return repr(float(value)), ('elem', 'ANYREAL')
+            return repr(value), ('elem', literal_type) if literal_type != 'STRING' else ('string',)
+        if kind == 'binary':
+            return self.binary(expression, scope)
+        if kind == 'unary':
+            code, type_ = self.expression(expression[2], scope)
+            if expression[1] == '-':
+                return f"(-{code})", type_
+            name = self.scalar(type_)
+            if name in INTEGER_TYPES:
+                bits, signed = INTEGER_TYPES[name]
+                return (f"(~{code})" if signed else f"(~{code} & {(1 << bits) - 1})"), type_
+            return f"(not {code})", ('elem', 'BOOL')
+        if kind == 'call':
+            return self.call_expression(expression, scope)
+        if kind == 'bit':
+            code, _ = self.expression(expression[1], scope)
+            return f"(({code} >> {expression[2]}) & 1 == 1)", ('elem', 'BOOL')
+        if kind == 'member' and expression[1][0] == 'name':
+            constant = self.enum_constant(expression[1][1], expression[2], scope)
+            if constant is not None:
+                return constant
+        if kind == 'name':
+            key = expression[1].lower()
+            if key not in scope.variables:
+                if key in scope.enum_members:
+                    return str(scope.enum_members[key]), ('elem', 'INT')
+                if scope.result_type is not None and key == scope.name.lower():
+                    return '_result', scope.result_type
+                if key not in self.project.globals and key in self.project.enum_members:
+                    options = self.project.enum_members[key]
+                    if len(options) == 1:
+                        return str(options[0][1]), ('enum', options[0][0], options[0][1])
+        code, type_ = self.access(expression, scope)
+        if type_[0] == 'ref' and self.scalar(type_[1]):
+            return f"{code}.value", type_[1]
+        if type_[0] == 'ref':
+            return code, type_[1]
+        return code, type_
+
+    def enum_constant(self, type_name: str, member: str, scope: _Scope) -> Optional[Tuple[str, tuple]]:
+        key = type_name.lower()
+        if key in scope.variables or key in self.project.globals:
+            return None
+        declaration = self.project.types.get(key)
+        if declaration is None or declaration[2][0] != 'enum':
+            return None
+        values = {name.lower(): value for name, value in self.project.enum_values(declaration[2][1]).items()}
+        if member.lower() not in values:
+            raise CompileError(f"{type_name}: нет значения {member}")
+        return str(values[member.lower()]), ('enum', key, values[member.lower()])
+
+    def binary(self, expression: tuple, scope: _Scope) -> Tuple[str, tuple]:
+        _, op, left, right = expression
+        left_code, left_type = self.expression(left, scope)
+        right_code, right_type = self.expression(right, scope)
+        comparisons = {'=': '==', '<>': '!=', '<': '<', '>': '>', '<=': '<=', '>=': '>='}
+        if op in comparisons:
+            return f"({left_code} {comparisons[op]} {right_code})", ('elem', 'BOOL')
+        left_name, right_name = self.scalar(left_type), self.scalar(right_type)
+        if left_type is not None and left_type[0] == 'ptr' and op in ('+', '-'):
+            return f"({left_code} {op} {right_code})", left_type
+        if op in ('AND', 'OR', 'XOR'):
+            if left_name == 'BOOL' or right_name == 'BOOL':
+                python_op = {'AND': 'and', 'OR': 'or', 'XOR': '!='}[op]
+                return f"({left_code} {python_op} {right_code})", ('elem', 'BOOL')
+            python_op = {'AND': '&', 'OR': '|', 'XOR': '^'}[op]
+            return f"({left_code} {python_op} {right_code})", self.common_type(left_type, right_type)
+        result_type = self.common_type(left_type, right_type)
+        is_real = self.scalar(result_type) in REAL_TYPES
+        if op == '/' and not is_real:
+            return f"_idiv({left_code}, {right_code})", result_type
+        if op == 'MOD':
+            return (f"_imod({left_code}, {right_code})" if not is_real else f"_math.fmod({left_code}, {right_code})"), \
+                result_type
+        if op == '**':
+            return f"({left_code} ** {right_code})", ('elem', 'LREAL')
+        return f"({left_code} {op} {right_code})", result_type
+
+    def variable(self, name: str, scope: _Scope) -> Tuple[str, tuple]:
+        """Код доступа к переменной по имени"""
+        key = name.lower()
+        entry = scope.variables.get(key)
+        if entry is not None:
+            declared, type_, storage = entry
+            return (f"self.{_python_name(declared)}" if storage == 'self' else _python_name(declared)), type_
+        if scope.result_type is not None and key == scope.name.lower():
+            return '_result', scope.result_type
+        entry = self.project.globals.get(key)
+        if entry is not None:
+            (declared, typespec, init, _), _ = entry
+            if key not in self.globals_used:
+                type_ = self.resolve_type(typespec)
+                self.globals_used[key] = (declared, type_, init)
+            return f"G.{_python_name(declared)}", self.globals_used[key][1]
+        raise CompileError(f"Неизвестная переменная {name}")
+
+    def access(self, expression: tuple, scope: _Scope) -> Tuple[str, tuple]:
+        """Код доступа к месту хранения (имя, поле, элемент, разыменование)"""
+        kind = expression[0]
+        if kind == 'name':
+            return self.variable(expression[1], scope)
+        if kind == 'member':
+            code, type_ = self.access(expression[1], scope)
+            if type_[0] == 'ref':
+                type_ = type_[1]
+            if type_[0] not in ('struct', 'union', 'fb'):
+                raise CompileError(f"Поле {expression[2]} у не-структуры")
+            member = self.members(type_).get(expression[2].lower())
+            if member is None:
+                raise CompileError(f"{type_[1]}: нет поля {expression[2]}")
+            return f"{code}.{_python_name(member[0])}", member[1]
+        if kind == 'index':
+            code, type_ = self.access(expression[1], scope)
+            if type_[0] == 'ref':
+                type_ = type_[1]
+            if type_[0] != 'array':
+                raise CompileError("Индекс у не-массива")
+            ranges = list(type_[1])
+            for index_expression in expression[2]:
+                if not ranges:
+                    raise CompileError("Лишний индекс массива")
+                low, _ = ranges.pop(0)
+                index_code, _ = self.expression(index_expression, scope)
+                offset = 0 if (0 < low <= MAX_INDEX_PADDING or len(type_) > 3) else low
+                if offset and index_code.lstrip('-').isdigit():
+                    index_code = str(int(index_code) - offset)
+                elif offset:
+                    index_code = f"{index_code} - {offset}"
+                code = f"{code}[{index_code}]"
+            element = ('array', tuple(ranges), type_[2]) if ranges else type_[2]
+            return code, element
+        if kind == 'deref':
+            code, type_ = self.expression(expression[1], scope)
+            if type_[0] != 'ptr':
+                raise CompileError("^ у не-указателя")
+            return f"{code}.value", type_[1]
+        if kind == 'bit':
+            raise CompileError("Доступ к биту не как выражение")
+        code, type_ = self.expression(expression, scope)
+        return code, type_
+
+
+def main():
+    """Главная функция"""
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description='Трансляция POU Structured Text в Python')
+    arg_parser.add_argument('pous', nargs='+', help='Имена POU-корней')
+    arg_parser.add_argument('--source', action='store_true', help='Вывести сгенерированный исходник')
+    args = arg_parser.parse_args()
+
+    print("=" * 60)
+    print("ST Runtime")
+    print("=" * 60)
+
+    project = Project.load()
+    try:
+        image = project.compile(args.pous)
+    except CompileError as e:
+        print(f"❌ {e}")
+        return 1
+    if args.source:
+        print(image.source)
+    print(f"✅ Откомпилировано: {', '.join(sorted(image.names.values()))}")
+    print(f"   Исходник: {image.source.count(chr(10))} строк")
+    print("=" * 60)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
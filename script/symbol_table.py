@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PLC Symbol Table
+=================
+Таблица символов проекта: объявления TYPE (STRUCT, UNION, перечисления),
+FUNCTION_BLOCK/PROGRAM/FUNCTION и VAR_GLOBAL из DataTypes/, Library/, Functions/
+и POUs/ по деревьям st_parser и IEC тип переменной по полному пути.
+
+Использование:
+    python3 symbol_table.py --check                               # Проверить типы вызовов FB_ModbusToSCADA.st
+    python3 symbol_table.py --check -v                            # То же + предупреждения и неразрешённые пути
+    python3 symbol_table.py "stDumper.MotorConveyor[1].VFD.wMotorCurrent"   # Тип переменной
+
+Возможности:
+    - Поля структур с наследованием (EXTENDS), объединения, перечисления, ФБ
+    - Пути с индексами массивов, REFERENCE TO, POINTER TO (^) и доступом к битам (wTag.3)
+    - Деревья берутся из общего кэша st_parser.SourceTree (db/st_ast_cache.marshal):
+      повторно разбираются только изменённые файлы
+    - Проверка типа и ширины (в регистрах) переменных во всех вызовах FC_Modbus*
+
+Дата: 2026-10-17
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple, Iterable
+
+from st_parser import CACHE_PATH, PROJECT_ROOT, ParseError, Parser, SourceTree
+
+# POU, в контексте которого разрешаются переменные карты Modbus
+DEFAULT_SCOPE = 'FB_ModbusToSCADA'
+
+# Ширина элементарных типов в 16-битных регистрах (BOOL - бит в регистре)
+IEC_TYPE_WORDS: Dict[str, int] = {
+    'BOOL': 0,
+    'BYTE': 1, 'SINT': 1, 'USINT': 1,
+    'WORD': 1, 'INT': 1, 'UINT': 1,
+    'DWORD': 2, 'DINT': 2, 'UDINT': 2, 'REAL': 2,
+    'TIME': 2, 'DATE': 2, 'TOD': 2, 'TIME_OF_DAY': 2, 'DT': 2, 'DATE_AND_TIME': 2,
+    'LWORD': 4, 'LINT': 4, 'ULINT': 4, 'LREAL': 4, 'LTIME': 4,
+}
+
+FLOAT_TYPES = ('REAL', 'LREAL')
+
+
+def format_typespec(typespec: tuple) -> str:
+    """Тип из дерева в виде объявления: ('array', ..., ('named', 'REAL')) -> 'ARRAY [1..2] OF REAL'"""
+    kind = typespec[0]
+    if kind == 'named':
+        return typespec[1]
+    if kind == 'array':
+        bounds = ', '.join(f"{_format_bound(low)}..{_format_bound(high)}" for low, high in typespec[1])
+        return f"ARRAY [{bounds}] OF {format_typespec(typespec[2])}"
+    if kind == 'ref':
+        return f"REFERENCE TO {format_typespec(typespec[1])}"
+    if kind == 'ptr':
+        return f"POINTER TO {format_typespec(typespec[1])}"
+    if kind == 'enum':
+        return typespec[2]  # Встроенное перечисление - базовый тип
+    return 'STRING'
+
+
+def _format_bound(expression: tuple) -> str:
+    """Граница массива: литерал или имя константы"""
+    if expression[0] in ('lit', 'name'):
+        return str(expression[1])
+    if expression[0] == 'unary' and expression[2][0] == 'lit':
+        return f"{expression[1]}{expression[2][1]}"
+    return '?'
+
+
+def _parse_path(path: str) -> Optional[tuple]:
+    """Путь к переменной в дерево выражения (None - не разбирается)"""
+    try:
+        parser = Parser(path)
+        node = parser.parse_expression()
+    except ParseError:
+        return None
+    return node if parser.peek()[0] == 'eof' else None
+
+
+class TypeCheckReport:
+    """Результат проверки типов переменных в вызовах FC_Modbus*"""
+
+    def __init__(self):
+        self.checked = 0
+        self.errors: List[Tuple[object, str]] = []
+        self.warnings: List[Tuple[object, str]] = []
+        self.unresolved: List[Tuple[object, str]] = []
+
+    def print_summary(self, verbose: bool = False):
+        """Вывести итоги проверки"""
+        print(f"   Проверено вызовов: {self.checked}")
+        print(f"   Ошибок типа: {len(self.errors)}")
+        print(f"   Неявных преобразований: {len(self.warnings)}")
+        print(f"   Не разрешено (выражения, неизвестные пути): {len(self.unresolved)}")
+
+        groups = [('❌', self.errors)]
+        if verbose:
+            groups += [('⚠️ ', self.warnings), ('❔', self.unresolved)]
+        for icon, issues in groups:
+            for reg, message in issues:
+                address = reg.register_address if reg.bit_index is None else f"{reg.register_address}.{reg.bit_index}"
+                print(f"   {icon} {reg.register_type}[{address}] {reg.variable_name}: {message}")
+
+
+class SymbolTable:
+    """Таблица символов: типы и глобальные переменные проекта (типы - узлы typespec дерева st_parser)"""
+
+    def __init__(self):
+        self.types: Dict[str, Dict] = {}
+        self.globals: Dict[str, tuple] = {}
+        self.duplicates: List[str] = []
+        self.errors: List[str] = []
+        self.files_total = 0
+        self.files_parsed = 0
+
+    @classmethod
+    def load(cls, root: Path = PROJECT_ROOT, cache_path: Optional[Path] = CACHE_PATH,
+             workers: Optional[int] = None) -> 'SymbolTable':
+        """
+        Построить таблицу символов по деревьям SourceTree (общий кэш st_parser)
+
+        Args:
+            cache_path: Файл кэша деревьев (None - без кэша)
+            workers: Процессов для разбора изменённых файлов (см. SourceTree.load)
+        """
+        return cls.from_tree(SourceTree.load(root, cache_path, workers))
+
+    @classmethod
+    def from_tree(cls, tree: SourceTree) -> 'SymbolTable':
+        """Построить таблицу символов по уже загруженному SourceTree"""
+        table = cls()
+        for path, declarations in tree.files:
+            table.add_declarations(declarations, path)
+        table.errors = list(tree.errors)
+        table.files_total = tree.files_total
+        table.files_parsed = tree.files_parsed
+        return table
+
+    def add_declarations(self, declarations: tuple, source: str = ''):
+        """Добавить объявления одного файла (первое объявление имени имеет приоритет)"""
+        for node in declarations:
+            if node[0] == 'globals':
+                for name, typespec, _, _ in node[2]:
+                    self.globals.setdefault(name.lower(), typespec)
+                continue
+
+            if node[0] == 'type':
+                _, name, spec, _ = node
+                declaration = {'name': name, 'kind': spec[0], 'extends': None, 'base': None, 'fields': ()}
+                if spec[0] == 'struct':
+                    declaration['extends'], declaration['fields'] = spec[1], spec[2]
+                elif spec[0] == 'union':
+                    declaration['fields'] = spec[1]
+                elif spec[0] == 'enum':
+                    declaration['base'] = ('named', spec[2])
+                else:
+                    declaration['base'] = spec[1]
+            else:
+                _, kind, name, extends, return_type, sections, _, _ = node
+                declaration = {'name': name, 'kind': kind.lower(), 'extends': extends, 'base': return_type,
+                               'fields': tuple(field for _, _, fields in sections for field in fields)}
+
+            key = name.lower()
+            if key in self.types:
+                self.duplicates.append(f"{name} ({source})")
+                continue
+            self.types[key] = dict(declaration, source=source)
+
+    def members(self, type_name: str) -> Dict[str, tuple]:
+        """Поля структуры/объединения/ФБ с учётом наследования (ключи в нижнем регистре)"""
+        result: Dict[str, tuple] = {}
+        declaration = self.types.get(type_name.lower())
+        seen = set()
+        while declaration and declaration['name'] not in seen:
+            seen.add(declaration['name'])
+            for name, typespec, _, _ in declaration['fields']:
+                result.setdefault(name.lower(), typespec)
+            declaration = self.types.get((declaration['extends'] or '').lower())
+        return result
+
+    def resolve(self, path: str, scope: Optional[str] = DEFAULT_SCOPE) -> Optional[str]:
+        """
+        Определить объявленный тип переменной по пути
+
+        Args:
+            path: Путь к переменной (например, 'stDumper.MotorConveyor[1].VFD.wMotorCurrent')
+            scope: POU, в котором используется путь (None - только глобальные переменные)
+
+        Returns:
+            Тип как в объявлении ('REAL', 'U_RealToWord', ...) или None
+        """
+        node = _parse_path(path)
+        typespec = self._resolve_node(node, scope) if node is not None else None
+        return None if typespec is None else format_typespec(self._dereference(typespec))
+
+    def _resolve_node(self, node: tuple, scope: Optional[str]) -> Optional[tuple]:
+        """Тип узла выражения-пути ('name', 'member', 'index', 'bit', 'deref') или None"""
+        kind = node[0]
+        if kind == 'name':
+            head = node[1].lower()
+            typespec = self.members(scope).get(head) if scope is not None else None
+            if typespec is None:
+                typespec = self.globals.get(head)
+            if typespec is None:
+                program = self.types.get(head)
+                if program and program['kind'] == 'program':
+                    typespec = ('named', program['name'])
+            return typespec
+        if kind not in ('member', 'index', 'bit', 'deref'):
+            return None  # Выражение, а не путь к переменной
+
+        typespec = self._resolve_node(node[1], scope)
+        if typespec is None:
+            return None
+        typespec = self._dereference(typespec)
+        if kind == 'member':
+            return self.members(typespec[1]).get(node[2].lower()) if typespec[0] == 'named' else None
+        if kind == 'bit':
+            elementary = self._elementary(typespec)
+            if not IEC_TYPE_WORDS.get(elementary or '') or elementary in FLOAT_TYPES:
+                return None
+            return ('named', 'BOOL')
+        if kind == 'index':
+            return typespec[2] if typespec[0] == 'array' else None
+        return typespec[1] if typespec[0] == 'ptr' else None
+
+    def _dereference(self, typespec: tuple) -> tuple:
+        """REFERENCE TO X -> X (ссылка прозрачна при обращении)"""
+        while typespec[0] == 'ref':
+            typespec = typespec[1]
+        return typespec
+
+    def _elementary(self, typespec: tuple) -> Optional[str]:
+        """Элементарный IEC тип узла typespec (см. elementary_type)"""
+        if typespec[0] == 'enum':
+            return self.elementary_type(typespec[2])
+        return self.elementary_type(typespec[1]) if typespec[0] == 'named' else None
+
+    def elementary_type(self, type_name: str) -> Optional[str]:
+        """
+        Элементарный IEC тип: псевдонимы раскрываются, перечисления заменяются базовым типом
+
+        Returns:
+            'REAL', 'INT', ... или None для составных типов
+        """
+        seen = set()
+        while type_name:
+            upper = type_name.upper()
+            if upper in IEC_TYPE_WORDS:
+                return upper
+            declaration = self.types.get(type_name.lower())
+            if not declaration or declaration['kind'] not in ('alias', 'enum') or upper in seen:
+                return None
+            seen.add(upper)
+            base = declaration['base']
+            if base[0] == 'enum':
+                base = ('named', base[2])
+            type_name = base[1] if base[0] == 'named' else None
+        return None
+
+    def check_register(self, data_type: str, variable_name: str,
+                       scope: Optional[str] = DEFAULT_SCOPE, seconds_to_time: bool = False) -> Tuple[str, str]:
+        """
+        Проверить, что тип переменной соответствует функции FC_Modbus*
+
+        Args:
+            data_type: Тип данных функции (BOOL, REAL, INT, ...)
+            variable_name: Путь к переменной в вызове
+            seconds_to_time: REAL передаётся в TIME через REAL_TO_TIME(... * 1000)
+                (ModbusRegister.seconds_to_time)
+
+        Returns:
+            (уровень, сообщение): уровень 'ok', 'warning', 'error' или 'unresolved'
+        """
+        declared = self.resolve(variable_name, scope)
+        if declared is None:
+            return 'unresolved', 'тип не определён'
+
+        actual = self.elementary_type(declared)
+        if actual is None:
+            return 'error', f"составной тип {declared} вместо {data_type}"
+        if actual == data_type:
+            return 'ok', ''
+        if data_type == 'REAL' and actual == 'TIME':
+            # Уставка времени в секундах: X := REAL_TO_TIME(rTempTime * 1000)
+            if seconds_to_time:
+                return 'ok', ''
+            return 'error', f"{declared} (TIME) передаётся как REAL без REAL_TO_TIME(... * 1000)"
+
+        expected_words = IEC_TYPE_WORDS[data_type]
+        actual_words = IEC_TYPE_WORDS[actual]
+        if data_type == 'BOOL' or actual == 'BOOL':
+            return 'error', f"{declared} ({actual}) вместо {data_type}"
+        if expected_words != actual_words:
+            return 'error', (f"ширина {actual} ({actual_words} рег.) не совпадает "
+                             f"с {data_type} ({expected_words} рег.)")
+        if (actual in FLOAT_TYPES) != (data_type in FLOAT_TYPES):
+            return 'error', f"{actual} передаётся как {data_type}"
+        return 'warning', f"неявное преобразование {declared} ({actual}) -> {data_type}"
+
+    def check_registers(self, registers: Iterable, scope: Optional[str] = DEFAULT_SCOPE) -> TypeCheckReport:
+        """Проверить все регистры (объекты с data_type, variable_name и, необязательно, seconds_to_time)"""
+        report = TypeCheckReport()
+        targets = {'error': report.errors, 'warning': report.warnings, 'unresolved': report.unresolved}
+        for reg in registers:
+            report.checked += 1
+            level, message = self.check_register(reg.data_type, reg.variable_name, scope,
+                                                 getattr(reg, 'seconds_to_time', False))
+            if level != 'ok':
+                targets[level].append((reg, message))
+        return report
+
+
+def main():
+    """Главная функция"""
+    verbose = '--verbose' in sys.argv or '-v' in sys.argv
+    paths = [arg for arg in sys.argv[1:] if not arg.startswith('-')]
+
+    start = time.perf_counter()
+    table = SymbolTable.load()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    print("=" * 60)
+    print("PLC Symbol Table")
+    print("=" * 60)
+    print(f"   Файлов: {table.files_total} (разобрано заново: {table.files_parsed})")
+    for error in table.errors:
+        print(f"   ❌ {error}")
+    print(f"   Типов и POU: {len(table.types)}")
+    print(f"   Глобальных переменных: {len(table.globals)}")
+    print(f"   Загрузка: {elapsed_ms:.1f} мс")
+
+    for path in paths:
+        declared = table.resolve(path)
+        elementary = table.elementary_type(declared) if declared else None
+        suffix = f" ({elementary})" if elementary and elementary != declared.upper() else ''
+        print(f"\n   {path}: {declared or '❌ не найдено'}{suffix}")
+
+    if '--check' in sys.argv:
+        from migrate_from_fc import FC_ModbusParser, FC_MODBUS_PATH
+
+        print(f"\n🔎 Проверка типов: {FC_MODBUS_PATH.name}")
+        report = table.check_registers(FC_ModbusParser(FC_MODBUS_PATH).iter_registers())
+        report.print_summary(verbose)
+        print("=" * 60)
+        return 1 if report.errors else 0
+
+    print("=" * 60)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
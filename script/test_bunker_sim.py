@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тестовый скрипт для проверки моделирования бункеров (bunker_sim)
+"""
+
+import sys
+from pathlib import Path
+
+# Добавить путь к модулю
+sys.path.insert(0, str(Path(__file__).parent))
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from bunker_sim import CYCLE, GREEN, OFF, RED, YELLOW, BunkerModel, make_scenarios, run, simulate
+
+
+def _stimulus(step):
+    """Частоты и светофоры, проходящие все ветки модели"""
+    frequency = [20.0 + 15.0 * ((step // 97) % 3), 35.0, 10.0 + (step % 40)]
+    light = [(GREEN, YELLOW, RED, OFF)[(step // 300) % 4], YELLOW if step % 500 < 350 else RED, GREEN]
+    return frequency, light
+
+
+def test_plc_fill_matches_fb_simulation():
+    from st_runtime import Project
+
+    runtime = Project.load().runtime(['FB_Simulation'])
+    fb = runtime.bind(runtime.new('FB_Simulation'))
+    runtime.G.SIMULATION_BUNKER_WEIGHT = True
+    fb.xEnable = True
+    fb()  # Инициализация: бункеры полные
+    runtime.advance(int(CYCLE * 1000))
+
+    # Шум и дрейф уже сделали шаг на цикле инициализации
+    model = BunkerModel(1, [fb._nRandomSeed[b] for b in (1, 2, 3)],
+                        drift_offset=[fb._rDriftOffset[b] for b in (1, 2, 3)], plc_fill=True)
+    for step in range(2000):
+        frequency, light = _stimulus(step)
+        if step == 1500:
+            model.weight[0, 2] = fb.Bunker[3].rWeight = 9.0  # Критический бункер с зелёным светофором
+        for b in range(3):
+            fb.Bunker[b + 1].eLightColor = light[b]
+            for m in (1, 2):
+                fb.Bunker[b + 1].MotorVibFeeder[m].VFD.rActualFrequency = frequency[b]
+        fb()
+        runtime.advance(int(CYCLE * 1000))
+        under_bunker = model.step(np.array([frequency]), np.array([light]))[0]
+
+        assert list(model.seeds[0]) == [fb._nRandomSeed[b] for b in (1, 2, 3)], step
+        assert list(model.weight[0]) == pytest.approx([fb.Bunker[b].rWeight for b in (1, 2, 3)], abs=1e-2), step
+        # Дрейф копится в REAL (float32), st_runtime считает в double: отражение от предела может сдвинуться на цикл
+        assert list(under_bunker) == pytest.approx([fb.Bunker[b].rWeightUnderBunker for b in (1, 2, 3)],
+                                                   rel=1e-3), step
+        assert list(model.fill_active[0]) == [fb._xFillTimerActive[b] for b in (1, 2, 3)], step
+
+
+def test_periodic_fill_duty_cycle():
+    # Без расхода, жёлтый светофор: ожидание периода, затем 3 с заполнения по 0.3 кг/с
+    model = BunkerModel(2, fill_period=[8.0, 4.0])
+    model.weight[:] = 50
+    frequency = np.zeros((2, 3))
+    light = np.full((2, 3), YELLOW)
+    active = []
+    for _ in range(450):
+        model.step(frequency, light)
+        active.append(model.fill_active[:, 0].copy())
+    active = np.array(active)
+    assert active[:, 0].sum() == 2 * 60 and active[:, 1].sum() == 3 * 60
+    assert not active[:160, 0].any() and active[160:220, 0].all() and not active[220:381, 0].any()
+    assert model.weight[0, 0] == pytest.approx(50 + 2 * 61 * 0.3 * CYCLE, abs=0.01)  # Включая цикл срабатывания TON
+
+    plc = BunkerModel(1, plc_fill=True)
+    plc.weight[:] = 50
+    for _ in range(450):
+        plc.step(frequency[:1], light[:1])
+    assert plc.weight[0, 0] == pytest.approx(50 + (450 - 160) * 0.3 * CYCLE, abs=0.01)  # Заполнение каждый цикл
+
+
+def test_empty_event_and_statistics():
+    scenarios = make_scenarios(8, seed=1, fill_period=(60.0, 120.0))
+    result = simulate(scenarios, duration=600.0, fill_duration=0.5)
+    assert result['error_histogram'].sum() > 0 and result['error_mean'].shape == (8,)
+    empty = np.isfinite(result['empty_time'])
+    assert empty.all() and (result['empty_bunker'] > 0).all()
+    assert (result['min_weight'] <= 0).all() and (result['critical_time'] > 0).all()
+
+    nominal = simulate(make_scenarios(1), duration=120.0)
+    assert np.isinf(nominal['empty_time'][0]) and nominal['error_max'][0] < 0.1
+
+
+def test_pool_matches_serial():
+    scenarios = make_scenarios(6, seed=3)
+    serial = run(scenarios, workers=1, duration=60.0)
+    pooled = run(scenarios, workers=3, chunk_size=2, duration=60.0)
+    for key in serial:
+        assert np.array_equal(serial[key], pooled[key]), key
+
+
+def main():
+    print("=" * 80)
+    print("Тест моделирования бункеров")
+    print("=" * 80)
+
+    failed = 0
+    for test in (test_plc_fill_matches_fb_simulation, test_periodic_fill_duty_cycle, test_empty_event_and_statistics,
+                 test_pool_matches_serial):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 80)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
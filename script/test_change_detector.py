@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тестовый скрипт для проверки детектора изменений с мёртвыми зонами
+"""
+
+import shutil
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+# Добавить путь к модулю
+sys.path.insert(0, str(Path(__file__).parent))
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from change_detector import ChangeDetector, load_deadbands
+from migrate_from_fc import DatabaseMigrator, SCHEMA_PATH
+from modbus_server import RegisterImage
+
+NAMES = ['rWeight', 'rLevel', 'xRun', 'iState']
+TYPES = ['REAL', 'REAL', 'BOOL', 'INT']
+DEADBANDS = {'rWeight': (0.5, 0), 'rLevel': (0, 10), 'xRun': (5, 50)}
+
+
+def test_first_frame_is_baseline():
+    detector = ChangeDetector(NAMES, TYPES, DEADBANDS)
+    assert len(detector.update([1.0, 100.0, 0, 3])) == 0
+    changes = detector.update([1.0, 100.0, 1, 2])
+    assert changes.to_dicts() == [
+        {'name': 'xRun', 'value': 1.0, 'previous': 0.0, 'difference': 1.0, 'increased': True, 'decreased': False},
+        {'name': 'iState', 'value': 2.0, 'previous': 3.0, 'difference': -1.0, 'increased': False, 'decreased': True},
+    ]
+
+
+def test_absolute_deadband_accumulates_drift():
+    detector = ChangeDetector(NAMES, TYPES, DEADBANDS)
+    detector.update([10.0, 100.0, 0, 0])
+    assert len(detector.update([10.3, 100.0, 0, 0])) == 0
+    assert len(detector.update([10.5, 100.0, 0, 0])) == 0  # Ровно на границе - не изменение
+    changes = detector.update([10.6, 100.0, 0, 0])
+    assert changes.names == ['rWeight'] and changes.previous.tolist() == [10.0]
+    assert changes.difference[0] == pytest.approx(0.6)
+    assert len(detector.update([10.9, 100.0, 0, 0])) == 0  # Опорное значение - 10.6
+
+
+def test_percent_deadband_and_nan():
+    detector = ChangeDetector(NAMES, TYPES, DEADBANDS)
+    detector.update([0.0, 100.0, 0, 0])
+    assert len(detector.update([0.0, 109.0, 0, 0])) == 0
+    assert detector.update([0.0, 89.0, 0, 0]).names == ['rLevel']
+    assert detector.update([0.0, np.nan, 0, 0]).names == ['rLevel']
+    assert len(detector.update([0.0, np.nan, 0, 0])) == 0
+    assert detector.update([0.0, 5.0, 0, 0]).names == ['rLevel']
+
+
+def test_reset_and_frames():
+    image = RegisterImage([('rWeight', 'REAL', 10, None), ('xRun', 'BOOL', 0, 3)])
+    detector = ChangeDetector.from_plan(image.plan, {'rWeight': (1.0, 0)})
+    image.set_values({'rWeight': 5.0})
+    detector.update_frame(image.words)
+    image.set_values({'rWeight': 7.0, 'xRun': True})
+    assert detector.update_frame(image.words).names == ['rWeight', 'xRun']
+    detector.reset()
+    image.set_values({'rWeight': 20.0})
+    assert len(detector.update_frame(image.words)) == 0
+
+
+def test_deadbands_from_upgraded_database():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'modbus_registers.db'
+        shutil.copy(Path(__file__).parent / 'db' / 'modbus_registers.db', db_path)
+        assert load_deadbands(db_path) == {}  # Старая схема без колонок deadband
+
+        migrator = DatabaseMigrator(db_path, SCHEMA_PATH)
+        migrator.open_database()
+        migrator.close()
+
+        conn = sqlite3.connect(db_path)
+        name = conn.execute("""
+            SELECT variable_name FROM registers WHERE data_type_id = 2 AND register_type_id = 2
+            ORDER BY register_address LIMIT 1
+        """).fetchone()[0]
+        conn.execute("UPDATE registers SET deadband = 0.25, deadband_percent = 1 WHERE variable_name = ?", (name,))
+        conn.commit()
+        conn.close()
+
+        assert load_deadbands(db_path, 'input_registers') == {name: (0.25, 1.0)}
+        detector = ChangeDetector.from_database(db_path, 'input_registers')
+        column = detector.names.index(name)
+        assert (detector.absolute[column], detector.fraction[column]) == (0.25, 0.01)
+        assert np.count_nonzero(detector.absolute) == 1
+
+
+def main():
+    print("=" * 80)
+    print("Тест детектора изменений")
+    print("=" * 80)
+
+    failed = 0
+    for test in (test_first_frame_is_baseline, test_absolute_deadband_accumulates_drift,
+                 test_percent_deadband_and_nan, test_reset_and_frames, test_deadbands_from_upgraded_database):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 80)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тестовый скрипт для проверки журнала кадров и воспроизведения
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Добавить путь к модулю
+sys.path.insert(0, str(Path(__file__).parent))
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from frame_log import FrameLogReader, FrameLogWriter, encode_runs, sink_server
+from modbus_server import ModbusServer, RegisterImage
+from register_decoder import IMAGE_WORDS
+
+
+def _frames(count: int, seed: int = 0):
+    """Кадры с редкими изменениями отдельных слов"""
+    rng = np.random.default_rng(seed)
+    frames = np.zeros((count, IMAGE_WORDS), dtype=np.uint16)
+    frames[0] = rng.integers(0, 65536, IMAGE_WORDS)
+    for i in range(1, count):
+        frames[i] = frames[i - 1]
+        changed = rng.integers(0, IMAGE_WORDS, rng.integers(0, 6))
+        frames[i, changed] = rng.integers(0, 65536, len(changed))
+    return frames
+
+
+def test_encode_runs_merges_small_gaps():
+    previous = np.zeros(20, dtype=np.uint16)
+    current = previous.copy()
+    current[[1, 2, 5, 9, 19]] = 1
+    assert encode_runs(previous, current) == [(1, 5), (9, 1), (19, 1)]
+    assert encode_runs(previous, previous) == []
+
+
+def test_round_trip_with_keyframes():
+    inputs, holdings = _frames(300, 1), _frames(300, 2)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'log.mbfl'
+        with FrameLogWriter(path, keyframe_interval=100) as log:
+            for i in range(300):
+                log.write(1000.0 + i * 0.1, 'input_registers', inputs[i])
+                if i % 3 == 0:
+                    log.write(1000.0 + i * 0.1 + 0.05, 'holding_registers', holdings[i])
+
+        records = [(t, image, words.copy()) for t, image, words in FrameLogReader(path)]
+        assert len(records) == 400
+        read_inputs = np.array([w for _, image, w in records if image == 'input_registers'])
+        read_holdings = np.array([w for _, image, w in records if image == 'holding_registers'])
+        assert np.array_equal(read_inputs, inputs) and np.array_equal(read_holdings, holdings[::3])
+        assert records[1][0] == pytest.approx(1000.05)
+
+        # Дельты вместо полных кадров
+        assert path.stat().st_size < inputs.nbytes / 10
+
+
+def test_batches_and_truncated_tail():
+    frames = _frames(50)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'log.mbfl'
+        with FrameLogWriter(path) as log:
+            for i, frame in enumerate(frames):
+                log.write(float(i), 'input_registers', frame)
+
+        batches = list(FrameLogReader(path).batches('input_registers', 16))
+        assert [len(times) for times, _ in batches] == [16, 16, 16, 2]
+        assert np.array_equal(np.concatenate([f for _, f in batches]), frames)
+
+        path.write_bytes(path.read_bytes()[:-3])  # Запись прервана посреди кадра
+        assert len(list(FrameLogReader(path))) == 49
+
+
+def test_reader_maps_file_instead_of_loading():
+    frames = _frames(20)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'log.mbfl'
+        with FrameLogWriter(path) as log:
+            for i, frame in enumerate(frames):
+                log.write(float(i), 'input_registers', frame)
+
+        reader = FrameLogReader(path)
+        assert isinstance(reader.data, np.memmap) and len(reader.data) == path.stat().st_size
+        assert np.array_equal(np.array([words.copy() for _, _, words in reader]), frames)
+        del reader
+
+        path.write_bytes(b'MB')  # Короче заголовка
+        with pytest.raises(ValueError):
+            FrameLogReader(path)
+
+
+def test_replay_into_server_at_speed():
+    image = RegisterImage([('rWeight', 'REAL', 10, None)])
+    server = ModbusServer(RegisterImage([]), image)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'log.mbfl'
+        with FrameLogWriter(path) as log:
+            for i, weight in enumerate((1.0, 2.0, 3.0)):
+                image.set_values({'rWeight': weight})
+                log.write(i * 1.0, 'input_registers', image.words)
+        image.words[:] = 0
+
+        seen = []
+        sink = sink_server(server)
+
+        async def scenario(speed):
+            start = time.perf_counter()
+            await FrameLogReader(path).replay(
+                lambda t, name, words: (sink(t, name, words), seen.append(server.input.values()['rWeight'])), speed)
+            return time.perf_counter() - start
+
+        assert asyncio.run(scenario(20.0)) >= 0.09  # 2 с записи при 20x
+        assert asyncio.run(scenario(None)) < 0.05
+        assert seen == [1.0, 2.0, 3.0] * 2
+
+
+def main():
+    print("=" * 80)
+    print("Тест журнала кадров")
+    print("=" * 80)
+
+    failed = 0
+    for test in (test_encode_runs_merges_small_gaps, test_round_trip_with_keyframes,
+                 test_batches_and_truncated_tail, test_reader_maps_file_instead_of_loading,
+                 test_replay_into_server_at_speed):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 80)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
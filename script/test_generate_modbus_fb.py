@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тестовый скрипт для проверки генератора FB_ModbusToSCADA (generate_modbus_fb)
+"""
+
+import random
+import re
+import struct
+import sys
+import tempfile
+from pathlib import Path
+
+# Добавить путь к модулю
+sys.path.insert(0, str(Path(__file__).parent))
+
+import pytest
+
+from generate_modbus_fb import (ModbusFBGenerator, Section, _scan_cost, compare_maps, read_interface, register_map,
+                                text_register_map)
+from migrate_from_fc import FC_MODBUS_PATH, SCHEMA_PATH, DatabaseMigrator, FC_ModbusParser, ModbusRegister
+from st_parser import parse_text, project_files
+from st_runtime import ObjectRef, Project
+from symbol_table import SymbolTable
+
+_PATH_RE = re.compile(r'(\w+)|\[(\d+)\]')
+
+
+def _generate(tmp: Path):
+    """БД, синхронизированная с текущим FB, и сгенерированный по ней текст"""
+    migrator = DatabaseMigrator(tmp / 'test.db', SCHEMA_PATH)
+    migrator.open_database()
+    migrator.sync(FC_ModbusParser(FC_MODBUS_PATH))
+    table = SymbolTable.load(cache_path=None)
+    return migrator, ModbusFBGenerator.from_database(migrator.db_path, table=table).generate(read_interface())
+
+
+@pytest.fixture(scope='module')
+def generated(tmp_path_factory):
+    return _generate(tmp_path_factory.mktemp('db'))
+
+
+def _member(obj, name):
+    """Имя атрибута объекта st_runtime без учёта регистра (ST регистронезависим)"""
+    for attribute in dir(obj):
+        if attribute.lower() == name.lower():
+            return attribute
+    return None
+
+
+def _location(runtime, fb, path):
+    """(контейнер, ключ) переменной по пути ST: stBunker[1].VFD.rFreq, SCADA_HEARTBEAT_TIMEOUT"""
+    steps = _PATH_RE.findall(path)
+    container = fb if _member(fb, steps[0][0]) else runtime.G
+    key = _member(container, steps[0][0])
+    for name, index in steps[1:]:
+        value = container[key] if isinstance(key, int) else getattr(container, key)
+        if isinstance(value, ObjectRef):
+            value = value.value
+        container, key = (value, int(index)) if index else (value, _member(value, name))
+    value = container[key] if isinstance(key, int) else getattr(container, key)
+    return (value, 'value') if isinstance(value, ObjectRef) else (container, key)
+
+
+def _get(runtime, fb, path):
+    container, key = _location(runtime, fb, path)
+    return container[key] if isinstance(key, int) else getattr(container, key)
+
+
+def _set(runtime, fb, path, value):
+    container, key = _location(runtime, fb, path)
+    if isinstance(key, int):
+        container[key] = value
+    else:
+        setattr(container, key, value)
+
+
+def test_round_trip_maps_every_address(generated):
+    migrator, text = generated
+    expected = register_map(FC_MODBUS_PATH)
+    assert len(expected) == 641
+    assert compare_maps(expected, text_register_map(text)) == []
+    assert 'FC_Modbus' not in text and 'rTempTime' not in text
+    assert text.count('awModbusInputRegisters[0] := wBits;') == 1  # Слово статусов собирается один раз
+
+    # Сгенерированный файл снова мигрируется в ту же БД без изменений регистров
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / FC_MODBUS_PATH.name
+        path.write_text(text, encoding='utf-8')
+        stats = migrator.sync(FC_ModbusParser(path))
+    assert (stats['inserted'], stats['updated'], stats['deleted'], stats['sections_removed']) == (0, 0, 0, 0)
+
+
+def test_generated_fb_behaves_like_current(generated):
+    _, text = generated
+    files = project_files()
+    runtimes = []
+    for declarations in (files, [(path, parse_text(text) if Path(path).name == FC_MODBUS_PATH.name else ast)
+                                 for path, ast in files]):
+        runtime = Project(declarations).runtime(['FB_ModbusToSCADA'])
+        runtimes.append((runtime, runtime.bind(runtime.new('FB_ModbusToSCADA'))))
+
+    mapping = register_map(FC_MODBUS_PATH)
+    rng = random.Random(7)
+    for _ in range(3):
+        holding = [rng.getrandbits(16) for _ in range(512)]
+        values = {}
+        for (register_type, address, _), (data_type, variable, _) in mapping.items():
+            if register_type == 'holding_registers' and data_type == 'REAL':
+                holding[address:address + 2] = struct.unpack('>HH', struct.pack('>f', rng.uniform(0, 100)))
+            elif register_type == 'input_registers' and re.fullmatch(r'[\w.\[\]]+', variable):
+                values[variable] = {'BOOL': rng.random() < 0.5, 'REAL': rng.uniform(-1e3, 1e3)}.get(
+                    data_type, rng.randrange(6))
+
+        for runtime, fb in runtimes:
+            runtime.G.awModbusHoldingRegisters[:] = holding
+            for variable, value in values.items():
+                _set(runtime, fb, variable, value)
+            fb()
+
+        (current, current_fb), (new, new_fb) = runtimes
+        assert new.G.awModbusInputRegisters == current.G.awModbusInputRegisters
+        for (register_type, _, _), (_, variable, _) in mapping.items():
+            if register_type == 'holding_registers':
+                assert _get(new, new_fb, variable) == _get(current, current_fb, variable), variable
+
+
+def test_scan_cost_is_reduced(generated):
+    _, text = generated
+    current, new = _scan_cost(text)
+    assert new * 4 < current
+
+
+def test_split_word_is_rejected():
+    sections = [Section('input_registers', name, 0, 9) for name in ('A', 'B')]
+    sections[0].registers.append(ModbusRegister('input_registers', 0, 0, 'BOOL', 'xA', 'A'))
+    sections[1].registers.append(ModbusRegister('input_registers', 0, 1, 'BOOL', 'xB', 'B'))
+    with pytest.raises(ValueError, match="слово занято"):
+        ModbusFBGenerator(sections)
+
+    sections = [Section('input_registers', 'A', 0, 9)]
+    sections[0].registers += [ModbusRegister('input_registers', 0, None, 'REAL', 'rA', 'A'),
+                              ModbusRegister('input_registers', 1, 3, 'BOOL', 'xB', 'A')]
+    with pytest.raises(ValueError, match="input_registers 1"):
+        ModbusFBGenerator(sections)
+
+
+def main():
+    print("=" * 80)
+    print("Тест генератора FB_ModbusToSCADA")
+    print("=" * 80)
+
+    failed = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        state = _generate(Path(tmp))
+        for test in (test_round_trip_maps_every_address, test_generated_fb_behaves_like_current,
+                     test_scan_cost_is_reduced, test_split_word_is_rejected):
+            try:
+                test(*([state] if test is not test_split_word_is_rejected else []))
+                print(f"✅ {test.__name__}")
+            except AssertionError as e:
+                failed += 1
+                print(f"❌ {test.__name__}: {e}")
+        state[0].conn.close()
+
+    print("=" * 80)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
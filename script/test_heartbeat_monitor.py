@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тестовый скрипт для проверки монитора heartbeat SCADA
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Добавить путь к модулю
+sys.path.insert(0, str(Path(__file__).parent))
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from heartbeat_monitor import (DEFAULT_BITS, HeartbeatTarget, LatencyHistogram, ScadaCommunicationModel,
+                               load_bits, serve_metrics)
+from modbus_server import ModbusServer, RegisterImage
+from register_decoder import DB_PATH
+
+HOLDING = [('SCADA_HEARTBEAT', 'BOOL', 0, 4), ('xStartCommand', 'BOOL', 0, 0)]
+INPUT = [('fbScadaCommunication.qxCommunicationOk', 'BOOL', 0, 4),
+         ('fbScadaCommunication.qxCommunicationLost', 'BOOL', 0, 5),
+         ('fbScadaCommunication.qxSignalChanged', 'BOOL', 0, 6)]
+
+
+def test_histogram_percentiles_within_one_percent():
+    histogram = LatencyHistogram()
+    samples = np.random.default_rng(0).lognormal(np.log(0.002), 0.8, 20_000)
+    for value in samples:
+        histogram.record(float(value))
+    for percent in (50, 99, 99.9):
+        assert histogram.percentile(percent) == pytest.approx(np.percentile(samples, percent), rel=0.02)
+    assert histogram.total == 20_000 and histogram.mean == pytest.approx(samples.mean())
+    assert histogram.percentile(100) == pytest.approx(samples.max())
+    assert LatencyHistogram().percentile(99) == 0.0
+
+
+def test_model_pulses_signal_changed_for_one_cycle():
+    server = ModbusServer(RegisterImage(HOLDING), RegisterImage(INPUT))
+    model = ScadaCommunicationModel(timeout=0.05)
+    model.step(server, 0.01)
+    server.holding.set_values({'SCADA_HEARTBEAT': True})
+    model.step(server, 0.01)
+    state = server.input.values()
+    assert state['fbScadaCommunication.qxSignalChanged'] and state['fbScadaCommunication.qxCommunicationOk']
+    model.step(server, 0.01)
+    assert not server.input.values()['fbScadaCommunication.qxSignalChanged']
+    for _ in range(5):
+        model.step(server, 0.01)
+    assert server.input.values()['fbScadaCommunication.qxCommunicationLost']
+
+
+def test_round_trip_against_emulator():
+    server = ModbusServer(RegisterImage(HOLDING), RegisterImage(INPUT))
+    server.holding.set_values({'xStartCommand': True})
+    server.add_simulation(ScadaCommunicationModel().step, interval=0.005)
+
+    async def scenario():
+        await server.start('127.0.0.1', 0)
+        target = HeartbeatTarget('plc', '127.0.0.1', server.port, dict(DEFAULT_BITS))
+        try:
+            await target.run(interval=0.05, echo_timeout=0.04, beats=6)
+        finally:
+            await server.close()
+        return target
+
+    target = asyncio.run(scenario())
+    assert target.beats == 6 and target.errors == 0
+    assert target.write.total == 6 and target.echo.total + target.echo_missed == 6 and target.echo.total >= 4
+    # qxCommunicationLost защёлкнут с запуска ПЛК до xReset
+    assert target.communication_ok is True and target.communication_lost is True
+    assert 0 < target.echo.percentile(50) < 0.04
+    # Mask Write не затрагивает остальные команды
+    assert server.holding.values()['xStartCommand']
+
+
+def test_echo_polls_are_paced():
+    # Без модели ПЛК отклика нет: опрос идёт до дедлайна с паузами poll_interval
+    server = ModbusServer(RegisterImage(HOLDING), RegisterImage(INPUT))
+
+    async def scenario():
+        await server.start('127.0.0.1', 0)
+        target = HeartbeatTarget('plc', '127.0.0.1', server.port, dict(DEFAULT_BITS), poll_interval=0.01)
+        polls = 0
+        request = target.connection.request
+
+        async def counted(pdu):
+            nonlocal polls
+            polls += 1
+            return await request(pdu)
+
+        target.connection.request = counted
+        try:
+            echoed = await target._wait_changed(True, time.perf_counter() + 0.1)
+        finally:
+            await target.connection.close()
+            await server.close()
+        return echoed, polls
+
+    echoed, polls = asyncio.run(scenario())
+    assert not echoed
+    assert 2 <= polls <= 12, polls
+
+
+def test_metrics_endpoint():
+    target = HeartbeatTarget('line1', '127.0.0.1', 1, dict(DEFAULT_BITS))
+    target.echo.record(0.012)
+    target.beats = 1
+
+    async def scenario():
+        metrics = await serve_metrics([target], '127.0.0.1', 0)
+        port = metrics.sockets[0].getsockname()[1]
+        responses = []
+        for path in ('/metrics', '/'):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode())
+            responses.append((await reader.read()).decode('utf-8'))
+            writer.close()
+        metrics.close()
+        await metrics.wait_closed()
+        return responses
+
+    ok, missing = asyncio.run(scenario())
+    assert ok.startswith('HTTP/1.1 200') and missing.startswith('HTTP/1.1 404')
+    assert 'scada_heartbeat_latency_seconds{connection="line1",kind="echo",quantile="0.99"} 0.012' in ok
+    assert 'scada_heartbeat_beats_total{connection="line1"} 1' in ok
+    assert 'scada_communication_ok{connection="line1"} -1' in ok
+
+
+def test_load_bits_from_database():
+    bits = load_bits(DB_PATH)
+    assert bits['heartbeat'] == (0, 4) and bits['changed'] == (0, 6)
+    assert load_bits(Path('/nonexistent.db')) == DEFAULT_BITS
+
+
+def main():
+    print("=" * 80)
+    print("Тест монитора heartbeat")
+    print("=" * 80)
+
+    failed = 0
+    for test in (test_histogram_percentiles_within_one_percent, test_model_pulses_signal_changed_for_one_cycle,
+                 test_round_trip_against_emulator, test_echo_polls_are_paced, test_metrics_endpoint,
+                 test_load_bits_from_database):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 80)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
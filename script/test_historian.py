@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тестовый скрипт для проверки архива значений
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+# Добавить путь к модулю
+sys.path.insert(0, str(Path(__file__).parent))
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from historian import Historian, SEGMENT_SECONDS
+from modbus_server import RegisterImage
+
+TAGS = [('rWeight', 'REAL'), ('xRun', 'BOOL'), ('tActive', 'TIME'), ('iState', 'INT')]
+LEVELS = [(1, 600), (60, 7200)]
+START = 1_790_000_000.0 - 1_790_000_000.0 % SEGMENT_SECONDS  # Начало часа
+
+
+def _historian(root: Path, **kwargs) -> Historian:
+    return Historian(root, TAGS, period=0.5, levels=LEVELS, **kwargs)
+
+
+def _fill(historian: Historian, seconds: int, step: float = 0.5):
+    times = START + np.arange(0, seconds, step)
+    for i, t in enumerate(times):
+        historian.append(t, [float(i), i % 2, i * 100, -i % 100])
+    return times
+
+
+def test_raw_round_trip_across_segments():
+    with tempfile.TemporaryDirectory() as tmp:
+        historian = _historian(Path(tmp))
+        times = _fill(historian, 3 * SEGMENT_SECONDS // 2)
+        assert len(historian.segment_paths()) == 2  # Смена часа
+
+        read_times, values = historian.read_raw('rWeight', START + 3000, START + 4000)
+        assert np.array_equal(read_times, times[(times >= START + 3000) & (times < START + 4000)])
+        assert np.array_equal(values, (read_times - START) * 2)
+        _, states = historian.read_raw('iState', START, START + 2)
+        assert states.dtype == np.int16 and states.tolist() == [0, 99, 98, 97]
+
+
+def test_pyramid_levels():
+    with tempfile.TemporaryDirectory() as tmp:
+        historian = _historian(Path(tmp))
+        _fill(historian, 1800)
+
+        # 10 минут при 1200 точках - сырые значения (период 0.5 с)
+        times, low, high, mean = historian.read('rWeight', START, START + 600, max_points=1200)
+        assert len(times) == 1200 and np.array_equal(low, high)
+
+        # 30 минут при 100 точках - уровень 1 мин
+        times, low, high, mean = historian.read('rWeight', START, START + 1800, max_points=100)
+        assert np.array_equal(times, START + np.arange(0, 1800, 60))
+        assert low[1] == 120 and high[1] == 239 and mean[1] == pytest.approx(179.5)
+
+        # Уровень 1 с хранит только последние 600 с
+        times, *_ = historian.read('xRun', START, START + 1800, max_points=1800)
+        assert times[0] == START + 1200 and len(times) == 600
+
+
+def test_reopen_continues_and_checks_catalog():
+    with tempfile.TemporaryDirectory() as tmp:
+        historian = _historian(Path(tmp))
+        _fill(historian, 10)
+        historian.flush()
+
+        reopened = _historian(Path(tmp))
+        with pytest.raises(ValueError):
+            reopened.append(START + 5, [0, 0, 0, 0])
+        reopened.append(START + 10, [20.0, 1, 0, 0])
+        assert reopened.read_raw('rWeight', START, START + 11)[1][-2:].tolist() == [19.0, 20.0]
+
+        with pytest.raises(ValueError):
+            Historian(Path(tmp), TAGS[:2], period=0.5, levels=LEVELS)
+
+
+def test_pyramid_slot_is_contiguous():
+    with tempfile.TemporaryDirectory() as tmp:
+        historian = _historian(Path(tmp))
+        historian.append(START + 7, [1.5, 1, 300, -4])
+        historian.flush()
+        # Слот корзины - подряд идущие (min, max, mean) всех тэгов
+        stats = np.fromfile(Path(tmp) / 'L1.f4', dtype='<f4').reshape(600, len(TAGS), 3)
+        assert stats[int(START + 7) % 600].tolist() == [[1.5] * 3, [1.0] * 3, [300.0] * 3, [-4.0] * 3]
+
+        # Архив прежнего формата пирамиды (каталог без формата) не открывается
+        path = Path(tmp) / 'catalog.json'
+        catalog = json.loads(path.read_text(encoding='utf-8'))
+        del catalog['pyramid_layout']
+        path.write_text(json.dumps(catalog), encoding='utf-8')
+        with pytest.raises(ValueError):
+            _historian(Path(tmp))
+
+
+def test_retention_keeps_fixed_segment_count():
+    with tempfile.TemporaryDirectory() as tmp:
+        historian = _historian(Path(tmp), raw_hours=2)
+        for hour in range(6):
+            historian.append(START + hour * SEGMENT_SECONDS, [hour, 0, 0, 0])
+        assert len(historian.segment_paths()) == 3
+        assert historian.read_raw('rWeight', 0, START + 10 * SEGMENT_SECONDS)[1].tolist() == [3, 4, 5]
+        sizes = {p.name: sum(f.stat().st_size for f in p.iterdir()) for p in historian.segment_paths()}
+        assert len(set(sizes.values())) == 1
+
+
+def test_append_frame_from_register_image():
+    image = RegisterImage([('rWeight', 'REAL', 10, None), ('xRun', 'BOOL', 0, 2),
+                           ('tActive', 'TIME', 20, None), ('iState', 'INT', 30, None)])
+    with tempfile.TemporaryDirectory() as tmp:
+        historian = Historian.from_plan(Path(tmp), image.plan, period=0.5, levels=LEVELS)
+        image.set_values({'rWeight': 12.5, 'xRun': True, 'tActive': 90_000, 'iState': -3})
+        historian.append_frame(START, image.words)
+        assert [historian.read_raw(name, START, START + 1)[1][0] for name, _ in TAGS] == [12.5, 1, 90_000, -3]
+
+
+def main():
+    print("=" * 80)
+    print("Тест архива значений")
+    print("=" * 80)
+
+    failed = 0
+    for test in (test_raw_round_trip_across_segments, test_pyramid_levels, test_reopen_continues_and_checks_catalog,
+                 test_pyramid_slot_is_contiguous, test_retention_keeps_fixed_segment_count,
+                 test_append_frame_from_register_image):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 80)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тестовый скрипт для проверки подкоманд и пакетного режима modbus_cli
+"""
+
+import io
+import json
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Добавить путь к модулю
+sys.path.insert(0, str(Path(__file__).parent))
+
+import pytest
+
+from migrate_from_fc import FC_MODBUS_PATH, SCHEMA_PATH, DatabaseMigrator, FC_ModbusParser
+from modbus_cli import ModbusCLI, build_arg_parser, fts_query, run_command
+from register_db import REGISTER_STATS_SELECT
+
+
+def _synced_db(tmp: Path) -> Path:
+    """БД, синхронизированная с текущим FB_ModbusToSCADA"""
+    migrator = DatabaseMigrator(tmp / 'test.db', SCHEMA_PATH)
+    migrator.open_database()
+    migrator.sync(FC_ModbusParser(FC_MODBUS_PATH))
+    migrator.conn.close()
+    return migrator.db_path
+
+
+@pytest.fixture
+def cli(tmp_path):
+    cli = ModbusCLI(_synced_db(tmp_path))
+    yield cli
+    cli.close_db()
+
+
+def _run(cli, *argv, stdin=''):
+    """Выполнить подкоманду, вернуть (код, stdout, stderr)"""
+    args = build_arg_parser().parse_args(['--db', str(cli.db_path), *argv])
+    stdout, stderr = io.StringIO(), io.StringIO()
+    streams = sys.stdin, sys.stdout, sys.stderr
+    sys.stdin, sys.stdout, sys.stderr = io.StringIO(stdin), stdout, stderr
+    try:
+        code = run_command(cli, args)
+    finally:
+        sys.stdin, sys.stdout, sys.stderr = streams
+    return code, stdout.getvalue(), stderr.getvalue()
+
+
+def _free_word(cli, register_type='holding_registers'):
+    """Секция и первое незанятое слово в ней"""
+    used = {row['register_address'] for row in cli.query_registers(register_type, limit=None)}
+    for section in cli.list_sections():
+        if section['register_type_name'] == register_type:
+            for address in range(section['start_register'], section['end_register']):
+                if address not in used and address + 1 not in used:
+                    return section, address
+    raise AssertionError('нет свободного слова')
+
+
+def test_subcommands_machine_readable_output(cli):
+    code, out, _ = _run(cli, 'list', '--type', 'input_registers', '--format', 'ndjson')
+    rows = [json.loads(line) for line in out.splitlines()]
+    assert code == 0 and len(rows) == 641 - 185
+    assert {row['register_type'] for row in rows} == {'input_registers'}
+    assert rows[0]['variable_name'] == 'xStateAutoWorking' and rows[0]['bit_index'] == 0
+
+    code, out, _ = _run(cli, 'stats', '--format', 'json')
+    stats = json.loads(out)
+    assert stats['registers'] == 641 and sum(row['count'] for row in stats['by_data_type']) == 641
+
+    code, out, _ = _run(cli, '--format', 'json', 'search', 'SCADA_HEARTBEAT')
+    assert [row['variable_name'] for row in json.loads(out)] == ['SCADA_HEARTBEAT', 'SCADA_HEARTBEAT_TIMEOUT']
+
+    code, out, _ = _run(cli, 'sections', '--format', 'json')
+    assert sum(row['register_count'] for row in json.loads(out)) == 641
+
+    code, out, _ = _run(cli, 'edit', '1', '--description', 'Новое', '--format', 'json')
+    assert code == 0 and json.loads(out)['description'] == 'Новое'
+    code, out, _ = _run(cli, 'edit', '1', '--description', '', '--format', 'json')
+    assert json.loads(out)['description'] is None
+
+    code, out, _ = _run(cli, 'delete', '1', '--format', 'json')
+    assert code == 0 and json.loads(out)['id'] == 1
+    code, _, err = _run(cli, 'delete', '1')
+    assert code == 1 and 'не найден' in err
+
+
+def test_add_validation(cli):
+    section, address = _free_word(cli)
+    common = ['add', '--type', 'holding_registers', '--section', section['name'], '--variable', 'xNew']
+
+    errors = [
+        (['--data-type', 'REAL', '--address', '0'], 'занят'),
+        (['--data-type', 'BOOL', '--address', '0', '--bit', '0'], 'занят'),
+        (['--data-type', 'BOOL', '--address', str(address)], 'бит-индекс'),
+        (['--data-type', 'INT', '--address', str(address), '--bit', '1'], 'только для BOOL'),
+        (['--data-type', 'REAL', '--address', str(section['end_register'])], 'вне диапазона'),
+        (['--data-type', 'LREAL', '--address', str(address)], 'Неизвестный тип данных'),
+    ]
+    for extra, message in errors:
+        code, _, err = _run(cli, *common, *extra)
+        assert code == 1 and message in err, (extra, err)
+
+    code, out, _ = _run(cli, *common, '--data-type', 'REAL', '--address', str(address), '--format', 'json')
+    added = json.loads(out)
+    assert code == 0 and (added['section'], added['register_address']) == (section['name'], address)
+    # Второе слово REAL занято
+    code, _, err = _run(cli, *common, '--data-type', 'BOOL', '--address', str(address + 1), '--bit', '3')
+    assert code == 1 and 'xNew' in err
+
+
+def test_batch_is_one_transaction(cli):
+    registers = [dict(row) for row in cli.query_registers(limit=None)]
+    operations = [{'op': 'edit', 'register_type': row['register_type'], 'register_address': row['register_address'],
+                   'bit_index': row['bit_index'], 'description': f'Описание {n}'}
+                  for n in range(3) for row in registers]
+    operations += [{'op': 'delete', 'id': row['id']} for row in registers[:300]]
+    operations += [dict({name: row[name] for name in row if name != 'id'}, op='add', description=None)
+                   for row in registers[:300]]
+    lines = '\n'.join(json.dumps(operation, ensure_ascii=False) for operation in operations)
+
+    # Ошибка в последней строке: не применяется ничего
+    bad = lines + '\n' + json.dumps({'op': 'edit', 'id': 1, 'bit_index': 3})
+    code, _, err = _run(cli, '--batch', stdin=bad)
+    assert code == 1 and f'Строка {len(operations) + 1}' in err
+    assert [dict(row) for row in cli.query_registers(limit=None)] == registers
+
+    start = time.perf_counter()
+    code, out, _ = _run(cli, '--batch', '--format', 'ndjson', stdin=lines)
+    elapsed = time.perf_counter() - start
+    results = [json.loads(line) for line in out.splitlines()]
+    assert code == 0 and len(results) == len(operations) > 2000
+    assert elapsed < 2.0
+
+    after = [dict(row) for row in cli.query_registers(limit=None)]
+    assert len(after) == len(registers) and {row['description'] for row in after} == {'Описание 2', None}
+    key = ('register_type', 'register_address', 'bit_index', 'variable_name')
+    assert sorted(tuple(row[name] for name in key) for row in after) == \
+        sorted(tuple(row[name] for name in key) for row in registers)
+
+
+def test_full_text_search(cli):
+    assert cli.has_fts
+    assert fts_query('^stDumper "Текущая частота" a"b*') == '^"stDumper" "Текущая частота" "a""b"'
+    assert fts_query('ЧРП xS') is None
+
+    rows = cli.find_registers('"текущая частота" ЧРП', limit=None)
+    assert rows and all('Текущая частота' in row['description'] for row in rows)
+    assert rows[0]['description_snippet'] == '«Текущая частота» «ЧРП»'
+    rows = cli.find_registers('MotorVibFeeder[2].fbStateQF')
+    assert [row['variable_highlight'] for row in rows] == [
+        f'stBunker[{n}].«MotorVibFeeder[2].fbStateQF».qxSignal' for n in (1, 2, 3)]
+    assert {row['variable_name'].split('.')[0] for row in cli.find_registers('^stDumper', limit=None)} == {'stDumper'}
+    # Фрагмент короче 3 символов - частичное совпадение LIKE
+    assert len(cli.find_registers('HE', limit=None)) == len(cli.find_registers('he', limit=None)) > 2
+
+    # Совпадение в имени переменной выше совпадения в описании
+    register_id = cli.find_register_id('holding_registers', 0, 0)
+    with cli.conn:
+        cli.update_register(register_id, description='Сброс таймера heartbeat')
+    rows = cli.find_registers('heartbeat')
+    assert [row['variable_name'] for row in rows][-1] == cli.get_register(register_id)['variable_name']
+    assert rows[-1]['description_snippet'] == 'Сброс таймера «heartbeat»'
+
+
+def test_search_index_follows_changes(cli):
+    def texts():
+        """Тексты с числом ссылок совпадают с регистрами"""
+        expected = cli.conn.execute("""
+            SELECT variable_name, IFNULL(description, ''), COUNT(*) FROM registers GROUP BY 1, 2
+        """)
+        actual = cli.conn.execute("SELECT variable_name, description, refs FROM register_texts")
+        return set(map(tuple, expected)) == set(map(tuple, actual))
+
+    section, address = _free_word(cli)
+    code, _, _ = _run(cli, 'add', '--type', 'holding_registers', '--section', section['name'], '--data-type', 'REAL',
+                      '--address', str(address), '--variable', 'rFeederSpeedLimit', '--description', 'Предел хода ленты')
+    assert code == 0 and texts()
+    [row] = cli.find_registers('FeederSpeed')
+    assert row['register_address'] == address
+
+    _run(cli, 'edit', str(row['id']), '--variable', 'rBeltSpeedLimit')
+    assert cli.find_registers('FeederSpeed') == [] and len(cli.find_registers('хода ленты')) == 1 and texts()
+    _run(cli, 'delete', str(row['id']))
+    assert cli.find_registers('BeltSpeed') == [] and texts()
+
+    # Общий текст нескольких регистров остаётся в индексе, пока жив хотя бы один
+    rows = cli.find_registers('"Текущая частота"', limit=None)
+    for row in rows[1:]:
+        _run(cli, 'delete', str(row['id']))
+    assert [row['id'] for row in cli.find_registers('"Текущая частота"')] == [rows[0]['id']] and texts()
+    cli.conn.execute("INSERT INTO register_texts_fts(register_texts_fts) VALUES('integrity-check')")
+
+
+def test_keyset_pagination(cli):
+    def walk(filters, limit):
+        forward, rows = [], cli.page_registers(**filters, limit=limit)
+        while rows:
+            assert len(rows) <= limit
+            forward += rows
+            rows = cli.page_registers(**filters, after=cli.register_key(rows[-1]), limit=limit)
+        backward, rows = [], cli.page_registers(**filters, before=(99, 0, 0, 0), limit=limit)
+        while rows:
+            backward = rows + backward
+            rows = cli.page_registers(**filters, before=cli.register_key(rows[0]), limit=limit)
+        assert [row['id'] for row in backward] == [row['id'] for row in forward]
+        return forward
+
+    rows = walk({}, 37)
+    assert len(rows) == 641 and [cli.register_key(row) for row in rows] == sorted(map(cli.register_key, rows))
+    section = cli.list_sections()[3]
+    for filters in ({'register_type': 'input_registers'}, {'data_type': 'REAL'}, {'section': section['id']},
+                    {'register_type': 'holding_registers', 'data_type': 'BOOL'}):
+        expected = cli.query_registers(filters.get('register_type'), filters.get('section'),
+                                       filters.get('data_type'), limit=None)
+        assert {row['id'] for row in walk(filters, 10)} == {row['id'] for row in expected}, filters
+
+    # Переход к адресу: с первого регистра адреса, без фильтра по типу - внутри типа ключа
+    [first] = cli.page_registers(after=cli.address_key('input_registers', 300), limit=1)
+    assert (first['register_type'], first['register_address'], first['bit_index']) == ('input_registers', 300, 0)
+    [last] = cli.page_registers('holding_registers', before=cli.address_key('holding_registers', 10 ** 6), limit=1)
+    assert last['id'] == max(cli.query_registers('holding_registers', limit=None),
+                             key=cli.register_key)['id']
+
+
+def test_background_export(cli):
+    openpyxl = pytest.importorskip('openpyxl')
+    tmp_path = cli.db_path.parent
+    steps, threads = [], set()
+
+    def progress(step, done, total):
+        steps.append((step, done, total))
+        threads.add(threading.current_thread().name)
+
+    future = cli.start_export(tmp_path / 'map.xlsx', progress)
+    # Пока идёт экспорт, меню работает со своим соединением
+    assert len(cli.page_registers(limit=10)) == 10
+    assert future.result(timeout=30) == tmp_path / 'map.xlsx'
+    assert steps == [('Holding Registers', 1, 5), ('Input Registers', 2, 5), ('Резервы', 3, 5),
+                     ('Статистика', 4, 5), ('map.xlsx', 5, 5)]
+    assert cli.export_status() == f"✅ Экспорт завершён: {tmp_path / 'map.xlsx'}"
+    workbook = openpyxl.load_workbook(tmp_path / 'map.xlsx')
+    assert workbook.sheetnames == ['Статистика', 'Holding Registers', 'Input Registers', 'Резервы']
+    assert workbook['Статистика']['B4'].value == 641
+
+    code, out, _ = _run(cli, 'export', '--output', str(tmp_path / 'again.xlsx'), '--format', 'json')
+    assert code == 0 and json.loads(out)['returncode'] == 0 and (tmp_path / 'again.xlsx').exists()
+    # Повторный экспорт - в том же рабочем потоке сеанса
+    cli.start_export(tmp_path / 'again.xlsx', progress).result(timeout=30)
+    assert len(steps) == 10 and len(threads) == 1 and threading.current_thread().name not in threads
+
+    cli.start_export(tmp_path / 'missing' / 'map.xlsx').exception(timeout=30)
+    assert cli.export_status().startswith('❌ Ошибка экспорта')
+
+
+def test_statistics_counters(cli):
+    def counters_match():
+        """register_stats совпадает с агрегацией registers"""
+        expected = cli.conn.execute(REGISTER_STATS_SELECT)
+        actual = cli.conn.execute("SELECT * FROM register_stats")
+        return sorted(map(tuple, expected)) == sorted(map(tuple, actual))
+
+    def statistics(has_stats):
+        cli.stats_source = 'register_stats' if has_stats else f"({REGISTER_STATS_SELECT})"
+        stats = cli.statistics()
+        return dict(stats, by_data_type=sorted(map(tuple, (row.values() for row in stats['by_data_type']))),
+                    top_sections=[row['count'] for row in stats['top_sections']])
+
+    assert cli.stats_source == 'register_stats' and counters_match() and statistics(True) == statistics(False)
+
+    # Правки меню, подкоманд и пакетного режима, перенос регистров между секциями
+    section, address = _free_word(cli)
+    _run(cli, 'add', '--type', 'holding_registers', '--section', section['name'], '--data-type', 'BOOL',
+         '--address', str(address), '--bit', '0', '--variable', 'xA', '--description', 'Бит')
+    _run(cli, 'add', '--type', 'holding_registers', '--section', section['name'], '--data-type', 'BOOL',
+         '--address', str(address), '--bit', '1', '--variable', 'xB')
+    assert counters_match()
+    operations = [{'op': 'edit', 'id': row['id'], 'description': ''} for row in cli.find_registers('xA', limit=None)]
+    operations += [{'op': 'delete', 'id': row['id']} for row in cli.query_registers('input_registers', limit=40)]
+    _run(cli, '--batch', stdin='\n'.join(json.dumps(operation) for operation in operations))
+    assert counters_match()
+    other = next(row for row in cli.list_sections() if row['register_type_name'] == 'holding_registers'
+                 and row['id'] != section['id'] and row['register_count'])
+    with cli.conn:
+        cli.conn.execute("UPDATE registers SET is_reserved = 1 WHERE id % 7 = 0")
+        cli.conn.execute("UPDATE registers SET section_id = ? WHERE section_id = ?", (section['id'], other['id']))
+        cli.conn.execute("UPDATE registers SET data_type_id = 3 WHERE data_type_id = 4")
+    assert counters_match() and statistics(True) == statistics(False)
+
+    stats = cli.conn.execute("""
+        SELECT id, used_registers, total_entries, bool_count, real_count, int_count FROM v_sections_stats
+    """).fetchall()
+    assert sorted(map(tuple, stats)) == sorted(map(tuple, cli.conn.execute("""
+        SELECT s.id, COUNT(DISTINCT r.register_address), COUNT(r.id),
+               SUM(CASE WHEN dt.name = 'BOOL' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN dt.name = 'REAL' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN dt.name IN ('INT', 'UINT', 'WORD') THEN 1 ELSE 0 END)
+        FROM sections s
+        LEFT JOIN registers r ON s.id = r.section_id
+        LEFT JOIN data_types dt ON r.data_type_id = dt.id
+        GROUP BY s.id
+    """)))
+
+
+def main():
+    print("=" * 80)
+    print("Тест подкоманд и пакетного режима modbus_cli")
+    print("=" * 80)
+
+    failed = 0
+    for test in (test_subcommands_machine_readable_output, test_add_validation, test_batch_is_one_transaction,
+                 test_full_text_search, test_search_index_follows_changes, test_keyset_pagination,
+                 test_background_export, test_statistics_counters):
+        with tempfile.TemporaryDirectory() as tmp:
+            cli = ModbusCLI(_synced_db(Path(tmp)))
+            try:
+                test(cli)
+                print(f"✅ {test.__name__}")
+            except AssertionError as e:
+                failed += 1
+                print(f"❌ {test.__name__}: {e}")
+            cli.close_db()
+
+    print("=" * 80)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тестовый скрипт для проверки эмулятора ПЛК (сервера Modbus TCP)
+"""
+
+import asyncio
+import struct
+import sys
+from pathlib import Path
+
+# Добавить путь к модулю
+sys.path.insert(0, str(Path(__file__).parent))
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from modbus_server import ModbusServer, RegisterImage, ILLEGAL_DATA_ADDRESS, ILLEGAL_DATA_VALUE, ILLEGAL_FUNCTION
+from setpoint_encoder import SetpointEncoder
+
+HOLDING_TAGS = [
+    ('cmdStart', 'BOOL', 0, 0),
+    ('SCADA_HEARTBEAT', 'BOOL', 0, 4),
+    ('rSetpoint', 'REAL', 10, None),
+    ('iMode', 'INT', 12, None),
+]
+
+INPUT_TAGS = [
+    ('xRun', 'BOOL', 0, 0),
+    ('rWeight', 'REAL', 2, None),
+    ('tActive', 'TIME', 20, None),
+]
+
+
+def _server(validate: bool = True) -> ModbusServer:
+    return ModbusServer(RegisterImage(HOLDING_TAGS), RegisterImage(INPUT_TAGS), validate)
+
+
+def test_read_input_registers():
+    server = _server()
+    server.input.set_values({'xRun': True, 'rWeight': 12.5, 'tActive': 90_000})
+    response = server.handle_pdu(struct.pack('>BHH', 4, 0, 22))
+    assert response[:2] == bytes((4, 44))
+    words = struct.unpack('>22H', response[2:])
+    assert words[0] == 1 and words[2:4] == struct.unpack('>HH', struct.pack('>f', 12.5))
+    assert server.input.values() == {'xRun': True, 'rWeight': 12.5, 'tActive': 90_000}
+
+
+def test_write_requests_update_holding_image():
+    server = _server()
+    writes = []
+    server.on_write(lambda address, count: writes.append((address, count)))
+
+    encoder = SetpointEncoder(HOLDING_TAGS)
+    for request in encoder.encode({'rSetpoint': -3.25, 'iMode': -2}) + encoder.encode({'SCADA_HEARTBEAT': True}):
+        pdu = request.to_pdu()
+        assert server.handle_pdu(pdu) == pdu[:7 if pdu[0] == 22 else 5]
+
+    assert server.holding.values() == {'cmdStart': False, 'SCADA_HEARTBEAT': True, 'rSetpoint': -3.25, 'iMode': -2}
+    assert writes == [(10, 3), (0, 1)]
+
+    assert server.handle_pdu(struct.pack('>BHH', 6, 12, 7)) == struct.pack('>BHH', 6, 12, 7)
+    assert server.holding.values()['iMode'] == 7
+
+
+def test_exceptions():
+    server = _server()
+    assert server.handle_pdu(struct.pack('>BHH', 3, 5, 1)) == bytes((0x83, ILLEGAL_DATA_ADDRESS))  # Не в карте
+    assert server.handle_pdu(struct.pack('>BHH', 4, 0, 126)) == bytes((0x84, ILLEGAL_DATA_VALUE))
+    assert server.handle_pdu(struct.pack('>BHH', 4, 510, 4)) == bytes((0x84, ILLEGAL_DATA_ADDRESS))
+    assert server.handle_pdu(struct.pack('>BHHB', 16, 10, 2, 3) + b'\0\0\0') == bytes((0x90, ILLEGAL_DATA_VALUE))
+    assert server.handle_pdu(bytes((1, 0, 0, 0, 8))) == bytes((0x81, ILLEGAL_FUNCTION))
+    assert server.handle_pdu(bytes((3, 0))) == bytes((0x83, ILLEGAL_DATA_VALUE))
+    assert server.exceptions == 6
+
+    # Блочное чтение через промежутки карты допускается, без проверки - любой адрес образа
+    assert server.handle_pdu(struct.pack('>BHH', 4, 0, 22))[0] == 4
+    assert _server(validate=False).handle_pdu(struct.pack('>BHH', 3, 5, 1))[0] == 3
+
+
+def test_concurrent_clients_over_tcp():
+    async def client(port: int, index: int):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        # Два запроса в одном пакете: запись уставки и чтение
+        writer.write(struct.pack('>HHHB', 1, 0, 6, 1) + struct.pack('>BHH', 6, 12, index)
+                     + struct.pack('>HHHB', 2, 0, 6, 1) + struct.pack('>BHH', 4, 2, 2))
+        first = await reader.readexactly(12)
+        second = await reader.readexactly(13)
+        writer.close()
+        await writer.wait_closed()
+        return first, second
+
+    async def scenario():
+        server = _server()
+        server.input.set_values({'rWeight': 1.5})
+        await server.start('127.0.0.1', 0)
+        try:
+            results = await asyncio.gather(*(client(server.port, i) for i in range(200)))
+        finally:
+            await server.close()
+        return server, results
+
+    server, results = asyncio.run(scenario())
+    for index, (first, second) in enumerate(results):
+        assert first == struct.pack('>HHHB', 1, 0, 6, 1) + struct.pack('>BHH', 6, 12, index)
+        assert second[:9] == struct.pack('>HHHBBB', 2, 0, 7, 1, 4, 4)
+        assert struct.unpack('>f', second[9:])[0] == 1.5
+    assert server.requests == 400 and server.connections == 0
+
+
+def test_simulation_hook_drives_inputs():
+    async def scenario():
+        server = _server()
+        server.add_simulation(lambda s, dt: s.input.set_values({'xRun': True}), interval=0.01)
+        await server.start('127.0.0.1', 0)
+        await asyncio.sleep(0.05)
+        await server.close()
+        return server
+
+    assert asyncio.run(scenario()).input.values()['xRun'] is True
+
+
+def main():
+    print("=" * 80)
+    print("Тест эмулятора ПЛК (Modbus TCP)")
+    print("=" * 80)
+
+    failed = 0
+    for test in (test_read_input_registers, test_write_requests_update_holding_image, test_exceptions,
+                 test_concurrent_clients_over_tcp, test_simulation_hook_drives_inputs):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 80)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
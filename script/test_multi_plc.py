@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тестовый скрипт для проверки загрузки нескольких ПЛК в одну БД
+"""
+
+import shutil
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Добавить путь к модулю
+sys.path.insert(0, str(Path(__file__).parent))
+
+from migrate_from_fc import DatabaseMigrator, DB_PATH, SCHEMA_PATH
+from modbus_cli import ModbusCLI
+
+SAMPLE = """// === HOLDING РЕГИСТРЫ (SCADA → PLC) ===
+
+// Уставки ЧРП (30-59)
+FC_ModbusReadBool(pRegisters := ADR(awModbusHoldingRegisters), iRegisterIndex := 30, iBitIndex := 0, xValue => VFD_SMOOTH_SET_FREQUENCY);
+FC_ModbusReadReal(pRegisters := ADR(awModbusHoldingRegisters), iRegisterIndex := 32, rValue => VFD_FREQUENCY_MAX);
+
+END_FUNCTION_BLOCK
+"""
+
+
+def _make_projects(tmp: Path, count: int) -> list:
+    projects = []
+    for i in range(1, count + 1):
+        root = tmp / f'line{i}'
+        (root / 'POUs').mkdir(parents=True)
+        # В каждом проекте своя переменная по адресу 32
+        source = SAMPLE.replace('VFD_FREQUENCY_MAX', f'VFD_FREQUENCY_MAX_{i}')
+        (root / 'POUs' / 'FB_ModbusToSCADA.st').write_text(source, encoding='utf-8')
+        projects.append((f'line{i}', root))
+    return projects
+
+
+def test_projects_share_addresses_without_overwriting():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        projects = _make_projects(tmp, 3)
+        migrator = DatabaseMigrator(tmp / 'test.db', SCHEMA_PATH)
+        migrator.open_database()
+        results = migrator.ingest_projects(projects, site='Карьер', workers=2)
+        assert sorted(results) == ['line1', 'line2', 'line3']
+        assert all(stats['inserted'] == 2 for stats in results.values())
+
+        rows = migrator.conn.execute("""
+            SELECT plc, variable_name FROM v_registers_full
+            WHERE site = 'Карьер' AND register_address = 32
+            ORDER BY plc
+        """).fetchall()
+        assert rows == [('line1', 'VFD_FREQUENCY_MAX_1'), ('line2', 'VFD_FREQUENCY_MAX_2'),
+                        ('line3', 'VFD_FREQUENCY_MAX_3')]
+        assert migrator.conn.execute(
+            "SELECT COUNT(*) FROM v_sections_stats WHERE site = 'Карьер'").fetchone()[0] == 3
+
+        again = migrator.ingest_projects(projects, workers=2)
+        assert all(stats['sections_changed'] == 0 for stats in again.values())
+        # Площадка сохраняется, если при повторной загрузке не указана
+        assert migrator.conn.execute("SELECT COUNT(*) FROM plcs WHERE site = 'Карьер'").fetchone()[0] == 3
+        migrator.close()
+
+
+def test_export_is_limited_to_plc_and_site():
+    openpyxl = pytest.importorskip('openpyxl')
+    from export_to_excel import export_workbook
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        projects = _make_projects(tmp, 3)
+        migrator = DatabaseMigrator(tmp / 'test.db', SCHEMA_PATH)
+        migrator.open_database()
+        migrator.ingest_projects(projects[:2], site='Карьер', workers=1)
+        migrator.ingest_projects(projects[2:], site='Склад', workers=1)
+        plc_id = migrator.conn.execute("SELECT id FROM plcs WHERE name = 'line2'").fetchone()[0]
+        migrator.close()
+
+        def variables(path: Path) -> list:
+            sheet = openpyxl.load_workbook(path)['Holding Registers']
+            return sorted(row[2] for row in sheet.iter_rows(min_row=2, values_only=True) if row[2])
+
+        assert variables(export_workbook(tmp / 'test.db', tmp / 'plc.xlsx', plc_id=plc_id)) == [
+            'VFD_FREQUENCY_MAX_2', 'VFD_SMOOTH_SET_FREQUENCY']
+        assert variables(export_workbook(tmp / 'test.db', tmp / 'site.xlsx', site='Склад')) == [
+            'VFD_FREQUENCY_MAX_3', 'VFD_SMOOTH_SET_FREQUENCY']
+        # Топ секций - по секциям ПЛК, одноимённые секции разных ПЛК не складываются
+        stats = openpyxl.load_workbook(tmp / 'site.xlsx')['Статистика']
+        assert [row for row in stats.iter_rows(values_only=True) if row[0] == 'Уставки ЧРП'] == [
+            ('Уставки ЧРП', 2)]
+
+        # modbus_cli --plc N export
+        cli = ModbusCLI(tmp / 'test.db', plc_id=plc_id)
+        try:
+            assert cli.run_export(tmp / 'cli.xlsx', quiet=True) == 0
+            assert variables(tmp / 'cli.xlsx') == ['VFD_FREQUENCY_MAX_2', 'VFD_SMOOTH_SET_FREQUENCY']
+        finally:
+            cli.close_db()
+        cli = ModbusCLI(tmp / 'test.db')
+        try:
+            assert [row['count'] for row in cli.statistics()['top_sections']] == [2, 2, 2]
+        finally:
+            cli.close_db()
+
+
+def test_legacy_database_is_upgraded():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'legacy.db'
+        shutil.copy(DB_PATH, db_path)
+        conn = sqlite3.connect(db_path)
+        count = conn.execute("SELECT COUNT(*) FROM registers").fetchone()[0]
+        conn.close()
+
+        migrator = DatabaseMigrator(db_path, SCHEMA_PATH)
+        migrator.open_database()
+        conn = migrator.conn
+        assert conn.execute("SELECT COUNT(*) FROM registers WHERE plc_id = 1").fetchone()[0] == count
+        assert conn.execute("SELECT COUNT(*) FROM v_registers_full WHERE plc = 'default'").fetchone()[0] == count
+        assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+        # Индекс с изменившимся определением пересоздаётся
+        assert 'bit_index' in conn.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'idx_registers_address'").fetchone()[0]
+        assert conn.execute("SELECT SUM(registers) FROM register_stats").fetchone()[0] == count
+        # Индекс поиска заполняется по существующим регистрам
+        assert conn.execute("SELECT SUM(refs) FROM register_texts").fetchone()[0] == count
+        assert conn.execute("SELECT COUNT(*) FROM register_texts_fts WHERE register_texts_fts MATCH 'HEARTBEAT'"
+                            ).fetchone()[0] == conn.execute("""
+            SELECT COUNT(*) FROM register_texts WHERE variable_name LIKE '%HEARTBEAT%' OR description LIKE '%HEARTBEAT%'
+        """).fetchone()[0] > 0
+        migrator.close()
+
+
+def main():
+    print("=" * 80)
+    print("Тест загрузки нескольких ПЛК")
+    print("=" * 80)
+
+    failed = 0
+    for test in (test_projects_share_addresses_without_overwriting, test_export_is_limited_to_plc_and_site,
+                 test_legacy_database_is_upgraded):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 80)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
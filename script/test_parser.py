@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тестовый скрипт для проверки потокового парсера FC_ModbusParser
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Добавить путь к модулю
+sys.path.insert(0, str(Path(__file__).parent))
+
+from migrate_from_fc import FC_ModbusParser, FC_MODBUS_PATH
+
+SAMPLE = """FUNCTION_BLOCK FB_ModbusToSCADA
+// === HOLDING РЕГИСТРЫ (SCADA → PLC) ===
+
+// Уставки ЧРП (30-59)
+FC_ModbusReadBool(pRegisters := ADR(awModbusHoldingRegisters), iRegisterIndex := 30, iBitIndex := 0, xValue => VFD_SMOOTH_SET_FREQUENCY);
+//FC_ModbusReadBool(pRegisters := ADR(awModbusHoldingRegisters), iRegisterIndex := 30, iBitIndex := 1, xValue => DISABLED);
+(* FC_ModbusReadReal(pRegisters := ADR(awModbusHoldingRegisters),
+   iRegisterIndex := 40, rValue => IN_BLOCK_COMMENT); *)
+FC_ModbusReadReal(
+    pRegisters := ADR(awModbusHoldingRegisters), // Массив holding
+    iRegisterIndex := 32,
+    rValue => VFD_FREQUENCY_MAX
+);
+FC_ModbusReadTime(pRegisters := ADR(awModbusHoldingRegisters), iRegisterIndex := 34, tValue => TIME_WAITING_FEEDBACK);
+FC_ModbusReadReal(pRegisters := ADR(awModbusHoldingRegisters), iRegisterIndex := 36, rValue => rTempTime);
+SCADA_HEARTBEAT_TIMEOUT := REAL_TO_TIME(rTempTime * 1000); // Таймаут в секундах
+uReal.wTag[1] := awModbusHoldingRegisters[38];
+uReal.wTag[0] := awModbusHoldingRegisters[39];
+SCADA_LINK_TIMEOUT := REAL_TO_TIME(uReal.rTag * 1000);
+
+// === INPUT РЕГИСТРЫ (PLC → SCADA) ===
+
+// Бункер 1 (30-89)
+FC_ModbusWriteBool(pRegisters := ADR(awModbusInputRegisters), iRegisterIndex := 30, iBitIndex := 12,
+    xValue := (stBunker[1].xStateRemoteAuto AND stDumper.xStateRemoteAuto));
+FC_ModbusWriteUInt(pRegisters := ADR(awModbusInputRegisters), iRegisterIndex := 84, uValue := eBunkerStageToSCADA[1]);
+FC_ModbusReadDint(pRegisters := ADR(awModbusInputRegisters), iRegisterIndex := 86, iValue => diCounter);
+
+END_FUNCTION_BLOCK
+"""
+
+
+def _parse_sample():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'FB_ModbusToSCADA.st'
+        path.write_text(SAMPLE, encoding='utf-8')
+        parser = FC_ModbusParser(path)
+        return parser, parser.parse()
+
+
+def test_all_function_variants():
+    _, registers = _parse_sample()
+    found = {(r.register_type, r.register_address, r.bit_index, r.data_type, r.variable_name)
+             for r in registers}
+    assert found == {
+        ('holding_registers', 30, 0, 'BOOL', 'VFD_SMOOTH_SET_FREQUENCY'),
+        ('holding_registers', 32, None, 'REAL', 'VFD_FREQUENCY_MAX'),
+        ('holding_registers', 34, None, 'TIME', 'TIME_WAITING_FEEDBACK'),
+        ('holding_registers', 36, None, 'REAL', 'SCADA_HEARTBEAT_TIMEOUT'),  # Через rTempTime
+        ('holding_registers', 38, None, 'REAL', 'SCADA_LINK_TIMEOUT'),  # Через uReal (генерированный FB)
+        ('input_registers', 30, 12, 'BOOL', '(stBunker[1].xStateRemoteAuto AND stDumper.xStateRemoteAuto)'),
+        ('input_registers', 84, None, 'UINT', 'eBunkerStageToSCADA[1]'),
+        ('input_registers', 86, None, 'DINT', 'diCounter'),
+    }
+
+
+def test_sections():
+    parser, registers = _parse_sample()
+    assert parser.sections == {
+        ('holding_registers', 'Уставки ЧРП'): (30, 59),
+        ('input_registers', 'Бункер 1'): (30, 89),
+    }
+    assert {r.section_name for r in registers} == {'Уставки ЧРП', 'Бункер 1'}
+
+
+def test_project_file_has_every_call():
+    source = FC_MODBUS_PATH.read_text(encoding='utf-8')
+    active_calls = sum(1 for line in source.splitlines()
+                       if 'FC_Modbus' in line and not line.lstrip().startswith('//'))
+    registers = FC_ModbusParser(FC_MODBUS_PATH).parse()
+    assert len(registers) == active_calls
+
+
+def test_seconds_to_time_is_flagged():
+    _, registers = _parse_sample()
+    flagged = sorted(r.variable_name for r in registers if r.seconds_to_time)
+    assert flagged == ['SCADA_HEARTBEAT_TIMEOUT', 'SCADA_LINK_TIMEOUT']
+
+
+def main():
+    print("=" * 80)
+    print("Тест потокового парсера FC_ModbusParser")
+    print("=" * 80)
+
+    failed = 0
+    for test in (test_all_function_variants, test_seconds_to_time_is_flagged, test_sections,
+                 test_project_file_has_every_call):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 80)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тестовый скрипт для проверки порта FB_ProportionPID и перебора параметров
+"""
+
+import sys
+from pathlib import Path
+
+# Добавить путь к модулю
+sys.path.insert(0, str(Path(__file__).parent))
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from pid_sweep import (ERROR_DELTA_TIME, ERROR_PROPORTION_SUM, FeederPlant, ProportionPID, build_grid,
+                       parse_range, rank, simulate, sweep)
+
+SETTINGS = dict(frequency_min=5.0, frequency_max=50.0, frequency_target_sum=50.0, delta_time=0.5)
+
+
+class ScalarPID:
+    """Построчный перенос ST-кода одного экземпляра блока (эталон)"""
+
+    def __init__(self, kp, ki, kd, integral_limit, derivative_filter, frequency_min, frequency_max,
+                 frequency_target_sum, delta_time):
+        self.kp, self.ki, self.kd = kp, ki, kd
+        self.integral_limit, self.derivative_filter = integral_limit, derivative_filter
+        self.frequency_min, self.frequency_max = frequency_min, frequency_max
+        self.frequency_target_sum, self.delta_time = frequency_target_sum, delta_time
+        self.integral = [0.0] * 3
+        self.previous = [0.0] * 3
+        self.filtered = [0.0] * 3
+
+    def __call__(self, targets, actual, base, reset=False):
+        total = sum(targets)
+        norm = [t / total for t in targets] if abs(total - 1.0) > 0.001 else list(targets)
+        if reset:
+            self.integral, self.previous = [0.0] * 3, [0.0] * 3
+        outputs = []
+        for i in range(3):
+            if norm[i] > 0.001:
+                error = norm[i] - actual[i]
+                derivative = (error - self.previous[i]) / self.delta_time
+                self.filtered[i] = (1.0 - self.derivative_filter) * derivative + self.derivative_filter * self.filtered[i]
+                output = self.kp * error + self.ki * self.integral[i] + self.kd * self.filtered[i]
+                if (0.0 <= output <= 1.0) or (output < 0.0 and error > 0.0) or (output > 1.0 and error < 0.0):
+                    self.integral[i] = max(min(self.integral[i] + error * self.delta_time, self.integral_limit),
+                                           -self.integral_limit)
+                outputs.append(min(max(output, 0.0), 1.0))
+                self.previous[i] = error
+            else:
+                outputs.append(0.0)
+                self.integral[i] = self.previous[i] = self.filtered[i] = 0.0
+        scaled = []
+        for i in range(3):
+            if norm[i] > 0.001:
+                value = base[i] + (outputs[i] - 0.5) * 2.0 * base[i]
+                scale = value / base[i]
+                if scale < 0.1:
+                    value = base[i] * 0.1
+                elif scale > 3.0:
+                    value = base[i] * 3.0
+                scaled.append(min(max(value, self.frequency_min), self.frequency_max))
+            else:
+                scaled.append(0.0)
+        total_scaled = max(sum(scaled), 0.01)
+        return [value * (self.frequency_target_sum / total_scaled) for value in scaled]
+
+
+def test_matches_scalar_transliteration():
+    rng = np.random.default_rng(0)
+    sets = [(0.4, 0.15, 0.01, 10.0, 0.8), (2.0, 0.6, 0.1, 0.5, 0.0), (0.1, 0.01, 0.0, 10.0, 0.9)]
+    pid = ProportionPID(len(sets), *np.array(sets).T, **SETTINGS)
+    references = [ScalarPID(*params, **SETTINGS) for params in sets]
+    for targets in ([0.5, 0.3, 0.2], [60, 40, 0]):
+        base = [50 * t / sum(targets) for t in targets]
+        for step in range(60):
+            actual = rng.uniform(0, 0.7, (len(sets), 3))
+            reset = step == 30
+            frequency = pid(targets, actual, base, reset)
+            for row, reference in enumerate(references):
+                assert frequency[row] == pytest.approx(reference(targets, actual[row], base, reset), abs=1e-3)
+        assert pid.normalized.all() == (targets[0] == 60)
+    assert frequency[:, 2].tolist() == [0, 0, 0] and frequency.sum(axis=1) == pytest.approx([50] * 3, abs=1e-3)
+
+
+def test_error_codes_keep_state():
+    pid = ProportionPID(2, delta_time=2.0)  # Значение по умолчанию в блоке не проходит проверку
+    pid([0.5, 0.5, 0], np.full((2, 3), 0.3), [25, 25, 0])
+    assert pid.error_code.tolist() == [ERROR_DELTA_TIME] * 2
+
+    pid = ProportionPID(2, **SETTINGS)
+    pid([0.5, 0.5, 0], np.full((2, 3), 0.3), [25, 25, 0])
+    integral = pid.integral.copy()
+    frequency = pid(np.array([[0.5, 0.5, 0], [0, 0, 0]]), np.full((2, 3), 0.3), [25, 25, 0])
+    assert pid.error_code.tolist() == [0, ERROR_PROPORTION_SUM]
+    assert frequency[1].tolist() == [0, 0, 0] and np.array_equal(pid.integral[1], integral[1])
+    pid.disable()
+    assert not pid.integral.any() and not pid.active.any()
+
+
+def test_plant_ramp_and_delay():
+    plant = FeederPlant(1, material=(1.0, 2.0, 1.0), ramp=4.0, delay=2)
+    plant.start([10, 10, 0])
+    assert plant.step(np.array([[20, 10, 0]]), 0.5)[0] == pytest.approx([1 / 3, 2 / 3, 0])
+    plant.step(np.array([[20, 10, 0]]), 0.5)
+    assert plant.frequency[0].tolist() == [14, 10, 0]
+    assert plant.step(np.array([[20, 10, 0]]), 0.5)[0] == pytest.approx([12 / 32, 20 / 32, 0])
+
+
+def test_sweep_ranks_and_matches_across_workers():
+    grid = build_grid({'kp': parse_range('0.1:2:5'), 'ki': parse_range('0.01:0.6:4'), 'kd': parse_range('0.01'),
+                       'integral_limit': parse_range('10'), 'derivative_filter': parse_range('0.8')})
+    kwargs = dict(targets=[50, 30, 20], material=[1.0, 0.8, 1.2], duration=120.0)
+    single = sweep(grid, workers=1, chunk_size=7, **kwargs)
+    assert len(single['iae']) == 20
+    assert np.array_equal(single['iae'], simulate(grid, **kwargs)['iae'])
+    assert np.array_equal(sweep(grid, workers=2, **kwargs)['settling_time'], single['settling_time'])
+
+    order = rank(single)
+    settled = np.isfinite(single['settling_time'])
+    assert settled[order[0]] and settled.any() and not settled.all()
+    assert np.all(np.diff(settled[order].astype(int)) <= 0)  # Неустановившиеся - в конце
+    assert single['final_error'][order[0]] <= 0.01
+
+
+def main():
+    print("=" * 80)
+    print("Тест перебора параметров ПИД")
+    print("=" * 80)
+
+    failed = 0
+    for test in (test_matches_scalar_transliteration, test_error_codes_keep_state, test_plant_ramp_and_delay,
+                 test_sweep_ranks_and_matches_across_workers):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 80)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тестовый скрипт для проверки планировщика блочного опроса
+"""
+
+import asyncio
+import itertools
+import sys
+from pathlib import Path
+
+# Добавить путь к модулю
+sys.path.insert(0, str(Path(__file__).parent))
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from poll_planner import (LATENCY_WINDOW, MAX_READ_REGISTERS, BlockRead, ModbusClientConnection, PollExecutor,
+                          PollPlanner, partition_spans)
+from modbus_server import ModbusServer, RegisterImage
+from register_decoder import DecodePlan
+
+TAGS = [
+    ('input_registers', 'Бункер 1', 'BOOL', 30),
+    ('input_registers', 'Бункер 1', 'BOOL', 30),
+    ('input_registers', 'Бункер 1', 'REAL', 32),
+    ('input_registers', 'Бункер 1', 'REAL', 40),
+    ('input_registers', 'Бункер 2', 'REAL', 90),
+    ('input_registers', 'Модуль DI1', 'WORD', 300),
+    ('holding_registers', 'Уставки ЧРП', 'REAL', 30),
+    ('holding_registers', 'Уставки ЧРП', 'REAL', 32),
+]
+
+
+def _brute_force_cost(spans, request_cost, max_count):
+    """Минимальная стоимость перебором всех разбиений на последовательные блоки"""
+    best = float('inf')
+    for cuts in itertools.product((False, True), repeat=len(spans) - 1):
+        cost, start = 0, spans[0][0]
+        for i, cut in enumerate(cuts + (True,)):
+            if cut:
+                count = spans[i][1] - start
+                if count > max_count:
+                    break
+                cost += request_cost + count
+                if i + 1 < len(spans):
+                    start = spans[i + 1][0]
+        else:
+            best = min(best, cost)
+    return best
+
+
+def test_partition_is_optimal():
+    rng = np.random.default_rng(3)
+    for _ in range(50):
+        starts = np.cumsum(rng.integers(1, 40, size=9))
+        spans = [(int(s), int(s) + int(w)) for s, w in zip(starts, rng.integers(1, 3, size=9))]
+        spans = [span for i, span in enumerate(spans) if i == 0 or span[0] >= spans[i - 1][1]]
+        blocks = partition_spans(spans, request_cost=16, max_count=60)
+        assert sum(16 + count for _, count in blocks) == _brute_force_cost(spans, 16, 60)
+        assert all(count <= 60 for _, count in blocks)
+
+
+def test_overlong_span_is_rejected():
+    with pytest.raises(ValueError):
+        partition_spans([(0, 200)])
+    assert partition_spans([(0, MAX_READ_REGISTERS)]) == [(0, MAX_READ_REGISTERS)]
+
+
+def test_blocks_respect_limit_and_values():
+    tags = [('input_registers', 'Все', 'REAL', address) for address in range(0, 300, 2)]
+    reads = PollPlanner(tags, request_cost=1000).plan()
+    assert [read.count for read in reads] == [124, 124, 52]
+    assert all(read.count <= MAX_READ_REGISTERS and read.count % 2 == 0 for read in reads)
+
+
+def test_gaps_merged_only_when_cheaper():
+    reads = PollPlanner(TAGS, request_cost=16).plan()
+    assert [(read.function_code, read.address, read.count) for read in reads] == [
+        (4, 30, 12), (4, 90, 2), (4, 300, 1), (3, 30, 4)]
+    merged = PollPlanner(TAGS, request_cost=100).plan()
+    assert [(read.address, read.count) for read in merged if read.function_code == 4] == [(30, 62), (300, 1)]
+
+
+def test_rates_per_section():
+    planner = PollPlanner(TAGS, rates={'Модуль DI*': 0.2, 'Бункер 2': 10})
+    by_interval = {}
+    for read in planner.plan():
+        by_interval.setdefault(read.interval, []).append((read.address, read.sections))
+    assert by_interval == {
+        0.2: [(300, ['Модуль DI1'])],
+        1.0: [(30, ['Бункер 1'])],
+        5.0: [(30, ['Уставки ЧРП'])],
+        10: [(90, ['Бункер 2'])],
+    }
+
+
+def test_executor_polls_server_images():
+    input_tags = [('rWeight1', 'REAL', 32, None), ('rLevel1', 'REAL', 40, None),
+                  ('rWeight2', 'REAL', 90, None), ('wDI1', 'WORD', 300, None)]
+    holding_tags = [('rSpeed', 'REAL', 30, None)]
+    server = ModbusServer(RegisterImage(holding_tags), RegisterImage(input_tags))
+    server.input.set_values({'rWeight1': 1.5, 'rLevel1': -2.0, 'rWeight2': 7.25, 'wDI1': 0xBEEF})
+    server.holding.set_values({'rSpeed': 42.0})
+
+    tags = [('input_registers', 'Бункер', t[1], t[2]) for t in input_tags]
+    tags += [('holding_registers', 'Уставки', t[1], t[2]) for t in holding_tags]
+    reads = PollPlanner(tags, default_intervals={'input_registers': 0.01, 'holding_registers': 0.02}).plan()
+    updates = []
+
+    async def scenario():
+        await server.start('127.0.0.1', 0)
+        executor = PollExecutor(reads, '127.0.0.1', server.port, connections=2)
+        executor.on_update(lambda register_type, image, done: updates.append((register_type, len(done))))
+        try:
+            await executor.run(cycles=3)
+        finally:
+            await server.close()
+        return executor
+
+    executor = asyncio.run(scenario())
+    assert executor.errors == 0 and executor.cycles == 6
+    assert len(executor.latencies) == 6 and executor.latencies.maxlen == LATENCY_WINDOW
+    assert DecodePlan(input_tags).decode(executor.images['input_registers']) == {
+        'rWeight1': 1.5, 'rLevel1': -2.0, 'rWeight2': 7.25, 'wDI1': 0xBEEF}
+    assert DecodePlan(holding_tags).decode(executor.images['holding_registers']) == {'rSpeed': 42.0}
+    assert updates.count(('input_registers', 3)) == 3 and updates.count(('holding_registers', 1)) == 3
+
+
+def test_truncated_response_is_rejected():
+    connection = ModbusClientConnection('127.0.0.1', 0)
+    read = BlockRead('input_registers', 30, 4, 1.0, ['Бункер'])
+
+    async def reply(pdu):
+        return bytes([4, 8, 0, 1, 0, 2])  # Счётчик 8 байт, данных 4
+
+    connection.request = reply
+    with pytest.raises(ValueError):
+        asyncio.run(connection.read(read))
+
+
+def main():
+    print("=" * 80)
+    print("Тест планировщика блочного опроса")
+    print("=" * 80)
+
+    failed = 0
+    for test in (test_partition_is_optimal, test_overlong_span_is_rejected, test_blocks_respect_limit_and_values,
+                 test_gaps_merged_only_when_cheaper, test_rates_per_section, test_executor_polls_server_images,
+                 test_truncated_response_is_rejected):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 80)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
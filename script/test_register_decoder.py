@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тестовый скрипт для проверки декодера образов регистров
+"""
+
+import struct
+import sys
+import tempfile
+from pathlib import Path
+
+# Добавить путь к модулю
+sys.path.insert(0, str(Path(__file__).parent))
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from register_decoder import DecodePlan, IMAGE_WORDS
+from migrate_from_fc import DatabaseMigrator, FC_ModbusParser, SCHEMA_PATH
+
+TAGS = [
+    ('xRun', 'BOOL', 0, 0),
+    ('xFault', 'BOOL', 0, 15),
+    ('rWeight', 'REAL', 10, None),
+    ('tDelay', 'TIME', 12, None),
+    ('iOffset', 'INT', 20, None),
+    ('uState', 'UINT', 21, None),
+    ('wColor', 'WORD', 22, None),
+    ('diCount', 'DINT', 23, None),
+]
+
+
+def _write_pair(frame, address: int, raw: bytes):
+    """Запись 32-битного значения как FC_ModbusWriteReal/Time: N <- wTag[1], N+1 <- wTag[0]"""
+    low, high = struct.unpack('<HH', raw)  # wTag[0], wTag[1]
+    frame[address] = high
+    frame[address + 1] = low
+
+
+def _sample_frame():
+    frame = np.zeros(IMAGE_WORDS, dtype=np.uint16)
+    frame[0] = 0x8001
+    _write_pair(frame, 10, struct.pack('<f', 12.5))
+    _write_pair(frame, 12, struct.pack('<I', 90_000))
+    frame[20] = struct.unpack('<H', struct.pack('<h', -300))[0]
+    frame[21] = 4
+    frame[22] = 0xFFFF
+    frame[23] = 0xFFFE
+    return frame
+
+
+def test_decode_matches_plc_functions():
+    plan = DecodePlan(TAGS)
+    assert plan.decode(_sample_frame()) == {
+        'xRun': True, 'xFault': True, 'rWeight': 12.5, 'tDelay': 90_000,
+        'iOffset': -300, 'uState': 4, 'wColor': 0xFFFF, 'diCount': 0xFFFE,
+    }
+
+
+def test_batch_equals_single_frames():
+    plan = DecodePlan(TAGS)
+    frames = np.random.default_rng(1).integers(0, 65536, size=(64, IMAGE_WORDS), dtype=np.uint16)
+    batch = plan.decode_batch(frames)
+    assert batch.shape == (64, len(TAGS))
+    for i in (0, 17, 63):
+        np.testing.assert_array_equal(batch[i], plan.decode_batch(frames[i])[0])
+
+
+def test_plan_rejects_out_of_image_address():
+    with pytest.raises(ValueError):
+        DecodePlan([('rLast', 'REAL', IMAGE_WORDS - 1, None)])
+
+
+def test_plan_from_database():
+    source = """// === INPUT РЕГИСТРЫ (PLC → SCADA) ===
+
+// Бункер 1 (0-59)
+FC_ModbusWriteBool(pRegisters := ADR(awModbusInputRegisters), iRegisterIndex := 0, iBitIndex := 15, xValue := xFault);
+FC_ModbusWriteReal(pRegisters := ADR(awModbusInputRegisters), iRegisterIndex := 10, rValue := rWeight);
+
+END_FUNCTION_BLOCK
+"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        st_path = tmp / 'FB_ModbusToSCADA.st'
+        st_path.write_text(source, encoding='utf-8')
+        migrator = DatabaseMigrator(tmp / 'test.db', SCHEMA_PATH)
+        migrator.open_database()
+        migrator.sync(FC_ModbusParser(st_path))
+        migrator.close()
+
+        plan = DecodePlan.from_database(tmp / 'test.db', 'input_registers')
+        assert plan.names == ['xFault', 'rWeight']
+        assert plan.decode(_sample_frame()) == {'xFault': True, 'rWeight': 12.5}
+
+
+def main():
+    print("=" * 80)
+    print("Тест декодера образов регистров")
+    print("=" * 80)
+
+    failed = 0
+    for test in (test_decode_matches_plc_functions, test_batch_equals_single_frames,
+                 test_plan_rejects_out_of_image_address, test_plan_from_database):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 80)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
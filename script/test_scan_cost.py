@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тестовый скрипт для проверки статической оценки времени цикла (scan_cost)
+"""
+
+import sys
+from collections import Counter
+from pathlib import Path
+
+# Добавить путь к модулю
+sys.path.insert(0, str(Path(__file__).parent))
+
+import pytest
+
+from scan_cost import ScanCostAnalyzer, load_costs
+from st_parser import parse_text
+from st_runtime import CompileError
+
+SNIPPET = """
+VAR_GLOBAL CONSTANT
+    N : INT := 4;
+END_VAR
+
+FUNCTION FC_Add : INT
+VAR_INPUT
+    a, b : INT;
+END_VAR
+FC_Add := a + b;
+END_FUNCTION
+
+FUNCTION_BLOCK FB_Leaf
+VAR_INPUT
+    x : INT;
+END_VAR
+VAR
+    y : INT;
+END_VAR
+IF x > 0 THEN
+    y := FC_Add(a := x, b := 1);
+ELSE
+    y := 0;
+END_IF
+END_FUNCTION_BLOCK
+
+TYPE ST_Box :
+STRUCT
+    aTimers : ARRAY [1..2] OF TON;
+    fbLeaf : FB_Leaf;
+END_STRUCT
+END_TYPE
+
+PROGRAM P
+VAR
+    box : ST_Box;
+    i, nCount : INT;
+END_VAR
+FOR i := 1 TO N DO
+    box.fbLeaf(x := i);
+END_FOR
+box.aTimers[1](IN := TRUE, PT := T#1S);
+FOR i := 0 TO nCount DO
+    nCount := nCount;
+END_FOR
+fbMissing();
+END_PROGRAM
+"""
+
+# Единичные стоимости для расчёта вручную
+COSTS = {'assign': 1, 'operator': 1, 'divide': 1, 'power': 1, 'index': 1, 'deref': 1, 'branch': 1,
+         'loop_iteration': 1, 'call': 10, 'fb_call': 20, 'argument': 1, 'builtin': 1, 'loop_bound': 3, 'ton': 100}
+
+
+def _analyzer(costs=COSTS):
+    return ScanCostAnalyzer([('snippet', parse_text(SNIPPET))], {key.lower(): value for key, value in costs.items()})
+
+
+def test_worst_case_and_call_paths():
+    analyzer = _analyzer()
+    assert analyzer.pou('FC_Add').total == 2
+    # Худшая ветка IF: условие (2) + аргументы (2) + вызов (10) + FC_Add (2) + присваивание (1)
+    assert analyzer.pou('FB_Leaf').total == 17
+    program = analyzer.pou('P')
+    # FOR 1..N: 4 × (аргумент + fb_call + итерация + FB_Leaf); TON: аргументы + индекс + 100;
+    # FOR без границы: 1 + 3 × 2; неразрешённый вызов: 10
+    assert program.total == 1 + 4 * (1 + 20 + 1 + 17) + 103 + 7 + 10
+    assert program.cost.calls == Counter({('FB_Leaf', 'box.fbLeaf'): 4, ('TON', 'box.aTimers[]'): 1})
+    assert analyzer.unbounded == [('p', 43)]
+    assert list(analyzer.unresolved) == [('P', 46, 'fbMissing')]
+
+    paths = analyzer.call_paths('P')
+    assert paths[0] == (('P', 'box.aTimers[]: TON'), 1, 100)
+    assert (('P', 'box.fbLeaf: FB_Leaf', 'FC_Add'), 4, 8) in paths
+
+    pous, lines = analyzer.hot_spots('P')
+    assert dict((name, count) for name, count, _ in pous) == {'P': 1, 'FB_Leaf': 4, 'FC_Add': 4, 'TON': 1}
+    assert sum(cost for _, _, cost in pous) == program.total
+    assert sum(cost for _, _, cost in lines) == program.total - 100  # TON - без строк исходника
+
+
+def test_measured_pou_cost_overrides_body():
+    analyzer = _analyzer(dict(COSTS, FB_Leaf=5))
+    assert analyzer.pou('FB_Leaf').measured
+    assert analyzer.pou('P').total == 1 + 4 * (1 + 20 + 1 + 5) + 103 + 7 + 10
+    assert 'fc_add' not in analyzer.results
+
+
+def test_recursion_is_reported():
+    analyzer = ScanCostAnalyzer([('snippet', parse_text("FUNCTION FC_R : INT\nFC_R := FC_R();\nEND_FUNCTION"))])
+    with pytest.raises(CompileError, match='FC_R → FC_R'):
+        analyzer.pou('FC_R')
+
+
+def test_project_modbus_calls():
+    analyzer = ScanCostAnalyzer.load(costs=load_costs())
+    modbus = analyzer.pou('FB_ModbusToSCADA')
+    calls = Counter()
+    for (name, _), count in modbus.cost.calls.items():
+        calls[name] += count
+    assert calls['FC_ModbusWriteBool'] == 353 and calls['FC_ModbusWriteReal'] == 97
+    assert modbus.total == pytest.approx(modbus.cost.own + sum(
+        count * analyzer.pou(name).total for (name, _), count in modbus.cost.calls.items()))
+
+    main = analyzer.pou('MAIN')
+    assert main.total > modbus.total and analyzer.executions('MAIN')['FB_ModbusToSCADA'] == 1
+
+
+def main():
+    print("=" * 80)
+    print("Тест оценки времени цикла")
+    print("=" * 80)
+
+    failed = 0
+    for test in (test_worst_case_and_call_paths, test_measured_pou_cost_overrides_body, test_recursion_is_reported,
+                 test_project_modbus_calls):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 80)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тестовый скрипт для проверки кодировщика уставок
+"""
+
+import sys
+from pathlib import Path
+
+# Добавить путь к модулю
+sys.path.insert(0, str(Path(__file__).parent))
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from register_decoder import DecodePlan, IMAGE_WORDS
+from setpoint_encoder import SetpointEncoder, WriteRequest, MAX_WRITE_REGISTERS
+
+TAGS = [
+    ('cmdStart', 'BOOL', 0, 0),
+    ('cmdStop', 'BOOL', 0, 1),
+    ('cmdReset', 'BOOL', 0, 3),
+    ('POINTS.LL_Value', 'REAL', 10, None),
+    ('POINTS.L_Value', 'REAL', 12, None),
+    ('POINTS.H_Value', 'REAL', 14, None),
+    ('POINTS.HH_Value', 'REAL', 16, None),
+    ('TIME_ACTIVE', 'TIME', 20, None),
+    ('iOffset', 'INT', 30, None),
+]
+
+
+def _apply(requests, image):
+    """Применить запросы к образу так, как это сделал бы ПЛК"""
+    image = image.copy()
+    for request in requests:
+        if request.function_code == 22:
+            image[request.address] = (int(image[request.address]) & request.and_mask) | request.or_mask
+        else:
+            image[request.address:request.address + len(request.words)] = request.words
+    return image
+
+
+def test_round_trip_through_decoder():
+    values = {'POINTS.LL_Value': 3.75, 'POINTS.HH_Value': -20.5, 'TIME_ACTIVE': 15000,
+              'iOffset': -7, 'cmdStop': True}
+    image = np.zeros(IMAGE_WORDS, dtype=np.uint16)
+    image[0] = 0b1001  # cmdStart и cmdReset уже установлены
+    written = _apply(SetpointEncoder(TAGS).encode(values), image)
+
+    decoded = DecodePlan(TAGS).decode(written)
+    assert {name: decoded[name] for name in values} == values
+    assert decoded['cmdStart'] and decoded['cmdReset']  # Остальные биты слова не затронуты
+
+
+def test_contiguous_values_are_coalesced():
+    encoder = SetpointEncoder(TAGS)
+    requests = encoder.encode({f'POINTS.{key}_Value': 1.0 for key in ('LL', 'L', 'H', 'HH')})
+    assert len(requests) == 1
+    assert (requests[0].function_code, requests[0].address, len(requests[0].words)) == (16, 10, 8)
+
+
+def test_bool_bits_fold_into_one_word():
+    encoder = SetpointEncoder(TAGS)
+    values = {'cmdStart': True, 'cmdStop': False, 'cmdReset': True}
+    assert encoder.encode(values) == [WriteRequest(22, 0, and_mask=0xFFF4, or_mask=0b1001)]
+
+    image = np.zeros(IMAGE_WORDS, dtype=np.uint16)
+    image[0] = 0x8002
+    assert encoder.encode(values, current=image) == [WriteRequest(6, 0, [0x8009])]
+
+
+def test_bits_over_word_setpoint_are_merged():
+    # Слово целиком и биты того же слова в одной группе уставок
+    encoder = SetpointEncoder(TAGS + [('wCommands', 'WORD', 0, None)])
+    values = {'wCommands': 0x00F0, 'cmdStart': True, 'cmdStop': False}
+    image = np.zeros(IMAGE_WORDS, dtype=np.uint16)
+    image[0] = 0x8002
+
+    requests = encoder.encode(values, current=image)
+    assert requests == [WriteRequest(6, 0, [0x00F1])]
+    assert np.array_equal(_apply(requests, image), _apply(encoder.encode(values), image))
+
+
+def test_gaps_filled_from_current_image():
+    encoder = SetpointEncoder(TAGS)
+    image = np.arange(IMAGE_WORDS, dtype=np.uint16)
+    values = {'POINTS.HH_Value': 1.0, 'TIME_ACTIVE': 1000}
+    assert len(encoder.encode(values)) == 2
+    requests = encoder.encode(values, current=image, max_gap=4)
+    assert len(requests) == 1 and requests[0].words[2:4] == [18, 19]
+    assert np.array_equal(_apply(requests, image)[18:20], image[18:20])
+
+
+def test_long_ranges_are_split():
+    tags = [(f'r{i}', 'REAL', i * 2, None) for i in range(100)]
+    requests = SetpointEncoder(tags).encode({f'r{i}': float(i) for i in range(100)})
+    assert [len(r.words) for r in requests] == [122, 78]
+    assert all(len(r.words) <= MAX_WRITE_REGISTERS for r in requests)
+
+
+def test_invalid_values_are_rejected():
+    encoder = SetpointEncoder(TAGS)
+    with pytest.raises(KeyError):
+        encoder.encode({'MISSING': 1})
+    with pytest.raises(ValueError):
+        encoder.encode({'iOffset': 40000})
+    with pytest.raises(ValueError):
+        encoder.encode({'TIME_ACTIVE': 1500.5})
+
+
+def test_image_bounds_are_checked():
+    encoder = SetpointEncoder(TAGS, image_size=16)
+    # REAL по адресу 16 выходит за образ из 16 слов
+    with pytest.raises(ValueError):
+        encoder.encode({'POINTS.HH_Value': 1.0})
+    with pytest.raises(ValueError):
+        encoder.encode({'cmdStart': True}, current=np.zeros(8, dtype=np.uint16))
+    assert encoder.encode({'POINTS.H_Value': 1.0}, current=np.zeros(16, dtype=np.uint16)) == [
+        WriteRequest(16, 14, [0x3F80, 0])]
+
+
+def test_pdu_layout():
+    request = WriteRequest(16, 10, [0x4170, 0x0000])
+    assert request.to_pdu() == bytes([16, 0, 10, 0, 2, 4, 0x41, 0x70, 0, 0])
+
+
+def main():
+    print("=" * 80)
+    print("Тест кодировщика уставок")
+    print("=" * 80)
+
+    failed = 0
+    for test in (test_round_trip_through_decoder, test_contiguous_values_are_coalesced,
+                 test_bool_bits_fold_into_one_word, test_bits_over_word_setpoint_are_merged,
+                 test_gaps_filled_from_current_image,
+                 test_long_ranges_are_split, test_invalid_values_are_rejected, test_image_bounds_are_checked,
+                 test_pdu_layout):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 80)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тестовый скрипт для проверки разбора Structured Text
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Добавить путь к модулю
+sys.path.insert(0, str(Path(__file__).parent))
+
+import pytest
+
+from st_parser import (PARALLEL_THRESHOLD, PROJECT_ROOT, ParseError, SourceTree, parse_file, parse_text, parse_time,
+                       source_files, walk)
+
+
+def test_whole_project_parses():
+    files = source_files(PROJECT_ROOT)
+    assert len(files) > 50
+    pous = {}
+    for path in files:
+        for declaration in parse_file(path):
+            if declaration[0] == 'pou':
+                pous[declaration[2]] = declaration
+    assert {'MAIN', 'FB_ModbusToSCADA', 'FB_UniversalSignal', 'FC_ModbusWriteReal'} <= set(pous)
+
+    calls = {}
+    for node in walk(pous['FB_ModbusToSCADA'][6]):
+        if node[0] == 'call' and isinstance(node[1], tuple) and node[1][0] == 'name':
+            calls[node[1][1]] = calls.get(node[1][1], 0) + 1
+    assert calls['FC_ModbusWriteBool'] == 353 and calls['FC_ModbusWriteReal'] == 97
+
+
+def test_expressions_and_literals():
+    assert parse_time('T#1H2M3S4MS') == 3_723_004 and parse_time('TIME#1.5s') == 1500
+    declarations = parse_text("""
+        FUNCTION_BLOCK FB_X
+        VAR x : INT := 16#FF; t : TIME := T#200MS; END_VAR
+        x := 1 + 2 * 3 ** 2 - -x;
+        END_FUNCTION_BLOCK
+    """)
+    _, kind, name, _, _, sections, body, _ = declarations[0]
+    assert (kind, name) == ('FUNCTION_BLOCK', 'FB_X')
+    assert sections[0][2][0][2] == ('lit', 255, 'INT') and sections[0][2][1][2] == ('lit', 200, 'TIME')
+    _, _, target, value = body[0]
+    assert target == ('name', 'x')
+    assert value == ('binary', '-', ('binary', '+', ('lit', 1, 'INT'),
+                                     ('binary', '*', ('lit', 2, 'INT'),
+                                      ('binary', '**', ('lit', 3, 'INT'), ('lit', 2, 'INT')))),
+                     ('unary', '-', ('name', 'x')))
+
+
+def test_error_reports_source_line():
+    with pytest.raises(ParseError, match=r'snippet:3'):
+        parse_text("PROGRAM P\nVAR x : INT; END_VAR\nx := (1 + ;\nEND_PROGRAM", 'snippet')
+
+
+def _write_tree(root: Path, count: int):
+    for i in range(count):
+        directory = root / ('DataTypes' if i % 2 else 'POUs')
+        directory.mkdir(exist_ok=True)
+        (directory / f'FC_{i:02}.st').write_text(
+            f"FUNCTION FC_{i:02} : INT\nFC_{i:02} := {i} + 1;\nEND_FUNCTION\n", encoding='utf-8')
+
+
+def test_cache_reparses_only_changed_files():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _write_tree(root, 4)
+        cache_path = root / 'st_ast_cache.marshal'
+
+        first = SourceTree.load(root, cache_path, workers=1)
+        assert (first.files_total, first.files_parsed) == (4, 4)
+        warm = SourceTree.load(root, cache_path)
+        assert warm.files_parsed == 0 and warm.files == first.files
+
+        # Изменился только mtime - сверка SHA-256 без разбора
+        path = root / 'POUs' / 'FC_00.st'
+        os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 10**9))
+        assert SourceTree.load(root, cache_path).files_parsed == 0
+
+        path.write_text("FUNCTION FC_00 : INT\nFC_00 := (1 + ;\nEND_FUNCTION\n", encoding='utf-8')
+        (root / 'DataTypes' / 'FC_01.st').unlink()
+        tree = SourceTree.load(root, cache_path)
+        assert (tree.files_total, tree.files_parsed, len(tree.files)) == (3, 1, 2)
+        assert len(tree.errors) == 1 and 'FC_00.st:2' in tree.errors[0]
+        assert SourceTree.load(root, cache_path).errors == tree.errors  # Ошибка тоже кэшируется
+
+        cache_path.write_bytes(b'not marshal')
+        assert SourceTree.load(root, cache_path).files_parsed == 3
+
+
+def test_parallel_refresh_matches_serial():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _write_tree(root, PARALLEL_THRESHOLD + 2)
+        pooled = SourceTree.load(root, root / 'cache.marshal', workers=2)
+        serial = SourceTree.load(root, None, workers=1)
+        assert pooled.files_parsed == serial.files_parsed == PARALLEL_THRESHOLD + 2
+        assert pooled.files == serial.files
+
+    tree = SourceTree.load(PROJECT_ROOT, None)
+    assert not tree.errors and tree.files == [(str(path), parse_file(path)) for path in source_files()]
+
+
+def main():
+    print("=" * 80)
+    print("Тест разбора Structured Text")
+    print("=" * 80)
+
+    failed = 0
+    for test in (test_whole_project_parses, test_expressions_and_literals, test_error_reports_source_line,
+                 test_cache_reparses_only_changed_files, test_parallel_refresh_matches_serial):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 80)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тестовый скрипт для проверки исполнения Structured Text (st_runtime)
+"""
+
+import struct
+import sys
+from pathlib import Path
+
+# Добавить путь к модулю
+sys.path.insert(0, str(Path(__file__).parent))
+
+import pytest
+
+from st_parser import parse_text
+from st_runtime import CompileError, ItemRef, Project
+
+SNIPPET = """
+TYPE ST_Point :
+STRUCT
+    x : INT;
+    y : INT := 5;
+END_STRUCT
+END_TYPE
+
+TYPE E_Mode : (OFF := 0, SLOW := 10, FAST); END_TYPE
+
+FUNCTION FC_Divide : INT
+VAR_INPUT
+    a : INT;
+    b : INT;
+END_VAR
+VAR_OUTPUT
+    remainder : INT;
+END_VAR
+FC_Divide := a / b;
+remainder := a MOD b;
+END_FUNCTION
+
+FUNCTION_BLOCK FB_Test
+VAR_INPUT
+    eMode : E_Mode;
+END_VAR
+VAR_OUTPUT
+    nSum, nCase, nWrapped, nQuotient, nRemainder : INT;
+    byBits : BYTE;
+    rAverage : REAL;
+END_VAR
+VAR
+    aValues : ARRAY [1..5] OF INT := [1, 2, 3, 2(10)];
+    astPoints : ARRAY [0..2] OF ST_Point;
+    stCopy : ST_Point;
+    i : INT;
+END_VAR
+nSum := 0;
+FOR i := 1 TO 5 DO
+    nSum := nSum + aValues[i];
+END_FOR
+FOR i := 2 TO 0 BY -1 DO
+    astPoints[i].x := i * 3;
+END_FOR
+stCopy := astPoints[2];
+astPoints[2].x := 0;
+CASE eMode OF
+    E_Mode.OFF: nCase := -1;
+    SLOW, 11..15: nCase := stCopy.x + stCopy.y;
+ELSE
+    nCase := 99;
+END_CASE
+nWrapped := 32767;
+nWrapped := nWrapped + 1;
+nQuotient := FC_Divide(a := -7, b := 2, remainder => nRemainder);
+byBits := 0;
+byBits.3 := TRUE;
+byBits := byBits OR 16#81;
+rAverage := INT_TO_REAL(nSum) / 5;
+i := 0;
+WHILE i < 10 DO
+    i := i + 1;
+    IF i = 4 THEN
+        EXIT;
+    END_IF
+END_WHILE
+REPEAT
+    i := i + 10;
+UNTIL i > 30
+END_REPEAT
+END_FUNCTION_BLOCK
+"""
+
+
+@pytest.fixture(scope='module')
+def project():
+    return Project.load()
+
+
+def test_snippet_semantics():
+    runtime = Project([('snippet', parse_text(SNIPPET))]).runtime(['FB_Test'])
+    fb = runtime.new('FB_Test')
+    fb.eMode = 10
+    fb()
+    assert (fb.nSum, fb.nCase, fb.nWrapped) == (26, 11, -32768)
+    assert (fb.nQuotient, fb.nRemainder) == (-3, -1)  # Деление с отбросом дробной части, MOD со знаком делимого
+    assert fb.byBits == 0x89 and fb.rAverage == pytest.approx(5.2) and fb.i == 34
+    assert (fb.stCopy.x, fb.astPoints[2].x) == (6, 0)  # Присваивание структуры - копия
+    fb.eMode = 11  # FAST
+    fb()
+    assert fb.nCase == 11
+    fb.eMode = 20
+    fb()
+    assert fb.nCase == 99
+
+
+def test_unknown_names_are_compile_errors(project):
+    # FC_ModbusReadDint присваивает результат FC_ModbusReadInt - ошибка в исходнике
+    with pytest.raises(CompileError, match='FC_ModbusReadInt'):
+        project.compile(['FC_ModbusReadDint'])
+
+
+def test_range_diagnostic_hysteresis(project):
+    runtime = project.runtime(['FB_RangeDiagnostic'])
+    fb = runtime.new('FB_RangeDiagnostic')
+    codes = []
+    for value in (50.0, 81.0, 79.5, 78.9, 95.0, 89.5, 19.5, 20.5, 21.1, 9.0):
+        fb.irValue = value
+        fb()
+        codes.append(fb.quAlarmCode)
+    # Normal=0, L=1, H=2, LL=3, HH=4; возврат в норму только за гистерезисом 1.0
+    assert codes == [0, 2, 2, 0, 4, 2, 1, 1, 0, 3]
+    assert fb.qxCriticalActive and fb.qrDistanceToNearestSetpoint == pytest.approx(1.0)
+
+
+def test_universal_signal_rattling_and_feedback_timeout(project):
+    runtime = project.runtime(['FB_UniversalSignal'])
+    fb = runtime.new('FB_UniversalSignal')
+    fb.xEnableRattlingFilter = True
+    fb.xEnableFeedback = fb.xEnableFeedbackTimer = True
+    fb.itFeedbackTimeout = 500
+
+    # Дребезг: 6 переключений за 60 мс
+    for i in range(6):
+        fb.ixSignal = i % 2 == 0
+        fb()
+        runtime.advance(10)
+    for _ in range(25):
+        fb()
+        runtime.advance(10)
+    assert fb.qxRattlingDetected
+
+    # Стабильный сигнал проходит фильтр через tStabilityTime, обратной связи нет - таймаут
+    fb.ixSignal = True
+    rising = []
+    for _ in range(80):
+        fb()
+        rising.append(fb.qxRisingEdge)
+        runtime.advance(10)
+    assert rising.count(True) == 1 and rising.index(True) == 10
+    assert fb.qxFeedbackTimeout and not fb.qxFeedbackReceived
+
+
+def test_scada_communication_matches_emulator_model(project):
+    from heartbeat_monitor import ScadaCommunicationModel
+    from modbus_server import ModbusServer, RegisterImage
+
+    runtime = project.runtime(['FB_ScadaCommunication'])
+    fb = runtime.new('FB_ScadaCommunication')
+    fb.itTimeout = 300
+    server = ModbusServer(RegisterImage([('SCADA_HEARTBEAT', 'BOOL', 0, 4)]),
+                          RegisterImage([('changed', 'BOOL', 0, 6), ('ok', 'BOOL', 0, 4), ('lost', 'BOOL', 0, 5)]))
+    model = ScadaCommunicationModel(timeout=0.3)
+
+    heartbeat = [(i // 10) % 2 == 1 for i in range(100)] + [True] * 50 + [(i // 5) % 2 == 1 for i in range(50)]
+    for i, signal in enumerate(heartbeat):
+        if i == 160:
+            fb.xReset = True
+            model.reset()
+        fb.ixHeartbeatSignal = signal
+        server.holding.set_values({'SCADA_HEARTBEAT': signal})
+        fb()
+        model.step(server, 0.01)
+        fb.xReset = False
+        runtime.advance(10)
+        state = server.input.values()
+        assert (fb.qxSignalChanged, fb.qxCommunicationOk, fb.qxCommunicationLost) == \
+            (state['changed'], state['ok'], state['lost']), i
+    assert fb.qnChangeCount == 7  # Изменения после сброса на 160-м цикле
+
+
+def test_pre_start_alarm_sequence(project):
+    runtime = project.runtime(['FB_PreStartAlarm'])
+    fb = runtime.new('FB_PreStartAlarm')
+    fb.itFirstSignal = fb.itSecondSignal = 1000
+    fb.itPauseAfterFirst = fb.itPauseAfterSecond = 500
+    fb.ixStart = True
+    power, complete = [], []
+    for _ in range(36):
+        fb()
+        power.append(fb.qxAlarmPower)
+        complete.append(fb.qxComplete)
+        fb.ixStart = False
+        runtime.advance(100)
+    # Два сигнала по 1 с (+ цикл на переход), паузы, импульс завершения
+    assert power == [False] + [True] * 11 + [False] * 6 + [True] * 11 + [False] * 7
+    assert complete.count(True) == 1 and complete.index(True) == 35
+    fb.ixStop = True
+    fb()
+    assert not fb.qxActive and fb.qnSecondsRemaining == 0
+
+
+def test_modbus_real_through_pointer_and_union(project):
+    runtime = project.runtime(['FC_ModbusWriteReal', 'FC_ModbusReadReal', 'FB_ModbusToSCADA'])
+    words = [0] * 64
+    write = runtime.function('FC_ModbusWriteReal')
+    assert write(pRegisters=ItemRef(words, 0, 2), iRegisterIndex=10, rValue=12.5) is True
+    high, low = struct.unpack('>HH', struct.pack('>f', 12.5))
+    assert words[10:12] == [high, low]  # Регистр N - старшее слово
+    assert runtime.function('FC_ModbusReadReal')(pRegisters=ItemRef(words, 0, 2), iRegisterIndex=10) == (True, 12.5)
+
+    fb = runtime.bind(runtime.new('FB_ModbusToSCADA'))
+    fb.stBunker[1].rWeight = -3.25
+    fb()
+    registers = runtime.G.awModbusInputRegisters
+    assert struct.unpack('>f', struct.pack('>HH', registers[32], registers[33]))[0] == -3.25
+
+
+def test_proportion_pid_matches_vectorised_port(project):
+    np = pytest.importorskip('numpy')
+    from pid_sweep import ProportionPID
+
+    runtime = project.runtime(['FB_ProportionPID'])
+    fb = runtime.new('FB_ProportionPID')
+    fb.xEnable = True
+    fb.rDeltaTime = 0.5
+    targets, base = (0.5, 0.3, 0.2), (30.0, 30.0, 30.0)
+    for i, (target, frequency) in enumerate(zip(targets, base), 1):
+        setattr(fb, f'rProportionTarget_{i}', target)
+        setattr(fb, f'rFrequencyBase_{i}', frequency)
+    port = ProportionPID(1, delta_time=0.5)
+
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        actual = rng.dirichlet((5, 3, 2))
+        for i, value in enumerate(actual, 1):
+            setattr(fb, f'rProportionActual_{i}', float(value))
+        fb()
+        expected = port(np.array(targets), actual.reshape(1, 3), np.array(base))[0]
+        assert [fb.qrFrequency_1, fb.qrFrequency_2, fb.qrFrequency_3] == pytest.approx(expected, abs=1e-3)
+
+
+def main():
+    print("=" * 80)
+    print("Тест исполнения Structured Text")
+    print("=" * 80)
+
+    project_ = Project.load()
+    failed = 0
+    for test in (test_snippet_semantics, test_unknown_names_are_compile_errors, test_range_diagnostic_hysteresis,
+                 test_universal_signal_rattling_and_feedback_timeout, test_scada_communication_matches_emulator_model,
+                 test_pre_start_alarm_sequence, test_modbus_real_through_pointer_and_union,
+                 test_proportion_pid_matches_vectorised_port):
+        try:
+            test() if test is test_snippet_semantics else test(project_)
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 80)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тестовый скрипт для проверки таблицы символов и проверки типов FC_Modbus*
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Добавить путь к модулю
+sys.path.insert(0, str(Path(__file__).parent))
+
+from symbol_table import SymbolTable
+from migrate_from_fc import FC_ModbusParser, FC_MODBUS_PATH
+
+FILES = {
+    'DataTypes/ST_Motor.st': """TYPE ST_Motor :
+STRUCT
+    VFD : ST_VFD; // Частотник
+    qxStart, // Пуск
+    qxStop : BOOL; // Стоп
+END_STRUCT
+END_TYPE
+""",
+    'DataTypes/ST_Feeder.st': """TYPE ST_Feeder EXTENDS ST_Motor :
+STRUCT
+    (* Температура
+       подшипника *)
+    rTempBearing : ARRAY [1..2] OF REAL;
+END_STRUCT
+END_TYPE
+""",
+    'DataTypes/ST_VFD.st': """TYPE ST_VFD :
+STRUCT
+    wMotorCurrent : U_RealToWord;
+    wStatus : WORD;
+    eMode : E_Mode;
+END_STRUCT
+END_TYPE
+""",
+    'DataTypes/U_RealToWord.st': """TYPE U_RealToWord :
+UNION
+    wTag: ARRAY [0..1] OF WORD;
+    rTag: REAL;
+END_UNION
+END_TYPE
+""",
+    'DataTypes/E_Mode.st': """TYPE E_Mode :
+(
+    Auto := 0,
+    Manual := 1
+);
+END_TYPE
+""",
+    'POUs/GLOBAL.st': """VAR_GLOBAL RETAIN
+    FREQUENCY_MAX : REAL := 50; // Максимальная частота
+    HEARTBEAT_TIMEOUT : TIME := T#5S; // Таймаут связи
+    awRegisters : ARRAY [0..511] OF WORD;
+END_VAR
+""",
+    'POUs/FB_Map.st': """FUNCTION_BLOCK FB_Map
+VAR_INPUT
+    stFeeder : REFERENCE TO ARRAY [1..2] OF ST_Feeder;
+END_VAR
+END_FUNCTION_BLOCK
+""",
+}
+
+
+class _Register:
+    def __init__(self, data_type, variable_name, seconds_to_time=False):
+        self.data_type = data_type
+        self.variable_name = variable_name
+        self.seconds_to_time = seconds_to_time
+
+
+def _write_tree(root: Path):
+    for rel, text in FILES.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding='utf-8')
+
+
+def test_resolve_paths():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _write_tree(root)
+        table = SymbolTable.load(root, cache_path=None)
+
+        assert table.resolve('stFeeder[1].rTempBearing[2]', 'FB_Map') == 'REAL'
+        assert table.resolve('stFeeder[2].qxStop', 'FB_Map') == 'BOOL'  # Поле базовой структуры
+        assert table.resolve('stFeeder[1].VFD.wMotorCurrent', 'FB_Map') == 'U_RealToWord'
+        assert table.resolve('stFeeder[1].VFD.wMotorCurrent.rTag', 'FB_Map') == 'REAL'
+        assert table.resolve('stFeeder[1].VFD.wStatus.3', 'FB_Map') == 'BOOL'
+        assert table.resolve('FREQUENCY_MAX', 'FB_Map') == 'REAL'
+        assert table.resolve('stFeeder[1].VFD.xMissing', 'FB_Map') is None
+        assert table.resolve('NOT stFeeder[1].qxStop', 'FB_Map') is None
+
+
+def test_check_register_levels():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _write_tree(root)
+        table = SymbolTable.load(root, cache_path=None)
+        registers = [
+            _Register('REAL', 'stFeeder[1].VFD.wMotorCurrent.rTag'),
+            _Register('INT', 'stFeeder[1].VFD.eMode'),
+            _Register('UINT', 'stFeeder[1].VFD.eMode'),
+            _Register('REAL', 'stFeeder[1].VFD.wStatus'),
+            _Register('REAL', 'stFeeder[1].VFD.wMotorCurrent'),
+            _Register('BOOL', 'stFeeder[1].qxStart AND stFeeder[1].qxStop'),
+            # TIME принимает REAL только как уставку в секундах (REAL_TO_TIME(... * 1000))
+            _Register('REAL', 'HEARTBEAT_TIMEOUT', seconds_to_time=True),
+            _Register('REAL', 'HEARTBEAT_TIMEOUT'),
+        ]
+        levels = [table.check_register(r.data_type, r.variable_name, 'FB_Map', r.seconds_to_time)[0]
+                  for r in registers]
+        assert levels == ['ok', 'ok', 'warning', 'error', 'error', 'unresolved', 'ok', 'error']
+
+        report = table.check_registers(registers, 'FB_Map')
+        assert report.checked == 8
+        assert (len(report.errors), len(report.warnings), len(report.unresolved)) == (3, 1, 1)
+
+
+def test_cache_reparses_only_changed_files():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _write_tree(root)
+        cache_path = root / 'st_ast_cache.marshal'
+
+        assert SymbolTable.load(root, cache_path).files_parsed == len(FILES)
+        assert SymbolTable.load(root, cache_path).files_parsed == 0
+
+        global_st = root / 'POUs' / 'GLOBAL.st'
+        global_st.write_text(FILES['POUs/GLOBAL.st'].replace('REAL := 50', 'LREAL := 50'), encoding='utf-8')
+        table = SymbolTable.load(root, cache_path)
+        assert table.files_parsed == 1
+        assert table.resolve('FREQUENCY_MAX', None) == 'LREAL'
+
+
+def test_project_map_has_no_type_errors():
+    table = SymbolTable.load(cache_path=None)
+    report = table.check_registers(FC_ModbusParser(FC_MODBUS_PATH).iter_registers())
+    assert report.checked > 600
+    assert not report.errors, report.errors[:3]
+
+
+def main():
+    print("=" * 80)
+    print("Тест таблицы символов")
+    print("=" * 80)
+
+    failed = 0
+    for test in (test_resolve_paths, test_check_register_levels,
+                 test_cache_reparses_only_changed_files, test_project_map_has_no_type_errors):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 80)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тестовый скрипт для проверки инкрементальной синхронизации DatabaseMigrator.sync()
+"""
+
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+# Добавить путь к модулю
+sys.path.insert(0, str(Path(__file__).parent))
+
+from migrate_from_fc import DatabaseMigrator, FC_ModbusParser, SCHEMA_PATH
+
+SAMPLE = """// === HOLDING РЕГИСТРЫ (SCADA → PLC) ===
+
+// Уставки ЧРП (30-59)
+FC_ModbusReadBool(pRegisters := ADR(awModbusHoldingRegisters), iRegisterIndex := 30, iBitIndex := 0, xValue => VFD_SMOOTH_SET_FREQUENCY);
+FC_ModbusReadReal(pRegisters := ADR(awModbusHoldingRegisters), iRegisterIndex := 32, rValue => VFD_FREQUENCY_MAX);
+
+// Уставки бункеров (60-89)
+FC_ModbusReadReal(pRegisters := ADR(awModbusHoldingRegisters), iRegisterIndex := 62, rValue => BUNKER_WORK_PRECENT_1);
+FC_ModbusReadReal(pRegisters := ADR(awModbusHoldingRegisters), iRegisterIndex := 64, rValue => BUNKER_WORK_PRECENT_2);
+
+END_FUNCTION_BLOCK
+"""
+
+
+def _sync(tmp: Path, source: str) -> dict:
+    st_path = tmp / 'FB_ModbusToSCADA.st'
+    st_path.write_text(source, encoding='utf-8')
+    migrator = DatabaseMigrator(tmp / 'test.db', SCHEMA_PATH)
+    migrator.open_database()
+    stats = migrator.sync(FC_ModbusParser(st_path))
+    migrator.close()
+    return stats
+
+
+def _build(tmp: Path, source: str):
+    """Пересоздать БД так же, как migrate_from_fc.py --rebuild --yes"""
+    st_path = tmp / 'FB_ModbusToSCADA.st'
+    st_path.write_text(source, encoding='utf-8')
+    parser = FC_ModbusParser(st_path)
+    blocks = list(parser.iter_blocks())
+    migrator = DatabaseMigrator(tmp / 'test.db', SCHEMA_PATH)
+    assert migrator.initialize_database(confirm=False)
+    migrator.migrate_sections(parser.sections)
+    migrator.migrate_registers([reg for block in blocks for reg in parser.build_registers(block)])
+    migrator.store_section_hashes(parser, blocks)
+    migrator.close()
+
+
+def _registers(tmp: Path) -> dict:
+    conn = sqlite3.connect(tmp / 'test.db')
+    rows = conn.execute("SELECT register_address, variable_name, description FROM registers").fetchall()
+    conn.close()
+    return {row[0]: (row[1], row[2]) for row in rows}
+
+
+def test_unchanged_map_touches_nothing():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        first = _sync(tmp, SAMPLE)
+        assert first['inserted'] == 4 and first['sections_changed'] == 2
+        second = _sync(tmp, SAMPLE)
+        assert second['sections_changed'] == 0
+        assert second['inserted'] == second['updated'] == second['deleted'] == 0
+
+
+def test_only_changed_section_is_rewritten():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        _sync(tmp, SAMPLE)
+        changed = SAMPLE.replace('BUNKER_WORK_PRECENT_2', 'BUNKER_MINIMAL_WEIGHT')
+        stats = _sync(tmp, changed)
+        assert stats['sections_changed'] == 1
+        assert stats['updated'] == 1 and stats['inserted'] == 0 and stats['deleted'] == 0
+        assert _registers(tmp)[64][0] == 'BUNKER_MINIMAL_WEIGHT'
+
+
+def test_manual_description_survives():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        _sync(tmp, SAMPLE)
+        conn = sqlite3.connect(tmp / 'test.db')
+        conn.execute("UPDATE registers SET description = 'Ручное описание' WHERE register_address = 32")
+        conn.commit()
+        conn.close()
+        # Изменить секцию, в которой находится отредактированный регистр
+        _sync(tmp, SAMPLE.replace('iBitIndex := 0', 'iBitIndex := 1'))
+        assert _registers(tmp)[32] == ('VFD_FREQUENCY_MAX', 'Ручное описание')
+
+
+def test_removed_registers_and_sections_are_deleted():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        _sync(tmp, SAMPLE)
+        head = SAMPLE.split('// Уставки бункеров')[0]
+        stats = _sync(tmp, head.replace(
+            'FC_ModbusReadReal(pRegisters := ADR(awModbusHoldingRegisters), iRegisterIndex := 32, rValue => VFD_FREQUENCY_MAX);\n', ''))
+        assert stats['sections_removed'] == 1
+        assert set(_registers(tmp)) == {30}
+
+
+def test_rebuilt_database_syncs_incrementally():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        _sync(tmp, SAMPLE)
+        _build(tmp, SAMPLE)  # Существующая БД удаляется без вопроса
+        assert _sync(tmp, SAMPLE)['sections_changed'] == 0
+        stats = _sync(tmp, SAMPLE.split('// Уставки бункеров')[0])
+        assert stats['sections_changed'] == 0 and stats['sections_removed'] == 1
+        assert set(_registers(tmp)) == {30, 32}
+
+
+def test_only_manual_sections_survive_removal():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        _sync(tmp, SAMPLE)
+        conn = sqlite3.connect(tmp / 'test.db')
+        conn.executemany("""
+            INSERT INTO sections (register_type_id, name, start_register, end_register, is_manual)
+            VALUES (1, ?, 100, 109, ?)
+        """, [('Ручная', 1), ('Без хэша', 0)])
+        conn.commit()
+        conn.close()
+        stats = _sync(tmp, SAMPLE)
+        assert stats['sections_removed'] == 1
+        conn = sqlite3.connect(tmp / 'test.db')
+        names = {row[0] for row in conn.execute("SELECT name FROM sections")}
+        conn.close()
+        assert 'Ручная' in names and 'Без хэша' not in names
+
+
+def test_bulk_load_restores_journal_settings():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        st_path = tmp / 'FB_ModbusToSCADA.st'
+        st_path.write_text(SAMPLE, encoding='utf-8')
+        parser = FC_ModbusParser(st_path)
+        registers = parser.parse()
+        migrator = DatabaseMigrator(tmp / 'test.db', SCHEMA_PATH)
+        migrator.initialize_database(confirm=False)
+        migrator.conn.execute("PRAGMA journal_mode = WAL")
+        migrator.conn.execute("PRAGMA synchronous = NORMAL")
+        migrator.migrate_sections(parser.sections)
+        assert migrator.migrate_registers(registers).inserted == 4
+        assert migrator.conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        assert migrator.conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+        migrator.close()
+
+
+def main():
+    print("=" * 80)
+    print("Тест инкрементальной синхронизации БД")
+    print("=" * 80)
+
+    failed = 0
+    for test in (test_unchanged_map_touches_nothing, test_only_changed_section_is_rewritten,
+                 test_manual_description_survives, test_removed_registers_and_sections_are_deleted,
+                 test_rebuilt_database_syncs_incrementally, test_only_manual_sections_survive_removal,
+                 test_bulk_load_restores_journal_settings):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print("=" * 80)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())